@@ -28,9 +28,18 @@ def create_app():
         print("Please copy .env.example to .env and configure DASHSCOPE_API_KEY")
 
     # 初始化数据库
-    from app.database import init_db
+    from app.database import db, init_db
     init_db(app)
 
+    # 初始化组提交写线程、进度推送中心，预加载替代关系图
+    from app.utils.write_batcher import write_batcher
+    from app.services.progress_hub import progress_hub
+    from app.services.substitution_graph import substitution_graph
+    with app.app_context():
+        write_batcher.init_app(app, db.engine)
+        progress_hub.init_app(app, db.engine)
+        substitution_graph.init_app(app)
+
     # 配置 CORS - 允许所有来源（开发环境）
     CORS(app, resources={r"/*": {"origins": "*"}})
 
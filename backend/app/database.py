@@ -8,13 +8,28 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 
 def init_db(app):
-    """初始化数据库"""
+    """初始化数据库（启动时仅校验 schema 版本，表结构由迁移维护）"""
     db.init_app(app)
 
     with app.app_context():
-        # 导入所有模型以确保表被创建
-        from app.models import ingredient, recipe, favorite, shopping_list, recipe_progress
+        # 导入所有模型以注册 ORM 映射
+        from app.models import ingredient, recipe, favorite, shopping_list, recipe_progress, progress_event, substitution, recipe_fts
+        from app.models import canonical_ingredient, cache_version, chain_run
+        from app.services import ingredient_lexicon  # 注册规范食材 ID 填充事件
+        from app.services import substitution_graph  # 注册替代关系图失效事件
+        from app import migrations
 
-        # 创建所有表
-        db.create_all()
-        print("[OK] Database tables created successfully")
+        current, head = migrations.verify(db.engine)
+        if current == head:
+            print(f"[OK] Database schema is up to date (v{current:04d})")
+            return
+
+        if current > head:
+            print(f"[WARNING] Database schema v{current:04d} is newer than code v{head:04d}")
+            return
+
+        if app.config.get('AUTO_MIGRATE', True):
+            migrations.upgrade(db.engine)
+            print(f"[OK] Database migrated v{current:04d} -> v{head:04d}")
+        else:
+            print(f"[WARNING] Database schema v{current:04d} is behind v{head:04d}, run: python migrate.py upgrade")
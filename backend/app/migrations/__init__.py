@@ -0,0 +1,160 @@
+"""
+SmartCook AI Migrations
+轻量级版本化数据库迁移
+
+每个迁移脚本位于 app/migrations/versions/ 下，文件名形如 v0001_xxx.py，
+需定义:
+    VERSION: int            迁移版本号（严格递增）
+    DESCRIPTION: str        迁移说明
+    TRANSACTIONAL: bool     是否在事务中执行（在线建索引等操作设为 False，默认 True）
+    upgrade(conn)           执行迁移
+"""
+import importlib
+import logging
+import pkgutil
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+
+from app.migrations import versions
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_TABLE = 'schema_version'
+
+
+class Migration:
+    """单个迁移脚本"""
+
+    def __init__(self, module):
+        self.module = module
+        self.version = int(module.VERSION)
+        self.description = getattr(module, 'DESCRIPTION', module.__name__)
+        self.transactional = getattr(module, 'TRANSACTIONAL', True)
+
+    def upgrade(self, conn):
+        self.module.upgrade(conn)
+
+    def __repr__(self):
+        return f'<Migration v{self.version:04d} {self.description}>'
+
+
+_migrations_cache: Optional[List[Migration]] = None
+
+
+def get_migrations() -> List[Migration]:
+    """按版本号加载全部迁移脚本"""
+    global _migrations_cache
+    if _migrations_cache is None:
+        loaded = []
+        for module_info in pkgutil.iter_modules(versions.__path__):
+            if not module_info.name.startswith('v'):
+                continue
+            module = importlib.import_module(f'{versions.__name__}.{module_info.name}')
+            loaded.append(Migration(module))
+
+        loaded.sort(key=lambda m: m.version)
+        seen = set()
+        for migration in loaded:
+            if migration.version in seen:
+                raise RuntimeError(f"迁移版本号重复: {migration.version}")
+            seen.add(migration.version)
+        _migrations_cache = loaded
+    return _migrations_cache
+
+
+def head_version() -> int:
+    """最新迁移版本号"""
+    migrations = get_migrations()
+    return migrations[-1].version if migrations else 0
+
+
+def _ensure_version_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+            "version INTEGER PRIMARY KEY, "
+            "description VARCHAR(200), "
+            "applied_at TIMESTAMP)"
+        ))
+
+
+def current_version(engine) -> int:
+    """读取数据库当前版本（未初始化返回 0）"""
+    try:
+        with engine.connect() as conn:
+            value = conn.execute(text(f"SELECT MAX(version) FROM {SCHEMA_VERSION_TABLE}")).scalar()
+            return int(value or 0)
+    except Exception:
+        # 版本表不存在
+        return 0
+
+
+def verify(engine) -> Tuple[int, int]:
+    """
+    校验数据库版本（启动时调用，只读取 schema_version，不反射全部表）
+
+    Returns:
+        (当前版本, 最新版本)
+    """
+    return current_version(engine), head_version()
+
+
+def _apply(engine, migration: Migration):
+    if migration.transactional:
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            _record(conn, migration)
+    else:
+        # 非事务迁移（如 PostgreSQL 的 CREATE INDEX CONCURRENTLY）逐条自动提交
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            migration.upgrade(conn)
+            _record(conn, migration)
+
+
+def _record(conn, migration: Migration):
+    conn.execute(
+        text(
+            f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, description, applied_at) "
+            "VALUES (:version, :description, :applied_at)"
+        ),
+        {
+            'version': migration.version,
+            'description': migration.description,
+            'applied_at': datetime.utcnow()
+        }
+    )
+
+
+def upgrade(engine, target: Optional[int] = None) -> List[Migration]:
+    """
+    执行所有待应用的迁移
+
+    Args:
+        engine: SQLAlchemy Engine
+        target: 目标版本（默认最新）
+
+    Returns:
+        本次应用的迁移列表
+    """
+    _ensure_version_table(engine)
+    current = current_version(engine)
+    target = head_version() if target is None else target
+
+    applied = []
+    for migration in get_migrations():
+        if migration.version <= current or migration.version > target:
+            continue
+        logger.info(f"🔧 应用迁移 v{migration.version:04d}: {migration.description}")
+        _apply(engine, migration)
+        applied.append(migration)
+
+    if applied:
+        logger.info(f"✅ 数据库已迁移到 v{applied[-1].version:04d}")
+    return applied
+
+
+def status(engine) -> List[Tuple[Migration, bool]]:
+    """列出所有迁移及其是否已应用"""
+    current = current_version(engine)
+    return [(migration, migration.version <= current) for migration in get_migrations()]
@@ -0,0 +1,53 @@
+"""
+Migration Operations
+迁移脚本使用的通用 DDL 操作（幂等，兼容 SQLite / PostgreSQL）
+"""
+from typing import Iterable
+from sqlalchemy import text, inspect
+
+
+def dialect_name(conn) -> str:
+    """当前数据库方言名"""
+    return conn.dialect.name
+
+
+def has_table(conn, table: str) -> bool:
+    """判断表是否存在"""
+    return inspect(conn).has_table(table)
+
+
+def has_column(conn, table: str, column: str) -> bool:
+    """判断列是否存在"""
+    return any(col['name'] == column for col in inspect(conn).get_columns(table))
+
+
+def add_column(conn, table: str, column: str, ddl_type: str):
+    """添加列（已存在则跳过）"""
+    if has_column(conn, table, column):
+        return
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def create_index(conn, name: str, table: str, columns: Iterable[str], unique: bool = False):
+    """
+    在线创建索引（已存在则跳过）
+
+    PostgreSQL 在自动提交连接上使用 CREATE INDEX CONCURRENTLY，不阻塞写入；
+    SQLite 建索引只短暂持有写锁，直接使用 IF NOT EXISTS。
+    """
+    unique_sql = 'UNIQUE ' if unique else ''
+    concurrently = ''
+    if dialect_name(conn) == 'postgresql' and conn.get_isolation_level() == 'AUTOCOMMIT':
+        concurrently = 'CONCURRENTLY '
+    column_sql = ', '.join(columns)
+    conn.execute(text(
+        f"CREATE {unique_sql}INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({column_sql})"
+    ))
+
+
+def drop_index(conn, name: str):
+    """删除索引（不存在则跳过）"""
+    concurrently = ''
+    if dialect_name(conn) == 'postgresql' and conn.get_isolation_level() == 'AUTOCOMMIT':
+        concurrently = 'CONCURRENTLY '
+    conn.execute(text(f"DROP INDEX {concurrently}IF EXISTS {name}"))
@@ -0,0 +1,4 @@
+"""
+Migration Scripts
+版本化迁移脚本（按 VERSION 顺序执行）
+"""
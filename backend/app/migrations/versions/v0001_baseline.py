@@ -0,0 +1,96 @@
+"""
+v0001 - 基线表结构
+与引入迁移前 db.create_all() 创建的表结构一致；已有数据库中存在的表会被跳过。
+"""
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Text, Boolean, DateTime, Float, ForeignKey
+)
+
+VERSION = 1
+DESCRIPTION = '基线表结构'
+
+metadata = MetaData()
+
+Table(
+    'ingredients', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('quantity', String(50)),
+    Column('state', String(20)),
+    Column('category', String(50)),
+    Column('storage_location', String(20)),
+    Column('is_common', Boolean),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime)
+)
+
+Table(
+    'recipes', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('description', Text),
+    Column('difficulty', String(20)),
+    Column('cooking_time', String(50)),
+    Column('calories', String(50)),
+    Column('cuisine', String(50)),
+    Column('taste', String(50)),
+    Column('scenario', String(50)),
+    Column('skill_level', String(20)),
+    Column('ingredients_json', Text),
+    Column('steps_json', Text),
+    Column('tags_json', Text),
+    Column('created_at', DateTime)
+)
+
+Table(
+    'favorite_groups', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('description', Text),
+    Column('created_at', DateTime)
+)
+
+Table(
+    'favorites', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('recipe_id', Integer, ForeignKey('recipes.id'), nullable=False),
+    Column('group_id', Integer, ForeignKey('favorite_groups.id')),
+    Column('notes', Text),
+    Column('created_at', DateTime)
+)
+
+Table(
+    'shopping_list', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('ingredient_name', String(100), nullable=False),
+    Column('quantity', String(50)),
+    Column('category', String(50)),
+    Column('is_purchased', Boolean),
+    Column('recipe_id', Integer, ForeignKey('recipes.id')),
+    Column('created_at', DateTime)
+)
+
+Table(
+    'recipe_step_progress', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('recipe_id', Integer, ForeignKey('recipes.id'), nullable=False),
+    Column('step_index', Integer, nullable=False),
+    Column('is_completed', Boolean),
+    Column('completed_at', DateTime)
+)
+
+Table(
+    'ingredient_substitutions', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('original_ingredient', String(100), nullable=False, index=True),
+    Column('substitute_ingredient', String(100), nullable=False),
+    Column('similarity_score', Float),
+    Column('substitution_ratio', String(50)),
+    Column('notes', Text),
+    Column('category', String(50)),
+    Column('created_at', DateTime)
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
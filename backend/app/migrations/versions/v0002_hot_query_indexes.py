@@ -0,0 +1,30 @@
+"""
+v0002 - 热点查询索引
+由查询计划审计（app/utils/query_audit.py）发现的全表扫描补齐索引。
+"""
+from app.migrations.ops import create_index
+
+VERSION = 2
+DESCRIPTION = '热点查询索引'
+TRANSACTIONAL = False
+
+INDEXES = [
+    ('ix_recipes_created_at', 'recipes', ['created_at']),
+    ('ix_favorites_recipe_id', 'favorites', ['recipe_id']),
+    ('ix_favorites_group_id', 'favorites', ['group_id']),
+    ('ix_favorites_created_at', 'favorites', ['created_at']),
+    ('ix_favorite_groups_created_at', 'favorite_groups', ['created_at']),
+    ('ix_recipe_step_progress_recipe_step', 'recipe_step_progress', ['recipe_id', 'step_index']),
+    ('ix_shopping_list_is_purchased', 'shopping_list', ['is_purchased']),
+    ('ix_shopping_list_recipe_id', 'shopping_list', ['recipe_id']),
+    ('ix_shopping_list_created_at', 'shopping_list', ['created_at']),
+    ('ix_ingredients_category', 'ingredients', ['category']),
+    ('ix_ingredients_storage_location', 'ingredients', ['storage_location']),
+    ('ix_ingredients_is_common', 'ingredients', ['is_common']),
+    ('ix_ingredients_created_at', 'ingredients', ['created_at']),
+]
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
@@ -0,0 +1,45 @@
+"""
+v0003 - 食谱全文索引
+SQLite 上创建 FTS5 虚拟表 recipes_fts（rowid = recipes.id），并回填已有食谱。
+索引内容为预先分好的中文单字/二元组词元，由 ORM 事件维护；其它数据库跳过。
+"""
+from sqlalchemy import text
+from app.migrations.ops import dialect_name
+
+VERSION = 3
+DESCRIPTION = '食谱全文索引 (FTS5)'
+
+BATCH_SIZE = 1000
+
+
+def upgrade(conn):
+    if dialect_name(conn) != 'sqlite':
+        return
+
+    from app.models.recipe_fts import FTS_TABLE, search_document
+
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(name, description, ingredients, steps, tags, tokenize='unicode61')"
+    ))
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(
+                "SELECT id, name, description, ingredients_json, steps_json, tags_json "
+                "FROM recipes WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            text(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description, ingredients, steps, tags) "
+                "VALUES (:id, :name, :description, :ingredients, :steps, :tags)"
+            ),
+            [{'id': row.id, **search_document(*row[1:])} for row in rows]
+        )
+        last_id = rows[-1].id
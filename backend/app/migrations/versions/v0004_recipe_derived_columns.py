@@ -0,0 +1,65 @@
+"""
+v0004 - 食谱派生数值列与标签表
+新增 recipes.cooking_minutes / recipes.calories_kcal 与 recipe_tags 表，
+由已有的 cooking_time / calories / tags_json 回填，并创建筛选与分面统计用的组合索引。
+"""
+import json
+from sqlalchemy import text
+from app.migrations.ops import add_column, create_index, has_table
+from app.utils.parsers import parse_minutes, parse_kcal
+
+VERSION = 4
+DESCRIPTION = '食谱派生数值列与标签表'
+
+BATCH_SIZE = 1000
+
+
+def _tags(tags_json):
+    try:
+        tags = json.loads(tags_json) if tags_json else []
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(tags, list):
+        return []
+    return list(dict.fromkeys(str(tag).strip()[:50] for tag in tags if str(tag).strip()))
+
+
+def upgrade(conn):
+    add_column(conn, 'recipes', 'cooking_minutes', 'INTEGER')
+    add_column(conn, 'recipes', 'calories_kcal', 'INTEGER')
+    if not has_table(conn, 'recipe_tags'):
+        conn.execute(text(
+            "CREATE TABLE recipe_tags ("
+            "recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE, "
+            "tag VARCHAR(50) NOT NULL, "
+            "PRIMARY KEY (recipe_id, tag))"
+        ))
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(
+                "SELECT id, cooking_time, calories, tags_json FROM recipes "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+
+        conn.execute(
+            text("UPDATE recipes SET cooking_minutes = :minutes, calories_kcal = :kcal WHERE id = :id"),
+            [
+                {'id': row.id, 'minutes': parse_minutes(row.cooking_time), 'kcal': parse_kcal(row.calories)}
+                for row in rows
+            ]
+        )
+        tag_rows = [{'recipe_id': row.id, 'tag': tag} for row in rows for tag in _tags(row.tags_json)]
+        if tag_rows:
+            conn.execute(text("INSERT INTO recipe_tags (recipe_id, tag) VALUES (:recipe_id, :tag)"), tag_rows)
+        last_id = rows[-1].id
+
+    create_index(conn, 'ix_recipes_facets', 'recipes', ['cuisine', 'taste', 'scenario', 'skill_level'])
+    create_index(conn, 'ix_recipes_cooking_minutes', 'recipes', ['cooking_minutes'])
+    create_index(conn, 'ix_recipes_calories_kcal', 'recipes', ['calories_kcal'])
+    create_index(conn, 'ix_recipe_tags_tag', 'recipe_tags', ['tag', 'recipe_id'])
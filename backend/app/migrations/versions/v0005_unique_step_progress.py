@@ -0,0 +1,20 @@
+"""
+v0005 - 步骤进度唯一约束
+并发请求曾为同一 (recipe_id, step_index) 写入重复记录。去重（保留 id 最大的一条，
+即最后一次写入），再以唯一索引取代 v0002 的普通索引，供 ON CONFLICT 使用。
+"""
+from sqlalchemy import text
+from app.migrations.ops import create_index, drop_index
+
+VERSION = 5
+DESCRIPTION = '步骤进度唯一约束'
+
+
+def upgrade(conn):
+    conn.execute(text(
+        "DELETE FROM recipe_step_progress WHERE id NOT IN ("
+        "SELECT MAX(id) FROM recipe_step_progress GROUP BY recipe_id, step_index)"
+    ))
+    create_index(conn, 'uq_recipe_step_progress', 'recipe_step_progress',
+                 ['recipe_id', 'step_index'], unique=True)
+    drop_index(conn, 'ix_recipe_step_progress_recipe_step')
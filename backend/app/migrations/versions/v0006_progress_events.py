@@ -0,0 +1,24 @@
+"""
+v0006 - 步骤进度事件表
+database 后端的进度推送中转表：各进程写入事件，由各自的订阅线程按 id 顺序读取。
+"""
+from sqlalchemy import MetaData, Table, Column, Integer, Text, DateTime, Index
+
+VERSION = 6
+DESCRIPTION = '步骤进度事件表'
+
+metadata = MetaData()
+
+progress_events = Table(
+    'progress_events', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('recipe_id', Integer, nullable=False),
+    Column('payload', Text, nullable=False),
+    Column('created_at', DateTime, nullable=False),
+    Index('ix_progress_events_created_at', 'created_at'),
+    sqlite_autoincrement=True,
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
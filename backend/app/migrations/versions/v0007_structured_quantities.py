@@ -0,0 +1,67 @@
+"""
+v0007 - 结构化数量列
+ingredients / shopping_list 新增 quantity_value / quantity_unit / quantity_dimension，
+由 quantity 文本批量解析回填；食谱 ingredients_json 中的每个食材附加同名字段。
+"""
+import json
+from sqlalchemy import text
+from app.migrations.ops import add_column
+from app.utils.quantity import quantity_columns
+
+VERSION = 7
+DESCRIPTION = '结构化数量列'
+
+BATCH_SIZE = 1000
+
+COLUMNS = [
+    ('quantity_value', 'FLOAT'),
+    ('quantity_unit', 'VARCHAR(20)'),
+    ('quantity_dimension', 'VARCHAR(20)'),
+]
+
+
+def _batches(conn, sql):
+    last_id = 0
+    while True:
+        rows = conn.execute(text(sql), {'last_id': last_id, 'limit': BATCH_SIZE}).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _backfill_table(conn, table):
+    sql = f"SELECT id, quantity FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit"
+    for rows in _batches(conn, sql):
+        conn.execute(
+            text(f"UPDATE {table} SET quantity_value = :quantity_value, quantity_unit = :quantity_unit, "
+                 f"quantity_dimension = :quantity_dimension WHERE id = :id"),
+            [{'id': row.id, **quantity_columns(row.quantity)} for row in rows]
+        )
+
+
+def _annotate(ingredients_json):
+    try:
+        ingredients = json.loads(ingredients_json) if ingredients_json else []
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(ingredients, list):
+        return None
+    return json.dumps([
+        {**ing, **quantity_columns(ing.get('quantity'))} if isinstance(ing, dict) else ing
+        for ing in ingredients
+    ], ensure_ascii=False)
+
+
+def upgrade(conn):
+    for table in ('ingredients', 'shopping_list'):
+        for column, ddl_type in COLUMNS:
+            add_column(conn, table, column, ddl_type)
+        _backfill_table(conn, table)
+
+    sql = "SELECT id, ingredients_json FROM recipes WHERE id > :last_id ORDER BY id LIMIT :limit"
+    for rows in _batches(conn, sql):
+        updates = [{'id': row.id, 'ingredients_json': _annotate(row.ingredients_json)} for row in rows]
+        updates = [update for update in updates if update['ingredients_json'] is not None]
+        if updates:
+            conn.execute(text("UPDATE recipes SET ingredients_json = :ingredients_json WHERE id = :id"), updates)
@@ -0,0 +1,169 @@
+"""
+v0008 - 规范食材与别名
+新增 canonical_ingredients / ingredient_aliases 表并写入初始词表；
+ingredients / shopping_list 新增 canonical_id，ingredient_substitutions 新增
+original_canonical_id / substitute_canonical_id，按别名自动机回填；
+食谱 ingredients_json 中的每个食材附加 canonical_id。
+"""
+import json
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, ForeignKey, select, text, insert
+from app.migrations.ops import add_column, create_index
+from app.utils.alias_trie import AliasAutomaton, normalize_alias
+
+VERSION = 8
+DESCRIPTION = '规范食材与别名'
+
+BATCH_SIZE = 1000
+
+metadata = MetaData()
+
+canonical_ingredients = Table(
+    'canonical_ingredients', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False, unique=True),
+    Column('category', String(50)),
+    Column('created_at', DateTime),
+)
+
+ingredient_aliases = Table(
+    'ingredient_aliases', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('alias', String(100), nullable=False, unique=True),
+    Column('canonical_id', Integer, ForeignKey('canonical_ingredients.id', ondelete='CASCADE'),
+           nullable=False, index=True),
+    Column('created_at', DateTime),
+)
+
+# 初始词表: (规范名, 分类, 别名)；名称末尾包含规范名或别名的写法（"新鲜鸡蛋"、"全脂牛奶"）
+# 由最长后缀匹配自动归并，无需逐一登记
+SEED_LEXICON = [
+    ('鸡蛋', '肉禽', ['鸡子']),
+    ('番茄', '蔬菜', ['西红柿', '洋柿子']),
+    ('番茄酱', '调料', ['番茄沙司']),
+    ('土豆', '蔬菜', ['马铃薯', '洋芋']),
+    ('洋葱', '蔬菜', ['洋葱头', '圆葱']),
+    ('葱', '蔬菜', ['大葱', '小葱', '香葱', '葱花']),
+    ('大蒜', '蔬菜', ['蒜', '蒜头', '蒜瓣', '蒜末']),
+    ('生姜', '蔬菜', ['姜', '老姜', '姜片', '姜末']),
+    ('小白菜', '蔬菜', []),
+    ('菠菜', '蔬菜', []),
+    ('菜花', '蔬菜', ['花菜', '花椰菜']),
+    ('西兰花', '蔬菜', ['西蓝花', '绿菜花']),
+    ('香菜', '蔬菜', ['芫荽']),
+    ('牛奶', '主食', ['鲜奶', '纯奶']),
+    ('豆浆', '主食', []),
+    ('大米', '主食', ['白米', '粳米']),
+    ('糙米', '主食', []),
+    ('面粉', '主食', ['小麦粉']),
+    ('意大利面', '主食', ['意面']),
+    ('荞麦面', '主食', []),
+    ('牛肉', '肉禽', []),
+    ('肥牛', '肉禽', ['肥牛卷', '肥牛片']),
+    ('猪肉', '肉禽', ['瘦肉']),
+    ('鸡胸肉', '肉禽', ['鸡胸']),
+    ('鸡腿肉', '肉禽', ['鸡腿']),
+    ('虾', '海鲜', ['虾仁']),
+    ('鱿鱼', '海鲜', []),
+    ('酱油', '调料', ['豉油']),
+    ('生抽', '调料', []),
+    ('老抽', '调料', []),
+    ('蚝油', '调料', []),
+    ('料酒', '调料', ['黄酒', '绍兴酒']),
+    ('白葡萄酒', '调料', []),
+    ('白醋', '调料', []),
+    ('柠檬汁', '调料', []),
+    ('青柠汁', '调料', []),
+    ('盐', '调料', ['食盐']),
+    ('白糖', '调料', ['糖', '砂糖', '白砂糖']),
+    ('红糖', '调料', []),
+    ('冰糖', '调料', []),
+    ('蜂蜜', '调料', []),
+    ('黄油', '调料', []),
+    ('植物油', '调料', ['食用油', '色拉油', '菜籽油']),
+    ('椰子油', '调料', []),
+    ('椰奶', '调料', ['椰浆']),
+    ('淡奶油', '调料', ['稀奶油']),
+    ('淀粉', '调料', ['玉米淀粉', '生粉']),
+    ('姜粉', '调料', []),
+    ('蒜粉', '调料', []),
+]
+
+# (表, 名称列, 规范 ID 列)
+LINKED_COLUMNS = [
+    ('ingredients', 'name', 'canonical_id'),
+    ('shopping_list', 'ingredient_name', 'canonical_id'),
+    ('ingredient_substitutions', 'original_ingredient', 'original_canonical_id'),
+    ('ingredient_substitutions', 'substitute_ingredient', 'substitute_canonical_id'),
+]
+
+
+def _seed(conn):
+    if conn.execute(select(canonical_ingredients.c.id).limit(1)).first():
+        return
+    now = datetime.utcnow()
+    for name, category, aliases in SEED_LEXICON:
+        canonical_id = conn.execute(
+            insert(canonical_ingredients).values(name=name, category=category, created_at=now)
+        ).inserted_primary_key[0]
+        conn.execute(insert(ingredient_aliases), [
+            {'alias': normalize_alias(alias), 'canonical_id': canonical_id, 'created_at': now}
+            for alias in [name] + aliases
+        ])
+
+
+def _automaton(conn) -> AliasAutomaton:
+    automaton = AliasAutomaton()
+    for alias, canonical_id in conn.execute(select(ingredient_aliases.c.alias, ingredient_aliases.c.canonical_id)):
+        automaton.add(alias, canonical_id)
+    return automaton
+
+
+def _batches(conn, sql):
+    last_id = 0
+    while True:
+        rows = conn.execute(text(sql), {'last_id': last_id, 'limit': BATCH_SIZE}).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _annotate(ingredients_json, automaton):
+    try:
+        ingredients = json.loads(ingredients_json) if ingredients_json else []
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(ingredients, list):
+        return None
+    return json.dumps([
+        {**ing, 'canonical_id': automaton.resolve(str(ing.get('name') or ''))} if isinstance(ing, dict) else ing
+        for ing in ingredients
+    ], ensure_ascii=False)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    for table, _, id_column in LINKED_COLUMNS:
+        add_column(conn, table, id_column, 'INTEGER')
+    create_index(conn, 'ix_ingredients_canonical_id', 'ingredients', ['canonical_id'])
+    create_index(conn, 'ix_shopping_list_canonical_id', 'shopping_list', ['canonical_id'])
+    create_index(conn, 'ix_ingredient_substitutions_original_canonical_id',
+                 'ingredient_substitutions', ['original_canonical_id'])
+    _seed(conn)
+
+    automaton = _automaton(conn)
+    for table, name_column, id_column in LINKED_COLUMNS:
+        sql = f"SELECT id, {name_column} FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit"
+        for rows in _batches(conn, sql):
+            conn.execute(
+                text(f"UPDATE {table} SET {id_column} = :canonical_id WHERE id = :id"),
+                [{'id': row[0], 'canonical_id': automaton.resolve(row[1] or '')} for row in rows]
+            )
+
+    sql = "SELECT id, ingredients_json FROM recipes WHERE id > :last_id ORDER BY id LIMIT :limit"
+    for rows in _batches(conn, sql):
+        updates = [{'id': row.id, 'ingredients_json': _annotate(row.ingredients_json, automaton)} for row in rows]
+        updates = [update for update in updates if update['ingredients_json'] is not None]
+        if updates:
+            conn.execute(text("UPDATE recipes SET ingredients_json = :ingredients_json WHERE id = :id"), updates)
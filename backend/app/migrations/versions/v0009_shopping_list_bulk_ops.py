@@ -0,0 +1,20 @@
+"""
+v0009 - 购物清单排序与批量操作索引
+shopping_list 新增 position（手动排序位置），并创建清单排序与按分类批量勾选用的组合索引。
+"""
+from app.migrations.ops import add_column, create_index
+
+VERSION = 9
+DESCRIPTION = '购物清单排序与批量操作索引'
+TRANSACTIONAL = False
+
+INDEXES = [
+    ('ix_shopping_list_position', 'shopping_list', ['position', 'created_at']),
+    ('ix_shopping_list_category_purchased', 'shopping_list', ['category', 'is_purchased']),
+]
+
+
+def upgrade(conn):
+    add_column(conn, 'shopping_list', 'position', 'INTEGER NOT NULL DEFAULT 0')
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
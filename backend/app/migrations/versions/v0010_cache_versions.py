@@ -0,0 +1,29 @@
+"""
+v0010 - 缓存版本表
+进程内缓存（替代关系图、食材别名自动机）的版本戳，数据变更时在同一事务中递增。
+"""
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, select, insert
+
+VERSION = 10
+DESCRIPTION = '缓存版本表'
+
+CACHE_NAMES = ['substitutions', 'ingredient_aliases']
+
+metadata = MetaData()
+
+cache_versions = Table(
+    'cache_versions', metadata,
+    Column('name', String(50), primary_key=True),
+    Column('version', Integer, nullable=False),
+    Column('updated_at', DateTime),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    existing = set(conn.execute(select(cache_versions.c.name)).scalars())
+    rows = [{'name': name, 'version': 0, 'updated_at': datetime.utcnow()}
+            for name in CACHE_NAMES if name not in existing]
+    if rows:
+        conn.execute(insert(cache_versions), rows)
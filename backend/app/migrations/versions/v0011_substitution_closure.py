@@ -0,0 +1,42 @@
+"""
+v0011 - 多级替代路径
+新增 substitution_closure 表，按现有替代关系计算初始传递闭包。
+"""
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, Integer, String, Float, Text, DateTime, select, insert, text
+from app.utils.substitution_paths import closure_rows
+
+VERSION = 11
+DESCRIPTION = '多级替代路径'
+
+metadata = MetaData()
+
+substitution_closure = Table(
+    'substitution_closure', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('original_key', String(120), nullable=False, index=True),
+    Column('original_ingredient', String(100), nullable=False),
+    Column('original_canonical_id', Integer, index=True),
+    Column('substitute_ingredient', String(100), nullable=False),
+    Column('substitute_canonical_id', Integer),
+    Column('hops', Integer, nullable=False),
+    Column('score', Float, nullable=False),
+    Column('substitution_ratio', String(50)),
+    Column('category', String(50)),
+    Column('path', Text, nullable=False),
+    Column('updated_at', DateTime),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    if conn.execute(select(substitution_closure.c.id).limit(1)).first():
+        return
+    edges = conn.execute(text(
+        "SELECT original_ingredient, substitute_ingredient, original_canonical_id, substitute_canonical_id, "
+        "similarity_score, substitution_ratio, category FROM ingredient_substitutions ORDER BY id"
+    )).mappings().all()
+    now = datetime.utcnow()
+    rows = [{**row, 'updated_at': now} for row in closure_rows(edges)]
+    if rows:
+        conn.execute(insert(substitution_closure), rows)
@@ -0,0 +1,21 @@
+"""
+v0012 - 替代关系来源与审核状态
+ingredient_substitutions 新增 source（curated 人工整理 / llm 模型建议）、confidence、
+review_state（pending / approved / rejected）与 expires_at，已有记录视为人工整理且已审核。
+"""
+from app.migrations.ops import add_column
+
+VERSION = 12
+DESCRIPTION = '替代关系来源与审核状态'
+
+COLUMNS = [
+    ('source', "VARCHAR(20) NOT NULL DEFAULT 'curated'"),
+    ('confidence', 'FLOAT'),
+    ('review_state', "VARCHAR(20) NOT NULL DEFAULT 'approved'"),
+    ('expires_at', 'TIMESTAMP'),
+]
+
+
+def upgrade(conn):
+    for column, ddl in COLUMNS:
+        add_column(conn, 'ingredient_substitutions', column, ddl)
@@ -0,0 +1,28 @@
+"""
+v0013 - 链式流程运行记录表
+保存链式流程的规范化输入、分析结果与完整响应，按输入哈希 + 时间查找缓存结果。
+"""
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, DateTime, Index
+
+VERSION = 13
+DESCRIPTION = '链式流程运行记录表'
+
+metadata = MetaData()
+
+chain_runs = Table(
+    'chain_runs', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_input', Text, nullable=False),
+    Column('normalized_input', Text, nullable=False),
+    Column('input_hash', String(64), nullable=False),
+    Column('route', String(20)),
+    Column('analysis', Text),
+    Column('response', Text, nullable=False),
+    Column('recipe_ids', Text),
+    Column('created_at', DateTime, nullable=False),
+    Index('ix_chain_runs_input_hash_created_at', 'input_hash', 'created_at'),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,12 @@
+"""
+v0014 - 链式运行记录降级标记
+chain_runs 新增 degraded：有阶段因截止时间降级的结果只保存用于回放，不作为缓存结果复用。
+"""
+from app.migrations.ops import add_column
+
+VERSION = 14
+DESCRIPTION = '链式运行记录降级标记'
+
+
+def upgrade(conn):
+    add_column(conn, 'chain_runs', 'degraded', 'BOOLEAN NOT NULL DEFAULT FALSE')
@@ -0,0 +1,25 @@
+"""
+v0015 - 步骤进度事件 id 不复用
+SQLite 的普通 INTEGER 主键在表被清空后会从 1 重新分配，订阅线程按 id > 上次位置读取，
+清理后的新事件将永远读不到。重建为 AUTOINCREMENT 表（事件只是短期中转数据，直接丢弃）。
+PostgreSQL 的序列本身不回退，无需处理。
+"""
+from sqlalchemy import text
+
+from app.migrations.ops import dialect_name, has_table
+from app.migrations.versions.v0006_progress_events import progress_events
+
+VERSION = 15
+DESCRIPTION = '步骤进度事件 id 不复用'
+
+
+def upgrade(conn):
+    if dialect_name(conn) != 'sqlite' or not has_table(conn, 'progress_events'):
+        return
+    ddl = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'progress_events'"
+    )).scalar() or ''
+    if 'AUTOINCREMENT' in ddl.upper():
+        return
+    progress_events.drop(conn)
+    progress_events.create(conn)
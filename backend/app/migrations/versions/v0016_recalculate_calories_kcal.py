@@ -0,0 +1,36 @@
+"""
+v0016 - 重算食谱热量派生列
+parse_kcal 曾取第一个数字（"2人份约900卡" 解析为 2），改为优先取带单位的数字后按 calories 重算
+recipes.calories_kcal，只更新结果变化的行。
+"""
+from sqlalchemy import text
+from app.utils.parsers import parse_kcal
+
+VERSION = 16
+DESCRIPTION = '重算食谱热量派生列'
+
+BATCH_SIZE = 1000
+
+
+def upgrade(conn):
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(
+                "SELECT id, calories, calories_kcal FROM recipes "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+
+        changed = [
+            {'id': row.id, 'kcal': kcal}
+            for row in rows
+            for kcal in [parse_kcal(row.calories)]
+            if kcal != row.calories_kcal
+        ]
+        if changed:
+            conn.execute(text("UPDATE recipes SET calories_kcal = :kcal WHERE id = :id"), changed)
+        last_id = rows[-1].id
@@ -0,0 +1,32 @@
+"""
+v0017 - 重算含"两"的结构化数量
+数量解析曾把任意位置的"两"当作数字 2（"三两" 解析为 2个、"一斤二两" 无法解析），
+现仅开头紧跟单位的"两"为数字，其余为质量单位。按修正后的规则重算数量文本含"两"的
+ingredients / shopping_list 数量列与食谱 ingredients_json 中的数量字段。
+"""
+from sqlalchemy import text
+from app.utils.quantity import quantity_columns
+from app.migrations.versions.v0007_structured_quantities import _annotate, _batches
+
+VERSION = 17
+DESCRIPTION = '重算含"两"的结构化数量'
+
+
+def upgrade(conn):
+    for table in ('ingredients', 'shopping_list'):
+        sql = (f"SELECT id, quantity FROM {table} WHERE id > :last_id AND quantity LIKE '%两%' "
+               f"ORDER BY id LIMIT :limit")
+        for rows in _batches(conn, sql):
+            conn.execute(
+                text(f"UPDATE {table} SET quantity_value = :quantity_value, quantity_unit = :quantity_unit, "
+                     f"quantity_dimension = :quantity_dimension WHERE id = :id"),
+                [{'id': row.id, **quantity_columns(row.quantity)} for row in rows]
+            )
+
+    sql = ("SELECT id, ingredients_json FROM recipes WHERE id > :last_id AND ingredients_json LIKE '%两%' "
+           "ORDER BY id LIMIT :limit")
+    for rows in _batches(conn, sql):
+        updates = [{'id': row.id, 'ingredients_json': _annotate(row.ingredients_json)} for row in rows]
+        updates = [update for update in updates if update['ingredients_json'] is not None]
+        if updates:
+            conn.execute(text("UPDATE recipes SET ingredients_json = :ingredients_json WHERE id = :id"), updates)
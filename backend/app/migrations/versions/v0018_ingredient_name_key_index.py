@@ -0,0 +1,13 @@
+"""
+v0018 - 食材归一化名称索引
+批量导入与生成购物清单按 lower(trim(name)) 查找已有食材，创建对应的表达式索引，避免全表扫描。
+"""
+from app.migrations.ops import create_index
+
+VERSION = 18
+DESCRIPTION = '食材归一化名称索引'
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    create_index(conn, 'ix_ingredients_name_key', 'ingredients', ['lower(trim(name))'])
@@ -3,16 +3,27 @@ SmartCook AI Models
 数据模型包
 """
 from app.models.ingredient import Ingredient
-from app.models.recipe import Recipe
+from app.models.recipe import Recipe, RecipeTag
 from app.models.favorite import FavoriteGroup, Favorite
 from app.models.shopping_list import ShoppingListItem
 from app.models.recipe_progress import RecipeStepProgress
+from app.models.progress_event import ProgressEvent
+from app.models.canonical_ingredient import CanonicalIngredient, IngredientAlias
+from app.models.cache_version import CacheVersion
+from app.models.chain_run import ChainRun
+from app.models import recipe_fts  # 注册全文索引维护事件
 
 __all__ = [
     'Ingredient',
     'Recipe',
+    'RecipeTag',
     'FavoriteGroup',
     'Favorite',
     'ShoppingListItem',
-    'RecipeStepProgress'
+    'RecipeStepProgress',
+    'ProgressEvent',
+    'CanonicalIngredient',
+    'IngredientAlias',
+    'CacheVersion',
+    'ChainRun'
 ]
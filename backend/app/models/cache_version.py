@@ -0,0 +1,40 @@
+"""
+Cache Version Model
+进程内缓存版本戳：数据变更时在同一事务中递增版本号，
+各 worker 进程定期比对版本号决定是否重建本地缓存
+"""
+from datetime import datetime
+from sqlalchemy import select, update, insert
+from app.database import db
+
+
+class CacheVersion(db.Model):
+    """缓存版本表"""
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
+
+
+def read_version(connection, name: str) -> int:
+    """读取缓存版本号（不存在视为 0）"""
+    return connection.execute(
+        select(CacheVersion.version).where(CacheVersion.name == name)
+    ).scalar() or 0
+
+
+def bump_version(connection, name: str) -> int:
+    """递增缓存版本号（随调用方事务提交），返回新版本号"""
+    table = CacheVersion.__table__
+    updated = connection.execute(
+        update(table).where(table.c.name == name).values(
+            version=table.c.version + 1, updated_at=datetime.utcnow()
+        )
+    ).rowcount
+    if not updated:
+        connection.execute(insert(table).values(name=name, version=1, updated_at=datetime.utcnow()))
+    return read_version(connection, name)
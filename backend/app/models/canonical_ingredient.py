@@ -0,0 +1,55 @@
+"""
+Canonical Ingredient Model
+规范食材与别名模型
+"""
+from datetime import datetime
+from app.database import db
+
+
+class CanonicalIngredient(db.Model):
+    """规范食材表（同一种食材的唯一标识）"""
+    __tablename__ = 'canonical_ingredients'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+    category = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    aliases = db.relationship('IngredientAlias', backref='canonical', lazy=True,
+                              cascade='all, delete-orphan')
+
+    def to_dict(self, include_aliases=True):
+        """转换为字典"""
+        result = {
+            'id': self.id,
+            'name': self.name,
+            'category': self.category
+        }
+        if include_aliases:
+            result['aliases'] = sorted(alias.alias for alias in self.aliases)
+        return result
+
+    def __repr__(self):
+        return f'<CanonicalIngredient {self.name}>'
+
+
+class IngredientAlias(db.Model):
+    """食材别名表（别名 -> 规范食材；规范名本身也登记为别名）"""
+    __tablename__ = 'ingredient_aliases'
+
+    id = db.Column(db.Integer, primary_key=True)
+    alias = db.Column(db.String(100), nullable=False, unique=True)
+    canonical_id = db.Column(db.Integer, db.ForeignKey('canonical_ingredients.id', ondelete='CASCADE'),
+                             nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'alias': self.alias,
+            'canonical_id': self.canonical_id
+        }
+
+    def __repr__(self):
+        return f'<IngredientAlias {self.alias}>'
@@ -0,0 +1,38 @@
+"""
+Chain Run Model
+链式流程运行记录：保存输入、分析结果与完整响应，用于结果缓存与回放
+"""
+import json
+from datetime import datetime
+from app.database import db
+
+
+class ChainRun(db.Model):
+    """链式流程运行记录表"""
+    __tablename__ = 'chain_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_input = db.Column(db.Text, nullable=False)  # 原始输入
+    normalized_input = db.Column(db.Text, nullable=False)  # 去标点空白、同义词归一后的输入
+    input_hash = db.Column(db.String(64), nullable=False)  # normalized_input 的 SHA-256，缓存查找键
+    route = db.Column(db.String(20))  # 实际执行的子流程
+    analysis = db.Column(db.Text)  # JSON 分析结果
+    response = db.Column(db.Text, nullable=False)  # JSON 完整响应
+    recipe_ids = db.Column(db.Text)  # JSON 本次生成并保存的食谱 ID
+    degraded = db.Column(db.Boolean, nullable=False, default=False)  # 有阶段因截止时间降级（不作为缓存结果）
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_chain_runs_input_hash_created_at', 'input_hash', 'created_at'),
+    )
+
+    def to_payload(self):
+        """回放响应：保存的完整响应附加运行记录 ID"""
+        return {
+            **json.loads(self.response),
+            'run_id': self.id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<ChainRun id={self.id} route={self.route}>'
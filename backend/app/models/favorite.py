@@ -12,19 +12,25 @@ class FavoriteGroup(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     # 关联关系
     favorites = db.relationship('Favorite', backref='group', lazy=True)
 
-    def to_dict(self):
-        """转换为字典"""
+    def to_dict(self, favorites_count=None):
+        """
+        转换为字典
+
+        favorites_count: 已聚合的收藏数；未提供时加载关联收藏计数
+        """
+        if favorites_count is None:
+            favorites_count = len(self.favorites)
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'favorites_count': len(self.favorites)
+            'favorites_count': favorites_count
         }
 
     def __repr__(self):
@@ -36,10 +42,10 @@ class Favorite(db.Model):
     __tablename__ = 'favorites'
 
     id = db.Column(db.Integer, primary_key=True)
-    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
-    group_id = db.Column(db.Integer, db.ForeignKey('favorite_groups.id'))
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False, index=True)
+    group_id = db.Column(db.Integer, db.ForeignKey('favorite_groups.id'), index=True)
     notes = db.Column(db.Text)  # 用户备注
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def to_dict(self, include_recipe=True):
         """转换为字典"""
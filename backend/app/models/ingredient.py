@@ -3,7 +3,9 @@ Ingredient Model
 食材数据模型
 """
 from datetime import datetime
+from sqlalchemy.orm import validates
 from app.database import db
+from app.utils.quantity import quantity_columns
 
 class Ingredient(db.Model):
     """食材表"""
@@ -11,20 +13,34 @@ class Ingredient(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
+    canonical_id = db.Column(db.Integer, index=True)  # 规范食材 ID（由名称经别名自动机映射）
     quantity = db.Column(db.String(50))
+    quantity_value = db.Column(db.Float)  # 由 quantity 解析、换算为基准单位的数值
+    quantity_unit = db.Column(db.String(20))  # 基准单位: g / ml / 个 / 盒…
+    quantity_dimension = db.Column(db.String(20))  # 量纲: mass / volume / count / unspecified…
     state = db.Column(db.String(20))  # 新鲜/冷冻/常温
-    category = db.Column(db.String(50))  # 蔬菜/肉禽/海鲜/主食/调料
-    storage_location = db.Column(db.String(20))  # fridge/freezer/pantry
-    is_common = db.Column(db.Boolean, default=False)  # 是否常用食材
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    category = db.Column(db.String(50), index=True)  # 蔬菜/肉禽/海鲜/主食/调料
+    storage_location = db.Column(db.String(20), index=True)  # fridge/freezer/pantry
+    is_common = db.Column(db.Boolean, default=False, index=True)  # 是否常用食材
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    @validates('quantity')
+    def _parse_quantity(self, key, value):
+        """写入数量文本时同步结构化数量列"""
+        for column, parsed in quantity_columns(value).items():
+            setattr(self, column, parsed)
+        return value
+
     def to_dict(self):
         """转换为字典"""
         return {
             'id': self.id,
             'name': self.name,
+            'canonical_id': self.canonical_id,
             'quantity': self.quantity,
+            'quantity_value': self.quantity_value,
+            'quantity_unit': self.quantity_unit,
             'state': self.state,
             'category': self.category,
             'storage_location': self.storage_location,
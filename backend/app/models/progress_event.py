@@ -0,0 +1,20 @@
+"""
+Progress Event Model
+步骤进度事件数据模型（多进程部署时作为进度推送的本地消息中转）
+"""
+from datetime import datetime
+from app.database import db
+
+class ProgressEvent(db.Model):
+    """步骤进度事件表"""
+    __tablename__ = 'progress_events'
+    # 订阅线程按 id 递增读取，清空后 id 不可复用（SQLite 需 AUTOINCREMENT）
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipe_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON 事件内容
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<ProgressEvent id={self.id} recipe_id={self.recipe_id}>'
@@ -5,10 +5,15 @@ Recipe Model
 import json
 from datetime import datetime
 from app.database import db
+from app.utils.parsers import parse_minutes, parse_kcal
+from app.utils.quantity import quantity_columns
 
 class Recipe(db.Model):
     """食谱历史表"""
     __tablename__ = 'recipes'
+    __table_args__ = (
+        db.Index('ix_recipes_facets', 'cuisine', 'taste', 'scenario', 'skill_level'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -16,6 +21,8 @@ class Recipe(db.Model):
     difficulty = db.Column(db.String(20))  # 新手/进阶
     cooking_time = db.Column(db.String(50))
     calories = db.Column(db.String(50))
+    cooking_minutes = db.Column(db.Integer, index=True)  # 由 cooking_time 解析的分钟数
+    calories_kcal = db.Column(db.Integer, index=True)  # 由 calories 解析的千卡数
     cuisine = db.Column(db.String(50))  # 中式/西式/日韩/东南亚
     taste = db.Column(db.String(50))  # 酸/甜/苦/辣/咸/清淡
     scenario = db.Column(db.String(50))  # 早餐/快手菜/硬菜
@@ -23,12 +30,13 @@ class Recipe(db.Model):
     ingredients_json = db.Column(db.Text)  # JSON 格式存储食材列表
     steps_json = db.Column(db.Text)  # JSON 格式存储步骤
     tags_json = db.Column(db.Text)  # JSON 格式存储标签
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     # 关联关系
     favorites = db.relationship('Favorite', backref='recipe', lazy=True, cascade='all, delete-orphan')
     shopping_items = db.relationship('ShoppingListItem', backref='recipe', lazy=True)
     step_progress = db.relationship('RecipeStepProgress', backref='recipe', lazy=True, cascade='all, delete-orphan')
+    tag_rows = db.relationship('RecipeTag', lazy=True, cascade='all, delete-orphan')
 
     def to_dict(self, include_progress=False):
         """转换为字典"""
@@ -64,20 +72,56 @@ class Recipe(db.Model):
     @staticmethod
     def from_ai_response(recipe_data):
         """从 AI 响应创建 Recipe 对象"""
+        tags = recipe_data.get('tags', [])
         return Recipe(
             name=recipe_data.get('name', ''),
             description=recipe_data.get('description', ''),
             difficulty=recipe_data.get('difficulty', ''),
             cooking_time=recipe_data.get('cooking_time', ''),
             calories=recipe_data.get('calories', ''),
+            cooking_minutes=parse_minutes(recipe_data.get('cooking_time', '')),
+            calories_kcal=parse_kcal(recipe_data.get('calories', '')),
             cuisine=recipe_data.get('cuisine', ''),
             taste=recipe_data.get('taste', ''),
             scenario=recipe_data.get('scenario', ''),
             skill_level=recipe_data.get('skill_level', ''),
-            ingredients_json=json.dumps(recipe_data.get('ingredients', []), ensure_ascii=False),
+            ingredients_json=json.dumps(with_quantity_fields(recipe_data.get('ingredients', [])), ensure_ascii=False),
             steps_json=json.dumps(recipe_data.get('steps', []), ensure_ascii=False),
-            tags_json=json.dumps(recipe_data.get('tags', []), ensure_ascii=False)
+            tags_json=json.dumps(tags, ensure_ascii=False),
+            tag_rows=[RecipeTag(tag=tag) for tag in normalize_tags(tags)]
         )
 
     def __repr__(self):
         return f'<Recipe {self.name}>'
+
+
+def normalize_tags(tags) -> list:
+    """标签去重、去空白，保持原顺序"""
+    if not isinstance(tags, list):
+        return []
+    normalized = (str(tag).strip()[:50] for tag in tags)
+    return list(dict.fromkeys(tag for tag in normalized if tag))
+
+
+def with_quantity_fields(ingredients) -> list:
+    """为食谱食材附加结构化数量字段（quantity_value / quantity_unit / quantity_dimension）"""
+    if not isinstance(ingredients, list):
+        return []
+    return [
+        {**ing, **quantity_columns(ing.get('quantity'))} if isinstance(ing, dict) else ing
+        for ing in ingredients
+    ]
+
+
+class RecipeTag(db.Model):
+    """食谱标签表（由 tags_json 派生，用于按标签筛选与分面统计）"""
+    __tablename__ = 'recipe_tags'
+    __table_args__ = (
+        db.Index('ix_recipe_tags_tag', 'tag', 'recipe_id'),
+    )
+
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id', ondelete='CASCADE'), primary_key=True)
+    tag = db.Column(db.String(50), primary_key=True)
+
+    def __repr__(self):
+        return f'<RecipeTag recipe_id={self.recipe_id} tag={self.tag}>'
@@ -0,0 +1,81 @@
+"""
+Recipe Full-Text Index
+食谱全文索引（SQLite FTS5 虚拟表 recipes_fts，rowid = recipes.id）
+
+索引列存储预先切分的中文单字/二元组词元，通过 ORM 事件随 Recipe 增删同步。
+"""
+import json
+from typing import Dict, Optional
+from sqlalchemy import event, text, inspect
+from app.models.recipe import Recipe
+from app.utils.text import cjk_index_text
+
+FTS_TABLE = 'recipes_fts'
+
+_fts_available: Dict[str, bool] = {}
+
+
+def _loads(value: Optional[str]) -> list:
+    try:
+        return json.loads(value) if value else []
+    except (TypeError, ValueError):
+        return []
+
+
+def search_document(
+    name: str,
+    description: str,
+    ingredients_json: str,
+    steps_json: str,
+    tags_json: str
+) -> Dict[str, str]:
+    """构建一条食谱的全文索引文档（已分词）"""
+    ingredient_names = [
+        ing.get('name', '') if isinstance(ing, dict) else str(ing)
+        for ing in _loads(ingredients_json)
+    ]
+    return {
+        'name': cjk_index_text(name or ''),
+        'description': cjk_index_text(description or ''),
+        'ingredients': cjk_index_text(' '.join(ingredient_names)),
+        'steps': cjk_index_text(' '.join(str(step) for step in _loads(steps_json))),
+        'tags': cjk_index_text(' '.join(str(tag) for tag in _loads(tags_json)))
+    }
+
+
+def fts_enabled(connection) -> bool:
+    """当前数据库是否可用 FTS5 索引（迁移 v0003 仅在 SQLite 上创建）"""
+    if connection.dialect.name != 'sqlite':
+        return False
+    key = str(connection.engine.url)
+    if key not in _fts_available:
+        _fts_available[key] = inspect(connection).has_table(FTS_TABLE)
+    return _fts_available[key]
+
+
+def index_recipe(connection, recipe_id: int, document: Dict[str, str]):
+    """写入（或覆盖）一条索引"""
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': recipe_id})
+    connection.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, ingredients, steps, tags) "
+            "VALUES (:id, :name, :description, :ingredients, :steps, :tags)"
+        ),
+        {'id': recipe_id, **document}
+    )
+
+
+@event.listens_for(Recipe, 'after_insert')
+def _index_after_insert(mapper, connection, target):
+    if not fts_enabled(connection):
+        return
+    index_recipe(connection, target.id, search_document(
+        target.name, target.description, target.ingredients_json, target.steps_json, target.tags_json
+    ))
+
+
+@event.listens_for(Recipe, 'after_delete')
+def _unindex_after_delete(mapper, connection, target):
+    if not fts_enabled(connection):
+        return
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': target.id})
@@ -8,6 +8,9 @@ from app.database import db
 class RecipeStepProgress(db.Model):
     """步骤完成状态表"""
     __tablename__ = 'recipe_step_progress'
+    __table_args__ = (
+        db.Index('uq_recipe_step_progress', 'recipe_id', 'step_index', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), nullable=False)
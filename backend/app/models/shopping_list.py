@@ -3,29 +3,51 @@ Shopping List Model
 购物清单数据模型
 """
 from datetime import datetime
+from sqlalchemy.orm import validates
 from app.database import db
+from app.utils.quantity import quantity_columns
 
 class ShoppingListItem(db.Model):
     """购物清单表"""
     __tablename__ = 'shopping_list'
+    __table_args__ = (
+        db.Index('ix_shopping_list_position', 'position', 'created_at'),
+        db.Index('ix_shopping_list_category_purchased', 'category', 'is_purchased'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     ingredient_name = db.Column(db.String(100), nullable=False)
+    canonical_id = db.Column(db.Integer, index=True)  # 规范食材 ID（由名称经别名自动机映射）
     quantity = db.Column(db.String(50))
+    quantity_value = db.Column(db.Float)  # 由 quantity 解析、换算为基准单位的数值
+    quantity_unit = db.Column(db.String(20))  # 基准单位: g / ml / 个 / 盒…
+    quantity_dimension = db.Column(db.String(20))  # 量纲: mass / volume / count / unspecified…
     category = db.Column(db.String(50))
-    is_purchased = db.Column(db.Boolean, default=False)
-    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'))  # 可为空
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    is_purchased = db.Column(db.Boolean, default=False, index=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), index=True)  # 可为空
+    position = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 手动排序位置，0 为未排序（排在最前）
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    @validates('quantity')
+    def _parse_quantity(self, key, value):
+        """写入数量文本时同步结构化数量列"""
+        for column, parsed in quantity_columns(value).items():
+            setattr(self, column, parsed)
+        return value
 
     def to_dict(self):
         """转换为字典"""
         return {
             'id': self.id,
             'ingredient_name': self.ingredient_name,
+            'canonical_id': self.canonical_id,
             'quantity': self.quantity,
+            'quantity_value': self.quantity_value,
+            'quantity_unit': self.quantity_unit,
             'category': self.category,
             'is_purchased': self.is_purchased,
             'recipe_id': self.recipe_id,
+            'position': self.position,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
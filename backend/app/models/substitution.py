@@ -2,10 +2,22 @@
 Ingredient Substitution Model
 食材替代关系模型
 """
+import json
 from app.database import db
 from datetime import datetime
 
 
+# 替代关系来源：人工整理 / 链式流程中模型补充的建议
+SOURCE_CURATED = 'curated'
+SOURCE_LLM = 'llm'
+
+# 审核状态：模型建议在审核前为 pending（到期前参与直接替代查询），rejected 的记录保留以免重复学习
+REVIEW_PENDING = 'pending'
+REVIEW_APPROVED = 'approved'
+REVIEW_REJECTED = 'rejected'
+REVIEW_STATES = [REVIEW_PENDING, REVIEW_APPROVED, REVIEW_REJECTED]
+
+
 class IngredientSubstitution(db.Model):
     """食材替代关系表"""
     __tablename__ = 'ingredient_substitutions'
@@ -13,10 +25,16 @@ class IngredientSubstitution(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     original_ingredient = db.Column(db.String(100), nullable=False, index=True)
     substitute_ingredient = db.Column(db.String(100), nullable=False)
+    original_canonical_id = db.Column(db.Integer, index=True)  # 原食材规范 ID
+    substitute_canonical_id = db.Column(db.Integer)  # 替代食材规范 ID
     similarity_score = db.Column(db.Float, default=0.8)  # 相似度评分 0-1
     substitution_ratio = db.Column(db.String(50), default='1:1')  # 替代比例
     notes = db.Column(db.Text)  # 替代说明
     category = db.Column(db.String(50))  # 食材分类
+    source = db.Column(db.String(20), nullable=False, default=SOURCE_CURATED)  # 来源
+    confidence = db.Column(db.Float)  # 模型给出的置信度 0-1
+    review_state = db.Column(db.String(20), nullable=False, default=REVIEW_APPROVED)  # 审核状态
+    expires_at = db.Column(db.DateTime)  # 未审核的模型建议到期后不再使用
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def to_dict(self):
@@ -25,9 +43,48 @@ class IngredientSubstitution(db.Model):
             'id': self.id,
             'original_ingredient': self.original_ingredient,
             'substitute_ingredient': self.substitute_ingredient,
+            'original_canonical_id': self.original_canonical_id,
+            'substitute_canonical_id': self.substitute_canonical_id,
             'similarity_score': self.similarity_score,
             'substitution_ratio': self.substitution_ratio,
             'notes': self.notes,
             'category': self.category,
+            'source': self.source,
+            'confidence': self.confidence,
+            'review_state': self.review_state,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class SubstitutionClosure(db.Model):
+    """多级替代路径表（由直接替代关系计算的传递闭包，随替代关系变更增量重算）"""
+    __tablename__ = 'substitution_closure'
+
+    id = db.Column(db.Integer, primary_key=True)
+    original_key = db.Column(db.String(120), nullable=False, index=True)  # 起点节点（规范 ID 或规范化名称）
+    original_ingredient = db.Column(db.String(100), nullable=False)
+    original_canonical_id = db.Column(db.Integer, index=True)
+    substitute_ingredient = db.Column(db.String(100), nullable=False)
+    substitute_canonical_id = db.Column(db.Integer)
+    hops = db.Column(db.Integer, nullable=False)  # 跳数（>= 2）
+    score = db.Column(db.Float, nullable=False)  # 各跳相似度之积
+    substitution_ratio = db.Column(db.String(50))  # 组合比例，文字描述的比例无法组合时为空
+    category = db.Column(db.String(50))
+    path = db.Column(db.Text, nullable=False)  # 路径食材名称 JSON 数组
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'original_ingredient': self.original_ingredient,
+            'substitute_ingredient': self.substitute_ingredient,
+            'original_canonical_id': self.original_canonical_id,
+            'substitute_canonical_id': self.substitute_canonical_id,
+            'hops': self.hops,
+            'score': self.score,
+            'substitution_ratio': self.substitution_ratio,
+            'category': self.category,
+            'path': json.loads(self.path) if self.path else []
+        }
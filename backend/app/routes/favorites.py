@@ -4,6 +4,7 @@ Favorites Routes
 """
 from flask import Blueprint, request, jsonify
 from app.services.favorite_service import favorite_service
+from app.utils.json_payload import json_response
 
 bp = Blueprint('favorites', __name__, url_prefix='/api/favorites')
 
@@ -16,7 +17,7 @@ def get_favorites():
     """
     try:
         favorites = favorite_service.get_all_favorites()
-        return jsonify({
+        return json_response({
             'success': True,
             'favorites': favorites,
             'count': len(favorites)
@@ -115,7 +116,7 @@ def get_by_group(group_id):
     """
     try:
         favorites = favorite_service.get_favorites_by_group(group_id)
-        return jsonify({
+        return json_response({
             'success': True,
             'favorites': favorites,
             'count': len(favorites)
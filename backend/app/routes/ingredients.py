@@ -2,12 +2,114 @@
 Ingredients Routes
 食材管理 API 端点
 """
+import csv
+import io
 from flask import Blueprint, request, jsonify
 from app.services.ingredient_service import ingredient_service
+from app.services.ingredient_lexicon import ingredient_lexicon
 from config import Config
 
 bp = Blueprint('ingredients', __name__, url_prefix='/api/ingredients')
 
+# CSV 表头（中英文均可）到字段名的映射
+CSV_COLUMNS = {
+    'name': 'name', '名称': 'name', '食材': 'name',
+    'quantity': 'quantity', '数量': 'quantity',
+    'state': 'state', '状态': 'state',
+    'category': 'category', '分类': 'category',
+    'storage_location': 'storage_location', '存储位置': 'storage_location',
+    'is_common': 'is_common', '常用': 'is_common',
+}
+CSV_TRUE = {'true', '1', 'yes', 'y', '是'}
+CSV_FALSE = {'false', '0', 'no', 'n', '否', ''}
+
+
+def validate_ingredient_row(row):
+    """验证并清洗批量导入的单行食材，返回 (清洗后的数据, 错误信息)"""
+    if not isinstance(row, dict):
+        return None, "食材格式错误"
+
+    name = row.get('name')
+    if not isinstance(name, str) or not name.strip():
+        return None, "食材名称不能为空"
+    if len(name.strip()) > 100:
+        return None, "食材名称不能超过 100 个字符"
+
+    cleaned = {'name': name.strip()}
+    quantity = row.get('quantity')
+    if quantity is not None and quantity != '':
+        quantity = str(quantity).strip()
+        if len(quantity) > 50:
+            return None, "数量不能超过 50 个字符"
+        cleaned['quantity'] = quantity
+
+    allowed = {
+        'category': (Config.ALLOWED_CATEGORIES, '分类'),
+        'storage_location': (Config.ALLOWED_STORAGE, '存储位置'),
+        'state': (Config.ALLOWED_STATES, '食材状态'),
+    }
+    for field, (values, label) in allowed.items():
+        value = row.get(field)
+        if value is None or value == '':
+            continue
+        if value not in values:
+            return None, f"无效的{label}: {value}"
+        cleaned[field] = value
+
+    if 'is_common' in row and row['is_common'] is not None:
+        if not isinstance(row['is_common'], bool):
+            return None, "is_common 必须是布尔值"
+        cleaned['is_common'] = row['is_common']
+
+    return cleaned, None
+
+
+def read_csv_rows(text):
+    """解析 CSV 文本，返回 [(行号, 数据)]；表头不合法时抛出 ValueError"""
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, None)
+    if not header:
+        raise ValueError("CSV 内容为空")
+
+    columns = []
+    for column in header:
+        key = column.strip().lower()
+        if key not in CSV_COLUMNS:
+            raise ValueError(f"未知的 CSV 列: {column}")
+        columns.append(CSV_COLUMNS[key])
+    if 'name' not in columns:
+        raise ValueError("CSV 缺少 name 列")
+
+    rows = []
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        row = {column: value.strip() for column, value in zip(columns, values)}
+        if 'is_common' in row:
+            flag = row['is_common'].lower()
+            row['is_common'] = True if flag in CSV_TRUE else False if flag in CSV_FALSE else flag
+        rows.append((reader.line_num, row))
+    return rows
+
+
+def read_bulk_rows():
+    """从 JSON 数组、CSV 请求体或上传的 CSV 文件读取批量导入数据"""
+    if request.is_json:
+        data = request.get_json()
+        items = data.get('ingredients') if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            raise ValueError("请求体必须是食材数组或 {\"ingredients\": [...]}")
+        return [(i + 1, item) for i, item in enumerate(items)]
+
+    upload = request.files.get('file')
+    if upload:
+        return read_csv_rows(upload.read().decode('utf-8-sig'))
+
+    if request.mimetype in ('text/csv', 'text/plain'):
+        return read_csv_rows(request.get_data(as_text=True).lstrip('\ufeff'))
+
+    raise ValueError("请提交 JSON 数组或 CSV（text/csv 请求体或 file 字段上传）")
+
 
 @bp.route('/', methods=['GET'])
 def get_ingredients():
@@ -125,6 +227,55 @@ def add_ingredient():
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/bulk', methods=['POST'])
+def bulk_import():
+    """
+    批量导入食材（小票扫描、补货）
+    POST /api/ingredients/bulk
+    Body: [{"name": "鸡蛋", "quantity": "6个", "category": "蛋奶", "storage_location": "fridge"}, ...]
+      或 CSV（Content-Type: text/csv，或 multipart 的 file 字段）:
+        name,quantity,category,storage_location
+        鸡蛋,6个,蛋奶,fridge
+    """
+    try:
+        try:
+            rows = read_bulk_rows()
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return jsonify({'error': str(e)}), 400
+
+        if not rows:
+            return jsonify({'error': '没有可导入的食材'}), 400
+
+        if len(rows) > Config.MAX_BULK_INGREDIENTS:
+            return jsonify({'error': f'单次最多导入 {Config.MAX_BULK_INGREDIENTS} 个食材'}), 400
+
+        # 一次性校验全部行，非法行单独报告，不影响其余行
+        valid, results = [], []
+        for line, row in rows:
+            cleaned, error = validate_ingredient_row(row)
+            if error:
+                name = row.get('name') if isinstance(row, dict) else None
+                results.append({'line': line, 'name': name, 'status': 'rejected', 'error': error})
+            else:
+                valid.append((line, cleaned))
+
+        if valid:
+            imported = ingredient_service.bulk_import(valid)
+            if imported is None:
+                return jsonify({'error': '批量导入食材失败'}), 500
+            results = sorted(results + imported, key=lambda r: r['line'])
+
+        summary = {status: sum(1 for r in results if r['status'] == status)
+                   for status in ('created', 'merged', 'rejected')}
+        return jsonify({
+            'success': summary['rejected'] < len(results),
+            'results': results,
+            **summary
+        }), 200 if summary['rejected'] < len(results) else 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/<int:ingredient_id>', methods=['PUT'])
 def update_ingredient(ingredient_id):
     """
@@ -183,3 +334,87 @@ def mark_as_common(ingredient_id):
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/lexicon', methods=['GET'])
+def get_lexicon():
+    """
+    获取规范食材词表
+    GET /api/ingredients/lexicon
+    """
+    try:
+        canonicals = ingredient_lexicon.list_canonicals()
+        return jsonify({
+            'success': True,
+            'canonicals': canonicals,
+            'count': len(canonicals)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/lexicon/resolve', methods=['GET'])
+def resolve_names():
+    """
+    名称映射为规范食材
+    GET /api/ingredients/lexicon/resolve?name=西红柿&name=土鸡蛋
+    """
+    try:
+        names = [name.strip() for name in request.args.getlist('name') if name.strip()]
+        if not names:
+            return jsonify({'error': 'name 不能为空'}), 400
+
+        resolved = [
+            {'name': name, 'canonical_id': canonical_id,
+             'canonical_name': ingredient_lexicon.canonical_name(canonical_id)}
+            for name, canonical_id in ingredient_lexicon.canonical_ids(names).items()
+        ]
+        return jsonify({
+            'success': True,
+            'results': resolved
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/lexicon/aliases', methods=['POST'])
+def add_alias():
+    """
+    登记食材别名（规范食材不存在时自动创建）
+    POST /api/ingredients/lexicon/aliases
+    Body: {"alias": "洋柿子", "canonical_name": "番茄", "category": "蔬菜"}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        alias = str(data.get('alias') or '').strip()
+        canonical_name = str(data.get('canonical_name') or '').strip()
+        if not alias or not canonical_name:
+            return jsonify({'error': '别名和规范名不能为空'}), 400
+        if len(alias) > 100 or len(canonical_name) > 100:
+            return jsonify({'error': '名称长度不能超过100个字符'}), 400
+
+        result = ingredient_lexicon.add_alias(alias, canonical_name, data.get('category'))
+        if not result:
+            return jsonify({'error': '登记别名失败'}), 500
+
+        return jsonify({'success': True, **result}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/lexicon/aliases/<int:alias_id>', methods=['DELETE'])
+def delete_alias(alias_id):
+    """
+    删除食材别名
+    DELETE /api/ingredients/lexicon/aliases/:id
+    """
+    try:
+        if not ingredient_lexicon.delete_alias(alias_id):
+            return jsonify({'error': '别名不存在'}), 404
+
+        return jsonify({
+            'success': True,
+            'message': '别名已删除'
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
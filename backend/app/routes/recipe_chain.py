@@ -3,9 +3,14 @@ Recipe Chain Routes
 链式食谱生成 API 端点
 """
 from flask import Blueprint, request, jsonify
+from config import Config
 from app.services.recipe_service import recipe_service
+from app.services.chain_run_service import chain_run_service
+from app.utils.deadline import Deadline
 from app import limiter
 
+DEADLINE_HEADER = 'X-Request-Deadline-Ms'
+
 bp = Blueprint('recipe_chain', __name__, url_prefix='/api/chain')
 
 
@@ -20,6 +25,20 @@ def _validate_request(data):
     return True, None
 
 
+def _parse_deadline():
+    """请求截止时间：请求头 X-Request-Deadline-Ms（剩余毫秒数）优先，否则使用配置"""
+    header = request.headers.get(DEADLINE_HEADER)
+    if header is None:
+        return True, Deadline(Config.CHAIN_DEADLINE_MS) if Config.CHAIN_DEADLINE_MS > 0 else None
+    try:
+        budget_ms = int(header)
+    except ValueError:
+        return False, f'{DEADLINE_HEADER} 必须是正整数'
+    if budget_ms <= 0:
+        return False, f'{DEADLINE_HEADER} 必须是正整数'
+    return True, Deadline(budget_ms)
+
+
 @bp.route('/process', methods=['POST'])
 @limiter.limit("10 per hour")
 def process_chain():
@@ -27,8 +46,13 @@ def process_chain():
     处理链式流程
     POST /api/chain/process
     Body: {"user_input": "..."}
+    Header: X-Request-Deadline-Ms（可选，剩余时间预算）
     """
     try:
+        valid, deadline = _parse_deadline()
+        if not valid:
+            return jsonify({'error': deadline}), 400
+
         if not request.is_json:
             return jsonify({'error': 'Content-Type 必须是 application/json'}), 400
 
@@ -37,15 +61,36 @@ def process_chain():
         if not valid:
             return jsonify({'error': error_msg}), 400
 
-        result = recipe_service.process_chain(data['user_input'].strip())
+        result = recipe_service.process_chain(data['user_input'].strip(), deadline)
 
         return jsonify({
             'success': True,
+            'run_id': result.get('run_id'),
+            'cached': result.get('cached', False),
+            'route': result.get('route'),
             'analysis': result.get('analysis', {}),
             'recipes': result.get('recipes', []),
             'substitutions': result.get('substitutions', {}),
             'missing_ingredients': result.get('missing_ingredients', []),
-            'substitution_candidates': result.get('substitution_candidates', {})
+            'substitution_candidates': result.get('substitution_candidates', {}),
+            'degraded': result.get('degraded', []),
+            'token_usage': result.get('token_usage', {})
         })
     except Exception as e:
         return jsonify({'error': f'服务器内部错误: {str(e)}'}), 500
+
+
+@bp.route('/runs/<int:run_id>', methods=['GET'])
+def get_chain_run(run_id):
+    """
+    回放链式流程运行结果（不调用模型）
+    GET /api/chain/runs/<run_id>
+    """
+    try:
+        run = chain_run_service.get_run(run_id)
+        if run is None:
+            return jsonify({'error': '运行记录不存在'}), 404
+
+        return jsonify({'success': True, **run})
+    except Exception as e:
+        return jsonify({'error': f'服务器内部错误: {str(e)}'}), 500
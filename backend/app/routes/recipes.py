@@ -2,11 +2,13 @@
 Recipe Routes
 食谱相关 API 端点
 """
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, Response, request, jsonify
 from app.services.recipe_service import recipe_service
-from app.models.recipe_progress import RecipeStepProgress
-from app.database import db
-from datetime import datetime
+from app.services.recipe_search_service import recipe_search_service
+from app.services.progress_service import progress_service
+from app.services.progress_hub import progress_hub
+from app.utils.json_payload import json_response
 from config import Config
 from app import limiter
 
@@ -120,9 +122,9 @@ def get_history():
     """
     try:
         limit = request.args.get('limit', 20, type=int)
-        history = recipe_service.get_recipe_history(limit)
+        history = recipe_service.get_recipe_history_payloads(limit)
 
-        return jsonify({
+        return json_response({
             'success': True,
             'history': history,
             'count': len(history)
@@ -131,6 +133,85 @@ def get_history():
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/search', methods=['GET'])
+def search_recipes():
+    """
+    全文检索食谱
+    GET /api/recipes/search?q=番茄&cuisine=中式&limit=20&offset=0
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': '请提供检索词 q'}), 400
+
+        filters = {
+            key: request.args[key]
+            for key in ('cuisine', 'taste', 'scenario', 'skill')
+            if request.args.get(key)
+        }
+        valid, error_msg = validate_filters(filters)
+        if not valid:
+            return jsonify({'error': error_msg}), 400
+
+        limit = min(request.args.get('limit', Config.DEFAULT_PAGE_SIZE, type=int), Config.MAX_PAGE_SIZE)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        recipes = recipe_search_service.search(query, filters, limit=limit, offset=offset)
+
+        return json_response({
+            'success': True,
+            'query': query,
+            'recipes': recipes,
+            'count': len(recipes)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/query', methods=['GET'])
+def query_recipes():
+    """
+    结构化筛选食谱（含分面统计）
+    GET /api/recipes/query?cuisine=中式&max_minutes=20&max_kcal=500&tag=快手菜&q=番茄&limit=20&offset=0
+    """
+    try:
+        filters = {
+            key: request.args[key]
+            for key in ('cuisine', 'taste', 'scenario', 'skill', 'q')
+            if request.args.get(key)
+        }
+        valid, error_msg = validate_filters(filters)
+        if not valid:
+            return jsonify({'error': error_msg}), 400
+
+        for key in ('min_minutes', 'max_minutes', 'min_kcal', 'max_kcal'):
+            if request.args.get(key):
+                value = request.args.get(key, type=int)
+                if value is None or value < 0:
+                    return jsonify({'error': f'{key} 必须是非负整数'}), 400
+                filters[key] = value
+
+        tags = [tag.strip() for tag in request.args.getlist('tag') if tag.strip()]
+        if tags:
+            filters['tags'] = tags
+
+        limit = min(request.args.get('limit', Config.DEFAULT_PAGE_SIZE, type=int), Config.MAX_PAGE_SIZE)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        with_facets = request.args.get('facets', 'true').lower() != 'false'
+        result = recipe_search_service.query(filters, limit=limit, offset=offset, with_facets=with_facets)
+
+        response = {
+            'success': True,
+            'recipes': result['recipes'],
+            'count': len(result['recipes'])
+        }
+        if with_facets:
+            response['total'] = result.get('total', 0)
+            response['facets'] = result.get('facets', {})
+        return json_response(response)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/<int:recipe_id>', methods=['GET'])
 def get_recipe(recipe_id):
     """
@@ -138,11 +219,11 @@ def get_recipe(recipe_id):
     GET /api/recipes/<id>
     """
     try:
-        recipe = recipe_service.get_recipe_by_id(recipe_id)
+        recipe = recipe_service.get_recipe_payload(recipe_id)
         if not recipe:
             return jsonify({'error': '食谱不存在'}), 404
 
-        return jsonify({
+        return json_response({
             'success': True,
             'recipe': recipe
         })
@@ -169,6 +250,21 @@ def delete_recipe(recipe_id):
         return jsonify({'error': str(e)}), 500
 
 
+def validate_step(step):
+    """验证单个步骤状态"""
+    if not isinstance(step, dict):
+        return False, "步骤状态格式错误"
+
+    step_index = step.get('step_index')
+    if not isinstance(step_index, int) or isinstance(step_index, bool) or step_index < 0:
+        return False, "step_index 必须是非负整数"
+
+    if 'is_completed' in step and not isinstance(step['is_completed'], bool):
+        return False, "is_completed 必须是布尔值"
+
+    return True, None
+
+
 @bp.route('/<int:recipe_id>/progress', methods=['GET'])
 def get_progress(recipe_id):
     """
@@ -176,15 +272,56 @@ def get_progress(recipe_id):
     GET /api/recipes/<id>/progress
     """
     try:
-        progress = RecipeStepProgress.query.filter_by(recipe_id=recipe_id).all()
+        progress = progress_service.get_progress(recipe_id)
         return jsonify({
             'success': True,
-            'progress': [p.to_dict() for p in progress]
+            'progress': progress
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/<int:recipe_id>/progress/stream', methods=['GET'])
+@limiter.exempt
+def stream_progress(recipe_id):
+    """
+    订阅步骤完成状态（Server-Sent Events）
+    GET /api/recipes/<id>/progress/stream
+
+    连接建立后先推送当前状态，之后每次进度写入推送一次完整状态；
+    空闲时定期发送心跳注释保持连接。
+    """
+    try:
+        if not progress_service.recipe_exists(recipe_id):
+            return jsonify({'error': '食谱不存在'}), 404
+
+        # 先订阅再读取当前状态，避免丢失两者之间的写入
+        subscription = progress_hub.subscribe(recipe_id)
+        initial = {'recipe_id': recipe_id, 'progress': progress_service.get_progress(recipe_id)}
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    def format_event(event):
+        event = dict(event)
+        seq = event.pop('seq', None)
+        lines = f"id: {seq}\n" if seq is not None else ''
+        return f"{lines}event: progress\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    def generate():
+        try:
+            yield f"retry: 3000\n{format_event(initial)}"
+            while True:
+                event = subscription.get(timeout=Config.PROGRESS_STREAM_KEEPALIVE)
+                yield format_event(event) if event is not None else ": keepalive\n\n"
+        finally:
+            progress_hub.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 @bp.route('/<int:recipe_id>/progress', methods=['POST'])
 def update_progress(recipe_id):
     """
@@ -193,38 +330,75 @@ def update_progress(recipe_id):
     Body: {"step_index": 0, "is_completed": true}
     """
     try:
-        data = request.get_json()
-        step_index = data.get('step_index')
-        is_completed = data.get('is_completed', False)
-
-        if step_index is None:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': '请求体必须是 JSON 对象'}), 400
+        if data.get('step_index') is None:
             return jsonify({'error': '请提供 step_index'}), 400
 
-        # 查找或创建进度记录
-        progress = RecipeStepProgress.query.filter_by(
-            recipe_id=recipe_id,
-            step_index=step_index
-        ).first()
+        valid, error = validate_step(data)
+        if not valid:
+            return jsonify({'error': error}), 400
+
+        progress = progress_service.update_steps(recipe_id, [data])
+        if progress is None:
+            return jsonify({'error': '更新步骤状态失败'}), 500
+
+        return jsonify({
+            'success': True,
+            'progress': next(p for p in progress if p['step_index'] == data['step_index'])
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:recipe_id>/progress', methods=['PUT'])
+def update_progress_batch(recipe_id):
+    """
+    批量更新步骤完成状态
+    PUT /api/recipes/<id>/progress
+    Body: {
+        "steps": [{"step_index": 0, "is_completed": true}, {"step_index": 1, "is_completed": true}],
+        "reset": false
+    }
+    """
+    try:
+        if not request.is_json:
+            return jsonify({'error': 'Content-Type 必须是 application/json'}), 400
+
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': '请求体必须是 JSON 对象'}), 400
+        steps = data.get('steps', [])
+        reset = data.get('reset', False)
+
+        if not isinstance(steps, list):
+            return jsonify({'error': 'steps 必须是列表'}), 400
+
+        if len(steps) > Config.MAX_PROGRESS_STEPS:
+            return jsonify({'error': f'单次最多更新 {Config.MAX_PROGRESS_STEPS} 个步骤'}), 400
 
-        if not progress:
-            progress = RecipeStepProgress(
-                recipe_id=recipe_id,
-                step_index=step_index
-            )
-            db.session.add(progress)
+        if not isinstance(reset, bool):
+            return jsonify({'error': 'reset 必须是布尔值'}), 400
 
-        progress.is_completed = is_completed
-        if is_completed:
-            progress.completed_at = datetime.utcnow()
-        else:
-            progress.completed_at = None
+        if not steps and not reset:
+            return jsonify({'error': '请提供 steps 或 reset'}), 400
+
+        for i, step in enumerate(steps):
+            valid, error = validate_step(step)
+            if not valid:
+                return jsonify({'error': f'第 {i + 1} 个步骤: {error}'}), 400
+
+        if not progress_service.recipe_exists(recipe_id):
+            return jsonify({'error': '食谱不存在'}), 404
 
-        db.session.commit()
+        progress = progress_service.update_steps(recipe_id, steps, reset=reset)
+        if progress is None:
+            return jsonify({'error': '更新步骤状态失败'}), 500
 
         return jsonify({
             'success': True,
-            'progress': progress.to_dict()
+            'progress': progress
         })
     except Exception as e:
-        db.session.rollback()
         return jsonify({'error': str(e)}), 500
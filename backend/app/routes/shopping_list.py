@@ -4,10 +4,47 @@ Shopping List Routes
 """
 from flask import Blueprint, request, jsonify
 from app.services.shopping_list_service import shopping_list_service
+from config import Config
 
 bp = Blueprint('shopping_list', __name__, url_prefix='/api/shopping-list')
 
 
+def validate_item_ids(ids):
+    """验证购物项 ID 列表，返回错误信息"""
+    if not isinstance(ids, list) or not ids:
+        return 'ids 必须是非空数组'
+    if not all(isinstance(item_id, int) and not isinstance(item_id, bool) for item_id in ids):
+        return 'ids 必须是整数数组'
+    if len(ids) > Config.MAX_BULK_SHOPPING_ITEMS:
+        return f'一次最多 {Config.MAX_BULK_SHOPPING_ITEMS} 个项目'
+    return None
+
+
+def parse_bulk_filter(data, allow_purchased=False):
+    """
+    解析批量操作的筛选条件 {ids, category[, is_purchased]}，返回 (条件, 错误信息)
+
+    至少需要一个条件，避免误操作整张清单
+    """
+    filters = {}
+    if 'ids' in data:
+        error = validate_item_ids(data['ids'])
+        if error:
+            return None, error
+        filters['ids'] = data['ids']
+    if 'category' in data:
+        if not isinstance(data['category'], str) or not data['category'].strip():
+            return None, 'category 必须是非空字符串'
+        filters['category'] = data['category'].strip()
+    if allow_purchased and 'is_purchased' in data:
+        if not isinstance(data['is_purchased'], bool):
+            return None, 'is_purchased 必须是布尔值'
+        filters['is_purchased'] = data['is_purchased']
+    if not filters:
+        return None, '请提供 ids 或 category'
+    return filters, None
+
+
 @bp.route('/', methods=['GET'])
 def get_shopping_list():
     """
@@ -112,23 +149,37 @@ def mark_purchased(item_id):
 @bp.route('/generate', methods=['POST'])
 def generate_from_recipe():
     """
-    从菜谱生成购物清单
+    从一个或多个菜谱生成购物清单（扣除库存、与已有清单合并）
     POST /api/shopping-list/generate
-    Body: {"recipe_id": 1}
+    Body: {"recipe_id": 1} 或 {"recipe_ids": [1, 2, 3]}
     """
     try:
-        data = request.get_json()
-        recipe_id = data.get('recipe_id')
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': '请求体必须是 JSON 对象'}), 400
+        recipe_ids = data.get('recipe_ids')
+        if recipe_ids is None and data.get('recipe_id'):
+            recipe_ids = [data.get('recipe_id')]
 
-        if not recipe_id:
+        if not recipe_ids:
             return jsonify({'error': '请提供食谱ID'}), 400
+        if not isinstance(recipe_ids, list) or not all(
+            isinstance(recipe_id, int) and not isinstance(recipe_id, bool) for recipe_id in recipe_ids
+        ):
+            return jsonify({'error': 'recipe_ids 必须是整数数组'}), 400
+        if len(recipe_ids) > Config.MAX_GENERATE_RECIPES:
+            return jsonify({'error': f'一次最多 {Config.MAX_GENERATE_RECIPES} 个食谱'}), 400
 
-        items = shopping_list_service.generate_from_recipe(recipe_id)
+        result = shopping_list_service.generate_from_recipes(recipe_ids)
+        if result is None:
+            return jsonify({'error': '生成购物清单失败'}), 500
+        if len(result['missing_recipe_ids']) == len(set(recipe_ids)):
+            return jsonify({'error': '食谱不存在'}), 404
 
         return jsonify({
             'success': True,
-            'items': items,
-            'count': len(items)
+            **result,
+            'count': len(result['items'])
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -141,13 +192,127 @@ def clear_purchased():
     DELETE /api/shopping-list/purchased
     """
     try:
-        success = shopping_list_service.clear_purchased()
-        if not success:
+        count = shopping_list_service.clear_purchased()
+        if count is None:
             return jsonify({'error': '清除失败'}), 500
 
         return jsonify({
             'success': True,
-            'message': '已购买项目已清除'
+            'message': '已购买项目已清除',
+            'deleted': count
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/bulk/purchase', methods=['POST'])
+def bulk_mark_purchased():
+    """
+    批量标记已购买/未购买
+    POST /api/shopping-list/bulk/purchase
+    Body: {"ids": [1, 2, 3]} 或 {"category": "蔬菜"}，可选 "is_purchased": false 取消勾选
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': '请求体必须是 JSON 对象'}), 400
+        filters, error = parse_bulk_filter(data)
+        if error:
+            return jsonify({'error': error}), 400
+        is_purchased = data.get('is_purchased', True)
+        if not isinstance(is_purchased, bool):
+            return jsonify({'error': 'is_purchased 必须是布尔值'}), 400
+
+        count = shopping_list_service.set_purchased(is_purchased, **filters)
+        if count is None:
+            return jsonify({'error': '批量标记失败'}), 500
+
+        return jsonify({
+            'success': True,
+            'updated': count
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/bulk/delete', methods=['POST'])
+def bulk_delete():
+    """
+    按条件批量删除
+    POST /api/shopping-list/bulk/delete
+    Body: {"ids": [1, 2]}、{"category": "调料", "is_purchased": true} 等
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': '请求体必须是 JSON 对象'}), 400
+        filters, error = parse_bulk_filter(data, allow_purchased=True)
+        if error:
+            return jsonify({'error': error}), 400
+
+        count = shopping_list_service.delete_items(**filters)
+        if count is None:
+            return jsonify({'error': '批量删除失败'}), 500
+
+        return jsonify({
+            'success': True,
+            'deleted': count
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/order', methods=['PUT'])
+def reorder():
+    """
+    调整清单顺序
+    PUT /api/shopping-list/order
+    Body: {"ids": [3, 1, 2]}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': '请求体必须是 JSON 对象'}), 400
+        error = validate_item_ids(data.get('ids'))
+        if error:
+            return jsonify({'error': error}), 400
+
+        count = shopping_list_service.reorder(data['ids'])
+        if count is None:
+            return jsonify({'error': '排序失败'}), 500
+
+        return jsonify({
+            'success': True,
+            'updated': count
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/merge', methods=['POST'])
+def merge_items():
+    """
+    合并重复的购物项
+    POST /api/shopping-list/merge
+    Body: {"ids": [1, 5]} 只在这些项目中合并同一食材、同一购买状态的项目；不传 ids 时自动合并未购买项目中的同一食材
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': '请求体必须是 JSON 对象'}), 400
+        ids = data.get('ids')
+        if ids is not None:
+            error = validate_item_ids(ids)
+            if error:
+                return jsonify({'error': error}), 400
+
+        result = shopping_list_service.merge_items(ids)
+        if result is None:
+            return jsonify({'error': '合并失败'}), 500
+
+        return jsonify({
+            'success': True,
+            **result
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -5,24 +5,49 @@ Substitution Routes
 from flask import Blueprint, request, jsonify
 from app.services.substitution_service import substitution_service
 from app.services.recipe_service import recipe_service
+from app.models.substitution import REVIEW_STATES
+from config import Config
 import json
 
 bp = Blueprint('substitutions', __name__, url_prefix='/api/substitutions')
 
 
+def validate_max_hops(max_hops):
+    """验证最大替代跳数，返回错误信息"""
+    if not isinstance(max_hops, int) or isinstance(max_hops, bool) \
+            or not 1 <= max_hops <= Config.SUBSTITUTION_MAX_HOPS:
+        return f'max_hops 必须是 1-{Config.SUBSTITUTION_MAX_HOPS} 的整数'
+    return None
+
+
 @bp.route('/<ingredient_name>', methods=['GET'])
 def get_substitutes(ingredient_name):
     """
     获取某食材的替代建议
-    GET /api/substitutions/<ingredient_name>?limit=5
+    GET /api/substitutions/<ingredient_name>?limit=5&direction=forward&max_hops=1
+
+    direction=reverse 时反向查询该食材可以替代哪些食材；
+    max_hops > 1 时包含多级替代路径（仅正向）
     """
     try:
         limit = request.args.get('limit', 5, type=int)
-        substitutes = substitution_service.get_substitutes(ingredient_name, limit)
+        direction = request.args.get('direction', 'forward')
+        if direction not in ('forward', 'reverse'):
+            return jsonify({'error': 'direction 只能是 forward 或 reverse'}), 400
+        max_hops = request.args.get('max_hops', 1, type=int)
+        error = validate_max_hops(max_hops)
+        if error:
+            return jsonify({'error': error}), 400
+
+        if direction == 'reverse':
+            substitutes = substitution_service.get_substituted_for(ingredient_name, limit)
+        else:
+            substitutes = substitution_service.get_substitutes(ingredient_name, limit, max_hops)
 
         return jsonify({
             'success': True,
             'ingredient': ingredient_name,
+            'direction': direction,
             'substitutes': substitutes,
             'count': len(substitutes)
         })
@@ -30,6 +55,42 @@ def get_substitutes(ingredient_name):
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/batch', methods=['POST'])
+def get_substitutes_batch():
+    """
+    批量获取多个食材的替代建议
+    POST /api/substitutions/batch
+    Body: {"names": ["柠檬汁", "黄油"], "limit": 5, "max_hops": 1}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        names = data.get('names')
+        limit = data.get('limit', 5)
+        max_hops = data.get('max_hops', 1)
+
+        if not isinstance(names, list) or not names:
+            return jsonify({'error': 'names 必须是非空数组'}), 400
+        if not all(isinstance(name, str) and name.strip() for name in names):
+            return jsonify({'error': 'names 必须是非空字符串数组'}), 400
+        if len(names) > Config.MAX_SUBSTITUTION_BATCH:
+            return jsonify({'error': f'一次最多查询 {Config.MAX_SUBSTITUTION_BATCH} 个食材'}), 400
+        if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= Config.MAX_SUBSTITUTION_LIMIT:
+            return jsonify({'error': f'limit 必须是 1-{Config.MAX_SUBSTITUTION_LIMIT} 的整数'}), 400
+        error = validate_max_hops(max_hops)
+        if error:
+            return jsonify({'error': error}), 400
+
+        substitutions = substitution_service.get_substitutes_many([name.strip() for name in names], limit, max_hops)
+
+        return jsonify({
+            'success': True,
+            'substitutions': substitutions,
+            'count': sum(1 for substitutes in substitutions.values() if substitutes)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/recipe/<int:recipe_id>', methods=['GET'])
 def get_recipe_substitutions(recipe_id):
     """
@@ -63,10 +124,15 @@ def get_recipe_substitutions(recipe_id):
 def get_all_substitutions():
     """
     获取所有替代关系
-    GET /api/substitutions
+    GET /api/substitutions?source=llm&review_state=pending
     """
     try:
-        substitutions = substitution_service.get_all_substitutions()
+        review_state = request.args.get('review_state')
+        if review_state and review_state not in REVIEW_STATES:
+            return jsonify({'error': f"review_state 只能是 {'/'.join(REVIEW_STATES)}"}), 400
+        substitutions = substitution_service.get_all_substitutions(
+            source=request.args.get('source'), review_state=review_state
+        )
         return jsonify({
             'success': True,
             'substitutions': substitutions,
@@ -108,6 +174,31 @@ def add_substitution():
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/<int:substitution_id>/review', methods=['PUT'])
+def review_substitution(substitution_id):
+    """
+    审核替代关系（主要用于模型写回的建议）
+    PUT /api/substitutions/<id>/review
+    Body: {"review_state": "approved"}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        review_state = data.get('review_state')
+        if review_state not in REVIEW_STATES:
+            return jsonify({'error': f"review_state 只能是 {'/'.join(REVIEW_STATES)}"}), 400
+
+        substitution = substitution_service.review_substitution(substitution_id, review_state)
+        if not substitution:
+            return jsonify({'error': '替代关系不存在'}), 404
+
+        return jsonify({
+            'success': True,
+            'substitution': substitution
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/<int:substitution_id>', methods=['DELETE'])
 def delete_substitution(substitution_id):
     """
@@ -0,0 +1,109 @@
+"""
+Chain Run Service
+链式流程运行记录服务：保存每次运行结果，相同（规范化后）输入在有效期内直接复用
+"""
+import hashlib
+import json
+import logging
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from config import Config
+from app.database import db
+from app.models.chain_run import ChainRun
+from app.services.ingredient_lexicon import ingredient_lexicon
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class ChainRunService:
+    """链式流程运行记录服务"""
+
+    @staticmethod
+    def normalize_input(user_input: str) -> str:
+        """
+        规范化输入：全角转半角、小写、去除标点与空白，食材别名替换为规范名称
+
+        "有鸡蛋西红柿" 与 "有 鸡蛋、西红柿" 均为 "有鸡蛋番茄"
+        """
+        text = ''.join(
+            char for char in unicodedata.normalize('NFKC', user_input or '').lower() if char.isalnum()
+        )
+        parts = []
+        position = 0
+        for match in ingredient_lexicon.find_all(text):
+            parts.append(text[position:match['start']])
+            parts.append(match['name'])
+            position = match['end']
+        parts.append(text[position:])
+        return ''.join(parts)
+
+    @staticmethod
+    def _hash(normalized: str) -> str:
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def find_cached(normalized: str) -> Optional[Dict[str, Any]]:
+        """查找有效期内相同规范化输入的最近一次运行结果（有阶段降级的结果不复用）"""
+        if Config.CHAIN_RUN_CACHE_TTL_SECONDS <= 0 or not normalized:
+            return None
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=Config.CHAIN_RUN_CACHE_TTL_SECONDS)
+            run = ChainRun.query.filter(
+                ChainRun.input_hash == ChainRunService._hash(normalized),
+                ChainRun.created_at >= cutoff,
+                ChainRun.degraded.is_(False)
+            ).order_by(ChainRun.created_at.desc(), ChainRun.id.desc()).first()
+            # 哈希相同仍比对原文，避免碰撞时返回其他输入的结果
+            if run is None or run.normalized_input != normalized:
+                return None
+            logger.info(f"✅ 链式结果命中缓存: 运行记录 {run.id}")
+            return run.to_payload()
+        except Exception as e:
+            logger.error(f"❌ 查询链式缓存失败: {e}")
+            return None
+
+    @staticmethod
+    def record(user_input: str, normalized: str, result: Dict[str, Any]) -> Optional[ChainRun]:
+        """保存运行结果（失败时仅记录日志，不影响本次响应）"""
+        try:
+            run = ChainRun(
+                user_input=user_input,
+                normalized_input=normalized,
+                input_hash=ChainRunService._hash(normalized),
+                route=result.get('route'),
+                analysis=json.dumps(result.get('analysis', {}), ensure_ascii=False, default=str),
+                response=json.dumps(result, ensure_ascii=False, default=str),
+                recipe_ids=json.dumps([
+                    recipe['id'] for recipe in result.get('recipes', [])
+                    if isinstance(recipe, dict) and recipe.get('id') is not None
+                ]),
+                degraded=bool(result.get('degraded'))
+            )
+            db.session.add(run)
+            db.session.commit()
+            logger.info(f"💾 链式运行记录已保存: {run.id}")
+            return run
+        except Exception as e:
+            logger.error(f"❌ 保存链式运行记录失败: {e}")
+            db.session.rollback()
+            return None
+
+    @staticmethod
+    def get_run(run_id: int) -> Optional[Dict[str, Any]]:
+        """按 ID 回放运行结果"""
+        try:
+            run = db.session.get(ChainRun, run_id)
+            return run.to_payload() if run else None
+        except Exception as e:
+            logger.error(f"❌ 获取链式运行记录失败: {e}")
+            return None
+
+
+# 创建全局服务实例
+chain_run_service = ChainRunService()
@@ -4,8 +4,10 @@ Favorite Service
 """
 import logging
 from typing import List, Dict, Any, Optional
+from sqlalchemy import func
 from app.database import db
 from app.models.favorite import Favorite, FavoriteGroup
+from app.services.recipe_cache import recipe_payload_cache
 
 # 配置日志
 logging.basicConfig(
@@ -18,13 +20,30 @@ logger = logging.getLogger(__name__)
 class FavoriteService:
     """收藏服务"""
 
+    @staticmethod
+    def _serialize_many(favorites: List[Favorite]) -> List[Dict[str, Any]]:
+        """
+        批量序列化收藏
+
+        食谱部分取自序列化缓存，未命中的食谱用一条 IN 查询加载，
+        不逐条访问 favorite.recipe。
+        """
+        payloads = recipe_payload_cache.payloads_by_id(fav.recipe_id for fav in favorites)
+        result = []
+        for fav in favorites:
+            item = fav.to_dict(include_recipe=False)
+            if fav.recipe_id in payloads:
+                item['recipe'] = payloads[fav.recipe_id]
+            result.append(item)
+        return result
+
     @staticmethod
     def get_all_favorites() -> List[Dict[str, Any]]:
         """获取所有收藏"""
         try:
             favorites = Favorite.query.order_by(Favorite.created_at.desc()).all()
             logger.info(f"✅ 获取所有收藏成功，共 {len(favorites)} 个")
-            return [fav.to_dict(include_recipe=True) for fav in favorites]
+            return FavoriteService._serialize_many(favorites)
         except Exception as e:
             logger.error(f"❌ 获取收藏失败: {e}")
             return []
@@ -35,7 +54,7 @@ class FavoriteService:
         try:
             favorites = Favorite.query.filter_by(group_id=group_id).all()
             logger.info(f"✅ 按分组 {group_id} 获取收藏成功，共 {len(favorites)} 个")
-            return [fav.to_dict(include_recipe=True) for fav in favorites]
+            return FavoriteService._serialize_many(favorites)
         except Exception as e:
             logger.error(f"❌ 按分组获取收藏失败: {e}")
             return []
@@ -79,9 +98,17 @@ class FavoriteService:
     def get_all_groups() -> List[Dict[str, Any]]:
         """获取所有分组"""
         try:
-            groups = FavoriteGroup.query.order_by(FavoriteGroup.created_at.desc()).all()
-            logger.info(f"✅ 获取所有分组成功，共 {len(groups)} 个")
-            return [group.to_dict() for group in groups]
+            # 先按 group_id 聚合计数（走 ix_favorites_group_id），再与分组左连接
+            counts = db.session.query(
+                Favorite.group_id, func.count().label('favorites_count')
+            ).group_by(Favorite.group_id).subquery()
+            rows = db.session.query(
+                FavoriteGroup, func.coalesce(counts.c.favorites_count, 0)
+            ).outerjoin(
+                counts, counts.c.group_id == FavoriteGroup.id
+            ).order_by(FavoriteGroup.created_at.desc()).all()
+            logger.info(f"✅ 获取所有分组成功，共 {len(rows)} 个")
+            return [group.to_dict(favorites_count=count) for group, count in rows]
         except Exception as e:
             logger.error(f"❌ 获取分组失败: {e}")
             return []
@@ -97,7 +124,7 @@ class FavoriteService:
             db.session.add(group)
             db.session.commit()
             logger.info(f"✅ 创建分组成功: {group.name}")
-            return group.to_dict()
+            return group.to_dict(favorites_count=0)
         except Exception as e:
             logger.error(f"❌ 创建分组失败: {e}")
             db.session.rollback()
@@ -0,0 +1,305 @@
+"""
+Ingredient Lexicon
+食材规范名服务：别名 -> 规范食材 ID
+
+进程内维护一个由 ingredient_aliases 编译的别名自动机，名称映射为 O(名称长度)：
+精确命中别名优先，否则取名称末尾的最长别名（"土鸡蛋"、"新鲜鸡蛋" -> 鸡蛋）。
+食材、购物清单与替代关系写入时通过 ORM 事件填充 canonical_id；
+别名增删随事务提交应用到自动机的副本，编译后整体替换（读者始终使用完整编译的自动机，无需加锁），回滚时丢弃；同时递增 cache_versions 中的版本号，
+其他 worker 进程比对版本号后重新编译。
+"""
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import event, inspect, select, func, update
+from sqlalchemy.orm import Session, selectinload
+from config import Config
+from app.database import db
+from app.models.cache_version import bump_version
+from app.models.canonical_ingredient import CanonicalIngredient, IngredientAlias
+from app.models.ingredient import Ingredient
+from app.models.shopping_list import ShoppingListItem
+from app.models.substitution import IngredientSubstitution
+from app.services.substitution_graph import mark_changed as mark_substitutions_changed, refresh_closure
+from app.utils.alias_trie import AliasAutomaton, normalize_alias
+from app.utils.version_stamp import VersionStamp
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CACHE_NAME = 'ingredient_aliases'
+
+# 会话上待提交的别名变更: [(别名, 规范 ID 或 None 表示删除)]
+_PENDING_KEY = 'ingredient_lexicon_changes'
+# 会话上本事务递增后的版本号
+_VERSION_KEY = 'ingredient_lexicon_version'
+
+# 名称列 -> 规范 ID 列（新增或名称变化时重新映射）
+LINKED_COLUMNS = {
+    Ingredient: [('name', 'canonical_id')],
+    ShoppingListItem: [('ingredient_name', 'canonical_id')],
+    IngredientSubstitution: [('original_ingredient', 'original_canonical_id'),
+                             ('substitute_ingredient', 'substitute_canonical_id')],
+}
+
+
+class IngredientLexicon:
+    """别名自动机与规范食材名称"""
+
+    def __init__(self):
+        self._automaton: Optional[AliasAutomaton[int]] = None
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.stamp = VersionStamp(CACHE_NAME, Config.CACHE_VERSION_CHECK_SECONDS)
+
+    def load(self, connection=None):
+        """从数据库全量编译别名自动机"""
+        connection = connection if connection is not None else db.session.connection()
+        version = self.stamp.read(connection)
+        automaton: AliasAutomaton[int] = AliasAutomaton()
+        names = dict(connection.execute(
+            select(CanonicalIngredient.id, CanonicalIngredient.name)
+        ).all())
+        for alias, canonical_id in connection.execute(
+            select(IngredientAlias.alias, IngredientAlias.canonical_id)
+        ):
+            automaton.add(alias, canonical_id)
+        automaton.build()
+        with self._lock:
+            self._automaton = automaton
+            self._names = names
+        self.stamp.mark_loaded(version)
+        logger.info(f"✅ 食材别名自动机已编译: {len(names)} 个规范食材，{len(automaton)} 个别名")
+
+    def reset(self):
+        """丢弃内存状态，下次使用时重新加载"""
+        with self._lock:
+            self._automaton = None
+            self._names = {}
+
+    def _ensure_loaded(self, connection=None) -> AliasAutomaton:
+        automaton = self._automaton
+        if automaton is None or self.stamp.changed(connection if connection is not None
+                                                   else db.session.connection):
+            self.load(connection)
+            automaton = self._automaton
+        return automaton
+
+    def canonical_id(self, name: Optional[str], connection=None) -> Optional[int]:
+        """名称 -> 规范食材 ID，未收录返回 None"""
+        if not name:
+            return None
+        return self._ensure_loaded(connection).resolve(name)
+
+    def canonical_ids(self, names: Iterable[str]) -> Dict[str, Optional[int]]:
+        """批量映射 {名称: 规范 ID}"""
+        automaton = self._ensure_loaded()
+        return {name: automaton.resolve(name) if name else None for name in names}
+
+    def canonical_name(self, canonical_id: Optional[int]) -> Optional[str]:
+        """规范食材 ID -> 规范名"""
+        self._ensure_loaded()
+        return self._names.get(canonical_id)
+
+    def find_all(self, text: str) -> List[Dict[str, Any]]:
+        """从整句中提取食材（最左最长匹配）"""
+        return [
+            {'name': self._names.get(canonical_id, alias), 'alias': alias,
+             'canonical_id': canonical_id, 'start': start, 'end': end}
+            for start, end, alias, canonical_id in self._ensure_loaded().find_all(text or '')
+        ]
+
+    def annotate(self, ingredients: Any) -> list:
+        """为食材字典列表附加 canonical_id（食谱食材、链式分析结果）"""
+        if not isinstance(ingredients, list):
+            return []
+        automaton = self._ensure_loaded()
+        return [
+            {**ing, 'canonical_id': automaton.resolve(str(ing.get('name') or ''))} if isinstance(ing, dict) else ing
+            for ing in ingredients
+        ]
+
+    def _apply(self, changes: List[tuple], version: int):
+        """
+        提交后把别名变更应用到自动机副本，编译完成后替换引用（期间有其他进程的变更时改为重新加载）
+
+        正在匹配的线程继续使用旧自动机，不会看到修改到一半、失败指针尚未重建的节点。
+        """
+        # 写者之间串行，读者不加锁
+        with self._lock:
+            current = self._automaton
+            if current is None:
+                return
+            if self.stamp.version != version - 1:
+                self._automaton = None
+                self._names = {}
+                return
+            automaton = current.copy()
+            names = dict(self._names)
+            for alias, canonical_id, canonical_name in changes:
+                if canonical_id is None:
+                    automaton.remove(alias)
+                else:
+                    automaton.add(alias, canonical_id)
+                    if canonical_name:
+                        names[canonical_id] = canonical_name
+            automaton.build()
+            self._automaton = automaton
+            self._names = names
+        self.stamp.mark_loaded(version)
+
+    # ---- 管理接口 ----
+
+    def list_canonicals(self) -> List[Dict[str, Any]]:
+        """全部规范食材及其别名"""
+        try:
+            canonicals = CanonicalIngredient.query.options(
+                selectinload(CanonicalIngredient.aliases)
+            ).order_by(CanonicalIngredient.name).all()
+            return [canonical.to_dict() for canonical in canonicals]
+        except Exception as e:
+            logger.error(f"❌ 获取规范食材失败: {e}")
+            return []
+
+    def add_alias(self, alias: str, canonical_name: str, category: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        登记别名（规范食材不存在时一并创建），并为已有记录补齐 canonical_id
+
+        别名已指向其他规范食材时改为指向 canonical_name
+        """
+        try:
+            key = normalize_alias(alias)
+            canonical_key = normalize_alias(canonical_name)
+            changed = {key}
+            canonical = CanonicalIngredient.query.filter_by(name=canonical_key).first()
+            if canonical is None:
+                canonical = CanonicalIngredient(name=canonical_key, category=category)
+                db.session.add(canonical)
+                db.session.flush()
+                if canonical_key != key:
+                    db.session.add(IngredientAlias(alias=canonical_key, canonical_id=canonical.id))
+                    changed.add(canonical_key)
+
+            record = IngredientAlias.query.filter_by(alias=key).first()
+            if record is None:
+                record = IngredientAlias(alias=key, canonical_id=canonical.id)
+                db.session.add(record)
+            else:
+                record.canonical_id = canonical.id
+            db.session.commit()
+
+            linked = sum(self.relink(changed_alias) for changed_alias in changed)
+            logger.info(f"✅ 登记食材别名成功: {key} -> {canonical.name}，重新关联 {linked} 条记录")
+            return {'alias': record.to_dict(), 'canonical': canonical.to_dict(), 'relinked': linked}
+        except Exception as e:
+            logger.error(f"❌ 登记食材别名失败: {e}")
+            db.session.rollback()
+            return None
+
+    def delete_alias(self, alias_id: int) -> bool:
+        """删除别名（已关联的记录保留原 canonical_id）"""
+        try:
+            record = db.session.get(IngredientAlias, alias_id)
+            if record is None:
+                logger.warning(f"⚠️  食材别名不存在: ID {alias_id}")
+                return False
+            db.session.delete(record)
+            db.session.commit()
+            logger.info(f"✅ 删除食材别名成功: {record.alias}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ 删除食材别名失败: {e}")
+            db.session.rollback()
+            return False
+
+    def relink(self, alias: str) -> int:
+        """
+        新别名生效后重新映射以其结尾的记录（只有这些名称的映射结果可能变化）
+        """
+        key = normalize_alias(alias)
+        pattern = '%' + key.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        linked = 0
+        substitutions_changed = False
+        for model, columns in LINKED_COLUMNS.items():
+            for name_column, id_column in columns:
+                name_attr = getattr(model, name_column)
+                rows = db.session.query(model.id, name_attr, getattr(model, id_column)).filter(
+                    func.lower(name_attr).like(pattern, escape='\\')
+                ).all()
+                updates = []
+                for row_id, name, current in rows:
+                    canonical_id = self.canonical_id(name)
+                    if canonical_id != current:
+                        updates.append({'id': row_id, id_column: canonical_id})
+                if updates:
+                    db.session.execute(update(model), updates)
+                    linked += len(updates)
+                    substitutions_changed = substitutions_changed or model is IngredientSubstitution
+        if substitutions_changed:
+            # 规范 ID 变化改变了替代关系图的节点标识，多级替代路径全量重算
+            refresh_closure(db.session.connection())
+            mark_substitutions_changed(db.session)
+        db.session.commit()
+        return linked
+
+
+def _record_change(session, connection, alias: str, canonical_id: Optional[int],
+                   canonical_name: Optional[str] = None):
+    session.info.setdefault(_PENDING_KEY, []).append((alias, canonical_id, canonical_name))
+    if _VERSION_KEY not in session.info:
+        session.info[_VERSION_KEY] = bump_version(connection, CACHE_NAME)
+
+
+@event.listens_for(IngredientAlias, 'after_insert')
+@event.listens_for(IngredientAlias, 'after_update')
+def _alias_written(mapper, connection, target):
+    canonical_name = connection.execute(
+        select(CanonicalIngredient.name).where(CanonicalIngredient.id == target.canonical_id)
+    ).scalar()
+    _record_change(Session.object_session(target), connection, target.alias, target.canonical_id, canonical_name)
+
+
+@event.listens_for(IngredientAlias, 'after_delete')
+def _alias_deleted(mapper, connection, target):
+    _record_change(Session.object_session(target), connection, target.alias, None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_alias_changes(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    version = session.info.pop(_VERSION_KEY, None)
+    if changes:
+        ingredient_lexicon._apply(changes, version)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_alias_changes(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_VERSION_KEY, None)
+
+
+def _link_on_insert(mapper, connection, target):
+    """新增记录按名称填充规范 ID"""
+    for name_column, id_column in LINKED_COLUMNS[type(target)]:
+        setattr(target, id_column, ingredient_lexicon.canonical_id(getattr(target, name_column), connection))
+
+
+def _link_on_update(mapper, connection, target):
+    """名称变化时重新映射规范 ID"""
+    state = inspect(target)
+    for name_column, id_column in LINKED_COLUMNS[type(target)]:
+        if state.attrs[name_column].history.has_changes():
+            setattr(target, id_column, ingredient_lexicon.canonical_id(getattr(target, name_column), connection))
+
+
+for _model in LINKED_COLUMNS:
+    event.listen(_model, 'before_insert', _link_on_insert)
+    event.listen(_model, 'before_update', _link_on_update)
+
+
+# 创建全局实例（首次使用时从数据库加载）
+ingredient_lexicon = IngredientLexicon()
@@ -3,9 +3,14 @@ Ingredient Service
 食材管理服务
 """
 import logging
-from typing import List, Dict, Any, Optional
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import func, insert, update
 from app.database import db
 from app.models.ingredient import Ingredient
+from app.services.ingredient_lexicon import ingredient_lexicon
+from app.utils.quantity import add_quantities, quantity_columns
+from app.utils.write_batcher import write_batcher
 
 # 配置日志
 logging.basicConfig(
@@ -14,6 +19,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 允许通过 update_ingredient 修改的字段
+UPDATABLE_FIELDS = ['name', 'quantity', 'state', 'category', 'storage_location', 'is_common']
+
+# 批量导入时合并到已有食材的属性字段（数量单独累加）
+MERGE_FIELDS = ['state', 'category', 'storage_location', 'is_common']
+
+QUANTITY_MAX_LENGTH = 50
+
+
+def normalize_name(name: str) -> str:
+    """食材名称归一化：去首尾空白、合并连续空白、小写"""
+    return ' '.join(name.split()).lower()
+
 
 class IngredientService:
     """食材服务"""
@@ -84,27 +102,117 @@ class IngredientService:
             return None
 
     @staticmethod
-    def update_ingredient(ingredient_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """更新食材"""
+    def _find_by_names(keys: List[str]) -> Dict[str, Any]:
+        """按归一化名称查找已有食材，同名多条时取 id 最小的一条"""
+        found = {}
+        if not keys:
+            return found
+        matches = db.session.query(Ingredient.id, Ingredient.name, Ingredient.quantity).filter(
+            func.lower(func.trim(Ingredient.name)).in_(keys)
+        ).order_by(Ingredient.id)
+        for match in matches:
+            found.setdefault(normalize_name(match.name), match)
+        return found
+
+    @staticmethod
+    def bulk_import(rows: List[Tuple[int, Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+        """
+        批量导入食材（单个事务）
+
+        rows: [(行号, 已校验的食材数据), ...]
+        同名（归一化后）的行先合并，再与已有食材合并：数量单位相同则相加，
+        其余属性以导入数据为准。新增与更新各用一次 executemany 写入。
+        返回逐行结果 [{"line", "name", "status": created/merged/rejected, "id"/"error"}]
+        """
         try:
-            ingredient = Ingredient.query.get(ingredient_id)
-            if not ingredient:
-                return None
+            groups: Dict[str, Dict[str, Any]] = {}
+            for line, row in rows:
+                key = normalize_name(row['name'])
+                group = groups.get(key)
+                if group is None:
+                    groups[key] = {'values': dict(row), 'lines': [(line, row['name'])]}
+                    continue
+                values = group['values']
+                values['quantity'] = add_quantities(values.get('quantity'), row.get('quantity'))
+                values.update({field: row[field] for field in MERGE_FIELDS if field in row})
+                group['lines'].append((line, row['name']))
+
+            existing = IngredientService._find_by_names(list(groups))
 
-            if 'name' in data:
-                ingredient.name = data['name']
-            if 'quantity' in data:
-                ingredient.quantity = data['quantity']
-            if 'state' in data:
-                ingredient.state = data['state']
-            if 'category' in data:
-                ingredient.category = data['category']
-            if 'storage_location' in data:
-                ingredient.storage_location = data['storage_location']
-            if 'is_common' in data:
-                ingredient.is_common = data['is_common']
+            now = datetime.utcnow()
+            inserts, updates, rejected = [], [], {}
+            for key, group in groups.items():
+                values = group['values']
+                target = existing.get(key)
+                quantity = add_quantities(target.quantity, values.get('quantity')) if target else values.get('quantity')
+                if quantity and len(quantity) > QUANTITY_MAX_LENGTH:
+                    rejected[key] = f'合并后数量超过 {QUANTITY_MAX_LENGTH} 个字符: {quantity}'
+                elif target:
+                    update_values = {field: values[field] for field in MERGE_FIELDS if field in values}
+                    updates.append({**update_values, 'id': target.id, 'quantity': quantity,
+                                    **quantity_columns(quantity), 'updated_at': now})
+                else:
+                    inserts.append({
+                        'name': values['name'],
+                        'canonical_id': ingredient_lexicon.canonical_id(values['name']),
+                        'quantity': quantity,
+                        **quantity_columns(quantity),
+                        'state': values.get('state'),
+                        'category': values.get('category'),
+                        'storage_location': values.get('storage_location'),
+                        'is_common': values.get('is_common', False),
+                        'created_at': now,
+                        'updated_at': now
+                    })
 
+            if updates:
+                db.session.execute(update(Ingredient), updates)
+            if inserts:
+                # 使用 Core 表对象 executemany：ORM 批量插入会按非空字段拆成多条语句
+                db.session.execute(insert(Ingredient.__table__), inserts)
+                ids = {key: match.id for key, match in IngredientService._find_by_names(list(groups)).items()}
+            else:
+                ids = {key: match.id for key, match in existing.items()}
             db.session.commit()
+
+            results = []
+            for key, group in groups.items():
+                for i, (line, name) in enumerate(group['lines']):
+                    if key in rejected:
+                        results.append({'line': line, 'name': name, 'status': 'rejected', 'error': rejected[key]})
+                        continue
+                    created = key not in existing and i == 0
+                    results.append({'line': line, 'name': name, 'status': 'created' if created else 'merged',
+                                    'id': ids[key]})
+            merged = sum(1 for r in results if r['status'] == 'merged')
+            logger.info(f"✅ 批量导入食材成功: 新增 {len(inserts)} 个，合并 {merged} 行")
+            return sorted(results, key=lambda r: r['line'])
+        except Exception as e:
+            logger.error(f"❌ 批量导入食材失败: {e}")
+            db.session.rollback()
+            return None
+
+    @staticmethod
+    def update_ingredient(ingredient_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """更新食材（开启 ingredient 组提交时与并发写合并提交）"""
+        try:
+            values = {field: data[field] for field in UPDATABLE_FIELDS if field in data}
+            values['updated_at'] = datetime.utcnow()
+            if 'quantity' in values:
+                # Core UPDATE 不经过模型的 validates，需要同步结构化数量列
+                values.update(quantity_columns(values['quantity']))
+            if 'name' in values:
+                values['canonical_id'] = ingredient_lexicon.canonical_id(values['name'])
+
+            def write(conn):
+                return conn.execute(
+                    update(Ingredient).where(Ingredient.id == ingredient_id).values(**values)
+                ).rowcount
+
+            if not write_batcher.execute('ingredient', write, db.session):
+                return None
+
+            ingredient = db.session.get(Ingredient, ingredient_id, populate_existing=True)
             logger.info(f"✅ 更新食材成功: {ingredient.name}")
             return ingredient.to_dict()
         except Exception as e:
@@ -0,0 +1,207 @@
+"""
+Progress Hub
+步骤进度推送中心：进度写入后发布事件，SSE 连接订阅对应食谱的事件
+
+事件内容是该食谱完整的步骤状态列表，客户端直接覆盖本地状态即可，丢弃中间事件不影响正确性。
+
+后端:
+- memory: 进程内直接分发（单进程部署）
+- database: 事件写入 progress_events 表，每个进程一个订阅线程按 id 顺序读取后分发，
+  多个 worker 进程共享同一数据库时互相可见（本地消息中转的替代方案）
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Set
+from sqlalchemy import func, select, delete, insert
+from sqlalchemy.engine import Engine
+from app.models.progress_event import ProgressEvent
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[int, Dict[str, Any]], None]
+
+
+class Subscription:
+    """单个 SSE 连接的事件队列"""
+
+    def __init__(self, recipe_id: int, maxsize: int = 16):
+        self.recipe_id = recipe_id
+        self._queue: 'queue.Queue[Dict[str, Any]]' = queue.Queue(maxsize=maxsize)
+
+    def put(self, event: Dict[str, Any]):
+        """放入事件；客户端消费过慢时丢弃最旧的事件（事件是完整状态，只需最新）"""
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """等待下一个事件，超时返回 None"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class MemoryBackend:
+    """进程内后端：发布即分发"""
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    def publish(self, recipe_id: int, event: Dict[str, Any]):
+        self._deliver(recipe_id, event)
+
+
+class DatabaseBackend:
+    """
+    数据库后端：事件写入 progress_events，订阅线程轮询新事件
+
+    每个进程只有一个轮询线程，查询走主键范围扫描，与 SSE 连接数无关。
+    超过保留期的事件由轮询线程定期清理。
+    """
+
+    def __init__(self, engine: Engine, poll_ms: float = 100, retention_seconds: int = 300):
+        self.engine = engine
+        self.poll = poll_ms / 1000.0
+        self.retention = timedelta(seconds=retention_seconds)
+        self._table = ProgressEvent.__table__
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+        with self.engine.connect() as conn:
+            # 只分发启动之后的事件
+            self._last_id = conn.execute(select(func.max(self._table.c.id))).scalar() or 0
+        self._thread = threading.Thread(target=self._run, name='progress-hub', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+    def publish(self, recipe_id: int, event: Dict[str, Any]):
+        with self.engine.begin() as conn:
+            conn.execute(insert(self._table).values(
+                recipe_id=recipe_id,
+                payload=json.dumps(event, ensure_ascii=False),
+                created_at=datetime.utcnow()
+            ))
+
+    def poll_once(self):
+        """读取并分发上次之后的新事件"""
+        table = self._table
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.recipe_id, table.c.payload)
+                .where(table.c.id > self._last_id).order_by(table.c.id)
+            ).all()
+        for event_id, recipe_id, payload in rows:
+            self._last_id = event_id
+            self._deliver(recipe_id, json.loads(payload))
+
+    def prune(self):
+        """清理过期事件"""
+        with self.engine.begin() as conn:
+            conn.execute(delete(self._table).where(
+                self._table.c.created_at < datetime.utcnow() - self.retention
+            ))
+
+    def _run(self):
+        last_prune = time.monotonic()
+        while not self._stopped.wait(self.poll):
+            try:
+                self.poll_once()
+                if time.monotonic() - last_prune > self.retention.total_seconds():
+                    self.prune()
+                    last_prune = time.monotonic()
+            except Exception as e:
+                logger.error(f"❌ 读取进度事件失败: {e}")
+
+
+class ProgressHub:
+    """进度发布/订阅中心"""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.backend = None
+
+    def init_app(self, app, engine: Engine):
+        """按配置选择后端"""
+        backend = app.config.get('PROGRESS_HUB_BACKEND', 'memory')
+        if backend == 'database':
+            self.use_backend(DatabaseBackend(
+                engine,
+                poll_ms=app.config.get('PROGRESS_HUB_POLL_MS', 100),
+                retention_seconds=app.config.get('PROGRESS_HUB_RETENTION', 300)
+            ))
+        else:
+            self.use_backend(MemoryBackend())
+
+    def use_backend(self, backend):
+        """切换后端"""
+        if isinstance(self.backend, DatabaseBackend):
+            self.backend.stop()
+        self.backend = backend
+        backend.start(self._deliver)
+        logger.info(f"✅ 进度推送后端: {type(backend).__name__}")
+
+    def subscribe(self, recipe_id: int) -> Subscription:
+        """订阅食谱的进度事件"""
+        subscription = Subscription(recipe_id)
+        with self._lock:
+            self._subscribers.setdefault(recipe_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """取消订阅"""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.recipe_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.recipe_id]
+
+    def subscriber_count(self, recipe_id: int) -> int:
+        """当前订阅数"""
+        with self._lock:
+            return len(self._subscribers.get(recipe_id, ()))
+
+    def publish(self, recipe_id: int, event: Dict[str, Any]):
+        """发布事件（失败只记录日志，不影响进度写入）"""
+        if self.backend is None:
+            return
+        try:
+            self.backend.publish(recipe_id, event)
+        except Exception as e:
+            logger.error(f"❌ 发布进度事件失败: {e}")
+
+    def _deliver(self, recipe_id: int, event: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers.get(recipe_id, ()))
+            self._seq += 1
+            event = {**event, 'seq': self._seq}
+        for subscription in subscribers:
+            subscription.put(event)
+
+
+# 创建全局推送中心实例（create_app 中按配置初始化后端）
+progress_hub = ProgressHub()
@@ -0,0 +1,111 @@
+"""
+Progress Service
+食谱步骤进度服务
+"""
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from app.database import db
+from app.models.recipe import Recipe
+from app.models.recipe_progress import RecipeStepProgress
+from app.services.progress_hub import progress_hub
+from app.utils.write_batcher import write_batcher
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# 支持 INSERT ... ON CONFLICT DO UPDATE 的方言
+UPSERT_DIALECTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+class ProgressService:
+    """步骤进度服务"""
+
+    @staticmethod
+    def recipe_exists(recipe_id: int) -> bool:
+        """判断食谱是否存在（只查主键，不加载 JSON 列）"""
+        return db.session.query(Recipe.id).filter_by(id=recipe_id).first() is not None
+
+    @staticmethod
+    def get_progress(recipe_id: int) -> List[Dict[str, Any]]:
+        """获取食谱的全部步骤状态"""
+        try:
+            progress = RecipeStepProgress.query.filter_by(
+                recipe_id=recipe_id
+            ).order_by(RecipeStepProgress.step_index).all()
+            return [p.to_dict() for p in progress]
+        except Exception as e:
+            logger.error(f"❌ 获取步骤进度失败: {e}")
+            return []
+
+    @staticmethod
+    def _upsert(conn, recipe_id: int, steps: Dict[int, bool]):
+        """单条 INSERT ... ON CONFLICT (recipe_id, step_index) DO UPDATE 写入多个步骤"""
+        insert = UPSERT_DIALECTS[conn.dialect.name]
+        now = datetime.utcnow()
+        stmt = insert(RecipeStepProgress).values([
+            {
+                'recipe_id': recipe_id,
+                'step_index': step_index,
+                'is_completed': is_completed,
+                'completed_at': now if is_completed else None
+            }
+            for step_index, is_completed in steps.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['recipe_id', 'step_index'],
+            set_={
+                'is_completed': stmt.excluded.is_completed,
+                'completed_at': stmt.excluded.completed_at
+            }
+        )
+        conn.execute(stmt)
+
+    @staticmethod
+    def update_steps(recipe_id: int, steps: List[Dict[str, Any]],
+                     reset: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """
+        批量更新步骤状态（单个事务）
+
+        steps: [{"step_index": 0, "is_completed": true}, ...]，同一步骤以最后一次为准
+        reset: 为 True 时先清除该食谱的全部进度，再写入 steps
+        开启 progress 组提交时与并发写合并提交
+        返回更新后的全部步骤状态，并发布到 progress_hub
+        """
+        try:
+            # ON CONFLICT 不允许同一语句内重复命中同一行，先按步骤去重
+            latest = {}
+            for step in steps:
+                latest[step['step_index']] = bool(step.get('is_completed', False))
+
+            def write(conn):
+                if reset:
+                    conn.execute(delete(RecipeStepProgress).where(RecipeStepProgress.recipe_id == recipe_id))
+                if latest:
+                    ProgressService._upsert(conn, recipe_id, latest)
+
+            write_batcher.execute('progress', write, db.session)
+            logger.info(f"✅ 更新步骤进度成功: Recipe ID {recipe_id}，{len(latest)} 个步骤"
+                        f"{'（已重置）' if reset else ''}")
+
+            # 推送完整状态给订阅该食谱的 SSE 连接
+            progress = ProgressService.get_progress(recipe_id)
+            progress_hub.publish(recipe_id, {'recipe_id': recipe_id, 'progress': progress})
+            return progress
+        except Exception as e:
+            logger.error(f"❌ 更新步骤进度失败: {e}")
+            db.session.rollback()
+            return None
+
+
+# 创建全局服务实例
+progress_service = ProgressService()
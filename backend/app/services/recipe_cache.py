@@ -0,0 +1,158 @@
+"""
+Recipe Payload Cache
+食谱序列化结果缓存
+
+食谱在 save_recipe_to_history 之后不再修改，因此 Recipe.to_dict() 的 JSON 结果
+可以按 ID 缓存为 UTF-8 字节，列表/详情接口直接拼接进响应。只在删除时失效：
+删除在同一事务中递增 cache_versions 中的 recipes 版本号，提交后本进程失效对应条目，
+其他 worker 进程最迟在一个检查间隔后发现版本变化并清空本地缓存（SQLite 会复用被删除的
+最大 ID，不清空会把旧食谱的 JSON 返回给新食谱）。
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config import Config
+from app.database import db
+from app.models.cache_version import bump_version
+from app.models.recipe import Recipe
+from app.utils.json_payload import RawJSON, encode
+from app.utils.version_stamp import VersionStamp
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CACHE_NAME = 'recipes'
+_PENDING_KEY = 'recipe_cache_deleted'
+_VERSION_KEY = 'recipe_cache_version'
+
+
+class RecipePayloadCache:
+    """按食谱 ID 缓存序列化结果的有界 LRU"""
+
+    def __init__(self, maxsize: int, check_interval: float = 1.0):
+        self.maxsize = maxsize
+        self._items: 'OrderedDict[int, RawJSON]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stamp = VersionStamp(CACHE_NAME, check_interval)
+        self.hits = 0
+        self.misses = 0
+
+    def sync(self):
+        """其他进程删除过食谱时清空本地缓存"""
+        if self.maxsize <= 0 or not self.stamp.changed(db.session.connection):
+            return
+        version = self.stamp.read(db.session.connection())
+        self.clear()
+        self.stamp.mark_loaded(version)
+        logger.info(f"🔄 食谱缓存已清空（版本 {version}）")
+
+    def get(self, recipe_id: int) -> Optional[RawJSON]:
+        """读取缓存"""
+        with self._lock:
+            payload = self._items.get(recipe_id)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(recipe_id)
+            self.hits += 1
+            return payload
+
+    def put(self, recipe_id: int, payload: RawJSON):
+        """写入缓存，超出容量时淘汰最久未使用项"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[recipe_id] = payload
+            self._items.move_to_end(recipe_id)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, recipe_id: int):
+        """删除食谱时失效"""
+        with self._lock:
+            self._items.pop(recipe_id, None)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._items.clear()
+
+    def _apply_deletes(self, recipe_ids: Iterable[int], version: int):
+        """提交后失效本进程中被删除的食谱（期间有其他进程的删除时下次访问重新比对版本）"""
+        for recipe_id in recipe_ids:
+            self.invalidate(recipe_id)
+        if self.stamp.version == version - 1:
+            self.stamp.mark_loaded(version)
+        else:
+            self.stamp.expire()
+
+    def payload(self, recipe: Recipe) -> RawJSON:
+        """获取食谱的序列化结果，未命中时序列化并缓存"""
+        self.sync()
+        cached = self.get(recipe.id)
+        if cached is not None:
+            return cached
+        payload = encode(recipe.to_dict())
+        self.put(recipe.id, payload)
+        return payload
+
+    def payloads_by_id(self, recipe_ids: Iterable[int]) -> Dict[int, RawJSON]:
+        """
+        批量获取序列化结果，返回 {食谱 ID: 片段}
+
+        未命中的 ID 用一条 IN 查询加载；不存在的 ID 不在结果中。
+        """
+        self.sync()
+        found: Dict[int, RawJSON] = {}
+        missing = []
+        for recipe_id in set(recipe_ids):
+            cached = self.get(recipe_id)
+            if cached is None:
+                missing.append(recipe_id)
+            else:
+                found[recipe_id] = cached
+
+        if missing:
+            for recipe in Recipe.query.filter(Recipe.id.in_(missing)).all():
+                found[recipe.id] = encode(recipe.to_dict())
+                self.put(recipe.id, found[recipe.id])
+
+        return found
+
+    def payloads_for_ids(self, recipe_ids: List[int]) -> List[RawJSON]:
+        """按 ID 顺序批量获取序列化结果，不存在的 ID 被跳过"""
+        found = self.payloads_by_id(recipe_ids)
+        return [found[recipe_id] for recipe_id in recipe_ids if recipe_id in found]
+
+
+# 创建全局缓存实例
+recipe_payload_cache = RecipePayloadCache(Config.RECIPE_PAYLOAD_CACHE_SIZE, Config.CACHE_VERSION_CHECK_SECONDS)
+
+
+@event.listens_for(Recipe, 'after_delete')
+def _record_delete(mapper, connection, target):
+    session = Session.object_session(target)
+    session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+    if _VERSION_KEY not in session.info:
+        session.info[_VERSION_KEY] = bump_version(connection, CACHE_NAME)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    recipe_ids = session.info.pop(_PENDING_KEY, None)
+    version = session.info.pop(_VERSION_KEY, None)
+    if recipe_ids:
+        recipe_payload_cache._apply_deletes(recipe_ids, version)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_deletes(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_VERSION_KEY, None)
@@ -0,0 +1,227 @@
+"""
+Recipe Search Service
+食谱全文检索服务（SQLite FTS5 + 中文单字/二元组分词）
+"""
+import logging
+from typing import List, Dict, Any
+from app.database import db
+from app.models.recipe import Recipe, RecipeTag
+from app.models.recipe_fts import FTS_TABLE, fts_enabled
+from app.services.recipe_cache import recipe_payload_cache
+from app.utils.json_payload import RawJSON
+from app.utils.text import cjk_tokens
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# bm25 列权重：name, description, ingredients, steps, tags
+BM25_WEIGHTS = (10.0, 2.0, 5.0, 1.0, 3.0)
+
+# 结构化筛选参数 / 分面统计维度 -> Recipe 列
+FILTER_COLUMNS = {
+    'cuisine': Recipe.cuisine,
+    'taste': Recipe.taste,
+    'scenario': Recipe.scenario,
+    'skill': Recipe.skill_level
+}
+
+# 区间筛选参数前缀 -> Recipe 派生数值列
+RANGE_COLUMNS = {
+    'minutes': Recipe.cooking_minutes,
+    'kcal': Recipe.calories_kcal
+}
+
+
+def build_match_query(query: str) -> str:
+    """
+    将用户输入转换为 FTS5 MATCH 表达式
+
+    多字中文只使用二元组（全部命中即包含原词），单字中文使用单字；
+    字母数字词使用前缀匹配。所有词元之间为 AND。
+    """
+    terms = []
+    for token in dict.fromkeys(cjk_tokens(query, unigrams=False)):
+        escaped = token.replace('"', '""')
+        if token.isascii():
+            terms.append(f'"{escaped}"*')
+        else:
+            terms.append(f'"{escaped}"')
+    return ' '.join(terms)
+
+
+class RecipeSearchService:
+    """食谱检索服务"""
+
+    @staticmethod
+    def _apply_filters(stmt, filters: Dict[str, Any]):
+        """
+        追加结构化筛选条件
+
+        支持: cuisine / taste / scenario / skill 等值筛选，tags 标签（需全部命中），
+        min_minutes / max_minutes 烹饪时间区间，min_kcal / max_kcal 热量区间
+        """
+        for key, column in FILTER_COLUMNS.items():
+            if filters.get(key):
+                stmt = stmt.where(column == filters[key])
+
+        for tag in filters.get('tags') or []:
+            stmt = stmt.where(
+                db.exists().where(RecipeTag.recipe_id == Recipe.id, RecipeTag.tag == tag)
+            )
+
+        for key, column in RANGE_COLUMNS.items():
+            low = filters.get(f'min_{key}')
+            high = filters.get(f'max_{key}')
+            if low is not None:
+                stmt = stmt.where(column >= low)
+            if high is not None:
+                stmt = stmt.where(column <= high)
+        return stmt
+
+    @staticmethod
+    def _match_ids(query: str):
+        """全文检索命中的食谱 ID 子查询（非 SQLite 退化为 LIKE）"""
+        connection = db.session.connection()
+        if fts_enabled(connection):
+            return db.select(db.literal_column('rowid')).select_from(db.table(FTS_TABLE)).where(
+                db.literal_column(FTS_TABLE).op('MATCH')(build_match_query(query))
+            )
+        pattern = f'%{query.strip()}%'
+        return db.select(Recipe.id).where(
+            db.or_(Recipe.name.like(pattern), Recipe.description.like(pattern),
+                   Recipe.ingredients_json.like(pattern), Recipe.tags_json.like(pattern))
+        )
+
+    @staticmethod
+    def search(
+        query: str,
+        filters: Dict[str, Any] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[RawJSON]:
+        """
+        全文检索食谱
+
+        Args:
+            query: 检索词，支持中英文混合
+            filters: 结构化筛选 {"cuisine": "中式", "taste": "清淡", "scenario": "快手菜", "skill": "新手"}
+            limit: 返回数量
+            offset: 偏移量
+
+        Returns:
+            按相关度排序的食谱序列化结果列表
+        """
+        filters = filters or {}
+        try:
+            match_query = build_match_query(query)
+            if not match_query:
+                return []
+
+            if fts_enabled(db.session.connection()):
+                fts = db.table(FTS_TABLE, db.column('rowid'))
+                rank = db.func.bm25(db.literal_column(FTS_TABLE), *BM25_WEIGHTS)
+                stmt = (
+                    db.select(Recipe.id)
+                    .join(fts, fts.c.rowid == Recipe.id)
+                    .where(db.literal_column(FTS_TABLE).op('MATCH')(match_query))
+                    .order_by(rank)
+                )
+            else:
+                # 非 SQLite 环境退化为 LIKE 检索，按时间排序
+                stmt = (
+                    db.select(Recipe.id)
+                    .where(Recipe.id.in_(RecipeSearchService._match_ids(query)))
+                    .order_by(Recipe.created_at.desc())
+                )
+
+            stmt = RecipeSearchService._apply_filters(stmt, filters).limit(limit).offset(offset)
+            ids = db.session.execute(stmt).scalars().all()
+            recipes = recipe_payload_cache.payloads_for_ids(ids)
+            logger.info(f"✅ 检索食谱 '{query}' 成功，共 {len(recipes)} 条")
+            return recipes
+        except Exception as e:
+            logger.error(f"❌ 检索食谱失败: {e}", exc_info=True)
+            return []
+
+    @staticmethod
+    def query(
+        filters: Dict[str, Any] = None,
+        limit: int = 20,
+        offset: int = 0,
+        with_facets: bool = True
+    ) -> Dict[str, Any]:
+        """
+        结构化筛选食谱，并返回分面统计
+
+        Args:
+            filters: 筛选条件，见 _apply_filters；可额外包含 q 全文检索词
+            limit: 返回数量
+            offset: 偏移量
+            with_facets: 是否计算分面统计
+
+        Returns:
+            {"recipes": [...], "total": 命中总数, "facets": {"cuisine": {"中式": 3}, ...}}
+        """
+        filters = filters or {}
+        try:
+            stmt = RecipeSearchService._apply_filters(db.select(Recipe.id), filters)
+            if filters.get('q'):
+                stmt = stmt.where(Recipe.id.in_(RecipeSearchService._match_ids(filters['q'])))
+
+            page = stmt.order_by(Recipe.created_at.desc()).limit(limit).offset(offset)
+            ids = db.session.execute(page).scalars().all()
+            recipes = recipe_payload_cache.payloads_for_ids(ids)
+
+            result = {'recipes': recipes}
+            if with_facets:
+                result['total'], result['facets'] = RecipeSearchService._facets(stmt)
+            logger.info(f"✅ 筛选食谱成功，返回 {len(recipes)} 条")
+            return result
+        except Exception as e:
+            logger.error(f"❌ 筛选食谱失败: {e}", exc_info=True)
+            return {'recipes': [], 'total': 0, 'facets': {}}
+
+    @staticmethod
+    def _facets(matched_stmt):
+        """
+        在一条分组查询中计算命中总数与各维度分面计数
+
+        各维度的 GROUP BY 通过 UNION ALL 合并为单条语句，只访问一次数据库。
+        """
+        matched = matched_stmt.with_only_columns(
+            Recipe.id, *FILTER_COLUMNS.values()
+        ).cte('matched')
+
+        selects = [
+            db.select(db.literal('total').label('facet'), db.null().label('value'),
+                      db.func.count().label('count')).select_from(matched)
+        ]
+        for facet, column in FILTER_COLUMNS.items():
+            col = matched.c[column.key]
+            selects.append(
+                db.select(db.literal(facet), col, db.func.count())
+                .where(col.isnot(None), col != '')
+                .group_by(col)
+            )
+        selects.append(
+            db.select(db.literal('tag'), RecipeTag.tag, db.func.count())
+            .join(matched, matched.c.id == RecipeTag.recipe_id)
+            .group_by(RecipeTag.tag)
+        )
+
+        total = 0
+        facets: Dict[str, Dict[str, int]] = {facet: {} for facet in list(FILTER_COLUMNS) + ['tag']}
+        for facet, value, count in db.session.execute(db.union_all(*selects)):
+            if facet == 'total':
+                total = count
+            else:
+                facets[facet][value] = count
+        return total, facets
+
+
+# 创建全局服务实例
+recipe_search_service = RecipeSearchService()
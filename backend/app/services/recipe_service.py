@@ -7,7 +7,8 @@ import json
 import logging
 import re
 import time
-from typing import List, Dict, Any, Optional
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
 from langchain_community.chat_models import ChatTongyi
 from langchain.schema import HumanMessage, SystemMessage
 from langchain.chains import LLMChain, SequentialChain, TransformChain
@@ -15,7 +16,17 @@ from langchain.prompts import PromptTemplate
 from config import Config
 from app.database import db
 from app.models.recipe import Recipe
+from app.models.recipe_progress import RecipeStepProgress
 from app.services.substitution_service import substitution_service
+from app.services.chain_run_service import chain_run_service
+from app.services.ingredient_lexicon import ingredient_lexicon
+from app.services.recipe_cache import recipe_payload_cache
+from app.services.recipe_search_service import recipe_search_service
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.json_payload import RawJSON, extend_object
+from app.utils.prompt_inputs import candidate_tuples, compact_json
+from app.utils.recipe_schema import expand_recipes
+from app.utils.tokens import estimate_tokens
 
 # 配置日志
 logging.basicConfig(
@@ -24,6 +35,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 链式流程子流程
+ROUTE_RECIPE = 'recipe'
+ROUTE_SUBSTITUTION = 'substitution'
+ROUTE_ANALYSIS = 'analysis'
+
+# 明确询问替代品：缺少某食材并询问替代（如"没有料酒用什么代替"），命中且能识别出食材时不调用分析模型
+LACK_PATTERN = re.compile(r'没有|缺|少')
+SUBSTITUTION_ASK_PATTERN = re.compile(r'替代|代替|换成什么')
+CLAUSE_PATTERN = re.compile(r'[，,。.！!？?；;\s]+')
+
 
 class RecipeGenerationService:
     """食谱生成服务"""
@@ -48,14 +69,17 @@ class RecipeGenerationService:
             logger.error(f"❌ 链式服务初始化失败: {e}")
             raise
 
-    def process_chain(self, user_input: str) -> Dict[str, Any]:
+    def process_chain(self, user_input: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """执行链式流程"""
-        return self.chain_service.process_chain(user_input)
+        return self.chain_service.process_chain(user_input, deadline)
 
     def generate_recipes(
         self,
         ingredients: List[Dict[str, Any]],
-        filters: Dict[str, Any] = None
+        filters: Dict[str, Any] = None,
+        deadline: Optional[Deadline] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        degraded: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         根据食材和筛选条件生成食谱
@@ -63,6 +87,9 @@ class RecipeGenerationService:
         Args:
             ingredients: 食材列表 [{"name": "鸡蛋", "quantity": "6个", "state": "新鲜"}]
             filters: 筛选条件 {"cuisine": "中式", "taste": "清淡", "scenario": "快手菜", "skill": "新手"}
+            deadline: 请求截止时间，模型在剩余时间内未返回时抛出 DeadlineExceeded
+            usage: 给定时写入本次调用的输入/输出 token 估算 usage['recipes']
+            degraded: 给定时，返回备用食谱的情况下追加 'recipes'
 
         Returns:
             食谱列表
@@ -84,37 +111,37 @@ class RecipeGenerationService:
             # 记录请求
             logger.debug(f"📤 AI 请求 - 食材: {[ing['name'] for ing in ingredients]}")
 
-            response = self.model.invoke(messages)
+            response = deadline.run(self.model.invoke, messages) if deadline else self.model.invoke(messages)
             elapsed = time.time() - start_time
 
             logger.info(f"✅ AI 响应成功 - 耗时: {elapsed:.2f}秒")
+            if usage is not None:
+                usage['recipes'] = {
+                    'input': estimate_tokens(system_prompt) + estimate_tokens(user_prompt),
+                    'output': estimate_tokens(response.content)
+                }
             logger.debug(f"📥 AI 响应内容长度: {len(response.content)} 字符")
 
             recipes = self._parse_response(response.content)
 
             if not recipes:
                 logger.warning("⚠️  AI 响应解析失败，使用备用食谱")
-                return self._get_fallback_recipes(ingredients)
-
-            # 保存到数据库
-            saved_recipes = []
-            for i, recipe_data in enumerate(recipes, 1):
-                saved_recipe = self.save_recipe_to_history(recipe_data)
-                if saved_recipe:
-                    saved_recipes.append(saved_recipe.to_dict())
-                    logger.info(f"💾 食谱 {i} 已保存: {recipe_data.get('name', 'N/A')}")
-                else:
-                    logger.warning(f"⚠️  食谱 {i} 保存失败")
+                return self._get_fallback_recipes(ingredients, degraded)
+
+            saved_recipes = self.save_recipes(recipes)
 
             total_time = time.time() - start_time
             logger.info(f"✅ 食谱生成完成 - 总耗时: {total_time:.2f}秒, 生成数量: {len(saved_recipes)}")
 
             return saved_recipes if saved_recipes else recipes
 
+        except DeadlineExceeded:
+            logger.warning(f"⚠️  AI 生成超过截止时间 - 耗时: {time.time() - start_time:.2f}秒")
+            raise
         except Exception as e:
             elapsed = time.time() - start_time
             logger.error(f"❌ AI 生成失败 - 耗时: {elapsed:.2f}秒, 错误: {str(e)}", exc_info=True)
-            return self._get_fallback_recipes(ingredients)
+            return self._get_fallback_recipes(ingredients, degraded)
 
     def _build_system_prompt(self) -> str:
         """构建系统提示词"""
@@ -127,27 +154,12 @@ class RecipeGenerationService:
 4. 优先使用用户已有的食材，尽量减少需要补充的食材
 5. 菜名要有创意和吸引力，例如"黄金满屋蛋炒饭"而不是"蛋炒饭"
 
-输出格式（JSON）：
+输出格式（紧凑 JSON，每个食谱是一个数组，不要输出字段名）：
 ```json
-[
-  {
-    "name": "创意菜名",
-    "description": "简短描述",
-    "difficulty": "新手/进阶",
-    "time": "15分钟",
-    "calories": "约450卡",
-    "ingredients": [
-      {"name": "鸡蛋", "quantity": "2个", "status": "已有"},
-      {"name": "酱油", "quantity": "1勺", "status": "需补充"}
-    ],
-    "steps": [
-      "步骤1：...",
-      "步骤2：..."
-    ],
-    "tags": ["快手菜", "营养丰富"]
-  }
-]
+[["创意菜名","简短描述",1,15,450,[["鸡蛋","2个",1],["酱油","1勺",0]],["鸡蛋打散加盐","热锅下油炒散"],["快手菜","营养丰富"]]]
 ```
+数组依次为：菜名、描述、难度（1 新手 / 2 进阶）、烹饪分钟数、大致千卡数、
+食材 [名称, 数量, 1 已有 / 0 需补充]、步骤（不加序号）、标签
 
 重要约束：
 - 不要生成"西瓜炒月饼"等不合理组合
@@ -186,7 +198,7 @@ class RecipeGenerationService:
             if filter_text:
                 prompt += "我的偏好：\n" + "\n".join(filter_text) + "\n\n"
 
-        prompt += "请根据这些食材，为我生成 3 个创意食谱。请严格按照 JSON 格式输出。"
+        prompt += "请根据这些食材，为我生成 3 个创意食谱。请严格按照紧凑 JSON 格式输出。"
 
         return prompt
 
@@ -198,7 +210,7 @@ class RecipeGenerationService:
         json_patterns = [
             r'```json\s*(.*?)\s*```',  # 标准 markdown json 代码块
             r'```\s*(.*?)\s*```',       # 普通代码块
-            r'\[\s*\{.*?\}\s*\]',       # 直接的 JSON 数组
+            r'\[.*\]',                  # 直接的 JSON 数组
         ]
 
         json_text = None
@@ -215,8 +227,7 @@ class RecipeGenerationService:
             logger.debug("⚠️  未找到代码块，尝试直接解析")
 
         try:
-            recipes = json.loads(json_text)
-            recipe_list = recipes if isinstance(recipes, list) else [recipes]
+            recipe_list = expand_recipes(json.loads(json_text))
             logger.info(f"✅ JSON 解析成功 - 食谱数量: {len(recipe_list)}")
             return recipe_list
         except json.JSONDecodeError as e:
@@ -224,8 +235,11 @@ class RecipeGenerationService:
             logger.debug(f"原始响应 (前500字符): {response_text[:500]}")
             return []
 
-    def _get_fallback_recipes(self, ingredients: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _get_fallback_recipes(self, ingredients: List[Dict[str, Any]],
+                              degraded: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """备用食谱（当 AI 生成失败时）"""
+        if degraded is not None:
+            degraded.append('recipes')
         return [
             {
                 "name": "经典家常炒饭",
@@ -248,6 +262,18 @@ class RecipeGenerationService:
             }
         ]
 
+    def save_recipes(self, recipes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """保存生成的食谱到数据库，返回保存成功的食谱"""
+        saved_recipes = []
+        for i, recipe_data in enumerate(recipes, 1):
+            saved_recipe = self.save_recipe_to_history(recipe_data)
+            if saved_recipe:
+                saved_recipes.append(saved_recipe.to_dict())
+                logger.info(f"💾 食谱 {i} 已保存: {recipe_data.get('name', 'N/A')}")
+            else:
+                logger.warning(f"⚠️  食谱 {i} 保存失败")
+        return saved_recipes
+
     def save_recipe_to_history(self, recipe_data: Dict[str, Any]) -> Optional[Recipe]:
         """保存食谱到历史记录"""
         try:
@@ -262,7 +288,7 @@ class RecipeGenerationService:
                 'taste': recipe_data.get('taste', ''),
                 'scenario': recipe_data.get('scenario', ''),
                 'skill_level': recipe_data.get('skill_level', recipe_data.get('difficulty', '')),
-                'ingredients': recipe_data.get('ingredients', []),
+                'ingredients': ingredient_lexicon.annotate(recipe_data.get('ingredients', [])),
                 'steps': recipe_data.get('steps', []),
                 'tags': recipe_data.get('tags', [])
             }
@@ -287,6 +313,41 @@ class RecipeGenerationService:
             logger.error(f"❌ 获取历史记录失败: {e}", exc_info=True)
             return []
 
+    def get_recipe_history_payloads(self, limit: int = 20) -> List[RawJSON]:
+        """获取历史记录的序列化结果（最近N条，命中缓存时不再解析 JSON 列）"""
+        try:
+            ids = db.session.execute(
+                db.select(Recipe.id).order_by(Recipe.created_at.desc()).limit(limit)
+            ).scalars().all()
+            logger.debug(f"📖 查询历史记录: {len(ids)} 条")
+            return recipe_payload_cache.payloads_for_ids(ids)
+        except Exception as e:
+            logger.error(f"❌ 获取历史记录失败: {e}", exc_info=True)
+            return []
+
+    def get_recipe_payload(self, recipe_id: int) -> Optional[RawJSON]:
+        """根据ID获取单个食谱的序列化结果（含步骤进度）"""
+        try:
+            payloads = recipe_payload_cache.payloads_for_ids([recipe_id])
+            if not payloads:
+                logger.warning(f"⚠️  食谱不存在: ID={recipe_id}")
+                return None
+
+            progress = RecipeStepProgress.query.filter_by(recipe_id=recipe_id).all()
+            return extend_object(payloads[0], {
+                'step_progress': [
+                    {
+                        'step_index': p.step_index,
+                        'is_completed': p.is_completed,
+                        'completed_at': p.completed_at.isoformat() if p.completed_at else None
+                    }
+                    for p in progress
+                ]
+            })
+        except Exception as e:
+            logger.error(f"❌ 获取食谱失败: {e}", exc_info=True)
+            return None
+
     def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict[str, Any]]:
         """根据ID获取单个食谱"""
         try:
@@ -324,28 +385,34 @@ class RecipeChainService:
         """初始化链与模型"""
         self.recipe_service = recipe_service
         self.model = recipe_service.model
+        self.prompt_prefix = self._build_prompt_prefix()
         self.analysis_chain = self._build_analysis_chain()
         self.substitution_chain = self._build_substitution_chain()
-        self.chain = self._build_full_chain()
+        self.oneshot_chain = self._build_oneshot_chain()
+        self.recipe_pipeline, self.substitution_pipeline = self._build_pipelines()
+
+    def _build_prompt_prefix(self) -> str:
+        """
+        各模型链共用的静态前缀（角色与可选值），放在提示词最前面且逐字相同，
+        同一请求的多次调用可命中服务端的前缀缓存；随请求变化的内容一律放在末尾
+        """
+        return (
+            "你是专业的烹饪助手，负责识别烹饪意图、生成食谱和推荐食材替代。\n"
+            f"可选菜系: {'、'.join(Config.ALLOWED_CUISINES)}\n"
+            f"可选口味: {'、'.join(Config.ALLOWED_TASTES)}\n"
+            f"可选场景: {'、'.join(Config.ALLOWED_SCENARIOS)}\n"
+            f"可选技能: {'、'.join(Config.ALLOWED_SKILLS)}\n"
+            f"可选食材状态: {'、'.join(Config.ALLOWED_STATES)}\n"
+            "只输出严格 JSON。\n\n"
+        )
 
     def _build_analysis_chain(self) -> LLMChain:
         """构建食材分析链"""
-        allowed_cuisines = '、'.join(Config.ALLOWED_CUISINES)
-        allowed_tastes = '、'.join(Config.ALLOWED_TASTES)
-        allowed_scenarios = '、'.join(Config.ALLOWED_SCENARIOS)
-        allowed_skills = '、'.join(Config.ALLOWED_SKILLS)
-        allowed_states = '、'.join(Config.ALLOWED_STATES)
-
         prompt = PromptTemplate(
             input_variables=['user_input'],
-            template=(
-                "你是专业的食材分析与烹饪意图识别助手。请从用户的模糊输入中提取信息。\n"
-                "可选菜系: {allowed_cuisines}\n"
-                "可选口味: {allowed_tastes}\n"
-                "可选场景: {allowed_scenarios}\n"
-                "可选技能: {allowed_skills}\n"
-                "可选食材状态: {allowed_states}\n\n"
-                "输出严格 JSON：\n"
+            template=self.prompt_prefix + (
+                "任务：从用户的模糊输入中提取烹饪意图、食材、筛选条件与忌口。\n"
+                "输出格式：\n"
                 "{{\n"
                 "  \"intent\": \"食谱生成/替代方案/食材分析/其他\",\n"
                 "  \"ingredients\": [\n"
@@ -359,27 +426,19 @@ class RecipeChainService:
                 "  }},\n"
                 "  \"constraints\": [\"忌口/过敏/限制(可空)\"]\n"
                 "}}\n\n"
-                "用户输入：{user_input}\n"
-                "只输出 JSON。"
-            ),
-            partial_variables={
-                'allowed_cuisines': allowed_cuisines,
-                'allowed_tastes': allowed_tastes,
-                'allowed_scenarios': allowed_scenarios,
-                'allowed_skills': allowed_skills,
-                'allowed_states': allowed_states
-            }
+                "用户输入：{user_input}"
+            )
         )
         return LLMChain(llm=self.model, prompt=prompt, output_key='analysis_text')
 
     def _build_substitution_chain(self) -> LLMChain:
-        """构建替代方案推荐链"""
+        """构建替代方案推荐链（缺失食材与候选以紧凑 JSON 传入，见 _substitution_prompt_inputs）"""
         prompt = PromptTemplate(
             input_variables=['user_input', 'missing_ingredients', 'substitution_candidates'],
-            template=(
-                "你是专业的食材替代方案顾问。请结合数据库检索结果，生成完整替代方案。\n"
-                "要求：优先使用数据库候选项；若不足，可补充常见替代。\n"
-                "输出严格 JSON：\n"
+            template=self.prompt_prefix + (
+                "任务：为缺失食材生成完整替代方案。优先使用数据库候选；若不足，可补充常见替代。\n"
+                "数据库候选格式：{{\"缺失食材\": [[替代品, 相似度, 比例]]}}\n"
+                "输出格式：\n"
                 "{{\n"
                 "  \"summary\": \"整体说明\",\n"
                 "  \"items\": [\n"
@@ -387,67 +446,253 @@ class RecipeChainService:
                 "      \"ingredient\": \"缺失食材\",\n"
                 "      \"reason\": \"替代原因\",\n"
                 "      \"recommendations\": [\n"
-                "        {{\"name\": \"替代品\", \"ratio\": \"比例\", \"note\": \"说明\", \"source\": \"数据库/补充建议\"}}\n"
+                "        {{\"name\": \"替代品\", \"ratio\": \"比例\", \"note\": \"说明\", \"source\": \"数据库/补充建议\",\n"
+                "         \"confidence\": \"补充建议的置信度 0-1\"}}\n"
                 "      ]\n"
                 "    }}\n"
                 "  ]\n"
                 "}}\n\n"
                 "用户输入：{user_input}\n"
                 "缺失食材：{missing_ingredients}\n"
-                "数据库候选：{substitution_candidates}\n"
-                "只输出 JSON。"
+                "数据库候选：{substitution_candidates}"
             )
         )
         return LLMChain(llm=self.model, prompt=prompt, output_key='substitution_text')
 
-    def _build_full_chain(self) -> SequentialChain:
-        """构建完整业务链"""
-        parse_analysis_chain = TransformChain(
-            input_variables=['analysis_text', 'user_input'],
-            output_variables=['analysis'],
-            transform=self._parse_analysis_transform
+    def _build_oneshot_chain(self) -> LLMChain:
+        """构建一次完成食材分析与食谱生成的合并链"""
+        prompt = PromptTemplate(
+            input_variables=['user_input'],
+            template=self.prompt_prefix + (
+                "任务：先从用户的模糊输入中识别意图与食材，再根据已有食材生成食谱。\n"
+                "食谱要求：\n"
+                f"1. 意图为食谱生成时生成 {Config.RECIPES_PER_REQUEST} 个创意食谱，其他意图 recipes 输出空数组\n"
+                "2. 食材标注已有/需补充，优先使用已有食材，尽量减少需要补充的食材\n"
+                "3. 食谱必须合理可行，避免奇怪的食材组合；菜名要有创意，步骤清晰具体\n\n"
+                "输出格式：\n"
+                "{{\n"
+                "  \"analysis\": {{\n"
+                "    \"intent\": \"食谱生成/替代方案/食材分析/其他\",\n"
+                "    \"ingredients\": [{{\"name\": \"食材名\", \"quantity\": \"数量(可空)\", \"state\": \"状态(可空)\"}}],\n"
+                "    \"filters\": {{\"cuisine\": \"菜系(可空)\", \"taste\": \"口味(可空)\", "
+                "\"scenario\": \"场景(可空)\", \"skill\": \"技能(可空)\"}},\n"
+                "    \"constraints\": [\"忌口/过敏/限制(可空)\"]\n"
+                "  }},\n"
+                "  \"recipes\": [[\"创意菜名\",\"简短描述\",1,15,450,[[\"鸡蛋\",\"2个\",1],[\"酱油\",\"1勺\",0]],"
+                "[\"鸡蛋打散加盐\",\"热锅下油炒散\"],[\"快手菜\"]]]\n"
+                "}}\n"
+                "recipes 中每个食谱是一个数组，依次为：菜名、描述、难度（1 新手 / 2 进阶）、烹饪分钟数、大致千卡数、"
+                "食材 [名称, 数量, 1 已有 / 0 需补充]、步骤（不加序号）、标签\n\n"
+                "用户输入：{user_input}"
+            )
         )
+        return LLMChain(llm=self.model, prompt=prompt, output_key='oneshot_text')
+
+    def _build_pipelines(self):
+        """构建食谱生成与替代方案子流程（仅食材分析无后续阶段）"""
         recipe_chain = TransformChain(
-            input_variables=['analysis'],
+            input_variables=['analysis', 'deadline', 'degraded', 'usage'],
             output_variables=['recipes'],
             transform=self._generate_recipes_transform
         )
-        candidates_chain = TransformChain(
-            input_variables=['recipes', 'analysis'],
-            output_variables=['missing_ingredients', 'substitution_candidates'],
-            transform=self._collect_substitution_candidates
-        )
-        parse_substitution_chain = TransformChain(
-            input_variables=['substitution_text', 'missing_ingredients', 'substitution_candidates'],
-            output_variables=['substitutions'],
-            transform=self._parse_substitution_transform
-        )
+        substitution_stages = [
+            TransformChain(
+                input_variables=['recipes', 'analysis'],
+                output_variables=['missing_ingredients', 'substitution_candidates'],
+                transform=self._collect_substitution_candidates
+            ),
+            TransformChain(
+                input_variables=['user_input', 'missing_ingredients', 'substitution_candidates',
+                                 'deadline', 'degraded', 'usage'],
+                output_variables=['substitution_text', 'covered_ingredients', 'uncovered_ingredients'],
+                transform=self._substitution_gate_transform
+            ),
+            TransformChain(
+                input_variables=['substitution_text', 'missing_ingredients', 'substitution_candidates',
+                                 'covered_ingredients', 'uncovered_ingredients', 'degraded'],
+                output_variables=['substitutions'],
+                transform=self._parse_substitution_transform
+            )
+        ]
+        output_variables = ['substitutions', 'missing_ingredients', 'substitution_candidates']
 
-        return SequentialChain(
-            chains=[
-                self.analysis_chain,
-                parse_analysis_chain,
-                recipe_chain,
-                candidates_chain,
-                self.substitution_chain,
-                parse_substitution_chain
-            ],
-            input_variables=['user_input'],
-            output_variables=['analysis', 'recipes', 'substitutions', 'missing_ingredients', 'substitution_candidates'],
+        recipe_pipeline = SequentialChain(
+            chains=[recipe_chain, *substitution_stages],
+            input_variables=['user_input', 'analysis', 'deadline', 'degraded', 'usage'],
+            output_variables=['recipes'] + output_variables,
+            verbose=False
+        )
+        # 已有食谱（合并模式）或不需要食谱（替代方案问题）时只执行替代阶段
+        substitution_pipeline = SequentialChain(
+            chains=substitution_stages,
+            input_variables=['user_input', 'analysis', 'recipes', 'deadline', 'degraded', 'usage'],
+            output_variables=output_variables,
             verbose=False
         )
+        return recipe_pipeline, substitution_pipeline
 
-    def process_chain(self, user_input: str) -> Dict[str, Any]:
-        """执行链式流程"""
+    def process_chain(self, user_input: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        执行链式流程
+
+        先识别意图（明确的替代问题由词表直接提取食材，不调用分析模型），再执行对应子流程；
+        合并模式（CHAIN_MODE=oneshot）下分析与食谱生成一次模型调用完成，结果无法解析时回退分步流程。
+        各子流程返回相同结构，未执行的阶段取空值，route 记录实际执行的子流程。
+        规范化输入相同的请求在缓存有效期内直接返回保存的结果（cached 为 True），不调用模型。
+        给定截止时间时，剩余时间不足或模型超时的阶段改用降级策略；模型调用失败或结果无法解析而使用
+        备用结果的阶段同样计入 degraded，这类结果不作为缓存复用；
+        token_usage 记录各次模型调用的输入/输出 token 估算。
+        """
         start_time = time.time()
         logger.info(f"🔄 开始链式处理: {user_input}")
 
-        result = self.chain.invoke({'user_input': user_input})
+        normalized = chain_run_service.normalize_input(user_input)
+        cached = chain_run_service.find_cached(normalized)
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+        degraded: List[str] = []
+        usage: Dict[str, Dict[str, int]] = {}
+        analysis = self._quick_substitution_analysis(user_input)
+        recipes = None
+        if analysis is None and Config.CHAIN_MODE == 'oneshot' and self._allows(deadline, 'analysis', 'recipes'):
+            analysis, recipes = self._oneshot_analysis(user_input, deadline, usage)
+        if analysis is None:
+            analysis = self._staged_analysis(user_input, deadline, degraded, usage)
+
+        route = self._select_route(analysis)
+        outputs: Dict[str, Any] = {}
+        stage_inputs = {
+            'user_input': user_input, 'analysis': analysis, 'deadline': deadline, 'degraded': degraded, 'usage': usage
+        }
+        if route == ROUTE_RECIPE and recipes is None:
+            outputs = self.recipe_pipeline.invoke(stage_inputs)
+        elif route != ROUTE_ANALYSIS:
+            recipes = recipes if route == ROUTE_RECIPE else []
+            outputs = self.substitution_pipeline.invoke({**stage_inputs, 'recipes': recipes})
+            outputs['recipes'] = recipes
+
+        result = {
+            'route': route,
+            'analysis': analysis,
+            'recipes': outputs.get('recipes', []),
+            'substitutions': outputs.get('substitutions') or self._parse_substitution_transform({})['substitutions'],
+            'missing_ingredients': outputs.get('missing_ingredients', []),
+            'substitution_candidates': outputs.get('substitution_candidates', {}),
+            'degraded': degraded,
+            'token_usage': usage
+        }
+
+        run = chain_run_service.record(user_input, normalized, result)
+        result['run_id'] = run.id if run else None
+        result['cached'] = False
 
         elapsed = time.time() - start_time
-        logger.info(f"✅ 链式处理完成 - 耗时: {elapsed:.2f}秒")
+        logger.info(f"✅ 链式处理完成 - 路由: {route}，耗时: {elapsed:.2f}秒")
         return result
 
+    def _allows(self, deadline: Optional[Deadline], *stages: str) -> bool:
+        """剩余时间是否足够按完整策略执行这些阶段（无截止时间时总是足够）"""
+        return deadline is None or deadline.allows(sum(Config.CHAIN_STAGE_BUDGET_MS[stage] for stage in stages))
+
+    def _staged_analysis(self, user_input: str, deadline: Optional[Deadline], degraded: List[str],
+                         usage: Dict[str, Any]) -> Dict[str, Any]:
+        """分步流程的食材分析：剩余时间不足、模型超时或失败、结果无法解析时使用启发式解析"""
+        if self._allows(deadline, 'analysis'):
+            try:
+                analysis_text = self._call_model(
+                    'analysis', self.analysis_chain, {'user_input': user_input}, deadline, usage
+                )['analysis_text']
+                parsed = self._parse_json_from_text(analysis_text)
+                if isinstance(parsed, dict):
+                    return self._normalize_analysis(parsed, user_input)
+                logger.warning("⚠️  分析结果格式异常，使用启发式解析")
+            except DeadlineExceeded as e:
+                logger.warning(f"⚠️  食材分析超时，使用启发式解析: {e}")
+            except Exception as e:
+                logger.warning(f"⚠️  食材分析模型调用失败，使用启发式解析: {e}")
+        else:
+            logger.warning("⚠️  剩余时间不足，食材分析使用启发式解析")
+        degraded.append('analysis')
+        return self._normalize_analysis(self._heuristic_analysis(user_input), user_input)
+
+    def _invoke(self, chain, inputs: Dict[str, Any], deadline: Optional[Deadline]) -> Dict[str, Any]:
+        """调用模型链，给定截止时间时超时抛出 DeadlineExceeded"""
+        return deadline.run(chain.invoke, inputs) if deadline else chain.invoke(inputs)
+
+    def _call_model(self, stage: str, chain, inputs: Dict[str, Any], deadline: Optional[Deadline],
+                    usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """调用模型链，并把渲染后的提示词与输出的 token 估算记入 usage[stage]"""
+        outputs = self._invoke(chain, inputs, deadline)
+        if usage is not None:
+            usage[stage] = {
+                'input': estimate_tokens(chain.prompt.format(**inputs)),
+                'output': estimate_tokens(outputs.get(chain.output_key))
+            }
+            logger.info(f"📊 {stage} token 估算 - 输入: {usage[stage]['input']}，输出: {usage[stage]['output']}")
+        return outputs
+
+    def _oneshot_analysis(self, user_input: str, deadline: Optional[Deadline] = None,
+                          usage: Optional[Dict[str, Any]] = None) -> Tuple[Optional[Dict[str, Any]], Optional[List[Dict[str, Any]]]]:
+        """
+        合并模式：一次模型调用得到分析结果与食谱
+
+        Returns:
+            (analysis, recipes)；无法解析时为 (None, None)。食谱生成意图下未给出食谱时
+            recipes 为 None，由分步流程基于该分析结果补充生成；其他意图不需要食谱，
+            模型给出的食谱直接丢弃（不写入历史记录）
+        """
+        try:
+            oneshot_text = self._call_model(
+                'oneshot', self.oneshot_chain, {'user_input': user_input}, deadline, usage
+            )['oneshot_text']
+        except Exception as e:
+            logger.warning(f"⚠️  合并模式调用失败，回退分步流程: {e}")
+            return None, None
+
+        parsed = self._parse_json_from_text(oneshot_text)
+        if not isinstance(parsed, dict) or not isinstance(parsed.get('analysis'), dict):
+            logger.warning("⚠️  合并模式结果解析失败，回退分步流程")
+            return None, None
+
+        analysis = self._normalize_analysis(parsed['analysis'], user_input)
+        if self._select_route(analysis) != ROUTE_RECIPE:
+            logger.info(f"✅ 合并模式完成 - 意图: {analysis['intent']}，不保存食谱")
+            return analysis, []
+        recipes = [recipe for recipe in expand_recipes(parsed.get('recipes')) if recipe.get('name')]
+        if not recipes:
+            return analysis, None
+
+        saved_recipes = self.recipe_service.save_recipes(recipes)
+        logger.info(f"✅ 合并模式完成 - 食材数: {len(analysis['ingredients'])}，食谱数: {len(recipes)}")
+        return analysis, saved_recipes or recipes
+
+    def _select_route(self, analysis: Dict[str, Any]) -> str:
+        """按分析意图选择子流程，未知意图按食谱生成处理"""
+        intent = str(analysis.get('intent', '')).strip()
+        if intent == '替代方案':
+            return ROUTE_SUBSTITUTION
+        if intent == '食材分析':
+            return ROUTE_ANALYSIS
+        return ROUTE_RECIPE
+
+    def _quick_substitution_analysis(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """
+        明确询问替代品且词表能识别出食材时，直接得到替代方案意图的分析结果
+
+        需同时出现缺少标记（没有/缺/少）与替代询问（替代/代替/换成什么），缺失食材只取自
+        含缺少标记的分句；"用什么做晚饭"、"换成清淡口味"等其他说法交给分析模型判断
+        """
+        if not (LACK_PATTERN.search(user_input) and SUBSTITUTION_ASK_PATTERN.search(user_input)):
+            return None
+        lacking = '，'.join(clause for clause in CLAUSE_PATTERN.split(user_input) if LACK_PATTERN.search(clause))
+        analysis = self._heuristic_analysis(user_input)
+        ingredients = self._normalize_ingredients(self._heuristic_analysis(lacking)['ingredients'])
+        if not ingredients:
+            return None
+        logger.info(f"✅ 识别为替代方案问题，跳过分析模型 - 食材数: {len(ingredients)}")
+        return {**analysis, 'intent': '替代方案', 'ingredients': ingredients}
+
     def _parse_json_from_text(self, text: str) -> Optional[Any]:
         """从文本中解析 JSON"""
         json_patterns = [
@@ -472,16 +717,8 @@ class RecipeChainService:
             logger.warning("⚠️  JSON 解析失败")
             return None
 
-    def _parse_analysis_transform(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """解析食材分析结果"""
-        analysis_text = inputs.get('analysis_text', '')
-        user_input = inputs.get('user_input', '')
-        parsed = self._parse_json_from_text(analysis_text)
-
-        if not isinstance(parsed, dict):
-            logger.warning("⚠️  分析结果格式异常，使用启发式解析")
-            parsed = self._heuristic_analysis(user_input)
-
+    def _normalize_analysis(self, parsed: Dict[str, Any], user_input: str) -> Dict[str, Any]:
+        """标准化分析结果（食材、筛选条件、约束与意图）"""
         ingredients = self._normalize_ingredients(parsed.get('ingredients', []))
         filters = self._normalize_filters(parsed.get('filters', {}))
         constraints = parsed.get('constraints', []) if isinstance(parsed.get('constraints', []), list) else []
@@ -497,7 +734,7 @@ class RecipeChainService:
         }
 
         logger.info(f"✅ 食材分析完成 - 食材数: {len(ingredients)}")
-        return {'analysis': analysis}
+        return analysis
 
     def _generate_recipes_transform(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """生成食谱"""
@@ -505,13 +742,55 @@ class RecipeChainService:
         ingredients = analysis.get('ingredients', [])
         filters = analysis.get('filters', {})
 
+        deadline = inputs.get('deadline')
+
         if not ingredients:
             logger.warning("⚠️  未识别到食材，跳过食谱生成")
             return {'recipes': []}
 
-        recipes = self.recipe_service.generate_recipes(ingredients, filters or None)
-        logger.info(f"✅ 食谱生成完成 - 数量: {len(recipes)}")
-        return {'recipes': recipes}
+        if self._allows(deadline, 'recipes'):
+            try:
+                recipes = self.recipe_service.generate_recipes(
+                    ingredients, filters or None, deadline=deadline, usage=inputs.get('usage'),
+                    degraded=inputs['degraded']
+                )
+                logger.info(f"✅ 食谱生成完成 - 数量: {len(recipes)}")
+                return {'recipes': recipes}
+            except DeadlineExceeded:
+                pass
+        else:
+            logger.warning("⚠️  剩余时间不足，从历史食谱中检索")
+
+        inputs['degraded'].append('recipes')
+        return {'recipes': self._retrieve_recipes(ingredients, filters)}
+
+    def _retrieve_recipes(self, ingredients: List[Dict[str, Any]], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        食谱生成的降级策略：从历史食谱中检索包含已有食材最多的食谱
+
+        食材状态按本次已有食材重新标注（已有 / 需补充）
+        """
+        hits: Counter = Counter()
+        found: Dict[int, Dict[str, Any]] = {}
+        for ingredient in ingredients:
+            for payload in recipe_search_service.search(ingredient['name'], filters, limit=Config.RECIPES_PER_REQUEST * 3):
+                recipe = json.loads(payload)
+                hits[recipe['id']] += 1
+                found.setdefault(recipe['id'], recipe)
+
+        owned_ids = {ing.get('canonical_id') for ing in ingredients if ing.get('canonical_id') is not None}
+        owned_names = {ing['name'] for ing in ingredients}
+        recipes = []
+        for recipe_id, _ in hits.most_common(Config.RECIPES_PER_REQUEST):
+            recipe = found[recipe_id]
+            for item in recipe.get('ingredients', []):
+                name = str(item.get('name', '')).strip()
+                owned = name in owned_names or ingredient_lexicon.canonical_id(name) in owned_ids
+                item['status'] = '已有' if owned else '需补充'
+            recipes.append(recipe)
+
+        logger.info(f"✅ 历史食谱检索完成 - 数量: {len(recipes)}")
+        return recipes
 
     def _collect_substitution_candidates(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """收集替代方案候选"""
@@ -529,12 +808,13 @@ class RecipeChainService:
         else:
             missing_ingredients = self._extract_missing_ingredients(recipes)
 
-        substitution_candidates: Dict[str, List[Dict[str, Any]]] = {}
-
-        for ingredient_name in missing_ingredients:
-            substitutes = substitution_service.get_substitutes(ingredient_name, limit=5)
-            if substitutes:
-                substitution_candidates[ingredient_name] = substitutes
+        substitution_candidates: Dict[str, List[Dict[str, Any]]] = {
+            name: substitutes
+            for name, substitutes in substitution_service.get_substitutes_many(
+                missing_ingredients, limit=5, max_hops=Config.SUBSTITUTION_MAX_HOPS
+            ).items()
+            if substitutes
+        }
 
         logger.info(f"✅ 替代候选检索完成 - 缺失食材: {len(missing_ingredients)}")
         return {
@@ -542,11 +822,79 @@ class RecipeChainService:
             'substitution_candidates': substitution_candidates
         }
 
+    def _is_covered(self, candidates: List[Dict[str, Any]]) -> bool:
+        """数据库候选是否足以直接作答：至少 k 个相似度不低于阈值的替代品"""
+        qualified = [
+            candidate for candidate in candidates
+            if (candidate.get('similarity_score') or 0) >= Config.SUBSTITUTION_LOCAL_MIN_SCORE
+        ]
+        return len(qualified) >= Config.SUBSTITUTION_LOCAL_MIN_CANDIDATES
+
+    def _substitution_gate_transform(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        替代方案推荐（按覆盖度选择本地或模型）
+
+        数据库候选已覆盖的缺失食材直接本地作答，只把未覆盖的食材及其候选交给模型；
+        全部覆盖时不调用模型。
+        """
+        missing_ingredients = inputs.get('missing_ingredients', []) or []
+        substitution_candidates = inputs.get('substitution_candidates', {}) or {}
+
+        covered = [name for name in missing_ingredients if self._is_covered(substitution_candidates.get(name, []))]
+        uncovered = [name for name in missing_ingredients if name not in covered]
+
+        deadline = inputs.get('deadline')
+
+        substitution_text = ''
+        if uncovered and not self._allows(deadline, 'substitution'):
+            logger.warning("⚠️  剩余时间不足，替代方案使用候选结果兜底")
+            inputs['degraded'].append('substitution')
+        elif uncovered:
+            try:
+                substitution_text = self._call_model(
+                    'substitution', self.substitution_chain,
+                    self._substitution_prompt_inputs(inputs.get('user_input', ''), uncovered, substitution_candidates),
+                    deadline, inputs.get('usage')
+                )['substitution_text']
+            except DeadlineExceeded as e:
+                logger.warning(f"⚠️  替代方案模型超时，使用候选结果兜底: {e}")
+                inputs['degraded'].append('substitution')
+            except Exception as e:
+                logger.warning(f"⚠️  替代方案模型调用失败，使用候选结果兜底: {e}")
+                inputs['degraded'].append('substitution')
+
+        logger.info(f"✅ 替代方案路由 - 本地: {len(covered)}，模型: {len(uncovered)}")
+        return {
+            'substitution_text': substitution_text,
+            'covered_ingredients': covered,
+            'uncovered_ingredients': uncovered
+        }
+
+    def _substitution_prompt_inputs(
+        self,
+        user_input: str,
+        uncovered: List[str],
+        substitution_candidates: Dict[str, List[Dict[str, Any]]]
+    ) -> Dict[str, str]:
+        """替代方案提示词变量：缺失食材与每个食材前 k 个候选的 (替代品, 相似度, 比例)，紧凑 JSON"""
+        return {
+            'user_input': user_input,
+            'missing_ingredients': compact_json(uncovered),
+            'substitution_candidates': compact_json(candidate_tuples(
+                {name: substitution_candidates[name] for name in uncovered if name in substitution_candidates},
+                Config.SUBSTITUTION_PROMPT_TOP_K
+            ))
+        }
+
     def _parse_substitution_transform(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """解析替代方案结果"""
+        """解析替代方案结果（本地作答与模型作答的食材合并，按缺失食材顺序排列）"""
         missing_ingredients = inputs.get('missing_ingredients', [])
         substitution_candidates = inputs.get('substitution_candidates', {})
         substitution_text = inputs.get('substitution_text', '')
+        covered = inputs.get('covered_ingredients') or []
+        uncovered = inputs.get('uncovered_ingredients')
+        if uncovered is None:
+            uncovered = [name for name in missing_ingredients if name not in covered]
 
         if not missing_ingredients:
             return {
@@ -556,15 +904,28 @@ class RecipeChainService:
                 }
             }
 
-        parsed = self._parse_json_from_text(substitution_text)
-        if not isinstance(parsed, dict):
-            logger.warning("⚠️  替代方案解析失败，使用候选结果兜底")
-            parsed = self._fallback_substitutions(missing_ingredients, substitution_candidates)
-
-        if 'items' not in parsed:
-            parsed['items'] = []
+        parsed = self._fallback_substitutions(covered, substitution_candidates)
+        if uncovered:
+            llm_result = self._parse_json_from_text(substitution_text) if substitution_text else None
+            if not isinstance(llm_result, dict):
+                if substitution_text:
+                    logger.warning("⚠️  替代方案解析失败，使用候选结果兜底")
+                    if inputs.get('degraded') is not None:
+                        inputs['degraded'].append('substitution')
+                llm_result = self._fallback_substitutions(uncovered, substitution_candidates)
+            else:
+                # 模型补充的建议写回替代关系表，下次同一食材直接命中数据库候选
+                substitution_service.learn_suggestions(llm_result.get('items'), uncovered)
+            llm_items = llm_result.get('items') if isinstance(llm_result.get('items'), list) else []
+            parsed = {**llm_result, 'items': parsed['items'] + llm_items}
+
+        order = {name: index for index, name in enumerate(missing_ingredients)}
+        parsed['items'].sort(key=lambda item: order.get(
+            item.get('ingredient') if isinstance(item, dict) else None, len(order)
+        ))
         if 'summary' not in parsed:
             parsed['summary'] = '已为缺失食材生成替代建议。'
+        parsed['coverage'] = {'local': covered, 'llm': uncovered}
 
         return {'substitutions': parsed}
 
@@ -598,7 +959,7 @@ class RecipeChainService:
                 'state': state
             })
 
-        return normalized
+        return ingredient_lexicon.annotate(normalized)
 
     def _normalize_filters(self, filters: Any) -> Dict[str, Any]:
         """标准化筛选条件"""
@@ -653,25 +1014,32 @@ class RecipeChainService:
                 filters['skill'] = skill
                 break
 
+        # 用别名自动机从原句中提取已收录的食材
+        ingredients = list({
+            match['canonical_id']: {'name': match['name']}
+            for match in ingredient_lexicon.find_all(user_input)
+        }.values())
+
         intent = self._infer_intent(user_input)
         return {
             'intent': intent,
-            'ingredients': [],
+            'ingredients': ingredients,
             'filters': filters,
             'constraints': []
         }
 
     def _extract_missing_ingredients(self, recipes: List[Dict[str, Any]]) -> List[str]:
-        """提取需补充食材"""
-        missing_set = set()
+        """提取需补充食材（同一规范食材的不同写法只保留一个）"""
+        missing: Dict[Any, str] = {}
         for recipe in recipes:
             for ingredient in recipe.get('ingredients', []):
                 status = str(ingredient.get('status', '')).strip()
                 if '需补充' in status:
                     name = str(ingredient.get('name', '')).strip()
                     if name:
-                        missing_set.add(name)
-        return sorted(list(missing_set))
+                        key = ingredient_lexicon.canonical_id(name) or name
+                        missing[key] = min(missing.get(key, name), name)
+        return sorted(missing.values())
 
     def _fallback_substitutions(
         self,
@@ -4,9 +4,16 @@ Shopping List Service
 """
 import logging
 from typing import List, Dict, Any, Optional
+from datetime import datetime
+from sqlalchemy import case, delete, func, insert, update
 from app.database import db
+from app.models.ingredient import Ingredient
 from app.models.shopping_list import ShoppingListItem
 from app.models.recipe import Recipe
+from app.services.ingredient_lexicon import ingredient_lexicon
+from app.services.ingredient_service import normalize_name
+from app.utils.quantity import add_quantities, quantity_columns, remaining_quantity
+from app.utils.write_batcher import write_batcher
 import json
 
 # 配置日志
@@ -24,7 +31,9 @@ class ShoppingListService:
     def get_shopping_list() -> List[Dict[str, Any]]:
         """获取购物清单"""
         try:
-            items = ShoppingListItem.query.order_by(ShoppingListItem.created_at.desc()).all()
+            items = ShoppingListItem.query.order_by(
+                ShoppingListItem.position, ShoppingListItem.created_at.desc()
+            ).all()
             logger.info(f"✅ 获取购物清单成功，共 {len(items)} 个项目")
             return [item.to_dict() for item in items]
         except Exception as e:
@@ -94,12 +103,15 @@ class ShoppingListService:
 
     @staticmethod
     def mark_as_purchased(item_id: int) -> Optional[Dict[str, Any]]:
-        """标记为已购买"""
+        """标记为已购买（开启 shopping 组提交时与并发写合并提交）"""
         try:
-            item = ShoppingListItem.query.get(item_id)
-            if item:
-                item.is_purchased = True
-                db.session.commit()
+            def write(conn):
+                return conn.execute(
+                    update(ShoppingListItem).where(ShoppingListItem.id == item_id).values(is_purchased=True)
+                ).rowcount
+
+            if write_batcher.execute('shopping', write, db.session):
+                item = db.session.get(ShoppingListItem, item_id, populate_existing=True)
                 logger.info(f"✅ 标记已购买成功: {item.ingredient_name}")
                 return item.to_dict()
             logger.warning(f"⚠️  购物项目不存在: ID {item_id}")
@@ -110,49 +122,265 @@ class ShoppingListService:
             return None
 
     @staticmethod
-    def generate_from_recipe(recipe_id: int) -> List[Dict[str, Any]]:
-        """从菜谱生成购物清单"""
+    def _match_key(name: str, canonical_id: Optional[int]):
+        """同一食材的匹配键：收录在词表中的按规范 ID，否则按归一化名称"""
+        return ('id', canonical_id) if canonical_id is not None else ('name', normalize_name(name))
+
+    @staticmethod
+    def _needed_ingredients(recipes) -> Dict[Any, Dict[str, Any]]:
+        """汇总多个食谱中需补充的食材，同一食材合并数量"""
+        needed: Dict[Any, Dict[str, Any]] = {}
+        for recipe_id, ingredients_json in recipes:
+            try:
+                ingredients = json.loads(ingredients_json) if ingredients_json else []
+            except (TypeError, ValueError):
+                continue
+            for ing in ingredients if isinstance(ingredients, list) else []:
+                # 只添加需要补充的食材
+                if not isinstance(ing, dict) or ing.get('status') != '需补充':
+                    continue
+                name = str(ing.get('name') or '').strip()
+                if not name:
+                    continue
+                canonical_id = ing.get('canonical_id')
+                if canonical_id is None:
+                    canonical_id = ingredient_lexicon.canonical_id(name)
+                key = ShoppingListService._match_key(name, canonical_id)
+                entry = needed.get(key)
+                if entry is None:
+                    needed[key] = {'name': name, 'quantity': ing.get('quantity'),
+                                   'category': ing.get('category', ''), 'recipe_id': recipe_id}
+                else:
+                    entry['quantity'] = add_quantities(entry['quantity'], ing.get('quantity'))
+        return needed
+
+    @staticmethod
+    def generate_from_recipes(recipe_ids: List[int]) -> Optional[Dict[str, Any]]:
+        """
+        从多个菜谱生成购物清单（单个事务）
+
+        同一食材（按规范 ID 或名称）跨食谱合并数量；库存已有的扣除库存数量，
+        清单中未购买的同一食材补足到所需数量，不再重复添加。
+        返回 {"items": 新增与更新的项目, "created", "updated", "skipped": [{"name", "reason"}],
+              "missing_recipe_ids": 不存在的食谱}
+        """
         try:
-            recipe = Recipe.query.get(recipe_id)
-            if not recipe:
-                return []
+            recipe_ids = list(dict.fromkeys(recipe_ids))
+            recipes = db.session.query(Recipe.id, Recipe.ingredients_json).filter(
+                Recipe.id.in_(recipe_ids)
+            ).all()
+            found = {recipe_id for recipe_id, _ in recipes}
+            order = {recipe_id: i for i, recipe_id in enumerate(recipe_ids)}
+            recipes.sort(key=lambda r: order[r[0]])
+            needed = ShoppingListService._needed_ingredients(recipes)
 
-            ingredients = json.loads(recipe.ingredients_json) if recipe.ingredients_json else []
-            added_items = []
+            # 库存（只取所需食材）与当前清单各一次查询，建立内存索引
+            match_key = ShoppingListService._match_key
+            pantry: Dict[Any, Optional[str]] = {}
+            canonical_ids = [value for kind, value in needed if kind == 'id']
+            names = [value for kind, value in needed if kind == 'name']
+            for name, canonical_id, quantity in db.session.query(
+                Ingredient.name, Ingredient.canonical_id, Ingredient.quantity
+            ).filter(db.or_(
+                Ingredient.canonical_id.in_(canonical_ids),
+                func.lower(func.trim(Ingredient.name)).in_(names)
+            )):
+                key = match_key(name, canonical_id)
+                pantry[key] = add_quantities(pantry[key], quantity) if key in pantry else quantity
+            listed: Dict[Any, ShoppingListItem] = {}
+            for item in ShoppingListItem.query.filter_by(is_purchased=False).order_by(ShoppingListItem.id):
+                listed.setdefault(match_key(item.ingredient_name, item.canonical_id), item)
 
-            for ing in ingredients:
-                # 只添加需要补充的食材
-                if ing.get('status') == '需补充':
-                    item = ShoppingListItem(
-                        ingredient_name=ing.get('name'),
-                        quantity=ing.get('quantity'),
-                        category=ing.get('category', ''),
-                        recipe_id=recipe_id
-                    )
-                    db.session.add(item)
-                    added_items.append(item)
+            now = datetime.utcnow()
+            inserts, updated, skipped = [], [], []
+            for key, entry in needed.items():
+                quantity = entry['quantity']
+                if key in pantry:
+                    quantity = remaining_quantity(quantity, pantry[key])
+                    if quantity is None:
+                        skipped.append({'name': entry['name'], 'reason': 'pantry'})
+                        continue
+                item = listed.get(key)
+                if item is not None:
+                    extra = remaining_quantity(quantity, item.quantity)
+                    if extra is None:
+                        skipped.append({'name': entry['name'], 'reason': 'listed'})
+                        continue
+                    item.quantity = add_quantities(item.quantity, extra)
+                    updated.append(item)
+                    continue
+                inserts.append({
+                    'ingredient_name': entry['name'],
+                    'canonical_id': key[1] if key[0] == 'id' else None,
+                    'quantity': quantity,
+                    **quantity_columns(quantity),
+                    'category': entry['category'],
+                    'is_purchased': False,
+                    'recipe_id': entry['recipe_id'],
+                    'created_at': now
+                })
 
+            # 更新随 flush 批量写入；新增用一条多行 INSERT ... RETURNING（批量插入不经过模型事件，
+            # 规范 ID 与结构化数量列已在上面填好；render_nulls 避免按空值拆分语句）。
+            # 提交前序列化，避免提交后逐个刷新
+            db.session.flush()
+            created = db.session.scalars(
+                insert(ShoppingListItem).returning(ShoppingListItem).execution_options(render_nulls=True),
+                inserts
+            ).all() if inserts else []
+            items = [item.to_dict() for item in created + updated]
             db.session.commit()
-            logger.info(f"✅ 从菜谱 {recipe_id} 生成购物清单成功，添加 {len(added_items)} 个项目")
-            return [item.to_dict() for item in added_items]
+            logger.info(f"✅ 从 {len(found)} 个菜谱生成购物清单成功: 新增 {len(created)} 个，"
+                        f"更新 {len(updated)} 个，跳过 {len(skipped)} 个")
+            return {
+                'items': items,
+                'created': len(created),
+                'updated': len(updated),
+                'skipped': skipped,
+                'missing_recipe_ids': [recipe_id for recipe_id in recipe_ids if recipe_id not in found]
+            }
         except Exception as e:
             logger.error(f"❌ 从菜谱生成购物清单失败: {e}")
             db.session.rollback()
-            return []
+            return None
+
+    @staticmethod
+    def generate_from_recipe(recipe_id: int) -> List[Dict[str, Any]]:
+        """从单个菜谱生成购物清单"""
+        result = ShoppingListService.generate_from_recipes([recipe_id])
+        return result['items'] if result else []
+
+    @staticmethod
+    def clear_purchased() -> Optional[int]:
+        """清除已购买项目，返回清除数量"""
+        return ShoppingListService.delete_items(is_purchased=True)
+
+    @staticmethod
+    def _conditions(ids: Optional[List[int]] = None, category: Optional[str] = None,
+                    is_purchased: Optional[bool] = None) -> list:
+        """批量操作的筛选条件（多个条件同时满足）"""
+        conditions = []
+        if ids is not None:
+            conditions.append(ShoppingListItem.id.in_(ids))
+        if category is not None:
+            conditions.append(ShoppingListItem.category == category)
+        if is_purchased is not None:
+            conditions.append(ShoppingListItem.is_purchased == is_purchased)
+        if not conditions:
+            raise ValueError('批量操作必须指定筛选条件')
+        return conditions
+
+    @staticmethod
+    def set_purchased(is_purchased: bool, ids: Optional[List[int]] = None,
+                      category: Optional[str] = None) -> Optional[int]:
+        """
+        按 ID 列表或分类批量标记已购买/未购买（单条 UPDATE）
+
+        只更新状态确实变化的项目，返回更新数量
+        """
+        try:
+            conditions = ShoppingListService._conditions(ids, category, not is_purchased)
+
+            def write(conn):
+                return conn.execute(
+                    update(ShoppingListItem).where(*conditions).values(is_purchased=is_purchased)
+                ).rowcount
+
+            count = write_batcher.execute('shopping', write, db.session)
+            logger.info(f"✅ 批量标记{'已' if is_purchased else '未'}购买成功，共 {count} 个")
+            return count
+        except Exception as e:
+            logger.error(f"❌ 批量标记购买状态失败: {e}")
+            db.session.rollback()
+            return None
 
     @staticmethod
-    def clear_purchased() -> bool:
-        """清除已购买项目"""
+    def delete_items(ids: Optional[List[int]] = None, category: Optional[str] = None,
+                     is_purchased: Optional[bool] = None) -> Optional[int]:
+        """按条件批量删除（单条 DELETE），返回删除数量"""
         try:
-            count = ShoppingListItem.query.filter_by(is_purchased=True).count()
-            ShoppingListItem.query.filter_by(is_purchased=True).delete()
+            conditions = ShoppingListService._conditions(ids, category, is_purchased)
+            count = db.session.execute(delete(ShoppingListItem).where(*conditions)).rowcount
             db.session.commit()
-            logger.info(f"✅ 清除已购买项目成功，共清除 {count} 个")
-            return True
+            logger.info(f"✅ 批量删除购物项目成功，共 {count} 个")
+            return count
         except Exception as e:
-            logger.error(f"❌ 清除已购买项目失败: {e}")
+            logger.error(f"❌ 批量删除购物项目失败: {e}")
             db.session.rollback()
-            return False
+            return None
+
+    @staticmethod
+    def reorder(ids: List[int]) -> Optional[int]:
+        """
+        按给定顺序设置排序位置（单条 UPDATE ... SET position = CASE id ...）
+
+        未列出的项目位置不变；新添加的项目位置为 0，排在最前。返回更新数量
+        """
+        try:
+            ids = list(dict.fromkeys(ids))
+            positions = {item_id: position for position, item_id in enumerate(ids, 1)}
+            count = db.session.execute(
+                update(ShoppingListItem).where(ShoppingListItem.id.in_(ids)).values(
+                    position=case(positions, value=ShoppingListItem.id)
+                )
+            ).rowcount
+            db.session.commit()
+            logger.info(f"✅ 购物清单排序成功，共 {count} 个")
+            return count
+        except Exception as e:
+            logger.error(f"❌ 购物清单排序失败: {e}")
+            db.session.rollback()
+            return None
+
+    @staticmethod
+    def merge_items(ids: Optional[List[int]] = None) -> Optional[Dict[str, Any]]:
+        """
+        合并重复的购物项目（单个事务）
+
+        同一食材（按规范 ID 或名称）且购买状态相同的多条合并到最早的一条：指定 ids 时只在这些项目中
+        合并（按 ids 顺序，不同食材或购买状态不同的项目互不合并），未指定时合并全部未购买项目。
+        数量按单位换算相加，其余项目一次删除。
+        返回 {"items": 合并后的项目, "removed": 删除数量}
+        """
+        try:
+            if ids:
+                ids = list(dict.fromkeys(ids))
+                loaded = {item.id: item for item in ShoppingListItem.query.filter(ShoppingListItem.id.in_(ids))}
+                candidates = [loaded[item_id] for item_id in ids if item_id in loaded]
+            else:
+                candidates = ShoppingListItem.query.filter_by(is_purchased=False).order_by(ShoppingListItem.id)
+            grouped: Dict[Any, List[ShoppingListItem]] = {}
+            for item in candidates:
+                key = ShoppingListService._match_key(item.ingredient_name, item.canonical_id)
+                grouped.setdefault((key, item.is_purchased), []).append(item)
+            groups = list(grouped.values())
+
+            targets, removed = [], []
+            for group in groups:
+                if len(group) < 2:
+                    continue
+                target = group[0]
+                quantity = target.quantity
+                for item in group[1:]:
+                    quantity = add_quantities(quantity, item.quantity)
+                    removed.append(item.id)
+                target.quantity = quantity
+                targets.append(target)
+
+            if removed:
+                db.session.flush()
+                db.session.execute(
+                    delete(ShoppingListItem).where(ShoppingListItem.id.in_(removed)),
+                    execution_options={'synchronize_session': False}
+                )
+            items = [item.to_dict() for item in targets]
+            db.session.commit()
+            logger.info(f"✅ 合并购物项目成功: {len(targets)} 组，删除 {len(removed)} 个")
+            return {'items': items, 'removed': len(removed)}
+        except Exception as e:
+            logger.error(f"❌ 合并购物项目失败: {e}")
+            db.session.rollback()
+            return None
 
 
 # 创建全局服务实例
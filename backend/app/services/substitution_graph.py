@@ -0,0 +1,339 @@
+"""
+Substitution Graph
+食材替代关系图：进程内缓存，替代按查询的 LIKE 扫描
+
+启动时把 ingredient_substitutions 全量加载为只读快照：
+- 正向边（原食材 -> 替代食材）与反向边（替代食材 -> 原食材），按规范 ID 与规范化名称建索引，
+  邻接表预先按相似度降序排列，查询只需切片
+- 原食材名称的单字/二元组索引，未收录词表的名称按子串匹配（等价于 LIKE '%name%'）
+- substitution_closure 中预先计算的多级替代路径，按 max_hops 与直接替代合并排序
+- 已驳回或已到期的模型建议不加载；快照在最早的到期时间之后重建
+
+替代关系通过 ORM 写入时，在同一事务中增量重算受影响起点的多级替代路径并递增 cache_versions
+中的版本号，提交后本进程丢弃快照；其他 worker 进程按 CACHE_VERSION_CHECK_SECONDS 间隔比对版本号后重建。
+"""
+import heapq
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Set
+from sqlalchemy import event, select, delete, insert, inspect
+from sqlalchemy.orm import Session
+from config import Config
+from app.database import db
+from app.models.cache_version import bump_version
+from app.models.substitution import IngredientSubstitution, SubstitutionClosure, REVIEW_APPROVED, REVIEW_REJECTED
+from app.utils.alias_trie import normalize_alias
+from app.utils.substitution_paths import affected_origins, closure_rows, node_key
+from app.utils.version_stamp import VersionStamp
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CACHE_NAME = 'substitutions'
+
+# 会话上本事务已递增的版本号（每个事务只递增一次）
+_PENDING_KEY = 'substitution_graph_version'
+# 会话上待重算多级路径的起点节点（flush 后在同一事务中重算）
+_CLOSURE_KEY = 'substitution_closure_origins'
+
+
+def _sort_key(edge: Dict[str, Any]):
+    """相似度降序，同分时跳数少的优先，再按 ID"""
+    return -(edge['similarity_score'] or 0), edge.get('hops', 1), edge['id'] or 0
+
+
+def _grams(key: str) -> Set[str]:
+    """名称的单字与二元组"""
+    return set(key) | {key[i:i + 2] for i in range(len(key) - 1)}
+
+
+class SubstitutionGraph:
+    """替代关系图快照（只读，整体替换）"""
+
+    def __init__(self, edges: Iterable[Dict[str, Any]], version: int = 0,
+                 closure: Iterable[Dict[str, Any]] = (), expires_at: Optional[datetime] = None):
+        self.version = version
+        self.expires_at = expires_at  # 快照中最早到期的模型建议
+        self.edges: List[Dict[str, Any]] = sorted(edges, key=_sort_key)
+        self.closure: List[Dict[str, Any]] = sorted(closure, key=_sort_key)
+        self.closure_by_id: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.closure_by_name: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.forward_by_id: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.forward_by_name: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.reverse_by_id: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.reverse_by_name: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._grams: Dict[str, Set[str]] = defaultdict(set)
+
+        # edges 已按相似度排序，逐条追加后各邻接表自然有序
+        for edge in self.edges:
+            original = normalize_alias(edge['original_ingredient'])
+            substitute = normalize_alias(edge['substitute_ingredient'])
+            self.forward_by_name[original].append(edge)
+            self.reverse_by_name[substitute].append(edge)
+            if edge['original_canonical_id'] is not None:
+                self.forward_by_id[edge['original_canonical_id']].append(edge)
+            if edge['substitute_canonical_id'] is not None:
+                self.reverse_by_id[edge['substitute_canonical_id']].append(edge)
+        for path in self.closure:
+            self.closure_by_name[normalize_alias(path['original_ingredient'])].append(path)
+            if path['original_canonical_id'] is not None:
+                self.closure_by_id[path['original_canonical_id']].append(path)
+        for original in self.forward_by_name:
+            for gram in _grams(original):
+                self._grams[gram].add(original)
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+    def matching_names(self, name: str) -> List[str]:
+        """包含 name 的原食材名称（n-gram 倒排求交后校验子串）"""
+        key = normalize_alias(name)
+        if not key:
+            return []
+        if len(key) == 1:
+            return list(self._grams.get(key, ()))
+        postings = [self._grams.get(key[i:i + 2]) for i in range(len(key) - 1)]
+        if not all(postings):
+            return []
+        candidates = set.intersection(*sorted(postings, key=len))
+        return [original for original in candidates if key in original]
+
+    def substitutes(self, name: str, canonical_id: Optional[int] = None,
+                    limit: int = 5, max_hops: int = 1) -> List[Dict[str, Any]]:
+        """
+        某食材的替代建议（相似度降序）
+
+        有规范 ID 时按 ID 精确匹配，否则按原食材名称子串匹配。
+        max_hops > 1 时合并不超过该跳数的多级替代路径（带 hops / path 字段），
+        同一替代食材只保留得分最高的一条。
+        """
+        if canonical_id is not None:
+            direct = [self.forward_by_id.get(canonical_id, [])]
+            closure = [self.closure_by_id.get(canonical_id, [])]
+        else:
+            names = self.matching_names(name)
+            direct = [self.forward_by_name[original] for original in names]
+            closure = [self.closure_by_name[original] for original in names if original in self.closure_by_name]
+
+        if max_hops <= 1:
+            if len(direct) == 1:
+                return direct[0][:limit]
+            return list(islice(heapq.merge(*direct, key=_sort_key), limit))
+
+        paths = [(path for path in paths if path['hops'] <= max_hops) for paths in closure]
+        result, seen = [], set()
+        for edge in heapq.merge(*direct, *paths, key=_sort_key):
+            target = node_key(edge['substitute_canonical_id'], edge['substitute_ingredient'])
+            if 'hops' in edge and target in seen:
+                continue
+            seen.add(target)
+            result.append(edge if 'hops' in edge else {
+                **edge, 'hops': 1, 'path': [edge['original_ingredient'], edge['substitute_ingredient']]
+            })
+            if len(result) >= limit:
+                break
+        return result
+
+    def substituted_for(self, name: str, canonical_id: Optional[int] = None,
+                        limit: int = 5) -> List[Dict[str, Any]]:
+        """反向查询：该食材可以替代哪些食材（相似度降序）"""
+        if canonical_id is not None:
+            return self.reverse_by_id.get(canonical_id, [])[:limit]
+        return self.reverse_by_name.get(normalize_alias(name), [])[:limit]
+
+
+class SubstitutionGraphCache:
+    """替代关系图的加载、失效与跨进程版本比对"""
+
+    def __init__(self, check_interval: float = 1.0):
+        self._graph: Optional[SubstitutionGraph] = None
+        self._lock = threading.Lock()
+        self.stamp = VersionStamp(CACHE_NAME, check_interval)
+
+    def init_app(self, app):
+        """启动时预加载（表尚未迁移时跳过，首次查询时再加载）"""
+        self.stamp.interval = app.config.get('CACHE_VERSION_CHECK_SECONDS', self.stamp.interval)
+        try:
+            with db.engine.connect() as connection:
+                self.load(connection)
+        except Exception as e:
+            logger.warning(f"⚠️  替代关系图预加载失败，将在首次查询时加载: {e}")
+
+    def load(self, connection=None) -> SubstitutionGraph:
+        """从数据库全量构建替代关系图"""
+        connection = connection if connection is not None else db.session.connection()
+        # 先读版本号再读数据：并发写入最多导致下次比对时多重建一次，不会漏掉变更
+        version = self.stamp.read(connection)
+        now = datetime.utcnow()
+        table = IngredientSubstitution.__table__
+        rows = connection.execute(select(table).where(
+            table.c.review_state != REVIEW_REJECTED,
+            (table.c.expires_at.is_(None)) | (table.c.expires_at > now)
+        )).mappings().all()
+        paths = connection.execute(select(SubstitutionClosure.__table__)).mappings()
+        expires_at = min((row['expires_at'] for row in rows if row['expires_at']), default=None)
+        graph = SubstitutionGraph((_payload(row) for row in rows), version,
+                                  (_closure_payload(row) for row in paths), expires_at)
+        with self._lock:
+            self._graph = graph
+        self.stamp.mark_loaded(version)
+        logger.info(f"✅ 替代关系图已加载: {len(graph)} 条边，{len(graph.closure)} 条多级路径（版本 {version}）")
+        return graph
+
+    def rebuild_closure(self) -> int:
+        """全量重算多级替代路径（修改 SUBSTITUTION_MAX_HOPS / SUBSTITUTION_MIN_PATH_SCORE 后执行）"""
+        try:
+            count = refresh_closure(db.session.connection())
+            mark_changed(db.session)
+            db.session.commit()
+            logger.info(f"✅ 多级替代路径重算完成: {count} 条")
+            return count
+        except Exception as e:
+            logger.error(f"❌ 多级替代路径重算失败: {e}")
+            db.session.rollback()
+            return 0
+
+    def invalidate(self):
+        """丢弃快照，下次查询时重建"""
+        with self._lock:
+            self._graph = None
+
+    def graph(self) -> SubstitutionGraph:
+        """当前快照（其他进程已更新时重建）"""
+        graph = self._graph
+        if graph is None or (graph.expires_at is not None and datetime.utcnow() >= graph.expires_at) \
+                or self.stamp.changed(db.session.connection):
+            graph = self.load()
+        return graph
+
+
+def _payload(row) -> Dict[str, Any]:
+    """与 IngredientSubstitution.to_dict() 相同的结构"""
+    created_at = row['created_at']
+    return {
+        'id': row['id'],
+        'original_ingredient': row['original_ingredient'],
+        'substitute_ingredient': row['substitute_ingredient'],
+        'original_canonical_id': row['original_canonical_id'],
+        'substitute_canonical_id': row['substitute_canonical_id'],
+        'similarity_score': row['similarity_score'],
+        'substitution_ratio': row['substitution_ratio'],
+        'notes': row['notes'],
+        'category': row['category'],
+        'source': row['source'],
+        'confidence': row['confidence'],
+        'review_state': row['review_state'],
+        'expires_at': row['expires_at'].isoformat() if row['expires_at'] else None,
+        'created_at': created_at.isoformat() if created_at else None
+    }
+
+
+def _closure_payload(row) -> Dict[str, Any]:
+    """多级路径的返回结构：与直接替代关系相同的字段，另带 hops / path"""
+    path = json.loads(row['path'])
+    return {
+        'id': None,
+        'original_ingredient': row['original_ingredient'],
+        'substitute_ingredient': row['substitute_ingredient'],
+        'original_canonical_id': row['original_canonical_id'],
+        'substitute_canonical_id': row['substitute_canonical_id'],
+        'similarity_score': row['score'],
+        'substitution_ratio': row['substitution_ratio'],
+        'notes': '多级替代：' + ' → '.join(path),
+        'category': row['category'],
+        'source': 'closure',
+        'confidence': None,
+        'review_state': REVIEW_APPROVED,
+        'expires_at': None,
+        'created_at': None,
+        'hops': row['hops'],
+        'path': path
+    }
+
+
+def refresh_closure(connection, origins: Optional[Iterable[str]] = None) -> int:
+    """
+    重算多级替代路径（只使用已审核的替代关系，未审核的模型建议不参与推导）
+
+    Args:
+        connection: 当前事务的连接（与替代关系写入同一事务）
+        origins: 变化边的起点节点，只重算能到达它们的起点；None 表示全量重算
+
+    Returns:
+        写入的路径条数
+    """
+    edges = connection.execute(select(IngredientSubstitution.__table__).where(
+        IngredientSubstitution.review_state == REVIEW_APPROVED
+    )).mappings().all()
+    table = SubstitutionClosure.__table__
+    max_hops = Config.SUBSTITUTION_MAX_HOPS
+    if origins is None:
+        connection.execute(delete(table))
+    else:
+        origins = sorted(affected_origins(edges, origins, max_hops))
+        connection.execute(delete(table).where(table.c.original_key.in_(origins)))
+    rows = closure_rows(edges, origins, max_hops, Config.SUBSTITUTION_MIN_PATH_SCORE)
+    if rows:
+        now = datetime.utcnow()
+        connection.execute(insert(table), [{**row, 'updated_at': now} for row in rows])
+    return len(rows)
+
+
+def _origin_keys(target) -> Set[str]:
+    """替代关系变化前后的起点节点"""
+    state = inspect(target)
+    names = {target.original_ingredient, *state.attrs.original_ingredient.history.deleted}
+    canonical_ids = {target.original_canonical_id, *state.attrs.original_canonical_id.history.deleted}
+    return {node_key(canonical_id, name) for canonical_id in canonical_ids for name in names}
+
+
+def mark_changed(session, connection=None):
+    """
+    标记本事务修改了替代关系：递增版本号（每个事务一次），提交后本进程丢弃快照
+
+    批量 UPDATE 等不经过 ORM 事件的写入需要显式调用。
+    """
+    if _PENDING_KEY in session.info:
+        return
+    connection = connection if connection is not None else session.connection()
+    session.info[_PENDING_KEY] = bump_version(connection, CACHE_NAME)
+
+
+@event.listens_for(IngredientSubstitution, 'after_insert')
+@event.listens_for(IngredientSubstitution, 'after_update')
+@event.listens_for(IngredientSubstitution, 'after_delete')
+def _substitution_written(mapper, connection, target):
+    session = Session.object_session(target)
+    session.info.setdefault(_CLOSURE_KEY, set()).update(_origin_keys(target))
+    mark_changed(session, connection)
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_closure(session, flush_context):
+    origins = session.info.pop(_CLOSURE_KEY, None)
+    if origins:
+        refresh_closure(session.connection(), origins)
+
+
+@event.listens_for(Session, 'after_commit')
+def _drop_graph(session):
+    if session.info.pop(_PENDING_KEY, None) is not None:
+        substitution_graph.invalidate()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_change(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_CLOSURE_KEY, None)
+
+
+# 创建全局实例
+substitution_graph = SubstitutionGraphCache(Config.CACHE_VERSION_CHECK_SECONDS)
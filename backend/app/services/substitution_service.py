@@ -3,9 +3,17 @@ Ingredient Substitution Service
 食材替代推荐服务
 """
 import logging
+from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
+from sqlalchemy import or_
+from config import Config
 from app.database import db
-from app.models.substitution import IngredientSubstitution
+from app.models.substitution import (
+    IngredientSubstitution, SOURCE_LLM, REVIEW_PENDING, REVIEW_APPROVED
+)
+from app.services.ingredient_lexicon import ingredient_lexicon
+from app.services.substitution_graph import substitution_graph
+from app.utils.substitution_paths import node_key
 
 # 配置日志
 logging.basicConfig(
@@ -19,31 +27,79 @@ class SubstitutionService:
     """食材替代服务"""
 
     @staticmethod
-    def get_substitutes(ingredient_name: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def get_substitutes(ingredient_name: str, limit: int = 5, max_hops: int = 1) -> List[Dict[str, Any]]:
         """
         获取某食材的替代建议
 
         Args:
             ingredient_name: 食材名称
             limit: 返回结果数量限制
+            max_hops: 最大替代跳数，大于 1 时包含多级替代路径（黄油 -> 植物油 -> 猪油）
 
         Returns:
             替代建议列表
         """
         try:
-            # 模糊匹配食材名称
-            substitutions = IngredientSubstitution.query.filter(
-                IngredientSubstitution.original_ingredient.like(f'%{ingredient_name}%')
-            ).order_by(
-                IngredientSubstitution.similarity_score.desc()
-            ).limit(limit).all()
+            # 收录在词表中的食材按规范 ID 精确匹配（"西红柿"、"新鲜番茄" 都命中 "番茄"），否则按名称子串匹配
+            canonical_id = ingredient_lexicon.canonical_id(ingredient_name)
+            substitutions = substitution_graph.graph().substitutes(ingredient_name, canonical_id, limit, max_hops)
 
             logger.info(f"✅ 查询食材 '{ingredient_name}' 的替代建议成功，找到 {len(substitutions)} 个")
-            return [sub.to_dict() for sub in substitutions]
+            return [dict(sub) for sub in substitutions]
         except Exception as e:
             logger.error(f"❌ 查询食材替代建议失败: {e}")
             return []
 
+    @staticmethod
+    def get_substitutes_many(ingredient_names: List[str], limit: int = 5,
+                             max_hops: int = 1) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        批量获取多个食材的替代建议（一次取图快照、一次映射规范 ID，不逐个查询）
+
+        Args:
+            ingredient_names: 食材名称列表（重复名称只查询一次）
+            limit: 每个食材返回结果数量限制
+            max_hops: 最大替代跳数
+
+        Returns:
+            字典，key 为输入的食材名称，value 为替代建议列表（无替代时为空列表）
+        """
+        try:
+            names = list(dict.fromkeys(name for name in ingredient_names if name))
+            graph = substitution_graph.graph()
+            canonical_ids = ingredient_lexicon.canonical_ids(names)
+            result = {
+                name: [dict(sub) for sub in graph.substitutes(name, canonical_ids[name], limit, max_hops)]
+                for name in names
+            }
+            found = sum(1 for substitutes in result.values() if substitutes)
+            logger.info(f"✅ 批量查询替代建议成功，{len(names)} 个食材中 {found} 个有替代方案")
+            return result
+        except Exception as e:
+            logger.error(f"❌ 批量查询替代建议失败: {e}")
+            return {}
+
+    @staticmethod
+    def get_substituted_for(ingredient_name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        反向查询：某食材可以替代哪些食材
+
+        Args:
+            ingredient_name: 替代食材名称
+            limit: 返回结果数量限制
+
+        Returns:
+            替代关系列表
+        """
+        try:
+            canonical_id = ingredient_lexicon.canonical_id(ingredient_name)
+            substitutions = substitution_graph.graph().substituted_for(ingredient_name, canonical_id, limit)
+            logger.info(f"✅ 查询食材 '{ingredient_name}' 可替代的食材成功，找到 {len(substitutions)} 个")
+            return [dict(sub) for sub in substitutions]
+        except Exception as e:
+            logger.error(f"❌ 查询可替代食材失败: {e}")
+            return []
+
     @staticmethod
     def get_recipe_substitutions(ingredients: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -56,17 +112,15 @@ class SubstitutionService:
             字典，key 为食材名称，value 为替代建议列表
         """
         try:
-            result = {}
-            missing_ingredients = [
-                ing for ing in ingredients
+            missing_names = [
+                ing.get('name', '') for ing in ingredients
                 if ing.get('status') == '需补充'
             ]
-
-            for ingredient in missing_ingredients:
-                name = ingredient.get('name', '')
-                substitutes = SubstitutionService.get_substitutes(name)
-                if substitutes:
-                    result[name] = substitutes
+            result = {
+                name: substitutes
+                for name, substitutes in SubstitutionService.get_substitutes_many(missing_names).items()
+                if substitutes
+            }
 
             logger.info(f"✅ 获取菜谱替代建议成功，共 {len(result)} 个缺失食材有替代方案")
             return result
@@ -104,10 +158,150 @@ class SubstitutionService:
             return None
 
     @staticmethod
-    def get_all_substitutions() -> List[Dict[str, Any]]:
-        """获取所有替代关系"""
+    def _validate_suggestion(recommendation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """校验单条模型建议，返回写入字段；名称无效或置信度过低返回 None"""
+        name = str(recommendation.get('name') or '').strip()
+        if not name or len(name) > 100:
+            return None
+        try:
+            confidence = float(recommendation.get('confidence', Config.LLM_SUGGESTION_DEFAULT_CONFIDENCE))
+        except (TypeError, ValueError):
+            confidence = Config.LLM_SUGGESTION_DEFAULT_CONFIDENCE
+        confidence = min(max(confidence, 0.0), 1.0)
+        if confidence < Config.LLM_SUGGESTION_MIN_CONFIDENCE:
+            return None
+        return {
+            'substitute_ingredient': name,
+            'confidence': confidence,
+            'similarity_score': round(confidence * Config.LLM_SUGGESTION_SCORE_WEIGHT, 3),
+            'substitution_ratio': str(recommendation.get('ratio') or '1:1').strip()[:50],
+            'notes': str(recommendation.get('note') or '').strip() or None
+        }
+
+    @staticmethod
+    def learn_suggestions(items: Any, missing_ingredients: List[str]) -> int:
+        """
+        写回链式流程中模型补充的替代建议（source 为 "补充建议" 的推荐项）
+
+        只接受缺失食材的建议；与已有替代关系（含已驳回的）按规范 ID / 名称去重后，
+        以 source=llm、review_state=pending 写入，到期前参与直接替代查询。已到期的未审核建议
+        不再参与查询，也不阻止重新学习：再次给出时以新内容刷新该记录并重新计算有效期。
+
+        Args:
+            items: 替代方案结果中的 items
+            missing_ingredients: 本次的缺失食材
+
+        Returns:
+            写入条数
+        """
+        if not Config.LLM_SUGGESTION_WRITEBACK or not isinstance(items, list):
+            return 0
+        try:
+            missing = {
+                node_key(ingredient_lexicon.canonical_id(name), name): name
+                for name in missing_ingredients if name
+            }
+            suggestions = []
+            for item in items:
+                if not isinstance(item, dict) or not isinstance(item.get('recommendations'), list):
+                    continue
+                original = str(item.get('ingredient') or '').strip()
+                origin_key = node_key(ingredient_lexicon.canonical_id(original), original)
+                if not original or origin_key not in missing:
+                    continue
+                accepted = 0
+                for recommendation in item['recommendations']:
+                    if accepted >= Config.LLM_SUGGESTIONS_PER_INGREDIENT:
+                        break
+                    if not isinstance(recommendation, dict) or recommendation.get('source') != '补充建议':
+                        continue
+                    fields = SubstitutionService._validate_suggestion(recommendation)
+                    if fields:
+                        suggestions.append((origin_key, fields))
+                        accepted += 1
+            if not suggestions:
+                return 0
+
+            # 已有的 (原食材, 替代食材) 节点对：已驳回及仍有效的记录阻止重新学习，已到期的未审核建议可刷新
+            names = list(missing.values())
+            canonical_ids = [cid for cid in ingredient_lexicon.canonical_ids(names).values() if cid is not None]
+            now = datetime.utcnow()
+            existing, expired = set(), {}
+            for row in IngredientSubstitution.query.filter(or_(
+                IngredientSubstitution.original_canonical_id.in_(canonical_ids),
+                IngredientSubstitution.original_ingredient.in_(names)
+            )):
+                # 未记录规范 ID 的旧记录按当前词表解析，与新建议使用同一节点标识
+                pair = tuple(
+                    node_key(cid if cid is not None else ingredient_lexicon.canonical_id(name), name)
+                    for cid, name in ((row.original_canonical_id, row.original_ingredient),
+                                      (row.substitute_canonical_id, row.substitute_ingredient))
+                )
+                if row.review_state == REVIEW_PENDING and row.expires_at is not None and row.expires_at <= now:
+                    expired[pair] = row
+                else:
+                    existing.add(pair)
+
+            expires_at = now + timedelta(days=Config.LLM_SUGGESTION_TTL_DAYS)
+            records = []
+            for origin_key, fields in suggestions:
+                name = fields['substitute_ingredient']
+                pair = (origin_key, node_key(ingredient_lexicon.canonical_id(name), name))
+                if pair[1] == origin_key or pair in existing:
+                    continue
+                existing.add(pair)
+                record = expired.get(pair)
+                if record is None:
+                    record = IngredientSubstitution(original_ingredient=missing[origin_key])
+                    db.session.add(record)
+                for key, value in fields.items():
+                    setattr(record, key, value)
+                record.source, record.review_state, record.expires_at = SOURCE_LLM, REVIEW_PENDING, expires_at
+                records.append(record)
+            if records:
+                db.session.commit()
+            logger.info(f"✅ 写回模型替代建议: {len(records)} 条（候选 {len(suggestions)} 条）")
+            return len(records)
+        except Exception as e:
+            logger.error(f"❌ 写回模型替代建议失败: {e}")
+            db.session.rollback()
+            return 0
+
+    @staticmethod
+    def review_substitution(substitution_id: int, review_state: str) -> Optional[Dict[str, Any]]:
+        """
+        审核替代关系：通过后长期有效并参与多级替代推导，驳回后不再参与查询
+
+        Returns:
+            更新后的替代关系字典，不存在返回 None
+        """
+        try:
+            substitution = db.session.get(IngredientSubstitution, substitution_id)
+            if substitution is None:
+                logger.warning(f"⚠️  替代关系不存在: ID {substitution_id}")
+                return None
+            substitution.review_state = review_state
+            if review_state == REVIEW_APPROVED:
+                substitution.expires_at = None
+            db.session.commit()
+            logger.info(f"✅ 审核替代关系成功: ID {substitution_id} -> {review_state}")
+            return substitution.to_dict()
+        except Exception as e:
+            logger.error(f"❌ 审核替代关系失败: {e}")
+            db.session.rollback()
+            return None
+
+    @staticmethod
+    def get_all_substitutions(source: Optional[str] = None,
+                              review_state: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取所有替代关系（可按来源、审核状态筛选）"""
         try:
-            substitutions = IngredientSubstitution.query.order_by(
+            query = IngredientSubstitution.query
+            if source:
+                query = query.filter(IngredientSubstitution.source == source)
+            if review_state:
+                query = query.filter(IngredientSubstitution.review_state == review_state)
+            substitutions = query.order_by(
                 IngredientSubstitution.original_ingredient
             ).all()
             logger.info(f"✅ 获取所有替代关系成功，共 {len(substitutions)} 条")
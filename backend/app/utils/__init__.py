@@ -0,0 +1,4 @@
+"""
+Utilities Package
+通用工具
+"""
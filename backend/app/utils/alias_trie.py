@@ -0,0 +1,177 @@
+"""
+Alias Trie
+别名自动机（Aho-Corasick）：在一次线性扫描中找出文本包含的所有别名
+
+用于食材名称规范化："新鲜鸡蛋"、"土鸡蛋" 中包含别名 "鸡蛋"，"西红柿" 是 "番茄" 的别名。
+新增别名直接插入字典树，失败指针在下次匹配前重建；删除别名只摘除终止标记。
+已对外发布（多个线程并发匹配）的自动机不再原地修改：调用方用 copy() 复制一份，
+修改并 build() 后整体替换引用（copy-on-write），匹配过程无需加锁。
+"""
+import threading
+from typing import Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+V = TypeVar('V')
+
+# (起始位置, 结束位置, 别名, 值)
+Match = Tuple[int, int, str, V]
+
+
+def normalize_alias(text: Optional[str]) -> str:
+    """别名匹配键：去空白、小写"""
+    return ''.join(str(text or '').split()).lower()
+
+
+class _Node:
+    __slots__ = ('children', 'fail', 'output', 'alias', 'value')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.fail: Optional['_Node'] = None
+        # 沿失败指针可达的最近一个终止节点（输出链）
+        self.output: Optional['_Node'] = None
+        self.alias: Optional[str] = None
+        self.value = None
+
+
+class AliasAutomaton(Generic[V]):
+    """别名 -> 值 的 Aho-Corasick 自动机"""
+
+    def __init__(self):
+        self._root = _Node()
+        self._size = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, alias: str, value: V):
+        """插入（或覆盖）别名"""
+        key = normalize_alias(alias)
+        if not key:
+            return
+        with self._lock:
+            node = self._root
+            for char in key:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                    self._dirty = True
+                node = child
+            if node.alias is None:
+                self._size += 1
+                self._dirty = True
+            node.alias = key
+            node.value = value
+
+    def remove(self, alias: str) -> bool:
+        """删除别名（节点保留，只清除终止标记）"""
+        key = normalize_alias(alias)
+        with self._lock:
+            node = self._walk(key)
+            if node is None or node.alias is None:
+                return False
+            node.alias = None
+            node.value = None
+            self._size -= 1
+            self._dirty = True
+            return True
+
+    def items(self) -> Iterator[Tuple[str, V]]:
+        """遍历全部 (别名, 值)"""
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.alias is not None:
+                yield node.alias, node.value
+            stack.extend(node.children.values())
+
+    def copy(self) -> 'AliasAutomaton[V]':
+        """复制出独立的自动机（修改副本不影响正在匹配的读者）"""
+        automaton: AliasAutomaton[V] = AliasAutomaton()
+        for alias, value in self.items():
+            automaton.add(alias, value)
+        return automaton
+
+    def get(self, alias: str) -> Optional[V]:
+        """精确查找别名"""
+        node = self._walk(normalize_alias(alias))
+        return node.value if node is not None and node.alias is not None else None
+
+    def _walk(self, key: str) -> Optional[_Node]:
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def build(self) -> 'AliasAutomaton[V]':
+        """按层重建失败指针与输出链（发布给其他线程前调用）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            root = self._root
+            root.fail = root
+            root.output = None
+            queue = []
+            for child in root.children.values():
+                child.fail = root
+                child.output = None
+                queue.append(child)
+            for node in queue:
+                for char, child in node.children.items():
+                    fail = node.fail
+                    while fail is not root and char not in fail.children:
+                        fail = fail.fail
+                    child.fail = fail.children.get(char, root)
+                    child.output = child.fail if child.fail.alias is not None else child.fail.output
+                    queue.append(child)
+            self._dirty = False
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Match]:
+        """按结束位置顺序给出文本中出现的所有别名（含重叠）"""
+        if self._dirty:
+            self.build()
+        key = normalize_alias(text)
+        root = self._root
+        node = root
+        for end, char in enumerate(key, 1):
+            while node is not root and char not in node.children:
+                node = node.fail
+            node = node.children.get(char, root)
+            match = node if node.alias is not None else node.output
+            while match is not None:
+                yield end - len(match.alias), end, match.alias, match.value
+                match = match.output
+
+    def find_all(self, text: str) -> List[Match]:
+        """最左最长、互不重叠的别名匹配（用于从整句中提取食材）"""
+        longest: Dict[int, Match] = {}
+        for match in self.iter_matches(text):
+            start = match[0]
+            if start not in longest or match[1] > longest[start][1]:
+                longest[start] = match
+        result: List[Match] = []
+        covered = 0
+        for start in sorted(longest):
+            if start >= covered:
+                result.append(longest[start])
+                covered = longest[start][1]
+        return result
+
+    def resolve(self, name: str) -> Optional[V]:
+        """
+        名称 -> 值：精确命中别名优先；否则取名称末尾的最长别名
+        （中文食材名中心词在后："土鸡蛋" -> 鸡蛋，而 "蒜苗" 不会归为 "蒜"）
+        """
+        exact = self.get(name)
+        if exact is not None:
+            return exact
+        length = len(normalize_alias(name))
+        best = None
+        for start, end, _, value in self.iter_matches(name):
+            if end == length and (best is None or start < best[0]):
+                best = (start, value)
+        return best[1] if best is not None else None
@@ -0,0 +1,46 @@
+"""
+Deadline
+请求截止时间：在链式流程各阶段间传递剩余预算
+
+阶段开始前用 allows 判断剩余时间是否足够执行完整策略（如模型调用），不足时改用降级策略；
+模型调用经 run 执行，超过剩余时间即放弃等待并抛出 DeadlineExceeded。被放弃的调用在
+后台线程中自然结束，结果丢弃，因此 run 只用于不访问数据库会话的调用。
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable
+
+# 带截止时间的调用在此线程池中执行（被放弃的调用会继续占用线程直到返回）
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='deadline')
+
+
+class DeadlineExceeded(TimeoutError):
+    """剩余时间内未完成"""
+
+
+class Deadline:
+    """单个请求的截止时间（单调时钟）"""
+
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000.0
+
+    def remaining_ms(self) -> float:
+        """剩余毫秒数（已过期为 0）"""
+        return max(0.0, (self.expires_at - time.monotonic()) * 1000.0)
+
+    def allows(self, cost_ms: float) -> bool:
+        """剩余时间是否足够执行预计耗时 cost_ms 的阶段"""
+        return self.remaining_ms() >= cost_ms
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """在剩余时间内执行 fn，超时抛出 DeadlineExceeded"""
+        timeout = self.remaining_ms() / 1000.0
+        if timeout <= 0:
+            raise DeadlineExceeded('已超过截止时间')
+        future = _executor.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise DeadlineExceeded(f'{timeout * 1000:.0f}ms 内未完成')
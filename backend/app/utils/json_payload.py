@@ -0,0 +1,61 @@
+"""
+JSON Payload Utilities
+预序列化 JSON 片段拼接：缓存好的 JSON 字节直接嵌入响应，不再解码再编码
+"""
+import json
+from typing import Any
+from flask import Response
+
+
+class RawJSON(bytes):
+    """已序列化的 JSON 片段（UTF-8 字节），序列化时原样拼接"""
+
+
+def encode(obj: Any) -> RawJSON:
+    """序列化为紧凑 UTF-8 JSON 片段"""
+    return RawJSON(json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def _write(obj: Any, out: list):
+    if isinstance(obj, RawJSON):
+        out.append(obj)
+    elif isinstance(obj, dict):
+        out.append(b'{')
+        for i, (key, value) in enumerate(obj.items()):
+            if i:
+                out.append(b',')
+            out.append(encode(str(key)))
+            out.append(b':')
+            _write(value, out)
+        out.append(b'}')
+    elif isinstance(obj, (list, tuple)):
+        out.append(b'[')
+        for i, value in enumerate(obj):
+            if i:
+                out.append(b',')
+            _write(value, out)
+        out.append(b']')
+    else:
+        out.append(encode(obj))
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化对象，其中的 RawJSON 片段原样拼接"""
+    out = []
+    _write(obj, out)
+    return b''.join(out)
+
+
+def extend_object(payload: RawJSON, fields: dict) -> RawJSON:
+    """向已序列化的 JSON 对象末尾追加字段（如食谱详情追加 step_progress）"""
+    if not fields:
+        return payload
+    extra = dumps(fields)
+    if payload == b'{}':
+        return RawJSON(extra)
+    return RawJSON(payload[:-1] + b',' + extra[1:])
+
+
+def json_response(obj: Any, status: int = 200) -> Response:
+    """返回包含 RawJSON 片段的 JSON 响应"""
+    return Response(dumps(obj), status=status, mimetype='application/json')
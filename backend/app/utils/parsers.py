@@ -0,0 +1,111 @@
+"""
+Recipe Metric Parsers
+食谱文本指标解析：烹饪时间（分钟）与热量（千卡）
+
+AI 返回的 cooking_time / calories 为自由文本（"15分钟"、"约450卡"、"1小时30分钟"、
+"300-400千卡"），这里解析为可在 SQL 中筛选的整数。区间取上限，便于"X 分钟以内"类筛选。
+"""
+import re
+from typing import Optional
+
+_CN_DIGITS = {'零': 0, '一': 1, '二': 2, '两': 2, '三': 3, '四': 4, '五': 5,
+              '六': 6, '七': 7, '八': 8, '九': 9}
+_CN_UNITS = {'十': 10, '百': 100, '千': 1000}
+_CN_NUMBER_PATTERN = re.compile(r'[零一二两三四五六七八九十百千]+')
+
+_NUMBER = r'\d+(?:\.\d+)?'
+_DURATION_PATTERN = re.compile(
+    rf'({_NUMBER})\s*(?:[-~～—到至]\s*({_NUMBER})\s*)?个?\s*'
+    r'(小时|钟头|hours?|hrs?|h|分钟|分|minutes?|mins?|m|天|days?|秒|seconds?|s)(?![a-z])',
+    re.IGNORECASE
+)
+_ENERGY_PATTERN = re.compile(
+    rf'({_NUMBER})\s*(?:[-~～—到至]\s*({_NUMBER})\s*)?'
+    r'(千焦|kj|千卡|大卡|kcal|卡路里|卡|cal)?',
+    re.IGNORECASE
+)
+
+_MINUTES_PER_UNIT = {
+    '小时': 60, '钟头': 60, 'hour': 60, 'hours': 60, 'hr': 60, 'hrs': 60, 'h': 60,
+    '分钟': 1, '分': 1, 'minute': 1, 'minutes': 1, 'min': 1, 'mins': 1, 'm': 1,
+    '天': 1440, 'day': 1440, 'days': 1440,
+    '秒': 1 / 60, 'second': 1 / 60, 'seconds': 1 / 60, 's': 1 / 60
+}
+_KJ_PER_KCAL = 4.184
+
+
+def chinese_to_number(text: str) -> Optional[int]:
+    """中文数字转整数（"二十五" -> 25，"两百" -> 200），无法解析返回 None"""
+    if not text:
+        return None
+    total, current = 0, 0
+    for char in text:
+        if char in _CN_DIGITS:
+            current = _CN_DIGITS[char]
+        elif char in _CN_UNITS:
+            total += (current or 1) * _CN_UNITS[char]
+            current = 0
+        else:
+            return None
+    return total + current
+
+
+def _replace_numeral(match) -> str:
+    numeral = match.group(0)
+    # "千卡"、"千克"、"百里香" 中单独的 百/千 不是数字
+    if numeral in ('百', '千'):
+        return numeral
+    return str(chinese_to_number(numeral))
+
+
+def normalize_numerals(text: str) -> str:
+    """将文本中的中文数字替换为阿拉伯数字；"一个半" -> 1.5，独立的"半" -> 0.5"""
+    text = _CN_NUMBER_PATTERN.sub(_replace_numeral, text)
+    text = re.sub(r'(\d+)个?半', lambda m: f'{m.group(1)}.5', text)
+    # "半小时"、"半个小时"：前面没有数字的"半"
+    return re.sub(r'(?<![\d.])半', '0.5', text)
+
+
+def parse_minutes(text: Optional[str]) -> Optional[int]:
+    """
+    解析烹饪时间为分钟数
+
+    "15分钟" -> 15，"1小时30分钟" -> 90，"一个半小时" -> 90，"半小时" -> 30，
+    "20-30分钟" -> 30，"45 min" -> 45；无法解析返回 None
+    """
+    if not text:
+        return None
+    normalized = normalize_numerals(str(text))
+    total = 0.0
+    matched = False
+    for low, high, unit in _DURATION_PATTERN.findall(normalized):
+        total += float(high or low) * _MINUTES_PER_UNIT[unit.lower()]
+        matched = True
+
+    if not matched:
+        # 只有数字没有单位时按分钟处理
+        number = re.search(_NUMBER, normalized)
+        if not number:
+            return None
+        total = float(number.group(0))
+    return int(round(total))
+
+
+def parse_kcal(text: Optional[str]) -> Optional[int]:
+    """
+    解析热量为千卡
+
+    "约450卡" -> 450，"450千卡" -> 450，"300-400kcal" -> 400，"1884千焦" -> 450；
+    优先取带单位的数字（"2人份约900卡" -> 900），都没有单位时取第一个数字；无法解析返回 None
+    """
+    if not text:
+        return None
+    matches = list(_ENERGY_PATTERN.finditer(normalize_numerals(str(text))))
+    if not matches:
+        return None
+    match = next((m for m in matches if m.group(3)), matches[0])
+    low, high, unit = match.groups()
+    value = float(high or low)
+    if unit and unit.lower() in ('千焦', 'kj'):
+        value /= _KJ_PER_KCAL
+    return int(round(value))
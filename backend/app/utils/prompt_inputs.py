@@ -0,0 +1,30 @@
+"""
+Prompt Inputs
+提示词变量的紧凑表示：只保留模型需要的字段，以紧凑 JSON 传入
+
+直接插值 Python 对象会得到 repr（单引号、空格、id / created_at 等无关字段），
+输入 token 越多，费用和首 token 前的预填充耗时越高。
+"""
+import json
+from typing import Any, Dict, List
+
+
+def compact_json(value: Any) -> str:
+    """无多余空白的 JSON（中文不转义）"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def candidate_tuples(candidates: Dict[str, List[Dict[str, Any]]], top_k: int) -> Dict[str, List[list]]:
+    """
+    替代候选 -> {缺失食材: [[替代品, 相似度, 比例], ...]}
+
+    候选已按相似度降序排列，每个食材只保留前 top_k 个
+    """
+    return {
+        name: [
+            [row.get('substitute_ingredient', ''), round(row.get('similarity_score') or 0, 2),
+             row.get('substitution_ratio') or '1:1']
+            for row in rows[:top_k]
+        ]
+        for name, rows in candidates.items()
+    }
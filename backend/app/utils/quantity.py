@@ -0,0 +1,266 @@
+"""
+Quantity Engine
+食材数量解析："6个"、"两盒"、"1.5 kg"、"半个"、"一斤半"、"1斤2两"、"1/2杯"、"适量"
+
+数量解析为结构化的 (数值, 单位, 量纲)。单位注册表定义同一量纲内的换算（g/kg/斤/两，
+ml/L/杯/勺），计数类单位（盒、包、根…）各自成为独立量纲，只与同单位相加。
+解析结果按文本缓存，parse_many 供整表批量解析使用。
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+from app.utils.parsers import chinese_to_number
+
+# 量纲 -> 基准单位
+DIMENSION_BASE = {'mass': 'g', 'volume': 'ml', 'count': '个'}
+
+# "适量"、"少许" 等不定量
+UNSPECIFIED = 'unspecified'
+_VAGUE_WORDS = {'适量', '少许', '少量', '若干', '一些', '些许', '随意', '按口味', '酌量', '一点', '一点点'}
+
+
+@dataclass(frozen=True)
+class Unit:
+    """单位：所属量纲与换算到基准单位的系数"""
+    name: str
+    dimension: str
+    factor: float
+
+
+_UNITS: Dict[str, Unit] = {}
+
+
+def register_unit(dimension: str, factor: float, name: str, *aliases: str):
+    """注册单位及其别名（别名解析后统一为 name）"""
+    unit = Unit(name, dimension, factor)
+    for alias in (name,) + aliases:
+        _UNITS[alias.lower()] = unit
+
+
+register_unit('mass', 1, 'g', '克', 'gram', 'grams')
+register_unit('mass', 1000, 'kg', '千克', '公斤', 'kilogram', 'kilograms')
+register_unit('mass', 0.001, 'mg', '毫克')
+register_unit('mass', 500, '斤', '市斤')
+register_unit('mass', 50, '两')
+register_unit('mass', 453.59, 'lb', '磅', 'lbs')
+register_unit('mass', 28.35, 'oz', '盎司')
+register_unit('volume', 1, 'ml', '毫升', 'cc')
+register_unit('volume', 1000, 'L', '升', '公升', 'l', 'liter', 'liters')
+register_unit('volume', 250, '杯', 'cup', 'cups')
+register_unit('volume', 15, '汤匙', '大勺', '大匙', '勺', 'tbsp')
+register_unit('volume', 5, '茶匙', '小勺', '小匙', 'tsp')
+register_unit('count', 1, '个', '只', '颗', '枚', '粒')
+register_unit('count', 12, '打')
+
+_CN_NUMERAL = '零一二两三四五六七八九十百千万'
+# "两" 既是数字也是质量单位（1两 = 50g）：只有位于开头且后面紧跟单位或数位时才是数字（"两勺"、"两百克"），
+# 其余位置一律按单位解析（"三两"、"一两半"、"1斤二两"）
+_CN_NUMERAL_NO_LIANG = _CN_NUMERAL.replace('两', '')
+_FRACTION_CHARS = {'½': 0.5, '⅓': 1 / 3, '⅔': 2 / 3, '¼': 0.25, '¾': 0.75, '⅛': 0.125}
+
+_NUM = (
+    rf'\d+(?:\.\d+)?(?:\s*又\s*\d+/\d+|/\d+)?'
+    rf'|[{"".join(_FRACTION_CHARS)}]'
+    rf'|[{_CN_NUMERAL_NO_LIANG}]+分之[{_CN_NUMERAL_NO_LIANG}]+'
+    rf'|[{_CN_NUMERAL_NO_LIANG}]+'
+    r'|半'
+)
+# 已注册单位按长度降序优先匹配（"千克" 先于数字 "千"），其次是英文单词或单个汉字
+_UNIT = (
+    '|'.join(re.escape(alias) for alias in sorted(_UNITS, key=len, reverse=True))
+    + rf'|[a-z]{{1,12}}|[^\W\d_{_CN_NUMERAL}半]'
+)
+_SEGMENT = re.compile(
+    rf'\s*(?P<num>{_NUM})(?:\s*[-~～—到至]\s*(?P<high>{_NUM}))?'
+    rf'\s*(?P<half>个半)?\s*(?P<unit>{_UNIT})?(?P<trailing_half>半)?',
+    re.IGNORECASE
+)
+_LEADING_LIANG = re.compile(rf'^两(?=[十百千万]|(?:{_UNIT}))', re.IGNORECASE)
+_APPROXIMATE = re.compile(r'^(?:约|大约|大概|差不多)|(?:左右|多|上下)$')
+
+
+@dataclass(frozen=True)
+class Quantity:
+    """结构化数量：数值 + 单位；amount 为 None 表示不定量（适量、少许）"""
+    amount: Optional[float]
+    unit: str = ''
+
+    @property
+    def dimension(self) -> str:
+        """量纲：mass / volume / count（无单位的纯数字按个数），其他计数单位以单位本身为量纲"""
+        if self.amount is None:
+            return UNSPECIFIED
+        if not self.unit:
+            return 'count'
+        registered = _UNITS.get(self.unit.lower())
+        return registered.dimension if registered else self.unit
+
+    @property
+    def base_unit(self) -> str:
+        """量纲的基准单位"""
+        return DIMENSION_BASE.get(self.dimension, self.unit)
+
+    @property
+    def base_amount(self) -> Optional[float]:
+        """换算为基准单位后的数值"""
+        if self.amount is None:
+            return None
+        registered = _UNITS.get(self.unit.lower())
+        return self.amount * registered.factor if registered else self.amount
+
+    def compatible(self, other: 'Quantity') -> bool:
+        """两个数量可否换算相加"""
+        return self.amount is not None and other.amount is not None and self.dimension == other.dimension
+
+    def to(self, unit: str) -> 'Quantity':
+        """换算到同量纲的另一单位"""
+        target = Quantity(1.0, _unit_name(unit))
+        if not self.compatible(target):
+            raise ValueError(f'无法将 {self} 换算为 {unit}')
+        return Quantity(self.base_amount / target.base_amount, target.unit)
+
+    def __add__(self, other: 'Quantity') -> 'Quantity':
+        if not self.compatible(other):
+            raise ValueError(f'单位不兼容: {self} + {other}')
+        return Quantity(self.amount + other.to(self.unit).amount, self.unit)
+
+    def __sub__(self, other: 'Quantity') -> 'Quantity':
+        if not self.compatible(other):
+            raise ValueError(f'单位不兼容: {self} - {other}')
+        return Quantity(self.amount - other.to(self.unit).amount, self.unit)
+
+    def __str__(self) -> str:
+        if self.amount is None:
+            return self.unit
+        amount = round(self.amount, 3)
+        amount = int(amount) if float(amount).is_integer() else amount
+        return f'{amount}{self.unit}'
+
+
+def _number(token: str) -> Optional[float]:
+    """解析单个数字记号：阿拉伯数字、分数、中文数字、"X分之Y"、"半" """
+    if token in _FRACTION_CHARS:
+        return _FRACTION_CHARS[token]
+    if token == '半':
+        return 0.5
+    if '分之' in token:
+        denominator, numerator = token.split('分之')
+        denominator, numerator = chinese_to_number(denominator), chinese_to_number(numerator)
+        return numerator / denominator if denominator else None
+    if token[0].isdigit():
+        whole, _, fraction = token.replace(' ', '').partition('又')
+        if '/' in whole:
+            fraction, whole = whole, '0'
+        value = float(whole)
+        if fraction:
+            numerator, denominator = fraction.split('/')
+            value += int(numerator) / int(denominator) if int(denominator) else 0
+        return value
+    value = chinese_to_number(token)
+    return float(value) if value is not None else None
+
+
+def _unit_name(unit: Optional[str]) -> str:
+    if not unit:
+        return ''
+    registered = _UNITS.get(unit.lower())
+    return registered.name if registered else unit
+
+
+@lru_cache(maxsize=65536)
+def _parse(text: Any) -> Optional[Quantity]:
+    if text is None:
+        return None
+    text = str(text).strip()
+    if not text:
+        return None
+    if text in _VAGUE_WORDS:
+        return Quantity(None, text)
+    text = _APPROXIMATE.sub('', text).strip()
+    text = _LEADING_LIANG.sub('二', text)
+
+    segments: List[Quantity] = []
+    pos = 0
+    while pos < len(text):
+        match = _SEGMENT.match(text, pos)
+        if not match or match.end() == pos:
+            return None
+        amount = _number(match.group('high') or match.group('num'))
+        if amount is None:
+            return None
+        if match.group('half') or match.group('trailing_half'):
+            amount += 0.5
+        unit = _unit_name(match.group('unit') or ('个' if match.group('half') else ''))
+        segments.append(Quantity(amount, unit))
+        pos = match.end()
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+
+    if not segments:
+        return None
+    # "1斤2两"：同量纲的多段相加，以第一段单位表示
+    total = segments[0]
+    for segment in segments[1:]:
+        if not total.compatible(segment):
+            return None
+        total = total + segment
+    return total
+
+
+def parse_quantity(text: Optional[str]) -> Optional[Quantity]:
+    """
+    解析数量文本
+
+    "6个" -> 6个，"1.5 KG" -> 1.5kg，"半个" -> 0.5个，"一斤半" -> 1.5斤，"1斤2两" -> 1.2斤，
+    "三两" -> 3两，"两勺" -> 2勺，"2-3个" -> 3个（区间取上限），"适量" -> 不定量；无法解析返回 None
+    """
+    return _parse(text)
+
+
+def parse_many(texts: Iterable[Optional[str]]) -> List[Optional[Quantity]]:
+    """批量解析（整表回填、购物清单汇总），重复文本命中缓存"""
+    return list(map(_parse, texts))
+
+
+def quantity_columns(text: Optional[str]) -> Dict[str, Any]:
+    """数量文本对应的结构化列值（数值与单位按量纲基准单位存储）"""
+    quantity = _parse(text)
+    if quantity is None:
+        return {'quantity_value': None, 'quantity_unit': None, 'quantity_dimension': None}
+    return {
+        'quantity_value': quantity.base_amount,
+        'quantity_unit': quantity.base_unit if quantity.amount is not None else None,
+        'quantity_dimension': quantity.dimension
+    }
+
+
+def add_quantities(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    """
+    合并两个数量文本
+
+    同量纲时换算相加，以第一个的单位表示（"1kg" + "500g" -> "1.5kg"）；不兼容或
+    无法解析时用 "+" 连接保留原文（"1盒" + "6个" -> "1盒+6个"）。
+    """
+    if not a:
+        return b
+    if not b:
+        return a
+    qa, qb = _parse(a), _parse(b)
+    if qa and qb and qa.compatible(qb):
+        return str(qa + qb)
+    return f'{a}+{b}'
+
+
+def remaining_quantity(needed: Optional[str], available: Optional[str]) -> Optional[str]:
+    """
+    已有 available 时还需补充的数量，已足够时返回 None
+
+    同量纲时按差值计算（需要 "1kg"、已有 "300g" -> "0.7kg"）；
+    任一方为不定量或无法比较时视为已足够（已有该食材即不再补充）。
+    """
+    qn, qa = _parse(needed), _parse(available)
+    if not (qn and qa and qn.compatible(qa)):
+        return None
+    rest = qn - qa
+    return str(rest) if rest.amount > 1e-9 else None
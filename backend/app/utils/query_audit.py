@@ -0,0 +1,119 @@
+"""
+Query Audit
+SQL 查询计划审计工具：通过 SQLAlchemy 事件捕获业务代码发出的全部 SQL，
+对每条语句执行 EXPLAIN QUERY PLAN，标记超过行数阈值的表上的全表扫描。
+
+用法:
+    with QueryAudit(db.engine) as audit:
+        client.get('/api/recipes/history')
+    assert not audit.full_scans(), audit.report()
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event, text, inspect
+
+from config import Config
+
+# 只审计 DML 语句，跳过 DDL / PRAGMA / 迁移版本表等
+_AUDITED_PREFIXES = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+# 新版 SQLite 输出 "SCAN t"，旧版输出 "SCAN TABLE t"
+_SCAN_PATTERN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$')
+_ALIAS_SUFFIX = re.compile(r'_\d+$')
+
+
+@dataclass
+class PlanFinding:
+    """一次全表扫描发现"""
+    table: str
+    rows: int
+    statement: str
+    plan: List[str]
+
+
+class QueryAudit:
+    """SQL 捕获与查询计划审计"""
+
+    def __init__(self, engine, min_rows: Optional[int] = None):
+        self.engine = engine
+        self.min_rows = Config.QUERY_AUDIT_MIN_ROWS if min_rows is None else min_rows
+        self.statements: List[Tuple[str, Any]] = []
+        self._row_counts: Dict[str, int] = {}
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._capture)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, 'before_cursor_execute', self._capture)
+        return False
+
+    def _capture(self, conn, cursor, statement, parameters, context, executemany):
+        # executemany 记为一条语句，EXPLAIN 时使用第一组参数
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        self.statements.append((statement, parameters))
+
+    @property
+    def count(self) -> int:
+        """捕获到的 SQL 语句数量"""
+        return len(self.statements)
+
+    def reset(self):
+        """清空已捕获语句"""
+        self.statements = []
+
+    def _audited_statements(self) -> List[Tuple[str, Any]]:
+        unique = {}
+        for statement, parameters in self.statements:
+            normalized = statement.lstrip().upper()
+            if normalized.startswith(_AUDITED_PREFIXES) and statement not in unique:
+                unique[statement] = parameters
+        return list(unique.items())
+
+    def _table_rows(self, conn, table_names, name: str) -> Optional[int]:
+        if name not in table_names:
+            name = _ALIAS_SUFFIX.sub('', name)
+            if name not in table_names:
+                return None
+        if name not in self._row_counts:
+            self._row_counts[name] = conn.execute(text(f'SELECT COUNT(*) FROM {name}')).scalar()
+        return self._row_counts[name]
+
+    def explain(self) -> List[Tuple[str, List[str]]]:
+        """对捕获的语句执行 EXPLAIN QUERY PLAN，返回 (语句, 计划行) 列表"""
+        if self.engine.dialect.name != 'sqlite':
+            raise RuntimeError('QueryAudit 目前仅支持 SQLite 的 EXPLAIN QUERY PLAN')
+
+        plans = []
+        with self.engine.connect() as conn:
+            for statement, parameters in self._audited_statements():
+                rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters or ()).fetchall()
+                plans.append((statement, [row[-1] for row in rows]))
+        return plans
+
+    def full_scans(self) -> List[PlanFinding]:
+        """返回超过行数阈值的表上的全表扫描"""
+        findings = []
+        plans = self.explain()
+        with self.engine.connect() as conn:
+            table_names = set(inspect(conn).get_table_names())
+            for statement, plan in plans:
+                for detail in plan:
+                    match = _SCAN_PATTERN.match(detail.strip())
+                    if not match:
+                        continue
+                    rows = self._table_rows(conn, table_names, match.group(1))
+                    if rows is not None and rows >= self.min_rows:
+                        findings.append(PlanFinding(match.group(1), rows, statement, plan))
+        return findings
+
+    def report(self) -> str:
+        """生成可读的审计报告"""
+        findings = self.full_scans()
+        lines = [f"捕获 SQL {self.count} 条，全表扫描 {len(findings)} 处（阈值 {self.min_rows} 行）"]
+        for finding in findings:
+            lines.append(f"- SCAN {finding.table} ({finding.rows} 行)")
+            lines.append(f"  SQL: {' '.join(finding.statement.split())}")
+            lines.append(f"  PLAN: {' | '.join(finding.plan)}")
+        return '\n'.join(lines)
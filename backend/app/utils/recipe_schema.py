@@ -0,0 +1,108 @@
+"""
+Compact Recipe Schema
+模型输出用的紧凑食谱格式与展开
+
+模型逐个生成输出 token，输出长度直接决定生成耗时。紧凑格式用定长数组代替对象、
+用数字代码代替难度和食材状态、时间与热量只输出数字、步骤不带序号前缀：
+
+    ["番茄炒蛋", "酸甜下饭", 1, 15, 350, [["鸡蛋", "2个", 1], ["番茄", "1个", 0]], ["鸡蛋打散", "..."], ["快手菜"]]
+
+展开后为原有的食谱字典（name/description/difficulty/time/calories/ingredients/steps/tags），
+与 Recipe.from_ai_response 及前端使用的结构一致。模型仍按完整格式输出的对象原样保留。
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+# 字段顺序
+FIELDS = ('name', 'description', 'difficulty', 'time', 'calories', 'ingredients', 'steps', 'tags')
+
+DIFFICULTY_CODES = {1: '新手', 2: '进阶', 3: '专业'}
+STATUS_CODES = {1: '已有', 0: '需补充'}
+
+_STEP_PREFIX = re.compile(r'^\s*(?:步骤\s*\d+|第\s*\d+\s*步|\d+)\s*[:：.、)）]\s*')
+
+
+def _decode(codes: Dict[int, str], value: Any) -> Any:
+    """数字代码 -> 文本；已是文本时原样保留"""
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float)) and int(value) in codes:
+        return codes[int(value)]
+    return value if isinstance(value, str) else ''
+
+
+def _encode(codes: Dict[int, str], text: Any) -> Any:
+    for code, label in codes.items():
+        if label == text:
+            return code
+    return text
+
+
+def _with_unit(value: Any, template: str) -> str:
+    """数字 -> 带单位文本（15 -> "15分钟"）；已是文本时原样保留"""
+    if isinstance(value, bool) or value is None:
+        return ''
+    if isinstance(value, (int, float)):
+        return template.format(int(value) if float(value).is_integer() else value)
+    return str(value)
+
+
+def _expand_ingredient(row: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(row, dict):
+        return row
+    if not isinstance(row, list) or not row:
+        return None
+    name, quantity, status = (list(row) + ['', '', 0][len(row):])[:3]
+    return {'name': str(name), 'quantity': str(quantity or '适量'), 'status': _decode(STATUS_CODES, status)}
+
+
+def expand_recipe(row: Any) -> Optional[Dict[str, Any]]:
+    """紧凑数组 -> 食谱字典（完整格式的对象原样返回，无法识别返回 None）"""
+    if isinstance(row, dict):
+        return row
+    if not isinstance(row, list) or not row or not isinstance(row[0], str):
+        return None
+    values = dict(zip(FIELDS, row))
+    ingredients = values.get('ingredients') if isinstance(values.get('ingredients'), list) else []
+    steps = values.get('steps') if isinstance(values.get('steps'), list) else []
+    tags = values.get('tags') if isinstance(values.get('tags'), list) else []
+    return {
+        'name': values['name'],
+        'description': str(values.get('description') or ''),
+        'difficulty': _decode(DIFFICULTY_CODES, values.get('difficulty')),
+        'time': _with_unit(values.get('time'), '{}分钟'),
+        'calories': _with_unit(values.get('calories'), '约{}卡'),
+        'ingredients': [ing for ing in map(_expand_ingredient, ingredients) if ing],
+        'steps': [_STEP_PREFIX.sub('', str(step)) for step in steps if str(step).strip()],
+        'tags': [str(tag) for tag in tags]
+    }
+
+
+def expand_recipes(data: Any) -> List[Dict[str, Any]]:
+    """展开模型输出：紧凑数组列表、单个紧凑数组或完整格式对象（列表）"""
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        return []
+    if data and isinstance(data[0], str):
+        data = [data]
+    return [recipe for recipe in map(expand_recipe, data) if recipe]
+
+
+def compact_recipe(recipe: Dict[str, Any]) -> List[Any]:
+    """食谱字典 -> 紧凑数组（用于提示词示例与输出长度对比）"""
+    def number(text: Any) -> Any:
+        match = re.search(r'\d+', str(text or ''))
+        return int(match.group()) if match else text
+
+    return [
+        recipe.get('name', ''),
+        recipe.get('description', ''),
+        _encode(DIFFICULTY_CODES, recipe.get('difficulty')),
+        number(recipe.get('time')),
+        number(recipe.get('calories')),
+        [[ing.get('name', ''), ing.get('quantity', ''), _encode(STATUS_CODES, ing.get('status'))]
+         for ing in recipe.get('ingredients', [])],
+        [_STEP_PREFIX.sub('', str(step)) for step in recipe.get('steps', [])],
+        list(recipe.get('tags', []))
+    ]
@@ -0,0 +1,136 @@
+"""
+Substitution Paths
+多级替代路径：在直接替代关系上求有界跳数的传递闭包
+
+黄油 -> 植物油 (0.7)、植物油 -> 猪油 (0.9) 推出 黄油 -> 猪油，路径得分为各跳相似度之积 (0.63)。
+每个 (原食材, 替代食材) 只保留得分最高的路径；已有直接替代关系的食材对不再生成多级路径。
+食材节点以规范 ID 标识，未收录词表的以规范化名称标识。
+"""
+import json
+import re
+from collections import defaultdict, deque
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+from app.utils.alias_trie import normalize_alias
+
+DEFAULT_MAX_HOPS = 3
+DEFAULT_MIN_SCORE = 0.5
+
+_RATIO = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*[:：]\s*(\d+(?:\.\d+)?)\s*$')
+
+
+def node_key(canonical_id: Optional[int], name: Optional[str]) -> str:
+    """食材节点标识"""
+    return f'c:{canonical_id}' if canonical_id is not None else f'n:{normalize_alias(name)}'
+
+
+def parse_ratio(ratio: Optional[str]) -> Optional[float]:
+    """"1:0.8" -> 0.8（每单位原食材所需替代食材的量），文字描述的比例返回 None"""
+    match = _RATIO.match(ratio or '')
+    if not match or float(match.group(1)) == 0:
+        return None
+    return float(match.group(2)) / float(match.group(1))
+
+
+def compose_ratios(ratios: Iterable[Optional[str]]) -> Optional[str]:
+    """
+    组合各跳比例："1:0.8" 与 "1:0.5" -> "1:0.4"
+
+    任一跳为文字描述（"1瓣蒜=1/8勺蒜粉"）时无法换算，返回 None
+    """
+    factor = 1.0
+    for ratio in ratios:
+        value = parse_ratio(ratio)
+        if value is None:
+            return None
+        factor *= value
+    factor = round(factor, 3)
+    return f'1:{int(factor) if factor.is_integer() else factor}'
+
+
+def _out_edges(edges: Iterable[Mapping[str, Any]]) -> Dict[str, List[Mapping[str, Any]]]:
+    out: Dict[str, List[Mapping[str, Any]]] = defaultdict(list)
+    for edge in edges:
+        out[node_key(edge['original_canonical_id'], edge['original_ingredient'])].append(edge)
+    return out
+
+
+def affected_origins(edges: Iterable[Mapping[str, Any]], changed: Iterable[str],
+                     max_hops: int = DEFAULT_MAX_HOPS) -> Set[str]:
+    """
+    边变化后需要重算闭包的起点：能在 max_hops - 1 跳内到达变化边起点的所有节点
+
+    （删除的边只影响经过其起点的路径，起点本身的可达性与该边无关）
+    """
+    reverse: Dict[str, Set[str]] = defaultdict(set)
+    for edge in edges:
+        reverse[node_key(edge['substitute_canonical_id'], edge['substitute_ingredient'])].add(
+            node_key(edge['original_canonical_id'], edge['original_ingredient'])
+        )
+    affected = set(changed)
+    frontier = deque((key, 0) for key in affected)
+    while frontier:
+        key, depth = frontier.popleft()
+        if depth >= max_hops - 1:
+            continue
+        for origin in reverse.get(key, ()):
+            if origin not in affected:
+                affected.add(origin)
+                frontier.append((origin, depth + 1))
+    return affected
+
+
+def closure_rows(edges: Iterable[Mapping[str, Any]], origins: Optional[Iterable[str]] = None,
+                 max_hops: int = DEFAULT_MAX_HOPS, min_score: float = DEFAULT_MIN_SCORE) -> List[Dict[str, Any]]:
+    """
+    计算多级替代路径（2..max_hops 跳，得分不低于 min_score）
+
+    Args:
+        edges: 直接替代关系（含 original/substitute 名称与规范 ID、similarity_score、substitution_ratio）
+        origins: 只计算这些起点（None 表示全部）
+
+    Returns:
+        substitution_closure 行（不含 id / updated_at）
+    """
+    out = _out_edges(edges)
+    rows = []
+    for origin in (out if origins is None else origins):
+        if origin not in out:
+            continue
+        direct = {node_key(e['substitute_canonical_id'], e['substitute_ingredient']) for e in out[origin]}
+        best: Dict[str, tuple] = {}
+
+        # 深度优先枚举简单路径；相似度不超过 1，得分低于阈值即可剪枝
+        stack = [(origin, 1.0, [], {origin})]
+        while stack:
+            node, score, path, visited = stack.pop()
+            for edge in out.get(node, ()):
+                target = node_key(edge['substitute_canonical_id'], edge['substitute_ingredient'])
+                if target in visited:
+                    continue
+                path_score = score * (edge['similarity_score'] or 0)
+                if path_score < min_score:
+                    continue
+                hop_path = path + [edge]
+                if len(hop_path) >= 2 and target not in direct:
+                    current = best.get(target)
+                    if current is None or (path_score, -len(hop_path)) > (current[0], -len(current[1])):
+                        best[target] = (path_score, hop_path)
+                if len(hop_path) < max_hops:
+                    stack.append((target, path_score, hop_path, visited | {target}))
+
+        for score, path in best.values():
+            first, last = path[0], path[-1]
+            rows.append({
+                'original_key': origin,
+                'original_ingredient': first['original_ingredient'],
+                'original_canonical_id': first['original_canonical_id'],
+                'substitute_ingredient': last['substitute_ingredient'],
+                'substitute_canonical_id': last['substitute_canonical_id'],
+                'hops': len(path),
+                'score': round(score, 4),
+                'substitution_ratio': compose_ratios(edge['substitution_ratio'] for edge in path),
+                'category': last['category'],
+                'path': json.dumps([first['original_ingredient']] + [edge['substitute_ingredient'] for edge in path],
+                                   ensure_ascii=False),
+            })
+    return rows
@@ -0,0 +1,42 @@
+"""
+Text Utilities
+文本处理工具：中文分词（单字 + 二元组）
+"""
+import re
+from typing import List
+
+# CJK 统一表意文字（含扩展 A）与其它字符的分段
+_SEGMENT_PATTERN = re.compile(r'([㐀-䶿一-鿿]+)|([0-9A-Za-z]+)')
+
+
+def cjk_tokens(text: str, unigrams: bool = True) -> List[str]:
+    """
+    将文本切分为检索词元
+
+    中文连续片段切为单字与相邻二元组（"番茄炒蛋" -> 番 茄 炒 蛋 番茄 茄炒 炒蛋），
+    字母数字片段保留为小写单词。
+
+    Args:
+        text: 原始文本
+        unigrams: 是否输出单字（建索引时为 True，多字查询时只需二元组）
+
+    Returns:
+        词元列表
+    """
+    tokens = []
+    if not text:
+        return tokens
+
+    for cjk, word in _SEGMENT_PATTERN.findall(text):
+        if word:
+            tokens.append(word.lower())
+            continue
+        if unigrams or len(cjk) == 1:
+            tokens.extend(cjk)
+        tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+
+def cjk_index_text(text: str) -> str:
+    """生成写入全文索引的词元文本（空格分隔）"""
+    return ' '.join(cjk_tokens(text))
@@ -0,0 +1,25 @@
+"""
+Token Estimation
+提示词与模型输出的 token 数估算（不依赖模型分词器）
+
+按 Qwen 系列 BPE 分词的经验规则计数：每个汉字及全角标点约 1 个 token，
+数字逐位切分，连续英文字母约 4 个字符 1 个 token，其余 ASCII 符号各 1 个，
+空白并入相邻 token。用于比较不同提示词/输出格式的相对长度，不是精确计费值。
+"""
+import re
+from typing import Any
+
+_TOKEN_PATTERN = re.compile(r'([A-Za-z]+)|(\d)|(\s+)|(.)', re.DOTALL)
+
+
+def estimate_tokens(text: Any) -> int:
+    """估算文本的 token 数"""
+    if not text:
+        return 0
+    count = 0
+    for letters, digit, space, other in _TOKEN_PATTERN.findall(str(text)):
+        if letters:
+            count += (len(letters) + 3) // 4
+        elif digit or other:
+            count += 1
+    return count
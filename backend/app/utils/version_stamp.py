@@ -0,0 +1,53 @@
+"""
+Version Stamp
+进程内缓存的跨进程一致性：本地记录加载时的版本号，按间隔与 cache_versions 比对
+
+本进程的写入在提交后直接失效本地缓存；其他 worker 进程的写入最迟在一个检查间隔后发现。
+检查是一次主键查询，间隔内的读取不访问数据库。
+"""
+import threading
+import time
+from typing import Optional
+from app.models.cache_version import read_version
+
+
+class VersionStamp:
+    """单个缓存的版本戳"""
+
+    def __init__(self, name: str, interval: float = 1.0):
+        self.name = name
+        self.interval = interval
+        self.version: Optional[int] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def read(self, connection) -> int:
+        """读取数据库中的当前版本号"""
+        return read_version(connection, self.name)
+
+    def mark_loaded(self, version: int):
+        """记录本地缓存对应的版本号"""
+        with self._lock:
+            self.version = version
+            self._checked = time.monotonic()
+
+    def expire(self):
+        """下次访问时立即比对版本号"""
+        with self._lock:
+            self._checked = 0.0
+
+    def changed(self, connection) -> bool:
+        """
+        数据库版本是否与本地不同（间隔内直接返回 False）
+
+        Args:
+            connection: 数据库连接，或返回连接的无参函数（仅在需要比对时调用）
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.version is not None and now - self._checked < self.interval:
+                return False
+            self._checked = now
+        if callable(connection):
+            connection = connection()
+        return self.read(connection) != self.version
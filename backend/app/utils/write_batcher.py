@@ -0,0 +1,164 @@
+"""
+Write Batcher
+组提交（group commit）：单个写线程在短时间窗口内收集多个小写操作，合并为一次提交
+
+SQLite 每次提交都要获取数据库写锁并 fsync，多个用户同时勾选步骤、标记购买时
+逐个提交会严重串行化。开启组提交后，调用方提交一个写操作（接收 Connection 的函数），
+阻塞等待所在批次提交成功后拿到结果，持久性与逐条提交相同。
+
+按操作类别开关（Config.GROUP_COMMIT），未开启的类别在调用方的会话上直接执行并提交。
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+WriteOp = Callable[[Connection], Any]
+
+
+class WriteBatcher:
+    """组提交写线程"""
+
+    def __init__(self, window_ms: float = 5, max_batch: int = 64, enabled: Iterable[str] = ()):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.enabled = set(enabled)
+        self.engine: Optional[Engine] = None
+        self._queue: 'queue.Queue[Optional[Tuple[WriteOp, Future]]]' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.operations = 0
+
+    def init_app(self, app, engine: Engine):
+        """从应用配置读取窗口与开启的操作类别"""
+        self.window = app.config.get('GROUP_COMMIT_WINDOW_MS', 5) / 1000.0
+        self.max_batch = app.config.get('GROUP_COMMIT_MAX_BATCH', 64)
+        self.enabled = set(app.config.get('GROUP_COMMIT', ()))
+        self.engine = engine
+
+    def is_enabled(self, op_class: str) -> bool:
+        """该类别是否走组提交"""
+        return op_class in self.enabled and self.engine is not None
+
+    def submit(self, op: WriteOp) -> Future:
+        """提交写操作，返回在所在批次提交后完成的 Future"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((op, future))
+        return future
+
+    def execute(self, op_class: str, op: WriteOp, session=None) -> Any:
+        """
+        执行写操作并返回其结果
+
+        op_class 开启组提交时交给写线程并等待提交；否则在 session 的连接上执行并立即提交。
+        """
+        if self.is_enabled(op_class):
+            return self.submit(op).result()
+
+        try:
+            result = op(session.connection())
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+
+    def stop(self, timeout: Optional[float] = None):
+        """处理完已提交的操作后停止写线程"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(None)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-batcher', daemon=True)
+                self._thread.start()
+
+    def _collect(self, first) -> Tuple[List[Tuple[WriteOp, Future]], bool]:
+        """
+        从第一个操作起收集最多 max_batch 个操作
+
+        最多等待一个窗口期；调用方都在阻塞等待结果时不会再有新操作到达，
+        因此连续 1/4 个窗口没有新操作就提前结束收集，避免空等整个窗口。
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        idle = self.window / 4
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=min(remaining, idle))
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            self._commit(batch)
+            if stopping:
+                return
+
+    def _commit(self, batch: List[Tuple[WriteOp, Future]]):
+        """整批在一个事务中执行；失败时逐个重放，只让出错的操作失败"""
+        batch = [(op, future) for op, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            with self.engine.begin() as conn:
+                results = [op(conn) for op, _ in batch]
+        except Exception as e:
+            logger.warning(f"⚠️  组提交失败，逐个重放 {len(batch)} 个写操作: {e}")
+            for op, future in batch:
+                self._commit_one(op, future)
+            return
+
+        self.batches += 1
+        self.operations += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _commit_one(self, op: WriteOp, future: Future):
+        try:
+            with self.engine.begin() as conn:
+                result = op(conn)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        self.batches += 1
+        self.operations += 1
+        future.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        """批次统计"""
+        return {
+            'batches': self.batches,
+            'operations': self.operations,
+            'avg_batch_size': self.operations / self.batches if self.batches else 0.0
+        }
+
+
+# 创建全局写线程实例（create_app 中按配置初始化）
+write_batcher = WriteBatcher()
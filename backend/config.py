@@ -22,6 +22,8 @@ class Config:
         f'sqlite:///{os.path.join(BASE_DIR, "smartcook.db")}'
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # 启动时自动应用待执行的迁移（生产环境建议关闭，改为部署时执行 python migrate.py upgrade）
+    AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'True') == 'True'
 
     # Dashscope API 配置
     DASHSCOPE_API_KEY = os.getenv('DASHSCOPE_API_KEY')
@@ -39,10 +41,76 @@ class Config:
     MIN_INGREDIENTS = 1
     MAX_INGREDIENTS = 20
 
+    # 食谱序列化结果缓存容量（条）
+    RECIPE_PAYLOAD_CACHE_SIZE = int(os.getenv('RECIPE_PAYLOAD_CACHE_SIZE', 2048))
+
+    # 进程内缓存（替代关系图、食材别名自动机）与 cache_versions 比对版本号的间隔（秒）
+    CACHE_VERSION_CHECK_SECONDS = float(os.getenv('CACHE_VERSION_CHECK_SECONDS', 1.0))
+
     # 分页配置
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
 
+    # 步骤进度批量更新上限
+    MAX_PROGRESS_STEPS = 100
+
+    # 食材批量导入上限（行）
+    MAX_BULK_INGREDIENTS = 200
+
+    # 多食谱生成购物清单上限（食谱数）
+    MAX_GENERATE_RECIPES = 50
+
+    # 购物清单批量操作上限（项目数）
+    MAX_BULK_SHOPPING_ITEMS = 500
+
+    # 多级替代路径：预计算的最大跳数与最低路径得分（各跳相似度之积）
+    SUBSTITUTION_MAX_HOPS = int(os.getenv('SUBSTITUTION_MAX_HOPS', 3))
+    SUBSTITUTION_MIN_PATH_SCORE = float(os.getenv('SUBSTITUTION_MIN_PATH_SCORE', 0.5))
+
+    # 链式流程模式：staged 分步调用分析与食谱生成；oneshot 一次调用完成两者，解析失败时回退 staged
+    CHAIN_MODE = os.getenv('CHAIN_MODE', 'staged').lower()
+
+    # 链式流程截止时间（毫秒，0 不限制），请求头 X-Request-Deadline-Ms 可覆盖
+    CHAIN_DEADLINE_MS = int(os.getenv('CHAIN_DEADLINE_MS', 30000))
+    # 各阶段完整策略（模型调用）的预计耗时，剩余时间不足时改用降级策略
+    CHAIN_STAGE_BUDGET_MS = {
+        'analysis': 3000,  # 不足时启发式解析
+        'recipes': 10000,  # 不足时检索历史食谱
+        'substitution': 5000  # 不足时使用数据库候选
+    }
+
+    # 链式流程结果缓存：规范化输入相同的请求在有效期内直接返回已保存的结果（秒，0 关闭）
+    CHAIN_RUN_CACHE_TTL_SECONDS = int(os.getenv('CHAIN_RUN_CACHE_TTL_SECONDS', 3600))
+
+    # 链式流程替代方案：缺失食材有至少 k 个相似度不低于阈值的数据库候选时本地作答，不调用模型
+    SUBSTITUTION_LOCAL_MIN_CANDIDATES = int(os.getenv('SUBSTITUTION_LOCAL_MIN_CANDIDATES', 2))
+    SUBSTITUTION_LOCAL_MIN_SCORE = float(os.getenv('SUBSTITUTION_LOCAL_MIN_SCORE', 0.6))
+    # 替代方案提示词中每个缺失食材最多携带的数据库候选数
+    SUBSTITUTION_PROMPT_TOP_K = int(os.getenv('SUBSTITUTION_PROMPT_TOP_K', 3))
+
+    # 链式流程中模型补充的替代建议写回替代关系表（未审核前按置信度降权参与查询，到期后失效）
+    LLM_SUGGESTION_WRITEBACK = os.getenv('LLM_SUGGESTION_WRITEBACK', 'True').lower() == 'true'
+    LLM_SUGGESTION_TTL_DAYS = int(os.getenv('LLM_SUGGESTION_TTL_DAYS', 30))
+    LLM_SUGGESTION_MIN_CONFIDENCE = 0.3  # 低于此置信度的建议不写回
+    LLM_SUGGESTION_DEFAULT_CONFIDENCE = 0.6  # 模型未给出置信度时使用
+    LLM_SUGGESTION_SCORE_WEIGHT = 0.8  # similarity_score = 置信度 × 权重，排在同等人工记录之后
+    LLM_SUGGESTIONS_PER_INGREDIENT = 3  # 每个缺失食材最多写回条数
+
+    # 批量替代查询上限（食材数）与每个食材的返回数量上限
+    MAX_SUBSTITUTION_BATCH = 100
+    MAX_SUBSTITUTION_LIMIT = 20
+
+    # 组提交：开启的写操作类别（progress, shopping, ingredient），逗号分隔，默认关闭
+    GROUP_COMMIT = [c.strip() for c in os.getenv('GROUP_COMMIT', '').split(',') if c.strip()]
+    GROUP_COMMIT_WINDOW_MS = float(os.getenv('GROUP_COMMIT_WINDOW_MS', 5))  # 收集窗口
+    GROUP_COMMIT_MAX_BATCH = 64  # 每批最多操作数
+
+    # 步骤进度实时推送（SSE）
+    PROGRESS_HUB_BACKEND = os.getenv('PROGRESS_HUB_BACKEND', 'memory')  # memory: 单进程; database: 多进程共享
+    PROGRESS_HUB_POLL_MS = 100  # database 后端轮询间隔
+    PROGRESS_HUB_RETENTION = 300  # database 后端事件保留秒数
+    PROGRESS_STREAM_KEEPALIVE = 15  # SSE 心跳间隔（秒）
+
     # 允许的值 - 用于输入验证
     ALLOWED_CATEGORIES = ['蔬菜', '肉禽', '海鲜', '主食', '调料', '水果', '豆制品', '蛋奶']
     ALLOWED_STORAGE = ['fridge', 'freezer', 'pantry']
@@ -52,6 +120,9 @@ class Config:
     ALLOWED_SCENARIOS = ['早餐', '快手菜', '硬菜', '宴客菜', '夜宵']
     ALLOWED_SKILLS = ['新手', '进阶', '专业']
 
+    # 查询计划审计：超过该行数的表上出现全表扫描视为回归
+    QUERY_AUDIT_MIN_ROWS = 100
+
     # SQLAlchemy 连接池配置
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_size': 10,
@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app
 from app.database import db
+from app import migrations
 from app.models.ingredient import Ingredient
 from app.models.favorite import FavoriteGroup
 from app.models.substitution import IngredientSubstitution
@@ -19,10 +20,10 @@ def init_database():
     app = create_app()
 
     with app.app_context():
-        # 创建所有表
-        print("🔧 正在创建数据库表...")
-        db.create_all()
-        print("✅ 数据库表创建成功")
+        # 应用待执行的迁移（create_app 未开启 AUTO_MIGRATE 时在此补齐）
+        print("🔧 正在检查数据库迁移...")
+        migrations.upgrade(db.engine)
+        print(f"✅ 数据库表结构版本: v{migrations.current_version(db.engine):04d}")
 
         # 检查是否已有数据
         if Ingredient.query.first():
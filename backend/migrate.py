@@ -0,0 +1,55 @@
+"""
+Database Migration CLI
+数据库迁移命令行工具
+
+用法:
+    python migrate.py status            查看迁移状态
+    python migrate.py upgrade           应用全部待执行迁移
+    python migrate.py upgrade --to 3    迁移到指定版本
+    python migrate.py verify            校验版本（落后时返回非零退出码，可用于部署检查）
+"""
+import argparse
+import sys
+import os
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from config import Config
+from app import migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SmartCook AI 数据库迁移')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help='查看迁移状态')
+    upgrade_parser = subparsers.add_parser('upgrade', help='应用待执行迁移')
+    upgrade_parser.add_argument('--to', type=int, default=None, help='目标版本')
+    subparsers.add_parser('verify', help='校验数据库版本')
+    args = parser.parse_args()
+
+    # 迁移只需要数据库连接，不初始化 Flask 应用和 AI 模型
+    engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+
+    if args.command == 'status':
+        for migration, applied in migrations.status(engine):
+            mark = '✅' if applied else '⏳'
+            print(f"{mark} v{migration.version:04d}  {migration.description}")
+        return 0
+
+    if args.command == 'upgrade':
+        applied = migrations.upgrade(engine, target=args.to)
+        if not applied:
+            print("ℹ️  没有待执行的迁移")
+        for migration in applied:
+            print(f"✅ 已应用 v{migration.version:04d}  {migration.description}")
+        return 0
+
+    current, head = migrations.verify(engine)
+    print(f"当前版本: v{current:04d}, 最新版本: v{head:04d}")
+    return 0 if current == head else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Quantity Parser Benchmark
+数量解析吞吐基准：冷启动（逐个正则解析）与缓存命中（整表批量解析）
+
+用法:
+    python testing/benchmark_quantity.py [字符串数量]
+"""
+import sys
+import os
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.quantity import _parse, parse_many
+
+# 贴近真实数据的数量写法（食材库存、AI 食谱、小票识别）
+VOCABULARY = [
+    '6个', '两个', '半个', '一个半', '2-3个', '1斤', '一斤半', '1斤2两', '3两', '500g', '200克',
+    '1.5kg', '5千克', '1L', '250ml', '1/2杯', '三分之一杯', '两勺', '1茶匙', '一打', '2盒',
+    '3根', '1把', '适量', '少许', '约200克', '10', '1又1/2杯', '2 lbs', '½杯',
+]
+
+
+def print_header(title: str):
+    """打印测试标题"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def _texts(count: int):
+    """按词表生成数量文本，掺入带数字变化的写法模拟真实分布"""
+    rng = random.Random(42)
+    texts = []
+    for _ in range(count):
+        if rng.random() < 0.9:
+            texts.append(rng.choice(VOCABULARY))
+        else:
+            texts.append(f'{rng.randint(1, 999)}{rng.choice(["g", "克", "ml", "个", "斤"])}')
+    return texts
+
+
+def benchmark(count: int = 1_000_000):
+    print_header(f"数量解析吞吐基准 ({count:,} 条)")
+
+    texts = _texts(count)
+    distinct = sorted(set(texts))
+
+    _parse.cache_clear()
+    start = time.perf_counter()
+    parse_many(distinct)
+    cold = len(distinct) / (time.perf_counter() - start)
+    print(f"⏱️  冷启动解析: {cold:,.0f} 条/秒（{len(distinct):,} 个不同写法）")
+
+    start = time.perf_counter()
+    parse_many(texts)
+    warm = count / (time.perf_counter() - start)
+    info = _parse.cache_info()
+    print(f"⏱️  缓存批量解析: {warm:,.0f} 条/秒（命中 {info.hits:,}，未命中 {info.misses:,}）")
+
+
+def main():
+    args = [int(a) for a in sys.argv[1:2]]
+    benchmark(*args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Recipe Output Schema Benchmark
+模型输出长度基准：完整格式（带字段名、文本状态、步骤序号）与紧凑格式的输出 token 数，
+以及服务端展开紧凑格式的耗时
+
+用法:
+    python testing/benchmark_recipe_schema.py [每次响应的食谱数] [展开次数]
+"""
+import sys
+import os
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.recipe_schema import compact_recipe, expand_recipes
+from app.utils.tokens import estimate_tokens
+
+INGREDIENTS = ['鸡蛋', '番茄', '米饭', '鸡胸肉', '西兰花', '土豆', '牛肉', '豆腐', '青椒', '洋葱', '酱油', '蒜']
+QUANTITIES = ['2个', '1个', '1碗', '200克', '适量', '1勺', '半个', '300g']
+STEPS = ['将食材洗净切块备用', '热锅下油，放入蒜末爆香', '加入主料大火翻炒两分钟', '加酱油和少许盐调味',
+         '转小火焖煮五分钟', '撒上葱花即可出锅']
+
+
+def print_header(title: str):
+    """打印测试标题"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def _recipes(count: int):
+    """按原提示词示例的写法生成模型输出（步骤带序号）"""
+    rng = random.Random(42)
+    recipes = []
+    for i in range(count):
+        steps = rng.sample(STEPS, rng.randint(4, 6))
+        recipes.append({
+            'name': f'创意菜{i}',
+            'description': '家常快手，营养均衡',
+            'difficulty': rng.choice(['新手', '进阶']),
+            'time': f'{rng.randint(10, 60)}分钟',
+            'calories': f'约{rng.randint(200, 800)}卡',
+            'ingredients': [
+                {'name': name, 'quantity': rng.choice(QUANTITIES), 'status': rng.choice(['已有', '需补充'])}
+                for name in rng.sample(INGREDIENTS, rng.randint(4, 8))
+            ],
+            'steps': [f'步骤{n}：{step}' for n, step in enumerate(steps, 1)],
+            'tags': rng.sample(['快手菜', '下饭', '低脂', '家常'], 2)
+        })
+    return recipes
+
+
+def benchmark(recipes_per_response: int = 3, expansions: int = 10000):
+    print_header(f"模型输出长度基准（每次响应 {recipes_per_response} 个食谱）")
+
+    recipes = _recipes(recipes_per_response)
+    verbose = json.dumps(recipes, ensure_ascii=False, indent=2)
+    compact = json.dumps([compact_recipe(r) for r in recipes], ensure_ascii=False, separators=(',', ':'))
+
+    verbose_tokens, compact_tokens = estimate_tokens(verbose), estimate_tokens(compact)
+    print(f"📄 完整格式: {verbose_tokens:,} tokens（{len(verbose):,} 字符）")
+    print(f"📄 紧凑格式: {compact_tokens:,} tokens（{len(compact):,} 字符）")
+    print(f"📉 输出 token 减少 {1 - compact_tokens / verbose_tokens:.0%}")
+
+    parsed = json.loads(compact)
+    start = time.perf_counter()
+    for _ in range(expansions):
+        expand_recipes(parsed)
+    elapsed = (time.perf_counter() - start) / expansions
+    print(f"⏱️  服务端展开: {elapsed * 1e6:,.1f} µs/次")
+
+
+def main():
+    args = [int(a) for a in sys.argv[1:3]]
+    benchmark(*args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Substitution Lookup Benchmark
+替代查询延迟基准：原 SQL 查询（规范 ID / LIKE 扫描）与进程内替代关系图
+
+用法:
+    python testing/benchmark_substitutions.py [替代关系条数] [查询次数]
+"""
+import sys
+import os
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+os.environ.setdefault('CACHE_VERSION_CHECK_SECONDS', '1')
+
+from sqlalchemy import insert
+from app import create_app
+from app.database import db
+from app.models.substitution import IngredientSubstitution
+from app.services.ingredient_lexicon import ingredient_lexicon
+from app.services.substitution_graph import substitution_graph
+
+QUERIES = ['柠檬汁', '黄油', '土鸡蛋', '西红柿', '牛奶', '柠檬', '葡萄', '奶酪', '不存在的食材']
+
+
+def print_header(title: str):
+    """打印测试标题"""
+    print(f"\n{'='*60}")
+    print(f"  {title}")
+    print(f"{'='*60}\n")
+
+
+def _seed(count: int):
+    """生成替代关系：词表食材与随机组合的未收录食材各半"""
+    rng = random.Random(42)
+    names = ['柠檬汁', '黄油', '鸡蛋', '番茄', '牛奶', '奶酪', '白葡萄酒', '淡奶油']
+    rows = []
+    for i in range(count):
+        original = rng.choice(names) if i % 2 else f'食材{i}号'
+        rows.append({
+            'original_ingredient': original, 'substitute_ingredient': f'替代{i}',
+            'original_canonical_id': ingredient_lexicon.canonical_id(original),
+            'similarity_score': round(rng.random(), 3)
+        })
+    db.session.execute(insert(IngredientSubstitution), rows)
+    db.session.commit()
+
+
+def _sql_lookup(name: str, limit: int = 5):
+    """优化前的查询方式"""
+    canonical_id = ingredient_lexicon.canonical_id(name)
+    if canonical_id is not None:
+        condition = IngredientSubstitution.original_canonical_id == canonical_id
+    else:
+        condition = IngredientSubstitution.original_ingredient.like(f'%{name}%')
+    return [sub.to_dict() for sub in IngredientSubstitution.query.filter(condition).order_by(
+        IngredientSubstitution.similarity_score.desc()
+    ).limit(limit).all()]
+
+
+def _graph_lookup(name: str, limit: int = 5):
+    canonical_id = ingredient_lexicon.canonical_id(name)
+    return [dict(sub) for sub in substitution_graph.graph().substitutes(name, canonical_id, limit)]
+
+
+def _measure(lookup, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        lookup(QUERIES[i % len(QUERIES)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def benchmark(count: int = 5000, iterations: int = 2000):
+    print_header(f"替代查询延迟基准 ({count:,} 条替代关系，{iterations:,} 次查询)")
+
+    app = create_app()
+    with app.app_context():
+        _seed(count)
+        start = time.perf_counter()
+        substitution_graph.load()
+        print(f"⏱️  构建替代关系图: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        sql = _measure(_sql_lookup, iterations)
+        print(f"⏱️  SQL 查询:     {sql:,.1f} μs/次")
+        graph = _measure(_graph_lookup, iterations)
+        print(f"⏱️  替代关系图:   {graph:,.1f} μs/次（{sql / graph:,.0f}x）")
+
+
+def main():
+    args = [int(a) for a in sys.argv[1:3]]
+    benchmark(*args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Chain Routing Test
+链式流程意图路由测试：校验各子流程与合并模式跳过的阶段、模型调用次数，运行记录缓存与回放、截止时间降级与备用结果、
+提示词输入压缩与 token 估算（模型以桩替代，无需 API Key）
+"""
+import sys
+import os
+import json
+import tempfile
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from config import Config
+from app import create_app, limiter
+from app.database import db
+from app.models.chain_run import ChainRun
+from app.models.recipe import Recipe
+from app.services.chain_run_service import chain_run_service
+from app.services.recipe_service import recipe_service
+
+app = create_app()
+limiter.enabled = False
+
+RECIPE = {'name': '冰糖红烧肉', 'ingredients': [{'name': '五花肉', 'status': '已有'}, {'name': '冰糖', 'status': '需补充'}]}
+RESPONSE_KEYS = {'run_id', 'cached', 'degraded', 'token_usage', 'route', 'analysis', 'recipes', 'substitutions', 'missing_ingredients', 'substitution_candidates'}
+
+
+class _RecordingChain:
+    """记录调用次数、返回固定文本的模型链桩"""
+
+    def __init__(self, output_key, payload, prompt, delay=0):
+        self.output_key = output_key
+        self.prompt = prompt
+        self.delay = delay
+        self.text = payload if isinstance(payload, str) else '```json\n' + json.dumps(payload, ensure_ascii=False) + '\n```'
+        self.calls = []
+
+    def invoke(self, inputs):
+        self.calls.append(inputs)
+        time.sleep(self.delay)
+        return {self.output_key: self.text}
+
+
+class _Stubs:
+    """替换分析、合并、替代方案模型与食谱生成，统计各阶段调用"""
+
+    def __init__(self, intent, ingredients, mode='staged', oneshot=None, cache_ttl=0):
+        self.service = recipe_service.chain_service
+        self.mode = mode
+        self.cache_ttl = cache_ttl
+        analysis = {'intent': intent, 'ingredients': [{'name': name} for name in ingredients], 'filters': {}}
+        self.analysis = _RecordingChain('analysis_text', analysis, self.service.analysis_chain.prompt)
+        self.oneshot = _RecordingChain('oneshot_text', oneshot if oneshot is not None else {
+            'analysis': analysis, 'recipes': [RECIPE]
+        }, self.service.oneshot_chain.prompt)
+        self.substitution = _RecordingChain('substitution_text', {'summary': '替代建议', 'items': []},
+                                            self.service.substitution_chain.prompt)
+        self.recipe_calls = []
+
+    def generate_recipes(self, ingredients, filters=None, deadline=None, usage=None, degraded=None):
+        self.recipe_calls.append(ingredients)
+        return [RECIPE]
+
+    def __enter__(self):
+        self.saved = (self.service.analysis_chain, self.service.oneshot_chain, self.service.substitution_chain,
+                      self.service.recipe_service.generate_recipes, Config.CHAIN_MODE,
+                      Config.CHAIN_RUN_CACHE_TTL_SECONDS)
+        self.service.analysis_chain = self.analysis
+        self.service.oneshot_chain = self.oneshot
+        self.service.substitution_chain = self.substitution
+        self.service.recipe_service.generate_recipes = self.generate_recipes
+        Config.CHAIN_MODE = self.mode
+        Config.CHAIN_RUN_CACHE_TTL_SECONDS = self.cache_ttl
+        return self
+
+    def __exit__(self, *exc):
+        (self.service.analysis_chain, self.service.oneshot_chain, self.service.substitution_chain,
+         self.service.recipe_service.generate_recipes, Config.CHAIN_MODE,
+         Config.CHAIN_RUN_CACHE_TTL_SECONDS) = self.saved
+
+
+def test_substitution_route():
+    """明确的替代问题只调用一次替代方案模型，不分析、不生成食谱"""
+    with app.app_context(), _Stubs('食谱生成', []) as stubs:
+        result = recipe_service.process_chain('做红烧肉没有料酒，用什么代替')
+        assert set(result) == RESPONSE_KEYS and result['route'] == 'substitution'
+        assert stubs.analysis.calls == [] and stubs.recipe_calls == []
+        assert len(stubs.substitution.calls) == 1 and result['missing_ingredients'] == ['料酒']
+        assert result['recipes'] == []
+
+        # 缺失食材只取自含缺少标记的分句
+        result = recipe_service.process_chain('家里有鸡蛋，料酒没有了，用什么代替？')
+        assert result['route'] == 'substitution' and result['missing_ingredients'] == ['料酒']
+        assert stubs.analysis.calls == []
+        print('✅ 替代方案路由测试通过')
+
+
+def test_substitution_shortcut_negatives():
+    """"用什么"、"换成"等一般说法不走替代捷径，交给分析模型判断意图"""
+    inputs = ['我有鸡蛋和番茄，用什么做晚饭？', '鸡蛋用什么方法做好吃', '家里有土豆，想换成清淡口味的菜']
+    with app.app_context(), _Stubs('食谱生成', ['鸡蛋']) as stubs:
+        for text in inputs:
+            assert recipe_service.chain_service._quick_substitution_analysis(text) is None, text
+            result = recipe_service.process_chain(text)
+            assert result['route'] == 'recipe' and result['recipes'] == [RECIPE], text
+        assert len(stubs.analysis.calls) == len(inputs) and len(stubs.recipe_calls) == len(inputs)
+        print('✅ 替代捷径误判测试通过')
+
+
+def test_recipe_route():
+    """词表识别不出食材时交给分析模型，按其意图执行完整流程"""
+    with app.app_context(), _Stubs('食谱生成', ['五花肉']) as stubs:
+        result = recipe_service.process_chain('想做个红烧的菜')
+        assert result['route'] == 'recipe' and len(stubs.analysis.calls) == 1
+        assert len(stubs.recipe_calls) == 1 and result['missing_ingredients'] == ['冰糖']
+        assert len(stubs.substitution.calls) == 1
+        print('✅ 食谱生成路由测试通过')
+
+
+def test_analysis_route():
+    """仅食材分析时不生成食谱，也不推荐替代"""
+    with app.app_context(), _Stubs('食材分析', ['鸡胸肉']) as stubs:
+        result = recipe_service.process_chain('鸡胸肉有什么营养')
+        assert set(result) == RESPONSE_KEYS and result['route'] == 'analysis'
+        assert [ing['name'] for ing in result['analysis']['ingredients']] == ['鸡胸肉']
+        assert stubs.recipe_calls == [] and stubs.substitution.calls == []
+        assert result['recipes'] == [] and result['substitutions']['items'] == []
+
+        # 路由写入接口响应
+        data = app.test_client().post('/api/chain/process', json={'user_input': '鸡胸肉有什么营养'}).get_json()
+        assert data['success'] and data['route'] == 'analysis'
+        print('✅ 食材分析路由测试通过')
+
+
+def test_oneshot_mode():
+    """合并模式一次调用得到分析与食谱，不再单独分析和生成"""
+    with app.app_context(), _Stubs('食谱生成', ['五花肉', '西兰花'], mode='oneshot') as stubs:
+        saved = Recipe.query.count()
+        result = recipe_service.process_chain('想做个红烧的菜')
+        assert set(result) == RESPONSE_KEYS and result['route'] == 'recipe'
+        assert len(stubs.oneshot.calls) == 1 and stubs.analysis.calls == [] and stubs.recipe_calls == []
+        assert [ing['state'] for ing in result['analysis']['ingredients']] == ['常温', '常温']
+        assert [r['name'] for r in result['recipes']] == ['冰糖红烧肉'] and result['recipes'][0]['id']
+        assert Recipe.query.count() == saved + 1 and result['missing_ingredients'] == ['冰糖']
+
+    # 非食谱生成意图时模型多给出的食谱不写入历史记录
+    oneshot = {'analysis': {'intent': '食材分析', 'ingredients': ['五花肉']}, 'recipes': [RECIPE]}
+    with app.app_context(), _Stubs('食材分析', ['五花肉'], mode='oneshot', oneshot=oneshot):
+        saved = Recipe.query.count()
+        result = recipe_service.process_chain('五花肉热量高吗')
+        assert result['route'] == 'analysis' and result['recipes'] == [] and Recipe.query.count() == saved
+        print('✅ 合并模式测试通过')
+
+
+def test_oneshot_fallback():
+    """合并结果无法解析时回退分步流程；未给出食谱时基于合并分析结果补充生成"""
+    with app.app_context(), _Stubs('食谱生成', ['五花肉'], mode='oneshot', oneshot='抱歉') as stubs:
+        result = recipe_service.process_chain('想做个红烧的菜')
+        assert len(stubs.oneshot.calls) == 1 and len(stubs.analysis.calls) == 1 and len(stubs.recipe_calls) == 1
+        assert result['route'] == 'recipe' and result['recipes'] == [RECIPE]
+
+    oneshot = {'analysis': {'intent': '食谱生成', 'ingredients': ['五花肉']}, 'recipes': []}
+    with app.app_context(), _Stubs('食谱生成', ['五花肉'], mode='oneshot', oneshot=oneshot) as stubs:
+        result = recipe_service.process_chain('想做个红烧的菜')
+        assert stubs.analysis.calls == [] and len(stubs.recipe_calls) == 1
+        assert [ing['name'] for ing in stubs.recipe_calls[0]] == ['五花肉']
+        print('✅ 合并模式回退测试通过')
+
+
+def test_run_cache():
+    """规范化后相同的输入命中缓存，不调用模型；运行记录可按 ID 回放"""
+    client = app.test_client()
+    with app.app_context(), _Stubs('食谱生成', ['鸡蛋', '番茄'], mode='oneshot', cache_ttl=3600) as stubs:
+        assert chain_run_service.normalize_input('有 鸡蛋、西红柿！') == chain_run_service.normalize_input('有鸡蛋番茄')
+
+        first = client.post('/api/chain/process', json={'user_input': '有鸡蛋西红柿'}).get_json()
+        assert first['success'] and first['cached'] is False and first['run_id']
+        second = client.post('/api/chain/process', json={'user_input': '有 鸡蛋、西红柿'}).get_json()
+        assert second['cached'] is True and second['run_id'] == first['run_id']
+        assert second['recipes'] == first['recipes'] and second['substitutions'] == first['substitutions']
+        assert len(stubs.oneshot.calls) == 1
+
+        run = db.session.get(ChainRun, first['run_id'])
+        assert run.normalized_input == '有鸡蛋番茄' and json.loads(run.recipe_ids) == [first['recipes'][0]['id']]
+
+        replay = client.get(f"/api/chain/runs/{first['run_id']}").get_json()
+        assert replay['success'] and replay['analysis'] == first['analysis'] and replay['recipes'] == first['recipes']
+        assert len(stubs.oneshot.calls) == 1
+        assert client.get('/api/chain/runs/99999').status_code == 404
+
+        # 过期后重新执行
+        run.created_at -= timedelta(hours=2)
+        db.session.commit()
+        third = client.post('/api/chain/process', json={'user_input': '有鸡蛋西红柿'}).get_json()
+        assert third['cached'] is False and third['run_id'] != first['run_id'] and len(stubs.oneshot.calls) == 2
+        print('✅ 运行记录缓存与回放测试通过')
+
+
+def test_deadline():
+    """剩余时间不足或模型超时的阶段降级：启发式分析、检索历史食谱、数据库候选兜底"""
+    client = app.test_client()
+    with app.app_context(), _Stubs('食谱生成', ['鸡蛋']) as stubs:
+        recipe_service.save_recipes([{'name': '番茄炒蛋', 'ingredients': [
+            {'name': '鸡蛋', 'status': '已有'}, {'name': '西红柿', 'status': '需补充'}, {'name': '小葱', 'status': '已有'}
+        ]}])
+
+        response = client.post('/api/chain/process', json={'user_input': '家里有鸡蛋和番茄，做个菜'},
+                               headers={'X-Request-Deadline-Ms': '1'})
+        data = response.get_json()
+        assert data['degraded'] == ['analysis', 'recipes', 'substitution']
+        assert stubs.analysis.calls == [] and stubs.recipe_calls == [] and stubs.substitution.calls == []
+        assert [r['name'] for r in data['recipes']] == ['番茄炒蛋']
+        assert [i['status'] for i in data['recipes'][0]['ingredients']] == ['已有', '已有', '需补充']
+        assert data['missing_ingredients'] == ['小葱'] and data['substitutions']['items'][0]['ingredient'] == '小葱'
+
+        # 模型在剩余时间内未返回即放弃等待
+        stubs.analysis.delay = 1
+        Config.CHAIN_STAGE_BUDGET_MS, saved_budget = dict.fromkeys(Config.CHAIN_STAGE_BUDGET_MS, 0), Config.CHAIN_STAGE_BUDGET_MS
+        try:
+            start = time.monotonic()
+            data = client.post('/api/chain/process', json={'user_input': '家里有鸡蛋和番茄，做个菜'},
+                               headers={'X-Request-Deadline-Ms': '200'}).get_json()
+            assert time.monotonic() - start < 0.8 and len(stubs.analysis.calls) == 1
+            assert data['degraded'][0] == 'analysis'
+        finally:
+            Config.CHAIN_STAGE_BUDGET_MS = saved_budget
+
+        for header in ['0', 'abc']:
+            assert client.post('/api/chain/process', json={'user_input': '鸡蛋'},
+                               headers={'X-Request-Deadline-Ms': header}).status_code == 400
+        print('✅ 截止时间降级测试通过')
+
+
+def test_fallback_not_cached():
+    """模型失败或结果无法解析而使用备用结果的阶段计入 degraded，结果不作为缓存复用"""
+    with app.app_context(), _Stubs('食谱生成', ['五花肉'], cache_ttl=3600) as stubs:
+        stubs.analysis.text = '抱歉，无法识别'
+        stubs.substitution.text = '稍后再试'
+        first = recipe_service.process_chain('家里有鸡蛋想做个菜')
+        second = recipe_service.process_chain('家里有鸡蛋想做个菜')
+        assert first['degraded'] == ['analysis', 'substitution'] and second['cached'] is False
+        assert len(stubs.analysis.calls) == 2
+
+        def unavailable(inputs):
+            raise ConnectionError('服务不可用')
+        stubs.substitution.invoke = unavailable
+        stubs.analysis.text = '```json\n' + json.dumps({'intent': '食谱生成', 'ingredients': ['五花肉']}) + '\n```'
+        assert recipe_service.process_chain('家里有鸡蛋想做个菜')['degraded'] == ['substitution']
+
+    # 食谱模型输出无法解析时返回备用食谱
+    generator = recipe_service.chain_service.recipe_service
+    saved_model = generator.model
+    generator.model = SimpleNamespace(invoke=lambda messages: SimpleNamespace(content='抱歉'))
+    try:
+        degraded = []
+        recipes = generator.generate_recipes([{'name': '五花肉', 'quantity': '', 'state': '常温'}], degraded=degraded)
+        assert recipes and degraded == ['recipes']
+    finally:
+        generator.model = saved_model
+    print('✅ 备用结果不缓存测试通过')
+
+
+def test_prompt_compaction():
+    """替代候选按 (替代品, 相似度, 比例) 紧凑传入并截取前 k 个；各模型链共享静态前缀；按阶段估算 token"""
+    service = recipe_service.chain_service
+    candidates = {'冰糖': [
+        {'id': i, 'substitute_ingredient': name, 'similarity_score': score, 'substitution_ratio': '1:1',
+         'notes': '口味略有差异', 'created_at': '2026-01-01T00:00:00'}
+        for i, (name, score) in enumerate([('白糖', 0.5), ('红糖', 0.456), ('蜂蜜', 0.4), ('麦芽糖', 0.3)])
+    ]}
+    inputs = service._substitution_prompt_inputs('做红烧肉', ['冰糖'], candidates)
+    assert inputs['missing_ingredients'] == '["冰糖"]'
+    assert json.loads(inputs['substitution_candidates']) == {'冰糖': [['白糖', 0.5, '1:1'], ['红糖', 0.46, '1:1'], ['蜂蜜', 0.4, '1:1']]}
+    assert ' ' not in inputs['substitution_candidates'] and 'created_at' not in inputs['substitution_candidates']
+
+    # 可变内容位于末尾，静态前缀在各模型链间逐字节一致
+    prompts = [service.analysis_chain.prompt.format(user_input='鸡蛋'),
+               service.oneshot_chain.prompt.format(user_input='鸡蛋'),
+               service.substitution_chain.prompt.format(**inputs)]
+    assert all(prompt.startswith(service.prompt_prefix) for prompt in prompts)
+    assert all(prompt.rstrip().endswith(line) for prompt, line in zip(prompts, ['鸡蛋', '鸡蛋', inputs['substitution_candidates']]))
+
+    with app.app_context(), _Stubs('食谱生成', ['五花肉']):
+        result = recipe_service.process_chain('想做个红烧的菜')
+        usage = result['token_usage']
+        assert set(usage) == {'analysis', 'substitution'}
+        assert all(stage['input'] > 0 and stage['output'] > 0 for stage in usage.values())
+        print('✅ 提示词输入压缩测试通过')
+
+
+def main():
+    test_substitution_route()
+    test_substitution_shortcut_negatives()
+    test_recipe_route()
+    test_analysis_route()
+    test_oneshot_mode()
+    test_oneshot_fallback()
+    test_run_cache()
+    test_deadline()
+    test_fallback_not_cached()
+    test_prompt_compaction()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Ingredient Bulk Import Test
+食材批量导入测试（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import io
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.database import db
+from app.models.ingredient import Ingredient
+from app.utils.quantity import parse_quantity, add_quantities, Quantity
+from app.utils.query_audit import QueryAudit
+
+app = create_app()
+limiter.enabled = False
+
+
+def test_quantity_merge():
+    """数量解析与合并"""
+    assert parse_quantity('6个') == Quantity(6, '个')
+    assert parse_quantity('两盒') == Quantity(2, '盒')
+    assert parse_quantity('1.5 KG') == Quantity(1.5, 'kg')
+    assert parse_quantity('适量').amount is None
+    assert add_quantities('6个', '4个') == '10个'
+    assert add_quantities('0.5kg', '1 kg') == '1.5kg'
+    assert add_quantities('1盒', '6个') == '1盒+6个'
+    assert add_quantities(None, '3个') == '3个'
+    print('✅ 数量合并测试通过')
+
+
+def test_json_import():
+    """JSON 导入：逐行校验、同名合并、与已有食材合并，单事务 executemany"""
+    client = app.test_client()
+    with app.app_context():
+        db.session.add(Ingredient(name='鸡蛋', quantity='6个', category='蛋奶'))
+        db.session.commit()
+
+        rows = [
+            {'name': '番茄', 'quantity': '2个', 'category': '蔬菜', 'storage_location': 'fridge'},
+            {'name': ' 番茄 ', 'quantity': '3个'},
+            {'name': '鸡蛋', 'quantity': '4个'},
+            {'name': '牛奶', 'quantity': '1盒', 'category': '饮料'},
+            {'name': ''},
+            {'name': '大米', 'quantity': '5kg', 'storage_location': 'pantry', 'is_common': True},
+        ]
+        with QueryAudit(db.engine) as audit:
+            response = client.post('/api/ingredients/bulk', json=rows)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [r['status'] for r in data['results']] == \
+            ['created', 'merged', 'merged', 'rejected', 'rejected', 'created']
+        assert (data['created'], data['merged'], data['rejected']) == (2, 2, 2)
+        assert '饮料' in data['results'][3]['error']
+        assert data['results'][0]['id'] == data['results'][1]['id']
+
+        writes = [sql for sql, _ in audit.statements if sql.lstrip().upper().startswith(('INSERT', 'UPDATE'))]
+        assert len(writes) == 2, writes
+
+        assert Ingredient.query.filter_by(name='番茄').one().quantity == '5个'
+        assert Ingredient.query.filter_by(name='鸡蛋').one().quantity == '10个'
+        assert Ingredient.query.filter_by(name='大米').one().quantity_value == 5000
+        assert Ingredient.query.filter_by(name='鸡蛋').one().category == '蛋奶'
+        assert Ingredient.query.filter_by(name='大米').one().is_common is True
+        print('✅ JSON 批量导入测试通过')
+
+
+def test_csv_import():
+    """CSV 请求体与文件上传，支持中文表头"""
+    client = app.test_client()
+    with app.app_context():
+        body = '名称,数量,分类,存储位置\n豆腐,1盒,豆制品,fridge\n\n青菜,300g,蔬菜,冰箱\n'
+        data = client.post('/api/ingredients/bulk', data=body.encode('utf-8'),
+                           content_type='text/csv').get_json()
+        assert [(r['line'], r['status']) for r in data['results']] == [(2, 'created'), (4, 'rejected')]
+
+        upload = '﻿name,quantity,is_common\n豆腐,2盒,是\n'.encode('utf-8')
+        data = client.post('/api/ingredients/bulk', content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(upload), 'pantry.csv')}).get_json()
+        assert data['results'][0]['status'] == 'merged'
+        tofu = Ingredient.query.filter_by(name='豆腐').one()
+        assert tofu.quantity == '3盒' and tofu.is_common is True
+
+        response = client.post('/api/ingredients/bulk', data='foo,bar\n1,2\n', content_type='text/csv')
+        assert response.status_code == 400
+        print('✅ CSV 批量导入测试通过')
+
+
+def test_all_rejected():
+    """全部行非法时返回 400 与逐行原因"""
+    client = app.test_client()
+    with app.app_context():
+        response = client.post('/api/ingredients/bulk', json=[{'name': ''}, {'quantity': '1个'}])
+        assert response.status_code == 400
+        assert response.get_json()['rejected'] == 2
+        assert client.post('/api/ingredients/bulk', json={'foo': 1}).status_code == 400
+        print('✅ 非法数据测试通过')
+
+
+def main():
+    test_quantity_merge()
+    test_json_import()
+    test_csv_import()
+    test_all_rejected()
+
+
+if __name__ == '__main__':
+    main()
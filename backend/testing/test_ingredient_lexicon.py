@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Ingredient Lexicon Test
+食材规范名测试：别名自动机、规范 ID 填充、别名增量更新（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.database import db
+from app.models.canonical_ingredient import IngredientAlias
+from app.models.ingredient import Ingredient
+from app.services.ingredient_lexicon import ingredient_lexicon
+from app.services.recipe_service import recipe_service
+from app.services.substitution_service import substitution_service
+from app.utils.alias_trie import AliasAutomaton
+
+app = create_app()
+limiter.enabled = False
+
+
+def test_automaton():
+    """精确匹配、末尾最长匹配、整句提取、增删别名"""
+    automaton = AliasAutomaton()
+    for alias, value in [('鸡蛋', 1), ('番茄', 2), ('西红柿', 2), ('番茄酱', 3), ('蒜', 4), ('牛奶', 5)]:
+        automaton.add(alias, value)
+
+    assert automaton.resolve('西红柿') == 2
+    assert automaton.resolve('土鸡蛋') == 1 and automaton.resolve('新鲜 鸡蛋') == 1
+    assert automaton.resolve('番茄酱') == 3 and automaton.resolve('全脂牛奶') == 5
+    assert automaton.resolve('蒜苗') is None and automaton.resolve('鸡蛋面') is None
+
+    matches = automaton.find_all('冰箱里有西红柿、番茄酱和土鸡蛋')
+    assert [(alias, value) for _, _, alias, value in matches] == [('西红柿', 2), ('番茄酱', 3), ('鸡蛋', 1)]
+
+    automaton.add('鸡蛋面', 6)
+    assert automaton.resolve('鸡蛋面') == 6 and automaton.resolve('手工鸡蛋面') == 6
+    assert automaton.remove('鸡蛋') and automaton.resolve('土鸡蛋') is None
+    assert len(automaton) == 6
+
+    # 副本独立修改，原自动机不受影响
+    copy = automaton.copy()
+    copy.add('土豆', 7)
+    assert copy.resolve('小土豆') == 7 and automaton.resolve('小土豆') is None
+    assert dict(copy.items()) == {**dict(automaton.items()), '土豆': 7}
+    print('✅ 别名自动机测试通过')
+
+
+def test_canonical_ids():
+    """食材、购物清单、替代关系与食谱写入时填充规范 ID"""
+    client = app.test_client()
+    with app.app_context():
+        tomato = ingredient_lexicon.canonical_id('番茄')
+        egg = ingredient_lexicon.canonical_id('鸡蛋')
+        assert tomato and egg and tomato != egg
+
+        data = client.post('/api/ingredients/', json={'name': '新鲜鸡蛋', 'quantity': '6个'}).get_json()
+        assert data['ingredient']['canonical_id'] == egg
+        data = client.put(f"/api/ingredients/{data['ingredient']['id']}", json={'name': '西红柿'}).get_json()
+        assert data['ingredient']['canonical_id'] == tomato
+
+        data = client.post('/api/ingredients/bulk', json=[{'name': '土鸡蛋', 'quantity': '10个'}]).get_json()
+        assert db.session.get(Ingredient, data['results'][0]['id']).canonical_id == egg
+
+        data = client.post('/api/shopping-list/', json={'ingredient_name': '西红柿', 'quantity': '2个'}).get_json()
+        assert data['item']['canonical_id'] == tomato
+
+        recipe = recipe_service.save_recipe_to_history({
+            'name': '番茄炒蛋', 'ingredients': [{'name': '西红柿', 'quantity': '2个'}, {'name': '鸡蛋', 'quantity': '3个'}]
+        })
+        assert [ing['canonical_id'] for ing in recipe.to_dict()['ingredients']] == [tomato, egg]
+
+        data = client.get('/api/ingredients/lexicon/resolve?name=西红柿&name=蒜苗').get_json()
+        assert data['results'] == [
+            {'name': '西红柿', 'canonical_id': tomato, 'canonical_name': '番茄'},
+            {'name': '蒜苗', 'canonical_id': None, 'canonical_name': None}
+        ]
+        print('✅ 规范 ID 填充测试通过')
+
+
+def test_substitutes_by_canonical_id():
+    """替代查询按规范 ID 精确匹配"""
+    client = app.test_client()
+    with app.app_context():
+        client.post('/api/substitutions/', json={'original_ingredient': '柠檬汁', 'substitute_ingredient': '白醋'})
+        client.post('/api/substitutions/', json={'original_ingredient': '鸡蛋', 'substitute_ingredient': '豆腐'})
+        client.post('/api/substitutions/', json={'original_ingredient': '鸡蛋面', 'substitute_ingredient': '挂面'})
+
+        assert [s['substitute_ingredient'] for s in substitution_service.get_substitutes('土鸡蛋')] == ['豆腐']
+        assert [s['substitute_ingredient'] for s in substitution_service.get_substitutes('柠檬')] == ['白醋']
+        print('✅ 替代关系规范匹配测试通过')
+
+
+def test_alias_changes():
+    """登记别名后替换为更新后的自动机并重新关联已有记录；回滚不生效"""
+    client = app.test_client()
+    with app.app_context():
+        data = client.post('/api/ingredients/', json={'name': '洋山芋', 'quantity': '3个'}).get_json()
+        ingredient_id = data['ingredient']['id']
+        assert data['ingredient']['canonical_id'] is None
+        before = ingredient_lexicon._ensure_loaded()
+
+        response = client.post('/api/ingredients/lexicon/aliases', json={'alias': '山芋', 'canonical_name': '土豆'})
+        assert response.status_code == 201 and response.get_json()['relinked'] == 1
+        # 写时复制：正在使用旧自动机的读者不受影响
+        assert ingredient_lexicon._automaton is not before and before.resolve('洋山芋') is None
+        potato = ingredient_lexicon.canonical_id('土豆')
+        assert ingredient_lexicon.canonical_id('洋山芋') == potato
+        assert db.session.get(Ingredient, ingredient_id, populate_existing=True).canonical_id == potato
+
+        # 新规范食材同时登记规范名本身
+        response = client.post('/api/ingredients/lexicon/aliases', json={'alias': '牛油果', 'canonical_name': '鳄梨'})
+        assert response.get_json()['canonical']['aliases'] == ['牛油果', '鳄梨']
+        assert ingredient_lexicon.canonical_id('鳄梨') == ingredient_lexicon.canonical_id('牛油果')
+
+        db.session.add(IngredientAlias(alias='地瓜', canonical_id=potato))
+        db.session.flush()
+        db.session.rollback()
+        assert ingredient_lexicon.canonical_id('地瓜') is None
+
+        alias_id = IngredientAlias.query.filter_by(alias='山芋').one().id
+        assert client.delete(f'/api/ingredients/lexicon/aliases/{alias_id}').status_code == 200
+        assert ingredient_lexicon.canonical_id('洋山芋') is None
+        assert client.delete(f'/api/ingredients/lexicon/aliases/{alias_id}').status_code == 404
+        assert client.post('/api/ingredients/lexicon/aliases', json={'alias': '山芋'}).status_code == 400
+
+        # 重新加载与增量更新结果一致
+        ingredient_lexicon.reset()
+        assert ingredient_lexicon.canonical_id('牛油果') is not None and ingredient_lexicon.canonical_id('洋山芋') is None
+        print('✅ 别名增量更新测试通过')
+
+
+def test_chain_extraction():
+    """链式分析兜底时从原句中提取食材"""
+    with app.app_context():
+        analysis = recipe_service.chain_service._heuristic_analysis('家里只有西红柿和土鸡蛋，还有番茄，做个快手菜')
+        assert [ing['name'] for ing in analysis['ingredients']] == ['番茄', '鸡蛋']
+        missing = recipe_service.chain_service._extract_missing_ingredients([
+            {'ingredients': [{'name': '西红柿', 'status': '需补充'}, {'name': '番茄', 'status': '需补充'}]}
+        ])
+        assert missing == ['番茄']
+        print('✅ 链式食材提取测试通过')
+
+
+def main():
+    test_automaton()
+    test_canonical_ids()
+    test_substitutes_by_canonical_id()
+    test_alias_changes()
+    test_chain_extraction()
+
+
+if __name__ == '__main__':
+    main()
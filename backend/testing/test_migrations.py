@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Migration Test
+数据库迁移测试（使用临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, inspect, text
+from app import migrations
+
+
+def _temp_engine():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    return create_engine(f'sqlite:///{path}')
+
+
+def test_fresh_upgrade():
+    """空数据库升级到最新版本"""
+    engine = _temp_engine()
+    assert migrations.current_version(engine) == 0
+
+    applied = migrations.upgrade(engine)
+    assert [m.version for m in applied] == [m.version for m in migrations.get_migrations()]
+    assert migrations.verify(engine) == (migrations.head_version(), migrations.head_version())
+
+    tables = set(inspect(engine).get_table_names())
+    for table in ['ingredients', 'recipes', 'favorites', 'favorite_groups',
+                  'shopping_list', 'recipe_step_progress', 'ingredient_substitutions']:
+        assert table in tables, table
+
+    # 再次执行为空操作
+    assert migrations.upgrade(engine) == []
+    print('✅ 空数据库迁移测试通过')
+
+
+def test_adopt_existing_database():
+    """已由 create_all 创建的旧数据库可被基线迁移接管，数据保留"""
+    engine = _temp_engine()
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE ingredients (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+                          "quantity VARCHAR(50), state VARCHAR(20), category VARCHAR(50), "
+                          "storage_location VARCHAR(20), is_common BOOLEAN, created_at DATETIME, "
+                          "updated_at DATETIME)"))
+        conn.execute(text("INSERT INTO ingredients (name, quantity) VALUES ('鸡蛋', '6个')"))
+
+    migrations.upgrade(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM ingredients")).scalar() == 1
+    assert migrations.current_version(engine) == migrations.head_version()
+    print('✅ 旧数据库接管测试通过')
+
+
+def test_upgrade_to_target():
+    """迁移到指定版本"""
+    engine = _temp_engine()
+    migrations.upgrade(engine, target=1)
+    assert migrations.current_version(engine) == 1
+    statuses = migrations.status(engine)
+    assert statuses[0][1] is True
+    assert all(not applied for _, applied in statuses[1:])
+    print('✅ 指定版本迁移测试通过')
+
+
+def test_backfill_recipe_derived_columns():
+    """v0004 回填已有食谱的数值列与标签"""
+    engine = _temp_engine()
+    migrations.upgrade(engine, target=3)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO recipes (name, cooking_time, calories, tags_json) "
+                          "VALUES ('番茄炒蛋', '一个半小时', '约450卡', '[\"快手菜\", \"家常\", \"快手菜\"]')"))
+
+    migrations.upgrade(engine, target=4)
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT cooking_minutes, calories_kcal FROM recipes")).one()
+        assert tuple(row) == (90, 450)
+        tags = conn.execute(text("SELECT tag FROM recipe_tags ORDER BY tag")).scalars().all()
+        assert tags == ['家常', '快手菜']
+    print('✅ 派生列回填测试通过')
+
+
+def test_dedupe_step_progress():
+    """v0005 去除重复步骤进度并建立唯一索引"""
+    engine = _temp_engine()
+    migrations.upgrade(engine, target=4)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO recipes (name) VALUES ('番茄炒蛋')"))
+        conn.execute(text("INSERT INTO recipe_step_progress (recipe_id, step_index, is_completed) "
+                          "VALUES (1, 0, 0), (1, 0, 1), (1, 1, 0)"))
+
+    migrations.upgrade(engine, target=5)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT step_index, is_completed FROM recipe_step_progress "
+                                 "ORDER BY step_index")).all()
+        assert [tuple(r) for r in rows] == [(0, 1), (1, 0)]
+    indexes = {ix['name']: ix for ix in inspect(engine).get_indexes('recipe_step_progress')}
+    assert indexes['uq_recipe_step_progress']['unique']
+    assert 'ix_recipe_step_progress_recipe_step' not in indexes
+    print('✅ 步骤进度去重测试通过')
+
+
+def test_backfill_structured_quantities():
+    """v0007 回填食材、购物清单与食谱食材的结构化数量"""
+    engine = _temp_engine()
+    migrations.upgrade(engine, target=6)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO ingredients (name, quantity) VALUES ('大米', '5kg'), ('盐', '适量')"))
+        conn.execute(text("INSERT INTO shopping_list (ingredient_name, quantity) VALUES ('猪肉', '1斤2两')"))
+        conn.execute(text("INSERT INTO recipes (name, ingredients_json) "
+                          "VALUES ('番茄炒蛋', '[{\"name\": \"鸡蛋\", \"quantity\": \"两个\"}]')"))
+
+    migrations.upgrade(engine, target=7)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT quantity_value, quantity_unit, quantity_dimension "
+                                 "FROM ingredients ORDER BY id")).all()
+        assert [tuple(r) for r in rows] == [(5000, 'g', 'mass'), (None, None, 'unspecified')]
+        assert conn.execute(text("SELECT quantity_value FROM shopping_list")).scalar() == 600
+        ingredients = json.loads(conn.execute(text("SELECT ingredients_json FROM recipes")).scalar())
+        assert ingredients[0]['quantity_value'] == 2 and ingredients[0]['quantity_unit'] == '个'
+    print('✅ 结构化数量回填测试通过')
+
+
+def test_backfill_canonical_ids():
+    """v0008 写入初始词表并回填规范食材 ID"""
+    engine = _temp_engine()
+    migrations.upgrade(engine, target=7)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO ingredients (name) VALUES ('新鲜鸡蛋'), ('西红柿'), ('火龙果')"))
+        conn.execute(text("INSERT INTO ingredient_substitutions (original_ingredient, substitute_ingredient) "
+                          "VALUES ('黄油', '植物油')"))
+        conn.execute(text("INSERT INTO recipes (name, ingredients_json) "
+                          "VALUES ('番茄炒蛋', '[{\"name\": \"番茄\"}]')"))
+
+    migrations.upgrade(engine, target=8)
+    with engine.connect() as conn:
+        ids = dict(conn.execute(text(
+            "SELECT a.alias, a.canonical_id FROM ingredient_aliases a WHERE a.alias IN ('鸡蛋', '番茄', '黄油', '植物油')"
+        )).all())
+        rows = conn.execute(text("SELECT canonical_id FROM ingredients ORDER BY id")).scalars().all()
+        assert rows == [ids['鸡蛋'], ids['番茄'], None]
+        assert tuple(conn.execute(text(
+            "SELECT original_canonical_id, substitute_canonical_id FROM ingredient_substitutions"
+        )).one()) == (ids['黄油'], ids['植物油'])
+        ingredients = json.loads(conn.execute(text("SELECT ingredients_json FROM recipes")).scalar())
+        assert ingredients[0]['canonical_id'] == ids['番茄']
+    print('✅ 规范食材回填测试通过')
+
+
+def test_backfill_substitution_closure():
+    """v0011 按现有替代关系计算初始多级替代路径"""
+    engine = _temp_engine()
+    migrations.upgrade(engine, target=10)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO ingredient_substitutions (original_ingredient, substitute_ingredient, similarity_score, "
+            "substitution_ratio) VALUES ('酥油', '起酥油', 0.8, '1:0.8'), ('起酥油', '猪板油', 0.9, '1:1')"
+        ))
+
+    migrations.upgrade(engine, target=11)
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT original_ingredient, substitute_ingredient, hops, score, substitution_ratio FROM substitution_closure"
+        )).one()
+        assert tuple(row) == ('酥油', '猪板油', 2, 0.72, '1:0.8')
+    print('✅ 多级替代路径回填测试通过')
+
+
+def test_substitution_provenance_defaults():
+    """v0012 已有替代关系视为人工整理且已审核"""
+    engine = _temp_engine()
+    migrations.upgrade(engine, target=11)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO ingredient_substitutions (original_ingredient, substitute_ingredient) "
+                          "VALUES ('黄油', '植物油')"))
+
+    migrations.upgrade(engine, target=12)
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT source, confidence, review_state, expires_at FROM ingredient_substitutions"
+        )).one()
+        assert tuple(row) == ('curated', None, 'approved', None)
+    print('✅ 替代关系来源默认值测试通过')
+
+
+def test_recalculate_calories_kcal():
+    """v0016 按修正后的解析规则重算热量列"""
+    engine = _temp_engine()
+    migrations.upgrade(engine, target=15)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO recipes (name, calories, calories_kcal) VALUES "
+                          "('红烧肉', '2人份约900卡', 2), ('番茄炒蛋', '约450卡', 450)"))
+
+    migrations.upgrade(engine, target=16)
+    with engine.connect() as conn:
+        kcal = conn.execute(text("SELECT calories_kcal FROM recipes ORDER BY id")).scalars().all()
+        assert kcal == [900, 450]
+    print('✅ 热量列重算测试通过')
+
+
+def test_recalculate_liang_quantities():
+    """v0017 按修正后的解析规则重算含"两"的数量列"""
+    engine = _temp_engine()
+    migrations.upgrade(engine, target=16)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO ingredients (name, quantity, quantity_value, quantity_unit, quantity_dimension) "
+                          "VALUES ('猪肉', '三两', 2, '个', 'count'), ('牛肉', '1斤二两', NULL, NULL, NULL)"))
+        conn.execute(text("INSERT INTO shopping_list (ingredient_name, quantity, quantity_value, quantity_unit, "
+                          "quantity_dimension) VALUES ('羊肉', '一两半', 2.5, '个', 'count')"))
+        conn.execute(text("INSERT INTO recipes (name, ingredients_json) VALUES ('小炒肉', "
+                          "'[{\"name\": \"猪肉\", \"quantity\": \"二两\", \"quantity_value\": 2, \"quantity_unit\": \"个\"}]')"))
+
+    migrations.upgrade(engine, target=17)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT quantity_value, quantity_unit, quantity_dimension "
+                                 "FROM ingredients ORDER BY id")).all()
+        assert [tuple(r) for r in rows] == [(150, 'g', 'mass'), (600, 'g', 'mass')]
+        assert conn.execute(text("SELECT quantity_value FROM shopping_list")).scalar() == 75
+        ingredients = json.loads(conn.execute(text("SELECT ingredients_json FROM recipes")).scalar())
+        assert ingredients[0]['quantity_value'] == 100 and ingredients[0]['quantity_unit'] == 'g'
+    print('✅ "两"数量重算测试通过')
+
+
+def main():
+    test_fresh_upgrade()
+    test_adopt_existing_database()
+    test_upgrade_to_target()
+    test_backfill_recipe_derived_columns()
+    test_dedupe_step_progress()
+    test_backfill_structured_quantities()
+    test_backfill_canonical_ids()
+    test_backfill_substitution_closure()
+    test_substitution_provenance_defaults()
+    test_recalculate_calories_kcal()
+    test_recalculate_liang_quantities()
+    print('✅ 迁移测试全部通过')
+
+
+if __name__ == '__main__':
+    main()
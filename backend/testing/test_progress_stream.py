@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Progress Stream Test
+步骤进度实时推送测试（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import json
+import tempfile
+from datetime import timedelta
+from sqlalchemy import select, func
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.database import db
+from app.models.recipe import Recipe
+from app.services.progress_hub import ProgressHub, DatabaseBackend, Subscription, progress_hub
+
+app = create_app()
+limiter.enabled = False
+
+
+def _create_recipe():
+    recipe = Recipe(name='番茄炒蛋', ingredients_json='[]', steps_json='[]', tags_json='[]')
+    db.session.add(recipe)
+    db.session.commit()
+    return recipe.id
+
+
+def _parse(chunk):
+    """解析一条 SSE 消息的 data 字段"""
+    text = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+    data = [line[len('data: '):] for line in text.splitlines() if line.startswith('data: ')]
+    return json.loads(data[0])
+
+
+def test_stream_pushes_updates():
+    """SSE 连接先收到当前状态，写入后收到新状态"""
+    client = app.test_client()
+    with app.app_context():
+        recipe_id = _create_recipe()
+        client.put(f'/api/recipes/{recipe_id}/progress', json={'steps': [{'step_index': 0, 'is_completed': True}]})
+
+    response = client.get(f'/api/recipes/{recipe_id}/progress/stream', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    stream = iter(response.response)
+
+    initial = _parse(next(stream))
+    assert [p['step_index'] for p in initial['progress']] == [0]
+    assert progress_hub.subscriber_count(recipe_id) == 1
+
+    client.put(f'/api/recipes/{recipe_id}/progress', json={'steps': [{'step_index': 1, 'is_completed': True}]})
+    update = _parse(next(stream))
+    assert update['recipe_id'] == recipe_id
+    assert [p['step_index'] for p in update['progress']] == [0, 1]
+
+    response.close()
+    assert progress_hub.subscriber_count(recipe_id) == 0
+    assert client.get('/api/recipes/99999/progress/stream').status_code == 404
+    print('✅ SSE 推送测试通过')
+
+
+def test_slow_subscriber_keeps_latest():
+    """消费过慢时丢弃旧事件，保留最新状态"""
+    subscription = Subscription(1, maxsize=2)
+    for i in range(5):
+        subscription.put({'n': i})
+    assert [subscription.get(0)['n'], subscription.get(0)['n']] == [3, 4]
+    assert subscription.get(0) is None
+    print('✅ 慢消费者测试通过')
+
+
+def test_database_backend_fan_out():
+    """database 后端：一个进程发布的事件被另一个进程的订阅者收到"""
+    with app.app_context():
+        engine = db.engine
+    publisher, listener = ProgressHub(), ProgressHub()
+    publisher.use_backend(DatabaseBackend(engine, poll_ms=10))
+    listener.use_backend(DatabaseBackend(engine, poll_ms=10))
+    try:
+        subscription = listener.subscribe(42)
+        publisher.publish(42, {'recipe_id': 42, 'progress': [{'step_index': 0, 'is_completed': True}]})
+        publisher.publish(7, {'recipe_id': 7, 'progress': []})
+
+        event = subscription.get(timeout=2)
+        assert event['recipe_id'] == 42 and event['progress'][0]['is_completed'] is True
+        assert subscription.get(timeout=0.1) is None
+    finally:
+        publisher.backend.stop()
+        listener.backend.stop()
+    print('✅ 多进程事件中转测试通过')
+
+
+def test_database_backend_after_prune():
+    """清理掉全部事件后，新事件的 id 不复用，订阅者仍能收到"""
+    with app.app_context():
+        engine = db.engine
+    publisher, listener = ProgressHub(), ProgressHub()
+    # 两端保留期都足够长，轮询线程不会自行清理；只在下面显式清理一次
+    publisher.use_backend(DatabaseBackend(engine, poll_ms=10, retention_seconds=3600))
+    listener.use_backend(DatabaseBackend(engine, poll_ms=10, retention_seconds=3600))
+    try:
+        subscription = listener.subscribe(42)
+        for i in range(5):
+            publisher.publish(42, {'recipe_id': 42, 'n': i})
+        assert [subscription.get(timeout=2)['n'] for _ in range(5)] == list(range(5))
+
+        publisher.backend.retention = timedelta(0)
+        publisher.backend.prune()
+        publisher.backend.retention = timedelta(seconds=3600)
+        with engine.connect() as conn:
+            assert conn.execute(select(func.count()).select_from(publisher.backend._table)).scalar() == 0
+        publisher.publish(42, {'recipe_id': 42, 'n': 5})
+        event = subscription.get(timeout=2)
+        assert event is not None and event['n'] == 5
+    finally:
+        publisher.backend.stop()
+        listener.backend.stop()
+    print('✅ 清理后事件中转测试通过')
+
+
+def main():
+    test_stream_pushes_updates()
+    test_slow_subscriber_keeps_latest()
+    test_database_backend_fan_out()
+    test_database_backend_after_prune()
+
+
+if __name__ == '__main__':
+    main()
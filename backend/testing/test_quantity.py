@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Quantity Engine Test
+数量解析引擎测试（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.database import db
+from app.models.ingredient import Ingredient
+from app.models.recipe import Recipe
+from app.utils.quantity import Quantity, parse_quantity, parse_many, quantity_columns, add_quantities, remaining_quantity
+
+app = create_app()
+limiter.enabled = False
+
+CASES = {
+    '6个': (6, '个', 'count'),
+    '5kg': (5, 'kg', 'mass'),
+    '2盒': (2, '盒', '盒'),
+    '半个': (0.5, '个', 'count'),
+    '一个半': (1.5, '个', 'count'),
+    '一斤半': (1.5, '斤', 'mass'),
+    '1斤2两': (1.2, '斤', 'mass'),
+    '3两': (3, '两', 'mass'),
+    '三两': (3, '两', 'mass'),
+    '一两': (1, '两', 'mass'),
+    '二两': (2, '两', 'mass'),
+    '一两半': (1.5, '两', 'mass'),
+    '一斤二两': (1.2, '斤', 'mass'),
+    '1斤二两': (1.2, '斤', 'mass'),
+    '两斤半': (2.5, '斤', 'mass'),
+    '两勺': (2, '汤匙', 'volume'),
+    '1/2杯': (0.5, '杯', 'volume'),
+    '1又1/2杯': (1.5, '杯', 'volume'),
+    '三分之一杯': (1 / 3, '杯', 'volume'),
+    '2-3个': (3, '个', 'count'),
+    '约200克': (200, 'g', 'mass'),
+    '5千克': (5, 'kg', 'mass'),
+    '1.5 L': (1.5, 'L', 'volume'),
+    '一打': (1, '打', 'count'),
+    '6': (6, '', 'count'),
+}
+
+
+def test_parse():
+    """中文数字、分数、单位别名、区间与复合数量"""
+    for text, (amount, unit, dimension) in CASES.items():
+        quantity = parse_quantity(text)
+        assert quantity is not None, text
+        assert abs(quantity.amount - amount) < 1e-9 and quantity.unit == unit, (text, quantity)
+        assert quantity.dimension == dimension, (text, quantity.dimension)
+
+    assert parse_quantity('适量') == Quantity(None, '适量')
+    assert parse_quantity('适量').dimension == 'unspecified'
+    for text in ['', None, '鸡蛋', '1盒6个']:
+        assert parse_quantity(text) is None, text
+    print('✅ 数量解析测试通过')
+
+
+def test_conversion():
+    """同量纲换算与相加"""
+    assert parse_quantity('1kg').to('斤') == Quantity(2, '斤')
+    assert parse_quantity('一打').base_amount == 12
+    assert parse_quantity('2杯').base_amount == 500
+    assert add_quantities('1kg', '500g') == '1.5kg'
+    assert add_quantities('1斤', '2两') == '1.2斤'
+    assert add_quantities('2盒', '6个') == '2盒+6个'
+    assert add_quantities('适量', '1勺') == '适量+1勺'
+    assert remaining_quantity('1kg', '300g') == '0.7kg'
+    assert remaining_quantity('3个', '6个') is None
+    assert remaining_quantity('500g', '二两') == '400g'
+    assert remaining_quantity('2盒', '500ml') is None and remaining_quantity('1斤', '适量') is None
+    try:
+        parse_quantity('1kg').to('ml')
+        assert False, '不同量纲不可换算'
+    except ValueError:
+        pass
+    assert parse_many(['6个', None, '6个', '适量']) == [Quantity(6, '个'), None, Quantity(6, '个'), Quantity(None, '适量')]
+    print('✅ 单位换算测试通过')
+
+
+def test_structured_columns():
+    """食材、购物清单与食谱食材写入时同步结构化数量"""
+    client = app.test_client()
+    with app.app_context():
+        data = client.post('/api/ingredients/', json={'name': '大米', 'quantity': '5kg'}).get_json()
+        assert data['ingredient']['quantity_value'] == 5000 and data['ingredient']['quantity_unit'] == 'g'
+
+        ingredient_id = data['ingredient']['id']
+        data = client.put(f'/api/ingredients/{ingredient_id}', json={'quantity': '3斤'}).get_json()
+        assert data['ingredient']['quantity_value'] == 1500
+        assert db.session.get(Ingredient, ingredient_id).quantity_dimension == 'mass'
+
+        data = client.post('/api/shopping-list/', json={'ingredient_name': '牛奶', 'quantity': '1L'}).get_json()
+        assert data['item']['quantity_value'] == 1000 and data['item']['quantity_unit'] == 'ml'
+
+        recipe = Recipe.from_ai_response({'name': '番茄炒蛋', 'ingredients': [
+            {'name': '鸡蛋', 'quantity': '两个', 'status': '已有'},
+            {'name': '盐', 'quantity': '适量', 'status': '已有'},
+        ]})
+        ingredients = json.loads(recipe.ingredients_json)
+        assert quantity_columns('两个') == {k: ingredients[0][k] for k in quantity_columns('两个')}
+        assert ingredients[1]['quantity_dimension'] == 'unspecified'
+        print('✅ 结构化数量列测试通过')
+
+
+def main():
+    test_parse()
+    test_conversion()
+    test_structured_columns()
+
+
+if __name__ == '__main__':
+    main()
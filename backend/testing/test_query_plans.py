@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Test
+查询计划回归测试：捕获 API 发出的全部 SQL，确保大表上没有全表扫描
+"""
+import sys
+import os
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.database import db
+from app.models.recipe import Recipe
+from app.models.ingredient import Ingredient
+from app.models.favorite import Favorite, FavoriteGroup
+from app.models.shopping_list import ShoppingListItem
+from app.models.recipe_progress import RecipeStepProgress
+from app.models.chain_run import ChainRun
+from app.models.substitution import IngredientSubstitution
+from app.services.chain_run_service import chain_run_service
+from app.services.recipe_cache import recipe_payload_cache
+from app.utils.query_audit import QueryAudit
+from config import Config
+
+ROWS = Config.QUERY_AUDIT_MIN_ROWS * 3
+
+# 列表接口的 SQL 条数上限，与数据量无关
+QUERY_BUDGETS = {
+    '/api/favorites/': 2,
+    '/api/favorites/groups': 1,
+    '/api/favorites/by-group/1': 2,
+    '/api/recipes/history?limit=20': 2,
+}
+
+# 查询计划审计覆盖的请求：(方法, URL, 请求体)；读接口在前，写接口在后
+AUDITED_REQUESTS = [
+    ('GET', '/api/recipes/history?limit=20', None),
+    ('GET', '/api/recipes/search?q=测试食谱', None),
+    ('GET', '/api/recipes/query?cuisine=中式&max_minutes=30&tag=快手菜', None),
+    ('GET', '/api/recipes/1', None),
+    ('GET', '/api/recipes/1/progress', None),
+    ('POST', '/api/recipes/1/progress', {'step_index': 0, 'is_completed': True}),
+    ('PUT', '/api/recipes/1/progress', {'steps': [{'step_index': 1, 'is_completed': True}]}),
+    ('GET', '/api/ingredients/', None),
+    ('GET', '/api/ingredients/common', None),
+    ('GET', '/api/ingredients/by-category?category=蔬菜', None),
+    ('GET', '/api/ingredients/by-storage?storage=fridge', None),
+    ('GET', '/api/ingredients/lexicon', None),
+    ('GET', '/api/ingredients/lexicon/resolve?name=西红柿&name=食材1', None),
+    ('POST', '/api/ingredients/', {'name': '新食材', 'quantity': '2个', 'category': '蔬菜'}),
+    ('POST', '/api/ingredients/bulk', [{'name': '食材1', 'quantity': '1个'}, {'name': '食材新', 'quantity': '500g'}]),
+    ('PUT', '/api/ingredients/2', {'quantity': '3个'}),
+    ('POST', '/api/ingredients/3/mark-common', None),
+    ('DELETE', '/api/ingredients/4', None),
+    ('POST', '/api/ingredients/lexicon/aliases', {'alias': '洋柿子', 'canonical_name': '番茄'}),
+    ('DELETE', '/api/ingredients/lexicon/aliases/1', None),
+    ('GET', '/api/favorites/', None),
+    ('GET', '/api/favorites/groups', None),
+    ('GET', '/api/favorites/by-group/1', None),
+    ('POST', '/api/favorites/groups', {'name': '新分组'}),
+    ('PUT', '/api/favorites/groups/2', {'name': '改名分组'}),
+    ('POST', '/api/favorites/', {'recipe_id': ROWS, 'group_id': 1}),
+    ('DELETE', '/api/favorites/1', None),
+    ('DELETE', '/api/favorites/groups/3', None),
+    ('GET', '/api/shopping-list/', None),
+    ('POST', '/api/shopping-list/', {'ingredient_name': '牛奶', 'quantity': '1盒'}),
+    ('PUT', '/api/shopping-list/5', {'quantity': '2个'}),
+    ('DELETE', '/api/shopping-list/6', None),
+    ('POST', '/api/shopping-list/1/purchase', None),
+    ('DELETE', '/api/shopping-list/purchased', None),
+    ('POST', '/api/shopping-list/bulk/purchase', {'category': '蔬菜'}),
+    ('POST', '/api/shopping-list/bulk/purchase', {'ids': [2, 3], 'is_purchased': False}),
+    ('POST', '/api/shopping-list/bulk/delete', {'category': '调料', 'is_purchased': True}),
+    ('PUT', '/api/shopping-list/order', {'ids': [3, 2]}),
+    ('POST', '/api/shopping-list/generate', {'recipe_ids': [1, 2, 3]}),
+    ('POST', '/api/shopping-list/merge', {'ids': [2, 3]}),
+    ('POST', '/api/shopping-list/merge', None),
+    ('GET', '/api/substitutions/', None),
+    ('GET', '/api/substitutions/食材1?max_hops=2', None),
+    ('POST', '/api/substitutions/batch', {'names': ['食材1', '食材2'], 'max_hops': 2}),
+    ('GET', '/api/substitutions/recipe/1', None),
+    ('POST', '/api/substitutions/', {'original_ingredient': '黄油', 'substitute_ingredient': '植物油'}),
+    ('PUT', '/api/substitutions/1/review', {'review_state': 'approved'}),
+    ('DELETE', '/api/substitutions/2', None),
+    ('POST', '/api/chain/process', {'user_input': '有鸡蛋番茄'}),
+    ('GET', '/api/chain/runs/1', None),
+    ('DELETE', f'/api/recipes/{ROWS}', None),
+]
+
+# 允许的全表扫描：(方法, URL) -> {表名: 原因}
+ALLOWED_SCANS = {
+    ('POST', '/api/ingredients/lexicon/aliases'): {
+        table: '新别名按名称后缀 LIKE 重新映射，无法使用索引（低频管理操作）'
+        for table in ('ingredients', 'shopping_list', 'ingredient_substitutions')
+    },
+    ('POST', '/api/substitutions/'): {'ingredient_substitutions': '多级替代路径重算需要读取全部已审核的替代关系'},
+    ('PUT', '/api/substitutions/1/review'): {'ingredient_substitutions': '多级替代路径重算需要读取全部已审核的替代关系'},
+    ('DELETE', '/api/substitutions/2'): {'ingredient_substitutions': '多级替代路径重算需要读取全部已审核的替代关系'},
+}
+
+# 不在审计范围内的接口及原因；新增接口必须加入 AUDITED_REQUESTS 或在此说明
+UNAUDITED_ENDPOINTS = {
+    'recipes.generate_recipes': '每次调用模型，不走缓存',
+    'recipes.stream_progress': 'SSE 长连接，查询与 GET /progress 相同',
+}
+
+# 前几个食谱带需补充的食材，生成购物清单时按库存扣除
+NEEDED_JSON = json.dumps([
+    {'name': '食材7', 'quantity': '2个', 'status': '需补充'},
+    {'name': '鸡蛋', 'quantity': '3个', 'status': '需补充'},
+], ensure_ascii=False)
+
+app = create_app()
+limiter.enabled = False
+
+
+def seed():
+    """批量写入超过审计阈值的数据"""
+    now = datetime.utcnow()
+    db.session.execute(db.insert(Recipe), [
+        {'name': f'测试食谱{i}', 'ingredients_json': NEEDED_JSON if i < 3 else '[]', 'steps_json': '[]', 'tags_json': '[]',
+         'created_at': now - timedelta(minutes=i)}
+        for i in range(ROWS)
+    ])
+    db.session.execute(db.insert(Ingredient), [
+        {'name': f'食材{i}', 'quantity': '1个', 'category': Config.ALLOWED_CATEGORIES[i % 8],
+         'storage_location': Config.ALLOWED_STORAGE[i % 3], 'is_common': i % 10 == 0, 'created_at': now}
+        for i in range(ROWS)
+    ])
+    db.session.execute(db.insert(FavoriteGroup), [{'name': f'分组{i}', 'created_at': now} for i in range(5)])
+    db.session.execute(db.insert(Favorite), [
+        {'recipe_id': i + 1, 'group_id': i % 5 + 1, 'created_at': now} for i in range(ROWS)
+    ])
+    db.session.execute(db.insert(ShoppingListItem), [
+        {'ingredient_name': f'食材{i}', 'quantity': '1个', 'category': Config.ALLOWED_CATEGORIES[i % 8],
+         'is_purchased': i % 50 == 0, 'created_at': now}
+        for i in range(ROWS)
+    ])
+    db.session.execute(db.insert(RecipeStepProgress), [
+        {'recipe_id': i % ROWS + 1, 'step_index': i // ROWS, 'is_completed': False} for i in range(ROWS)
+    ])
+    db.session.execute(db.insert(ChainRun), [
+        {'user_input': f'输入{i}', 'normalized_input': f'输入{i}', 'input_hash': f'{i:064x}',
+         'response': '{}', 'created_at': now - timedelta(minutes=i)}
+        for i in range(ROWS)
+    ])
+    db.session.execute(db.insert(IngredientSubstitution), [
+        {'original_ingredient': f'食材{i}', 'substitute_ingredient': f'食材{i + 1}', 'created_at': now}
+        for i in range(ROWS)
+    ])
+    db.session.commit()
+    # 链式接口命中缓存时不调用模型
+    normalized = chain_run_service.normalize_input('有鸡蛋番茄')
+    chain_run_service.record('有鸡蛋番茄', normalized, {'route': 'recipes', 'recipes': []})
+
+
+def test_audit_covers_endpoints():
+    """每个 API 接口都在查询计划审计范围内（或说明了不审计的原因）"""
+    adapter = app.url_map.bind('localhost')
+    audited = {adapter.match(url.split('?')[0], method)[0] for method, url, _ in AUDITED_REQUESTS}
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.rule.startswith('/api/')}
+    missing = endpoints - audited - set(UNAUDITED_ENDPOINTS)
+    assert not missing, f'未纳入查询计划审计的接口: {sorted(missing)}'
+    print('✅ 审计覆盖全部接口测试通过')
+
+
+def test_no_full_scans():
+    """API 热点查询不应出现全表扫描"""
+    client = app.test_client()
+
+    with app.app_context():
+        captured, findings = 0, []
+        for method, url, body in AUDITED_REQUESTS:
+            with QueryAudit(db.engine) as audit:
+                response = client.open(url, method=method, json=body)
+            # 出错的接口只发出很少的 SQL，计划检查会误判为通过
+            assert response.status_code in (200, 201), \
+                f'{method} {url}: {response.status_code} {response.get_data(as_text=True)}'
+            allowed = ALLOWED_SCANS.get((method, url), {})
+            findings.extend(
+                f'{method} {url}: SCAN {f.table} ({f.rows} 行)\n  SQL: {" ".join(f.statement.split())}'
+                for f in audit.full_scans() if f.table not in allowed
+            )
+            captured += audit.count
+
+        assert captured > 0
+        assert not findings, '\n'.join(findings)
+        print(f'捕获 SQL {captured} 条，审计请求 {len(AUDITED_REQUESTS)} 个')
+        print('✅ 查询计划回归测试通过')
+
+
+def test_query_budgets():
+    """列表接口的 SQL 条数固定，不随记录数增长（无 N+1）"""
+    client = app.test_client()
+
+    with app.app_context():
+        recipe_payload_cache.clear()
+        # 缓存版本号按间隔比对，不计入单次请求的预算
+        recipe_payload_cache.sync()
+        saved_interval, recipe_payload_cache.stamp.interval = recipe_payload_cache.stamp.interval, 3600
+        try:
+            for url, budget in QUERY_BUDGETS.items():
+                with QueryAudit(db.engine) as audit:
+                    response = client.get(url)
+                assert response.status_code == 200, url
+                assert audit.count <= budget, f'{url}: {audit.count} 条 SQL，上限 {budget}\n' + \
+                    '\n'.join(sql for sql, _ in audit.statements[:5])
+        finally:
+            recipe_payload_cache.stamp.interval = saved_interval
+
+        groups = client.get('/api/favorites/groups').get_json()['groups']
+        assert sum(g['favorites_count'] for g in groups) == ROWS
+        favorites = client.get('/api/favorites/by-group/1').get_json()['favorites']
+        assert all(f['recipe']['id'] == f['recipe_id'] for f in favorites)
+        print('✅ 列表接口查询条数测试通过')
+
+
+def main():
+    with app.app_context():
+        seed()
+    test_audit_covers_endpoints()
+    test_query_budgets()
+    test_no_full_scans()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Recipe Payload Cache Test
+食谱序列化缓存测试：接口复用、删除提交后失效、跨进程版本比对（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.database import db
+from app.models.cache_version import bump_version
+from app.models.recipe import Recipe, RecipeTag
+from app.services.recipe_service import recipe_service
+from app.services.favorite_service import favorite_service
+from app.services.recipe_cache import recipe_payload_cache
+from app.utils.json_payload import dumps, encode, extend_object
+from app.utils.query_audit import QueryAudit
+
+app = create_app()
+limiter.enabled = False
+
+RECIPE = {
+    'name': '番茄炒蛋', 'description': '经典"家常"菜', 'time': '15分钟', 'calories': '约300卡',
+    'ingredients': [{'name': '番茄', 'quantity': '2个', 'status': '已有'}],
+    'steps': ['番茄切块', '鸡蛋打散炒熟'], 'tags': ['快手菜']
+}
+
+
+def test_json_payload():
+    """RawJSON 片段拼接结果与标准 JSON 一致"""
+    nested = {'name': '番茄', 'list': [1, 2.5, None, True]}
+    body = dumps({'success': True, 'items': [encode(nested), encode(nested)], 'count': 2})
+    assert json.loads(body) == {'success': True, 'items': [nested, nested], 'count': 2}
+    assert json.loads(extend_object(encode({'a': 1}), {'b': [2]})) == {'a': 1, 'b': [2]}
+    assert json.loads(extend_object(encode({}), {'b': 2})) == {'b': 2}
+    print('✅ JSON 片段拼接测试通过')
+
+
+def test_cached_endpoints():
+    """历史、详情、收藏接口复用缓存，删除时失效"""
+    client = app.test_client()
+    with app.app_context():
+        recipe_payload_cache.clear()
+        recipe = recipe_service.save_recipe_to_history(RECIPE)
+        recipe_id = recipe.id
+        expected = recipe.to_dict()
+        favorite_service.add_to_favorites({'recipe_id': recipe_id})
+
+        data = client.get('/api/recipes/history').get_json()
+        assert data['history'] == [expected] and data['count'] == 1
+
+        hits = recipe_payload_cache.hits
+        data = client.get(f'/api/recipes/{recipe_id}').get_json()
+        assert recipe_payload_cache.hits == hits + 1
+        assert data['recipe'] == {**expected, 'step_progress': []}
+
+        client.post(f'/api/recipes/{recipe_id}/progress', json={'step_index': 0, 'is_completed': True})
+        data = client.get(f'/api/recipes/{recipe_id}').get_json()
+        assert data['recipe']['step_progress'][0]['is_completed'] is True
+
+        data = client.get('/api/favorites/').get_json()
+        assert data['favorites'][0]['recipe'] == expected
+
+        # 命中缓存时不再读取食谱 JSON 列
+        with QueryAudit(db.engine) as audit:
+            client.get('/api/recipes/history')
+        assert not any('recipes.ingredients_json' in sql for sql, _ in audit.statements)
+
+        assert client.delete(f'/api/recipes/{recipe_id}').status_code == 200
+        assert recipe_payload_cache.get(recipe_id) is None
+        assert client.get(f'/api/recipes/{recipe_id}').status_code == 404
+        assert db.session.get(Recipe, recipe_id) is None
+        print('✅ 食谱序列化缓存测试通过')
+
+
+def test_cross_process_delete():
+    """其他进程删除食谱后本进程清空缓存，复用的 ID 不会返回旧食谱的 JSON"""
+    client = app.test_client()
+    with app.app_context():
+        old = recipe_service.save_recipe_to_history(RECIPE)
+        recipe_id = old.id
+        assert client.get(f'/api/recipes/{recipe_id}').get_json()['recipe']['name'] == '番茄炒蛋'
+        assert recipe_payload_cache.get(recipe_id) is not None
+
+        # 模拟另一个 worker：删除并在同一事务中递增版本号，本进程不经过 ORM 事件
+        db.session.commit()
+        with db.engine.begin() as connection:
+            connection.execute(RecipeTag.__table__.delete().where(RecipeTag.__table__.c.recipe_id == recipe_id))
+            connection.execute(Recipe.__table__.delete().where(Recipe.__table__.c.id == recipe_id))
+            bump_version(connection, 'recipes')
+        db.session.expunge_all()
+        new = recipe_service.save_recipe_to_history({**RECIPE, 'name': '青椒炒蛋'})
+        assert new.id == recipe_id
+
+        recipe_payload_cache.stamp.expire()
+        assert client.get(f'/api/recipes/{recipe_id}').get_json()['recipe']['name'] == '青椒炒蛋'
+        print('✅ 跨进程删除失效测试通过')
+
+
+def main():
+    test_json_payload()
+    test_cached_endpoints()
+    test_cross_process_delete()
+
+
+if __name__ == '__main__':
+    main()
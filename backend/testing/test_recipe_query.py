@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Recipe Query Test
+食谱结构化筛选与分面统计测试（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.database import db
+from app.services.recipe_service import recipe_service
+from app.utils.parsers import parse_minutes, parse_kcal
+from app.utils.query_audit import QueryAudit
+
+app = create_app()
+limiter.enabled = False
+
+RECIPES = [
+    {'name': '番茄炒蛋', 'time': '15分钟', 'calories': '约300卡', 'cuisine': '中式', 'taste': '咸',
+     'scenario': '快手菜', 'difficulty': '新手', 'tags': ['快手菜', '家常']},
+    {'name': '红烧肉', 'time': '1小时30分钟', 'calories': '约800千卡', 'cuisine': '中式', 'taste': '咸',
+     'scenario': '硬菜', 'difficulty': '进阶', 'tags': ['硬菜', '家常']},
+    {'name': '蔬菜沙拉', 'time': '十分钟', 'calories': '200kcal', 'cuisine': '西式', 'taste': '清淡',
+     'scenario': '早餐', 'difficulty': '新手', 'tags': ['快手菜', '低卡']},
+    {'name': '番茄意面', 'time': '20-30分钟', 'calories': '约500卡', 'cuisine': '西式', 'taste': '酸',
+     'scenario': '快手菜', 'difficulty': '新手', 'tags': ['快手菜']},
+]
+
+
+def test_parsers():
+    """烹饪时间与热量解析"""
+    assert parse_minutes('15分钟') == 15
+    assert parse_minutes('1小时30分钟') == 90
+    assert parse_minutes('一个半小时') == 90
+    assert parse_minutes('半小时') == 30
+    assert parse_minutes('20-30分钟') == 30
+    assert parse_minutes('45 min') == 45
+    assert parse_minutes('适量') is None
+    assert parse_kcal('约450卡') == 450
+    assert parse_kcal('450千卡') == 450
+    assert parse_kcal('300-400kcal') == 400
+    assert parse_kcal('1884千焦') == 450
+    assert parse_kcal('2人份约900卡') == 900
+    assert parse_kcal('每份 350') == 350
+    assert parse_kcal('') is None
+    print('✅ 指标解析测试通过')
+
+
+def test_query():
+    """区间/等值/标签筛选与分面统计"""
+    client = app.test_client()
+    with app.app_context():
+        for data in RECIPES:
+            recipe_service.save_recipe_to_history(data)
+
+        data = client.get('/api/recipes/query?max_minutes=20').get_json()
+        assert {r['name'] for r in data['recipes']} == {'番茄炒蛋', '蔬菜沙拉'}
+        assert data['total'] == 2
+
+        data = client.get('/api/recipes/query?max_kcal=500&tag=快手菜&cuisine=西式').get_json()
+        assert {r['name'] for r in data['recipes']} == {'蔬菜沙拉', '番茄意面'}
+        assert data['facets']['taste'] == {'清淡': 1, '酸': 1}
+        assert data['facets']['tag'] == {'快手菜': 2, '低卡': 1}
+
+        data = client.get('/api/recipes/query?tag=快手菜&tag=家常').get_json()
+        assert [r['name'] for r in data['recipes']] == ['番茄炒蛋']
+
+        data = client.get('/api/recipes/query?q=番茄&max_minutes=20').get_json()
+        assert [r['name'] for r in data['recipes']] == ['番茄炒蛋']
+
+        data = client.get('/api/recipes/query?limit=1').get_json()
+        assert data['count'] == 1 and data['total'] == 4
+        assert data['facets']['cuisine'] == {'中式': 2, '西式': 2}
+        assert data['facets']['skill'] == {'新手': 3, '进阶': 1}
+
+        assert client.get('/api/recipes/query?max_minutes=abc').status_code == 400
+        assert client.get('/api/recipes/query?cuisine=火星菜').status_code == 400
+
+        # 分面统计只发出一条分组查询
+        with QueryAudit(db.engine) as audit:
+            client.get('/api/recipes/query?facets=true&limit=0')
+        assert sum('UNION ALL' in sql for sql, _ in audit.statements) == 1
+
+        print('✅ 结构化筛选测试通过')
+
+
+def main():
+    test_parsers()
+    test_query()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compact Recipe Schema Test
+紧凑食谱格式测试：展开为原有食谱结构、兼容完整格式、输出长度（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.services.recipe_service import recipe_service
+from app.utils.recipe_schema import compact_recipe, expand_recipe, expand_recipes
+from app.utils.tokens import estimate_tokens
+
+app = create_app()
+limiter.enabled = False
+
+RECIPE = {
+    'name': '黄金满屋蛋炒饭',
+    'description': '粒粒分明的快手炒饭',
+    'difficulty': '新手',
+    'time': '15分钟',
+    'calories': '约500卡',
+    'ingredients': [
+        {'name': '米饭', 'quantity': '1碗', 'status': '已有'},
+        {'name': '鸡蛋', 'quantity': '2个', 'status': '已有'},
+        {'name': '葱花', 'quantity': '适量', 'status': '需补充'}
+    ],
+    'steps': ['鸡蛋打散', '热锅下油炒散鸡蛋', '下米饭翻炒出锅'],
+    'tags': ['快手菜']
+}
+
+
+def test_expand():
+    """紧凑数组展开为原有食谱字典，完整格式原样保留"""
+    compact = compact_recipe(RECIPE)
+    assert compact[2:5] == [1, 15, 500] and compact[5][2] == ['葱花', '适量', 0]
+    assert expand_recipe(compact) == RECIPE
+    assert expand_recipes([compact, RECIPE]) == [RECIPE, RECIPE]
+    assert expand_recipes(compact) == [RECIPE]
+
+    # 模型不守格式时的容错：文本代码、步骤序号、缺少字段
+    loose = expand_recipe(['番茄炒蛋', '', '进阶', '20分钟', None, [['番茄'], '鸡蛋'], ['步骤1：切番茄', '2. 炒蛋']])
+    assert loose['difficulty'] == '进阶' and loose['time'] == '20分钟' and loose['calories'] == ''
+    assert loose['ingredients'] == [{'name': '番茄', 'quantity': '适量', 'status': '需补充'}]
+    assert loose['steps'] == ['切番茄', '炒蛋'] and loose['tags'] == []
+    assert expand_recipes('食谱') == [] and expand_recipe([1, 2]) is None
+    print('✅ 紧凑格式展开测试通过')
+
+
+def test_parse_and_save():
+    """模型返回紧凑格式时解析、保存与接口结构与原来一致"""
+    with app.app_context():
+        recipes = recipe_service._parse_response('```json\n' + json.dumps([compact_recipe(RECIPE)], ensure_ascii=False) + '\n```')
+        assert recipes == [RECIPE]
+        saved = recipe_service.save_recipes(recipes)[0]
+        assert saved['cooking_time'] == '15分钟' and saved['calories'] == '约500卡' and saved['difficulty'] == '新手'
+        assert [ing['status'] for ing in saved['ingredients']] == ['已有', '已有', '需补充']
+        print('✅ 紧凑格式解析保存测试通过')
+
+
+def test_output_tokens():
+    """紧凑格式的输出 token 数明显少于原格式"""
+    verbose = estimate_tokens(json.dumps([RECIPE] * 3, ensure_ascii=False, indent=2))
+    compact = estimate_tokens(json.dumps([compact_recipe(RECIPE)] * 3, ensure_ascii=False, separators=(',', ':')))
+    assert compact < verbose * 0.6, (compact, verbose)
+    assert estimate_tokens('') == 0 and estimate_tokens('鸡蛋2个') == 4 and estimate_tokens('status') == 2
+    print(f'✅ 输出长度测试通过（{verbose} -> {compact} tokens）')
+
+
+def main():
+    test_expand()
+    test_parse_and_save()
+    test_output_tokens()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Recipe Search Test
+食谱全文检索测试（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.services.recipe_service import recipe_service
+from app.services.recipe_search_service import build_match_query
+from app.utils.text import cjk_tokens
+
+app = create_app()
+limiter.enabled = False
+
+RECIPES = [
+    {
+        'name': '番茄炒蛋', 'description': '经典家常菜', 'cuisine': '中式', 'taste': '咸',
+        'ingredients': [{'name': '番茄', 'quantity': '2个', 'status': '已有'},
+                        {'name': '鸡蛋', 'quantity': '3个', 'status': '已有'}],
+        'steps': ['番茄切块', '鸡蛋打散炒熟'], 'tags': ['快手菜']
+    },
+    {
+        'name': '黄金蛋炒饭', 'description': 'egg fried rice', 'cuisine': '中式', 'taste': '咸',
+        'ingredients': [{'name': '米饭', 'quantity': '1碗', 'status': '已有'},
+                        {'name': '鸡蛋', 'quantity': '2个', 'status': '已有'}],
+        'steps': ['热锅下油', '加入米饭翻炒'], 'tags': ['快手菜', '主食']
+    },
+    {
+        'name': '意式番茄汤', 'description': '浓郁酸甜的番茄汤', 'cuisine': '西式', 'taste': '酸',
+        'ingredients': [{'name': '番茄', 'quantity': '3个', 'status': '已有'},
+                        {'name': '洋葱', 'quantity': '半个', 'status': '需补充'}],
+        'steps': ['番茄去皮', '小火慢炖'], 'tags': ['汤品']
+    }
+]
+
+
+def test_tokenize():
+    """中文单字 + 二元组分词"""
+    assert cjk_tokens('番茄炒蛋') == ['番', '茄', '炒', '蛋', '番茄', '茄炒', '炒蛋']
+    assert cjk_tokens('番茄 Egg', unigrams=False) == ['番茄', 'egg']
+    assert cjk_tokens('蛋', unigrams=False) == ['蛋']
+    assert build_match_query('番茄 egg') == '"番茄" "egg"*'
+    print('✅ 分词测试通过')
+
+
+def test_search():
+    """检索、排序、筛选与删除同步"""
+    client = app.test_client()
+    with app.app_context():
+        ids = [recipe_service.save_recipe_to_history(data).id for data in RECIPES]
+
+        data = client.get('/api/recipes/search?q=番茄').get_json()
+        names = [recipe['name'] for recipe in data['recipes']]
+        assert set(names) == {'番茄炒蛋', '意式番茄汤'}, names
+
+        data = client.get('/api/recipes/search?q=番茄&cuisine=西式').get_json()
+        assert [recipe['name'] for recipe in data['recipes']] == ['意式番茄汤']
+
+        data = client.get('/api/recipes/search?q=鸡蛋 egg').get_json()
+        assert [recipe['name'] for recipe in data['recipes']] == ['黄金蛋炒饭']
+
+        data = client.get('/api/recipes/search?q=蛋').get_json()
+        assert {recipe['name'] for recipe in data['recipes']} == {'番茄炒蛋', '黄金蛋炒饭'}
+
+        assert client.get('/api/recipes/search').status_code == 400
+        assert client.get('/api/recipes/search?q=番茄&cuisine=火星菜').status_code == 400
+
+        recipe_service.delete_recipe(ids[0])
+        data = client.get('/api/recipes/search?q=番茄炒蛋').get_json()
+        assert data['count'] == 0
+
+        print('✅ 全文检索测试通过')
+
+
+def main():
+    test_tokenize()
+    test_search()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Shopping List Bulk Operations Test
+购物清单批量操作测试：批量勾选、按条件删除、排序、合并均为单条语句（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.database import db
+from app.models.shopping_list import ShoppingListItem
+from app.utils.query_audit import QueryAudit
+
+app = create_app()
+limiter.enabled = False
+
+ITEMS = [('番茄', '2个', '蔬菜'), ('土豆', '3个', '蔬菜'), ('洋葱', '1个', '蔬菜'),
+         ('猪肉', '500g', '肉禽'), ('盐', '1袋', '调料'), ('西红柿', '3个', '蔬菜')]
+
+
+def _seed():
+    ShoppingListItem.query.delete()
+    db.session.add_all([ShoppingListItem(ingredient_name=n, quantity=q, category=c) for n, q, c in ITEMS])
+    db.session.commit()
+    return {item.ingredient_name: item.id for item in ShoppingListItem.query}
+
+
+def _writes(audit):
+    """业务写语句（不含读取）"""
+    return [sql for sql, _ in audit.statements if sql.lstrip().upper().startswith(('UPDATE', 'DELETE'))]
+
+
+def test_bulk_purchase():
+    """按 ID 或分类批量勾选，单条 UPDATE"""
+    client = app.test_client()
+    with app.app_context():
+        ids = _seed()
+        with QueryAudit(db.engine) as audit:
+            data = client.post('/api/shopping-list/bulk/purchase', json={'category': '蔬菜'}).get_json()
+        assert data['updated'] == 4 and audit.count == 1 and len(_writes(audit)) == 1
+
+        # 已是目标状态的项目不计入
+        data = client.post('/api/shopping-list/bulk/purchase', json={'ids': [ids['番茄'], ids['猪肉']]}).get_json()
+        assert data['updated'] == 1
+        data = client.post('/api/shopping-list/bulk/purchase',
+                           json={'ids': [ids['番茄'], ids['土豆']], 'is_purchased': False}).get_json()
+        assert data['updated'] == 2
+        purchased = {i.ingredient_name for i in ShoppingListItem.query.filter_by(is_purchased=True)}
+        assert purchased == {'洋葱', '西红柿', '猪肉'}
+        print('✅ 批量勾选测试通过')
+
+
+def test_bulk_delete():
+    """按条件删除，单条 DELETE 返回删除数量"""
+    client = app.test_client()
+    with app.app_context():
+        ids = _seed()
+        client.post('/api/shopping-list/bulk/purchase', json={'ids': [ids['番茄'], ids['盐']]})
+
+        with QueryAudit(db.engine) as audit:
+            data = client.post('/api/shopping-list/bulk/delete',
+                               json={'category': '蔬菜', 'is_purchased': True}).get_json()
+        assert data['deleted'] == 1 and audit.count == 1
+
+        with QueryAudit(db.engine) as audit:
+            data = client.delete('/api/shopping-list/purchased').get_json()
+        assert data['deleted'] == 1 and audit.count == 1
+
+        data = client.post('/api/shopping-list/bulk/delete', json={'ids': [ids['土豆'], ids['洋葱'], 9999]}).get_json()
+        assert data['deleted'] == 2
+        assert {i.ingredient_name for i in ShoppingListItem.query} == {'猪肉', '西红柿'}
+        print('✅ 批量删除测试通过')
+
+
+def test_reorder_and_merge():
+    """排序为单条 CASE UPDATE；合并同一食材"""
+    client = app.test_client()
+    with app.app_context():
+        ids = _seed()
+        order = [ids['盐'], ids['猪肉'], ids['番茄']]
+        with QueryAudit(db.engine) as audit:
+            data = client.put('/api/shopping-list/order', json={'ids': order}).get_json()
+        assert data['updated'] == 3 and audit.count == 1
+
+        client.post('/api/shopping-list/', json={'ingredient_name': '黄瓜', 'quantity': '2根'})
+        names = [item['ingredient_name'] for item in client.get('/api/shopping-list/').get_json()['items']]
+        # 未排序项目（位置 0）在前，按添加时间倒序；之后按指定顺序
+        assert names[-3:] == ['盐', '猪肉', '番茄'] and names[0] == '黄瓜'
+
+        # 自动合并：番茄与西红柿是同一规范食材
+        data = client.post('/api/shopping-list/merge', json={}).get_json()
+        assert data['removed'] == 1 and data['items'][0]['quantity'] == '5个'
+        assert ShoppingListItem.query.filter_by(ingredient_name='西红柿').count() == 0
+
+        # 指定 ids 时不同食材、购买状态不同的项目互不合并
+        data = client.post('/api/shopping-list/merge', json={'ids': [ids['土豆'], ids['洋葱']]}).get_json()
+        assert data['removed'] == 0 and data['items'] == []
+        potato = client.post('/api/shopping-list/', json={'ingredient_name': '土豆', 'quantity': '1个'}).get_json()['item']
+        bought = client.post('/api/shopping-list/', json={'ingredient_name': '土豆', 'quantity': '1勺'}).get_json()['item']
+        client.post(f"/api/shopping-list/{bought['id']}/purchase")
+        data = client.post('/api/shopping-list/merge', json={'ids': [ids['土豆'], bought['id'], potato['id']]}).get_json()
+        assert data['removed'] == 1 and [item['id'] for item in data['items']] == [ids['土豆']]
+        assert db.session.get(ShoppingListItem, bought['id']) is not None
+        print('✅ 排序与合并测试通过')
+
+
+def test_validation():
+    """参数校验"""
+    client = app.test_client()
+    with app.app_context():
+        assert client.post('/api/shopping-list/bulk/purchase', json={}).status_code == 400
+        assert client.post('/api/shopping-list/bulk/purchase', json={'ids': []}).status_code == 400
+        assert client.post('/api/shopping-list/bulk/purchase', json={'ids': [1], 'is_purchased': 'yes'}).status_code == 400
+        assert client.post('/api/shopping-list/bulk/delete', json={'is_purchased': 'yes'}).status_code == 400
+        assert client.post('/api/shopping-list/bulk/delete', json={'category': ' '}).status_code == 400
+        assert client.put('/api/shopping-list/order', json={'ids': ['a']}).status_code == 400
+        assert client.post('/api/shopping-list/merge', json={'ids': list(range(1000))}).status_code == 400
+        for url in ['bulk/purchase', 'bulk/delete', 'merge']:
+            assert client.post(f'/api/shopping-list/{url}', json=[1]).status_code == 400
+        assert client.put('/api/shopping-list/order', json=[1]).status_code == 400
+        print('✅ 参数校验测试通过')
+
+
+def main():
+    test_bulk_purchase()
+    test_bulk_delete()
+    test_reorder_and_merge()
+    test_validation()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Shopping List Generation Test
+多食谱生成购物清单测试：跨食谱合并、扣除库存、与清单合并、单事务（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.database import db
+from app.models.ingredient import Ingredient
+from app.models.shopping_list import ShoppingListItem
+from app.services.recipe_service import recipe_service
+from app.utils.query_audit import QueryAudit
+
+app = create_app()
+limiter.enabled = False
+
+
+def _recipe(name, ingredients):
+    recipe = recipe_service.save_recipe_to_history({
+        'name': name,
+        'ingredients': [{'name': n, 'quantity': q, 'status': s} for n, q, s in ingredients]
+    })
+    return recipe.id
+
+
+def _listed():
+    items = ShoppingListItem.query.filter_by(is_purchased=False).order_by(ShoppingListItem.id).all()
+    return {item.ingredient_name: item.quantity for item in items}
+
+
+def test_generate_many():
+    """跨食谱合并数量、扣除库存、补足已有清单项"""
+    client = app.test_client()
+    with app.app_context():
+        db.session.add_all([Ingredient(name='新鲜鸡蛋', quantity='6个'), Ingredient(name='大米', quantity='300g')])
+        db.session.add(ShoppingListItem(ingredient_name='西红柿', quantity='1个'))
+        db.session.commit()
+
+        first = _recipe('番茄炒蛋', [('鸡蛋', '3个', '需补充'), ('番茄', '2个', '需补充'),
+                                    ('大米', '1kg', '需补充'), ('葱', '适量', '需补充'), ('盐', '适量', '已有')])
+        second = _recipe('番茄土豆汤', [('西红柿', '3个', '需补充'), ('土豆', '2个', '需补充'), ('葱花', '1根', '需补充')])
+
+        response = client.post('/api/shopping-list/generate', json={'recipe_ids': [first, second, 9999]})
+        data = response.get_json()
+        assert response.status_code == 200, data
+        assert data['created'] == 3 and data['updated'] == 1 and data['count'] == 4
+        assert data['skipped'] == [{'name': '鸡蛋', 'reason': 'pantry'}]
+        assert data['missing_recipe_ids'] == [9999]
+        assert _listed() == {'西红柿': '5个', '大米': '0.7kg', '葱': '适量+1根', '土豆': '2个'}
+
+        # 重复生成不会产生重复项
+        data = client.post('/api/shopping-list/generate', json={'recipe_ids': [second, first]}).get_json()
+        assert data['created'] == 0 and data['updated'] == 0 and len(data['skipped']) == 5
+        assert {s['reason'] for s in data['skipped']} == {'pantry', 'listed'}
+
+        # 兼容单个食谱
+        data = client.post('/api/shopping-list/generate', json={'recipe_id': first}).get_json()
+        assert data['success'] and data['count'] == 0
+        print('✅ 多食谱生成购物清单测试通过')
+
+
+def test_fixed_query_count():
+    """SQL 条数与食谱数量无关"""
+    client = app.test_client()
+    with app.app_context():
+        ShoppingListItem.query.delete()
+        db.session.commit()
+        recipe_ids = [
+            _recipe(f'备餐{i}', [(f'食材{i}', '100g', '需补充'), ('牛奶', '250ml', '需补充'), ('洋葱', '1个', '需补充')])
+            for i in range(10)
+        ]
+        with QueryAudit(db.engine) as audit:
+            data = client.post('/api/shopping-list/generate', json={'recipe_ids': recipe_ids}).get_json()
+        assert data['created'] == 12, data
+        assert _listed()['牛奶'] == '2500ml' and _listed()['洋葱'] == '10个'
+        # 食谱、库存、清单各一次查询 + 一次批量插入
+        writes = [sql for sql, _ in audit.statements if not sql.lstrip().upper().startswith('SELECT')]
+        assert audit.count <= 5 and len(writes) == 1, audit.statements
+        print('✅ 购物清单生成查询条数测试通过')
+
+
+def test_pantry_in_liang():
+    """库存以两/斤计时按质量扣除，而不是当作数字"""
+    client = app.test_client()
+    with app.app_context():
+        ShoppingListItem.query.delete()
+        db.session.add_all([Ingredient(name='猪肉', quantity='二两'), Ingredient(name='牛肉', quantity='1斤二两')])
+        db.session.commit()
+        recipe_id = _recipe('双肉小炒', [('猪肉', '500g', '需补充'), ('牛肉', '1kg', '需补充')])
+
+        data = client.post('/api/shopping-list/generate', json={'recipe_ids': [recipe_id]}).get_json()
+        assert data['created'] == 2 and data['skipped'] == [], data
+        assert _listed() == {'猪肉': '400g', '牛肉': '0.4kg'}
+        print('✅ 两/斤库存扣除测试通过')
+
+
+def test_validation():
+    """参数校验"""
+    client = app.test_client()
+    with app.app_context():
+        assert client.post('/api/shopping-list/generate', json={}).status_code == 400
+        assert client.post('/api/shopping-list/generate', json={'recipe_ids': ['1']}).status_code == 400
+        assert client.post('/api/shopping-list/generate', json={'recipe_ids': list(range(1, 100))}).status_code == 400
+        assert client.post('/api/shopping-list/generate', json=[1]).status_code == 400
+        assert client.post('/api/shopping-list/generate', json={'recipe_ids': [9999]}).status_code == 404
+        print('✅ 参数校验测试通过')
+
+
+def main():
+    test_generate_many()
+    test_fixed_query_count()
+    test_pantry_in_liang()
+    test_validation()
+
+
+if __name__ == '__main__':
+    main()
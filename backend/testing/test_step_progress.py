@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Step Progress Test
+步骤进度批量更新测试（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from app import create_app, limiter
+from app.database import db
+from app.models.recipe import Recipe
+from app.models.recipe_progress import RecipeStepProgress
+from app.utils.query_audit import QueryAudit
+
+app = create_app()
+limiter.enabled = False
+
+
+def _create_recipe():
+    recipe = Recipe(name='番茄炒蛋', ingredients_json='[]', steps_json='[]', tags_json='[]')
+    db.session.add(recipe)
+    db.session.commit()
+    return recipe.id
+
+
+def test_batch_upsert():
+    """批量写入只发出一条 INSERT ... ON CONFLICT，重复步骤以最后一次为准"""
+    client = app.test_client()
+    with app.app_context():
+        recipe_id = _create_recipe()
+        url = f'/api/recipes/{recipe_id}/progress'
+
+        steps = [{'step_index': i, 'is_completed': True} for i in range(10)]
+        with QueryAudit(db.engine) as audit:
+            response = client.put(url, json={'steps': steps})
+        assert response.status_code == 200
+        inserts = [sql for sql, _ in audit.statements if sql.lstrip().upper().startswith('INSERT')]
+        assert len(inserts) == 1 and 'ON CONFLICT' in inserts[0]
+        assert len(response.get_json()['progress']) == 10
+
+        data = client.put(url, json={'steps': [
+            {'step_index': 3, 'is_completed': False},
+            {'step_index': 3, 'is_completed': True},
+            {'step_index': 4, 'is_completed': False},
+        ]}).get_json()
+        states = {p['step_index']: p['is_completed'] for p in data['progress']}
+        assert states[3] is True and states[4] is False
+        assert data['progress'][4]['completed_at'] is None
+        assert RecipeStepProgress.query.filter_by(recipe_id=recipe_id).count() == 10
+
+        # 单步接口复用同一写入路径
+        data = client.post(url, json={'step_index': 4, 'is_completed': True}).get_json()
+        assert data['progress']['step_index'] == 4 and data['progress']['is_completed'] is True
+        assert RecipeStepProgress.query.filter_by(recipe_id=recipe_id).count() == 10
+        print('✅ 批量写入测试通过')
+
+
+def test_reset():
+    """reset 清除全部进度，可与 steps 同时使用"""
+    client = app.test_client()
+    with app.app_context():
+        recipe_id = _create_recipe()
+        url = f'/api/recipes/{recipe_id}/progress'
+        client.put(url, json={'steps': [{'step_index': i, 'is_completed': True} for i in range(5)]})
+
+        data = client.put(url, json={'reset': True}).get_json()
+        assert data['progress'] == []
+
+        data = client.put(url, json={'reset': True, 'steps': [{'step_index': 0, 'is_completed': True}]}).get_json()
+        assert [p['step_index'] for p in data['progress']] == [0]
+        print('✅ 重置进度测试通过')
+
+
+def test_validation():
+    """非法请求返回 400/404"""
+    client = app.test_client()
+    with app.app_context():
+        recipe_id = _create_recipe()
+        url = f'/api/recipes/{recipe_id}/progress'
+        assert client.put(url, json={}).status_code == 400
+        assert client.put(url, json={'steps': {}}).status_code == 400
+        assert client.put(url, json={'steps': [{'step_index': -1}]}).status_code == 400
+        assert client.put(url, json={'steps': [{'step_index': True}]}).status_code == 400
+        assert client.put(url, json={'steps': [{'step_index': 0, 'is_completed': 'yes'}]}).status_code == 400
+        assert client.put(url, json={'reset': 'true'}).status_code == 400
+        for body in ([], [{'step_index': 0}], 'x'):
+            assert client.put(url, json=body).status_code == 400
+            assert client.post(url, json=body).status_code == 400
+        assert client.post(url, data='{', content_type='application/json').status_code == 400
+        assert client.put('/api/recipes/99999/progress', json={'reset': True}).status_code == 404
+        print('✅ 参数校验测试通过')
+
+
+def main():
+    test_batch_upsert()
+    test_reset()
+    test_validation()
+
+
+if __name__ == '__main__':
+    main()
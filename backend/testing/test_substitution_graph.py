@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Substitution Graph Test
+替代关系图测试：邻接表排序、子串索引、提交后失效、跨进程版本比对（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from sqlalchemy import insert, text
+from app import create_app, limiter
+from app.database import db
+from app.models.cache_version import read_version, bump_version
+from app.models.canonical_ingredient import IngredientAlias
+from app.models.substitution import IngredientSubstitution, SubstitutionClosure
+from app.services.ingredient_lexicon import ingredient_lexicon
+from app.services.substitution_graph import SubstitutionGraph, substitution_graph
+from app.services.substitution_service import substitution_service
+from app.utils.query_audit import QueryAudit
+from app.utils.substitution_paths import affected_origins, closure_rows, compose_ratios
+
+app = create_app()
+limiter.enabled = False
+
+SUBSTITUTIONS = [
+    ('柠檬汁', '白醋', 0.85), ('柠檬汁', '青柠汁', 0.95), ('鲜柠檬', '柠檬汁', 0.9),
+    ('黄油', '植物油', 0.7), ('黄油', '椰子油', 0.8), ('鸡蛋', '豆腐', 0.6),
+    ('牛奶', '豆浆', 0.85), ('白葡萄酒', '料酒', 0.75), ('Butter Milk', '牛奶', 0.5),
+]
+
+
+def _edge(edge_id, original, substitute, score, original_id=None, substitute_id=None):
+    return {'id': edge_id, 'original_ingredient': original, 'substitute_ingredient': substitute,
+            'original_canonical_id': original_id, 'substitute_canonical_id': substitute_id,
+            'similarity_score': score}
+
+
+def _names(substitutes):
+    return [s['substitute_ingredient'] for s in substitutes]
+
+
+def test_graph_lookups():
+    """正向/反向邻接表按相似度排序，子串匹配合并多个原食材"""
+    graph = SubstitutionGraph([
+        _edge(1, '柠檬汁', '白醋', 0.85, 10, 20), _edge(2, '柠檬汁', '青柠汁', 0.95, 10, 21),
+        _edge(3, '鲜柠檬', '柠檬汁', 0.9, None, 10), _edge(4, '黄油', '植物油', 0.7),
+        _edge(5, '黄油', '椰子油', 0.7),
+    ])
+    assert len(graph) == 5
+    assert _names(graph.substitutes('柠檬汁', 10)) == ['青柠汁', '白醋']
+    assert _names(graph.substitutes('柠檬')) == ['青柠汁', '柠檬汁', '白醋']
+    assert _names(graph.substitutes('柠', limit=2)) == ['青柠汁', '柠檬汁']
+    assert _names(graph.substitutes('黄油')) == ['植物油', '椰子油']  # 同分按 ID
+    assert graph.substitutes('柠檬茶') == [] and graph.substitutes('') == []
+    assert [e['original_ingredient'] for e in graph.substituted_for('柠檬汁', 10)] == ['鲜柠檬']
+    assert [e['original_ingredient'] for e in graph.substituted_for('植物油')] == ['黄油']
+    print('✅ 替代关系图查询测试通过')
+
+
+def test_matches_database_query():
+    """图查询结果与原 SQL 查询（规范 ID 精确匹配 / LIKE 子串）一致"""
+    client = app.test_client()
+    with app.app_context():
+        for original, substitute, score in SUBSTITUTIONS:
+            client.post('/api/substitutions/', json={
+                'original_ingredient': original, 'substitute_ingredient': substitute, 'similarity_score': score
+            })
+
+        for name in ['柠檬汁', '柠檬', '黄油', '土鸡蛋', '全脂牛奶', '葡萄', 'milk', '油', '不存在']:
+            canonical_id = ingredient_lexicon.canonical_id(name)
+            if canonical_id is not None:
+                condition = IngredientSubstitution.original_canonical_id == canonical_id
+            else:
+                condition = IngredientSubstitution.original_ingredient.like(f'%{name}%')
+            expected = IngredientSubstitution.query.filter(condition).order_by(
+                IngredientSubstitution.similarity_score.desc(), IngredientSubstitution.id
+            ).limit(5).all()
+            assert substitution_service.get_substitutes(name) == [s.to_dict() for s in expected], name
+
+        data = client.get('/api/substitutions/豆浆?direction=reverse').get_json()
+        assert data['direction'] == 'reverse' and [s['original_ingredient'] for s in data['substitutes']] == ['牛奶']
+        assert client.get('/api/substitutions/豆浆?direction=sideways').status_code == 400
+        print('✅ 图查询与数据库查询一致性测试通过')
+
+
+def test_lookups_skip_database():
+    """版本检查间隔内的查询不访问数据库"""
+    with app.app_context():
+        substitution_service.get_substitutes('黄油')
+        with QueryAudit(db.engine) as audit:
+            for _ in range(100):
+                substitution_service.get_substitutes('柠檬')
+                substitution_service.get_substitutes('黄油')
+        assert audit.count == 0, audit.statements
+        print('✅ 查询免数据库访问测试通过')
+
+
+def test_batch_lookup():
+    """批量查询与逐个查询结果一致，不访问数据库；接口参数校验"""
+    client = app.test_client()
+    with app.app_context():
+        names = ['柠檬汁', '西红柿', '黄油', '柠檬汁', 'milk']
+        substitution_service.get_substitutes('黄油')
+        with QueryAudit(db.engine) as audit:
+            result = substitution_service.get_substitutes_many(names, limit=1)
+        assert audit.count == 0, audit.statements
+        assert list(result) == ['柠檬汁', '西红柿', '黄油', 'milk']
+        assert all(result[name] == substitution_service.get_substitutes(name, 1) for name in result)
+
+        missing = [{'name': '黄油', 'status': '需补充'}, {'name': '西红柿', 'status': '需补充'}, {'name': '牛奶'}]
+        assert list(substitution_service.get_recipe_substitutions(missing)) == ['黄油']
+
+        data = client.post('/api/substitutions/batch', json={'names': [' 黄油', '西红柿'], 'limit': 2}).get_json()
+        assert data['count'] == 1 and _names(data['substitutions']['黄油']) == ['椰子油', '植物油']
+        assert data['substitutions']['西红柿'] == []
+        for body in [{}, {'names': []}, {'names': ['黄油', '']}, {'names': '黄油'},
+                     {'names': ['黄油'], 'limit': 0}, {'names': ['黄油'], 'limit': True}]:
+            assert client.post('/api/substitutions/batch', json=body).status_code == 400, body
+        print('✅ 批量替代查询测试通过')
+
+
+def test_commit_invalidates():
+    """增删替代关系提交后立即可见，每个事务只递增一次版本号，回滚不生效"""
+    client = app.test_client()
+    with app.app_context():
+        before = read_version(db.session.connection(), 'substitutions')
+        data = client.post('/api/substitutions/', json={
+            'original_ingredient': '黄油', 'substitute_ingredient': '猪油', 'similarity_score': 0.9
+        }).get_json()
+        assert _names(substitution_service.get_substitutes('黄油')) == ['猪油', '椰子油', '植物油']
+        assert read_version(db.session.connection(), 'substitutions') == before + 1
+
+        assert client.delete(f"/api/substitutions/{data['substitution']['id']}").status_code == 200
+        assert _names(substitution_service.get_substitutes('黄油')) == ['椰子油', '植物油']
+
+        db.session.add_all([
+            IngredientSubstitution(original_ingredient='黄油', substitute_ingredient='橄榄油'),
+            IngredientSubstitution(original_ingredient='黄油', substitute_ingredient='花生油'),
+        ])
+        db.session.flush()
+        assert read_version(db.session.connection(), 'substitutions') == before + 3
+        db.session.rollback()
+        assert read_version(db.session.connection(), 'substitutions') == before + 2
+        assert _names(substitution_service.get_substitutes('黄油')) == ['椰子油', '植物油']
+        print('✅ 提交失效测试通过')
+
+
+def test_closure_paths():
+    """多级路径：得分为各跳之积、取最优路径、跳数与得分阈值、比例组合、受影响起点"""
+    edges = [
+        _edge(1, '黄油', '植物油', 0.8) | {'substitution_ratio': '1:0.8', 'category': '调料'},
+        _edge(2, '植物油', '猪油', 0.9) | {'substitution_ratio': '1:1', 'category': '调料'},
+        _edge(3, '猪油', '牛油', 0.9) | {'substitution_ratio': '1勺猪油=1勺牛油', 'category': '调料'},
+        _edge(4, '黄油', '椰子油', 0.6) | {'substitution_ratio': '1:1', 'category': '调料'},
+        _edge(5, '椰子油', '猪油', 0.9) | {'substitution_ratio': '1:1', 'category': '调料'},
+        _edge(6, '猪油', '黄油', 0.9) | {'substitution_ratio': '1:1', 'category': '调料'},
+    ]
+    rows = {(row['original_ingredient'], row['substitute_ingredient']): row for row in closure_rows(edges)}
+    lard = rows[('黄油', '猪油')]
+    assert lard['hops'] == 2 and lard['score'] == 0.72 and lard['substitution_ratio'] == '1:0.8'
+    assert lard['path'] == '["黄油", "植物油", "猪油"]'
+    beef = rows[('黄油', '牛油')]
+    assert beef['hops'] == 3 and beef['score'] == 0.648 and beef['substitution_ratio'] is None
+    # 已有直接替代或回到起点的不生成路径；超过跳数或低于阈值的剪枝
+    assert ('黄油', '植物油') not in rows and ('黄油', '黄油') not in rows
+    assert ('椰子油', '植物油') in rows and ('植物油', '牛油') in rows
+    for options in [{'max_hops': 2}, {'min_score': 0.7}]:
+        pairs = {(r['original_ingredient'], r['substitute_ingredient']) for r in closure_rows(edges, **options)}
+        assert ('黄油', '猪油') in pairs and ('黄油', '牛油') not in pairs, options
+
+    assert compose_ratios(['1:0.8', '2:1', '1:1']) == '1:0.4' and compose_ratios(['1:2', '1:1']) == '1:2'
+    # 猪油 -> 牛油 变化时，能在 2 跳内到达猪油的起点都要重算
+    assert affected_origins(edges, ['n:猪油'], 3) == {'n:猪油', 'n:植物油', 'n:椰子油', 'n:黄油'}
+    assert affected_origins(edges, ['n:猪油'], 2) == {'n:猪油', 'n:植物油', 'n:椰子油'}
+    print('✅ 多级替代路径计算测试通过')
+
+
+def test_multi_hop_lookup():
+    """多级路径随替代关系增删在同一事务中增量重算，按 max_hops 参与查询"""
+    client = app.test_client()
+    with app.app_context():
+        data = client.post('/api/substitutions/', json={
+            'original_ingredient': '植物油', 'substitute_ingredient': '猪油', 'similarity_score': 0.9
+        }).get_json()
+        paths = SubstitutionClosure.query.filter_by(substitute_ingredient='猪油').all()
+        assert [(p.original_ingredient, p.hops, p.score) for p in paths] == [('黄油', 2, 0.63)]
+
+        assert _names(substitution_service.get_substitutes('黄油')) == ['椰子油', '植物油']
+        result = substitution_service.get_substitutes('黄油', max_hops=2)
+        assert [(s['substitute_ingredient'], s['hops']) for s in result] == [('椰子油', 1), ('植物油', 1), ('猪油', 2)]
+        assert result[2]['path'] == ['黄油', '植物油', '猪油'] and result[2]['id'] is None
+        assert _names(substitution_service.get_substitutes('鲜柠檬', max_hops=3)) == ['柠檬汁', '青柠汁', '白醋']
+
+        body = client.get('/api/substitutions/黄油?max_hops=2').get_json()
+        assert body['count'] == 3
+        body = client.post('/api/substitutions/batch', json={'names': ['黄油'], 'max_hops': 2}).get_json()
+        assert _names(body['substitutions']['黄油'])[-1] == '猪油'
+        assert client.get('/api/substitutions/黄油?max_hops=9').status_code == 400
+        assert client.post('/api/substitutions/batch', json={'names': ['黄油'], 'max_hops': 0}).status_code == 400
+
+        assert client.delete(f"/api/substitutions/{data['substitution']['id']}").status_code == 200
+        assert SubstitutionClosure.query.filter_by(substitute_ingredient='猪油').count() == 0
+        assert _names(substitution_service.get_substitutes('黄油', max_hops=3)) == ['椰子油', '植物油']
+        print('✅ 多级替代查询测试通过')
+
+
+def test_other_process_changes():
+    """其他进程写入并递增版本号后，检查间隔到期时重建"""
+    with app.app_context():
+        interval = substitution_graph.stamp.interval
+        substitution_graph.stamp.interval = ingredient_lexicon.stamp.interval = 3600
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(IngredientSubstitution.__table__).values(
+                    original_ingredient='黄油', substitute_ingredient='奶油奶酪', similarity_score=0.99,
+                    original_canonical_id=ingredient_lexicon.canonical_id('黄油')
+                ))
+                bump_version(connection, 'substitutions')
+                potato = connection.execute(text("SELECT id FROM canonical_ingredients WHERE name = '土豆'")).scalar()
+                connection.execute(insert(IngredientAlias.__table__).values(alias='地蛋', canonical_id=potato))
+                bump_version(connection, 'ingredient_aliases')
+
+            # 检查间隔内仍使用本地快照
+            assert '奶油奶酪' not in _names(substitution_service.get_substitutes('黄油'))
+            assert ingredient_lexicon.canonical_id('地蛋') is None
+
+            substitution_graph.stamp.interval = ingredient_lexicon.stamp.interval = 0
+            assert _names(substitution_service.get_substitutes('黄油'))[0] == '奶油奶酪'
+            assert ingredient_lexicon.canonical_id('地蛋') == potato
+        finally:
+            substitution_graph.stamp.interval = ingredient_lexicon.stamp.interval = interval
+        print('✅ 跨进程版本比对测试通过')
+
+
+def main():
+    test_graph_lookups()
+    test_matches_database_query()
+    test_lookups_skip_database()
+    test_batch_lookup()
+    test_commit_invalidates()
+    test_closure_paths()
+    test_multi_hop_lookup()
+    test_other_process_changes()
+
+
+if __name__ == '__main__':
+    main()
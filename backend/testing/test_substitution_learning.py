@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Substitution Learning Test
+模型替代建议写回测试：校验覆盖度路由、去重、参与查询、审核、到期失效（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from sqlalchemy import insert
+from app import create_app, limiter
+from app.database import db
+from app.models.cache_version import bump_version
+from app.models.substitution import IngredientSubstitution, SubstitutionClosure
+from app.services.recipe_service import recipe_service
+from app.services.substitution_graph import substitution_graph
+from app.services.substitution_service import substitution_service
+
+app = create_app()
+limiter.enabled = False
+
+
+def _names(substitutes):
+    return [s['substitute_ingredient'] for s in substitutes]
+
+
+def _llm_text(items):
+    return '```json\n' + json.dumps({'summary': '替代建议', 'items': items}, ensure_ascii=False) + '\n```'
+
+
+class _RecordingChain:
+    """记录调用参数的替代方案模型桩"""
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = []
+
+    def invoke(self, inputs):
+        self.calls.append(inputs)
+        return {'substitution_text': self.text}
+
+
+def _candidate(name, score):
+    return {'substitute_ingredient': name, 'substitution_ratio': '1:1', 'notes': '', 'similarity_score': score}
+
+
+def test_coverage_gate():
+    """数据库候选已覆盖的食材本地作答，只把未覆盖的食材交给模型"""
+    service = recipe_service.chain_service
+    candidates = {
+        '白糖': [_candidate('冰糖', 0.9), _candidate('蜂蜜', 0.7)],
+        '米醋': [_candidate('白醋', 0.9), _candidate('柠檬汁', 0.4)],  # 第二个候选低于阈值
+    }
+    original = service.substitution_chain
+    try:
+        service.substitution_chain = stub = _RecordingChain('')
+        gate = service._substitution_gate_transform({
+            'user_input': '做糖醋排骨', 'missing_ingredients': ['白糖'], 'substitution_candidates': candidates
+        })
+        assert stub.calls == [] and gate['covered_ingredients'] == ['白糖'] and gate['uncovered_ingredients'] == []
+
+        stub.text = _llm_text([{'ingredient': '米醋', 'recommendations': [{'name': '白醋', 'source': '数据库'}]}])
+        inputs = {'user_input': '做糖醋排骨', 'missing_ingredients': ['米醋', '白糖'], 'substitution_candidates': candidates}
+        gate = service._substitution_gate_transform(inputs)
+        assert len(stub.calls) == 1 and json.loads(stub.calls[0]['missing_ingredients']) == ['米醋']
+        assert json.loads(stub.calls[0]['substitution_candidates']) == {'米醋': [['白醋', 0.9, '1:1'], ['柠檬汁', 0.4, '1:1']]}
+
+        with app.app_context():
+            substitutions = service._parse_substitution_transform({**inputs, **gate})['substitutions']
+        assert [item['ingredient'] for item in substitutions['items']] == ['米醋', '白糖']
+        assert substitutions['coverage'] == {'local': ['白糖'], 'llm': ['米醋']}
+        assert substitutions['items'][1]['recommendations'][0]['source'] == '数据库'
+    finally:
+        service.substitution_chain = original
+    print('✅ 替代方案覆盖度路由测试通过')
+
+
+def test_writeback():
+    """只写回缺失食材的有效补充建议，与已有关系去重，降权参与查询"""
+    client = app.test_client()
+    with app.app_context():
+        client.post('/api/substitutions/', json={
+            'original_ingredient': '黄油', 'substitute_ingredient': '植物油', 'similarity_score': 0.7
+        })
+        items = [
+            {'ingredient': '黄油', 'recommendations': [
+                {'name': '植物油', 'source': '补充建议', 'confidence': 0.9},       # 已有
+                {'name': '猪油', 'ratio': '1:1', 'note': '中式烘焙常用', 'source': '补充建议', 'confidence': 0.8},
+                {'name': '椰子油', 'source': '数据库'},                            # 非补充建议
+                {'name': '人造黄油', 'source': '补充建议', 'confidence': 0.1},     # 置信度过低
+                {'name': '黄油', 'source': '补充建议', 'confidence': 0.9},         # 与原食材相同
+                {'name': '', 'source': '补充建议'},
+            ]},
+            {'ingredient': '鱼露', 'recommendations': [{'name': '生抽', 'source': '补充建议'}]},  # 非缺失食材
+            {'ingredient': '淡奶油', 'recommendations': [{'name': '牛奶加黄油', 'source': '补充建议'}]},
+        ]
+        result = recipe_service.chain_service._parse_substitution_transform({
+            'substitution_text': _llm_text(items), 'missing_ingredients': ['黄油', '淡奶油'], 'substitution_candidates': {}
+        })
+        assert len(result['substitutions']['items']) == 3
+
+        learned = IngredientSubstitution.query.filter_by(source='llm').order_by(IngredientSubstitution.id).all()
+        assert [(s.original_ingredient, s.substitute_ingredient) for s in learned] == [('黄油', '猪油'), ('淡奶油', '牛奶加黄油')]
+        lard = learned[0].to_dict()
+        assert lard['review_state'] == 'pending' and lard['confidence'] == 0.8 and lard['similarity_score'] == 0.64
+        assert lard['substitution_ratio'] == '1:1' and lard['notes'] == '中式烘焙常用' and lard['expires_at']
+
+        # 写回的建议参与直接替代查询，不参与多级路径推导
+        assert _names(substitution_service.get_substitutes('黄油')) == ['植物油', '猪油']
+        assert _names(substitution_service.get_substitutes('淡奶油')) == ['牛奶加黄油']
+        assert substitution_service.learn_suggestions(items, ['黄油', '淡奶油']) == 0
+        print('✅ 替代建议写回测试通过')
+
+
+def test_review():
+    """审核通过后长期有效并参与多级路径；驳回后不再参与查询，也不会被重新学习"""
+    client = app.test_client()
+    with app.app_context():
+        lard = IngredientSubstitution.query.filter_by(substitute_ingredient='猪油').one()
+        cream = IngredientSubstitution.query.filter_by(substitute_ingredient='牛奶加黄油').one()
+        client.post('/api/substitutions/', json={
+            'original_ingredient': '猪油', 'substitute_ingredient': '牛油', 'similarity_score': 0.9
+        })
+        assert SubstitutionClosure.query.filter_by(original_ingredient='黄油', substitute_ingredient='牛油').count() == 0
+
+        data = client.put(f'/api/substitutions/{lard.id}/review', json={'review_state': 'approved'}).get_json()
+        assert data['substitution']['review_state'] == 'approved' and data['substitution']['expires_at'] is None
+        assert SubstitutionClosure.query.filter_by(original_ingredient='黄油', substitute_ingredient='牛油').count() == 1
+
+        assert client.put(f'/api/substitutions/{cream.id}/review', json={'review_state': 'rejected'}).status_code == 200
+        assert substitution_service.get_substitutes('淡奶油') == []
+        items = [{'ingredient': '淡奶油', 'recommendations': [{'name': '牛奶加黄油', 'source': '补充建议'}]}]
+        assert substitution_service.learn_suggestions(items, ['淡奶油']) == 0
+
+        data = client.get('/api/substitutions/?source=llm&review_state=rejected').get_json()
+        assert [s['id'] for s in data['substitutions']] == [cream.id]
+        assert client.put(f'/api/substitutions/{cream.id}/review', json={'review_state': 'ok'}).status_code == 400
+        assert client.put('/api/substitutions/99999/review', json={'review_state': 'approved'}).status_code == 404
+        assert client.get('/api/substitutions/?review_state=ok').status_code == 400
+        print('✅ 替代建议审核测试通过')
+
+
+def test_expiry():
+    """未审核的建议到期后自动退出查询，再次给出时刷新该记录重新生效"""
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(insert(IngredientSubstitution.__table__).values(
+                original_ingredient='鱼露', substitute_ingredient='生抽', similarity_score=0.5, source='llm',
+                review_state='pending', expires_at=datetime.utcnow() + timedelta(seconds=1)
+            ))
+            bump_version(connection, 'substitutions')
+        substitution_graph.load()
+        assert _names(substitution_service.get_substitutes('鱼露')) == ['生抽']
+        time.sleep(1.1)
+        assert substitution_service.get_substitutes('鱼露') == []
+
+        items = [{'ingredient': '鱼露', 'recommendations': [{'name': '生抽', 'note': '加少许盐', 'source': '补充建议'}]}]
+        assert substitution_service.learn_suggestions(items, ['鱼露']) == 1
+        assert _names(substitution_service.get_substitutes('鱼露')) == ['生抽']
+        record = IngredientSubstitution.query.filter_by(original_ingredient='鱼露').one()
+        assert record.notes == '加少许盐' and record.expires_at > datetime.utcnow() + timedelta(days=1)
+        assert substitution_service.learn_suggestions(items, ['鱼露']) == 0
+        print('✅ 替代建议到期测试通过')
+
+
+def main():
+    test_coverage_gate()
+    test_writeback()
+    test_review()
+    test_expiry()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Write Batcher Test
+组提交测试（临时 SQLite 数据库，无需 API Key）
+"""
+import sys
+import os
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用临时数据库，避免污染开发数据；开启进度与购物清单的组提交
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkstemp(suffix=".db")[1]}')
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+os.environ.setdefault('GROUP_COMMIT', 'progress,shopping')
+
+from sqlalchemy import create_engine, text
+from app import create_app, limiter
+from app.database import db
+from app.models.recipe import Recipe
+from app.models.shopping_list import ShoppingListItem
+from app.utils.write_batcher import WriteBatcher, write_batcher
+
+app = create_app()
+limiter.enabled = False
+
+
+def _temp_engine():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER NOT NULL)"))
+    return engine
+
+
+def _insert(value):
+    def write(conn):
+        return conn.execute(text("INSERT INTO t (v) VALUES (:v)"), {'v': value}).lastrowid
+    return write
+
+
+def test_concurrent_writes_are_batched():
+    """并发写合并为少量批次，每个调用方拿到自己的结果"""
+    batcher = WriteBatcher(window_ms=20, max_batch=64)
+    batcher.engine = _temp_engine()
+    results = {}
+
+    def worker(n):
+        results[n] = batcher.submit(_insert(n)).result()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.stop()
+
+    assert len(set(results.values())) == 20
+    assert batcher.operations == 20 and batcher.batches < 20
+    with batcher.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM t")).scalar() == 20
+    print(f"✅ 并发写合并测试通过 ({batcher.stats()['avg_batch_size']:.1f} 个/批)")
+
+
+def test_failed_operation_is_isolated():
+    """批内某个操作失败时只有它报错，其余操作照常提交"""
+    batcher = WriteBatcher(window_ms=50, max_batch=64)
+    batcher.engine = _temp_engine()
+    futures = [batcher.submit(_insert(1)), batcher.submit(_insert(None)), batcher.submit(_insert(3))]
+
+    assert futures[0].result() and futures[2].result()
+    try:
+        futures[1].result()
+        assert False, '违反 NOT NULL 的操作应失败'
+    except Exception as e:
+        assert 'NOT NULL' in str(e)
+    batcher.stop()
+
+    with batcher.engine.connect() as conn:
+        assert conn.execute(text("SELECT v FROM t ORDER BY v")).scalars().all() == [1, 3]
+    print('✅ 失败隔离测试通过')
+
+
+def test_services_use_batcher():
+    """开启的操作类别经写线程提交，接口结果不变"""
+    client = app.test_client()
+    with app.app_context():
+        recipe = Recipe(name='番茄炒蛋', ingredients_json='[]', steps_json='[]', tags_json='[]')
+        item = ShoppingListItem(ingredient_name='番茄', quantity='2个')
+        db.session.add_all([recipe, item])
+        db.session.commit()
+        recipe_id, item_id = recipe.id, item.id
+
+        operations = write_batcher.operations
+        data = client.put(f'/api/recipes/{recipe_id}/progress',
+                          json={'steps': [{'step_index': 0, 'is_completed': True}]}).get_json()
+        assert data['progress'][0]['is_completed'] is True
+
+        data = client.post(f'/api/shopping-list/{item_id}/purchase').get_json()
+        assert data['item']['is_purchased'] is True
+        assert client.post('/api/shopping-list/99999/purchase').status_code == 404
+        assert write_batcher.operations == operations + 3
+
+        # 未开启的类别在请求会话上直接提交
+        assert not write_batcher.is_enabled('ingredient')
+        print('✅ 服务组提交测试通过')
+
+
+def main():
+    test_concurrent_writes_are_batched()
+    test_failed_operation_is_isolated()
+    test_services_use_batcher()
+
+
+if __name__ == '__main__':
+    main()
@@ -103,10 +103,25 @@ export default function ScanReceipt() {
     }
   }
 
-  async function addLineAsIngredient(line: string) {
+  function parseLine(line: string) {
     const qtyMatch = line.match(/(\d+\s*[一二两kg克斤盒包个杯]+)/) || line.match(/(\d+)/);
     const quantity = qtyMatch ? qtyMatch[0] : '';
     const name = line.replace(/[\d\.\s一二两kg克斤盒包个杯]+/g, '').trim() || line;
+    return { name, quantity };
+  }
+
+  async function addAllLines() {
+    try {
+      const data = await ingredientAPI.bulkAdd(lines.map(l => ({ ...parseLine(l), storage_location: 'pantry' })));
+      alert(`已入库：新增 ${data.created} 项，合并 ${data.merged} 项` + (data.rejected ? `，${data.rejected} 项未导入` : ''));
+    } catch (err) {
+      console.error('批量添加失败', err);
+      alert('批量添加失败，请稍后重试');
+    }
+  }
+
+  async function addLineAsIngredient(line: string) {
+    const { name, quantity } = parseLine(line);
     try {
       await ingredientAPI.add({ name, quantity, storage_location: 'pantry' } as any);
       alert(`已添加：${name} ${quantity}`);
@@ -144,6 +159,9 @@ export default function ScanReceipt() {
           <div className="bg-white p-4 rounded shadow">
             <h3 className="font-bold mb-2">识别文本 {loading && (progress !== null ? `(识别中 ${progress}%)` : '(识别中)')}</h3>
             <div className="mb-3 whitespace-pre-wrap text-sm text-gray-700">{ocrText || '在此显示识别结果'}</div>
+            {lines.length > 1 && (
+              <button onClick={addAllLines} className="mb-3 px-3 py-1 bg-primary text-white rounded">全部入库</button>
+            )}
             <div className="space-y-2">
               {lines.map((l, idx) => (
                 <div key={idx} className="flex items-center justify-between gap-2">
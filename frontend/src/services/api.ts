@@ -45,6 +45,25 @@ export interface RecipeFilters {
   skill?: string;
 }
 
+export interface RecipeQuery extends RecipeFilters {
+  q?: string;
+  tag?: string[];
+  min_minutes?: number;
+  max_minutes?: number;
+  min_kcal?: number;
+  max_kcal?: number;
+  limit?: number;
+  offset?: number;
+}
+
+export interface StepProgress {
+  id?: number;
+  recipe_id?: number;
+  step_index: number;
+  is_completed: boolean;
+  completed_at?: string | null;
+}
+
 // API 方法
 export const recipeAPI = {
   generate: async (ingredients: Ingredient[], filters?: RecipeFilters) => {
@@ -55,6 +74,29 @@ export const recipeAPI = {
     const response = await api.get(`/recipes/history?limit=${limit}`);
     return response.data;
   },
+  search: async (q: string, filters?: RecipeFilters) => {
+    const response = await api.get('/recipes/search', { params: { q, ...filters } });
+    return response.data;
+  },
+  query: async (query: RecipeQuery) => {
+    const response = await api.get('/recipes/query', {
+      params: query,
+      paramsSerializer: { indexes: null },
+    });
+    return response.data;
+  },
+  updateProgress: async (recipeId: number, steps: StepProgress[], reset = false) => {
+    const response = await api.put(`/recipes/${recipeId}/progress`, { steps, reset });
+    return response.data;
+  },
+  // 订阅步骤进度推送（SSE），返回取消订阅函数
+  subscribeProgress: (recipeId: number, onProgress: (progress: StepProgress[]) => void) => {
+    const source = new EventSource(`${API_BASE_URL}/recipes/${recipeId}/progress/stream`);
+    source.addEventListener('progress', (event) => {
+      onProgress(JSON.parse((event as MessageEvent).data).progress);
+    });
+    return () => source.close();
+  },
 };
 
 export const ingredientAPI = {
@@ -66,6 +108,11 @@ export const ingredientAPI = {
     const response = await api.post('/ingredients', ingredient);
     return response.data;
   },
+  // 批量导入（JSON 数组），返回逐行 created / merged / rejected 结果
+  bulkAdd: async (ingredients: Array<Partial<Ingredient> & { storage_location?: string }>) => {
+    const response = await api.post('/ingredients/bulk', ingredients);
+    return response.data;
+  },
   update: async (id: number, data: Partial<Ingredient>) => {
     const response = await api.put(`/ingredients/${id}`, data);
     return response.data;
@@ -96,8 +143,8 @@ export const shoppingListAPI = {
     const response = await api.get('/shopping-list');
     return response.data;
   },
-  generate: async (recipes: Recipe[]) => {
-    const response = await api.post('/shopping-list/generate', { recipes });
+  generate: async (recipeIds: number[]) => {
+    const response = await api.post('/shopping-list/generate', { recipe_ids: recipeIds });
     return response.data;
   },
   add: async (name: string, quantity: string) => {
@@ -112,6 +159,33 @@ export const shoppingListAPI = {
     const response = await api.delete(`/shopping-list/${id}`);
     return response.data;
   },
+  bulkPurchase: async (filter: { ids?: number[]; category?: string }, isPurchased = true) => {
+    const response = await api.post('/shopping-list/bulk/purchase', { ...filter, is_purchased: isPurchased });
+    return response.data;
+  },
+  bulkDelete: async (filter: { ids?: number[]; category?: string; is_purchased?: boolean }) => {
+    const response = await api.post('/shopping-list/bulk/delete', filter);
+    return response.data;
+  },
+  reorder: async (ids: number[]) => {
+    const response = await api.put('/shopping-list/order', { ids });
+    return response.data;
+  },
+  merge: async (ids?: number[]) => {
+    const response = await api.post('/shopping-list/merge', ids ? { ids } : {});
+    return response.data;
+  },
+};
+
+export const substitutionAPI = {
+  get: async (name: string, limit = 5) => {
+    const response = await api.get(`/substitutions/${encodeURIComponent(name)}`, { params: { limit } });
+    return response.data;
+  },
+  getBatch: async (names: string[], limit = 5) => {
+    const response = await api.post('/substitutions/batch', { names, limit });
+    return response.data;
+  },
 };
 
 export default api;